@@ -1,6 +1,10 @@
 import os
 
+import tracing
+from resilience import call_llm
 
+
+@tracing.traced('aem.extract_fields')
 def extract_aem_fields_from_description(description: str, llm) -> dict:
     prompt = f"""
 Extract the following fields from this text and return ONLY a JSON object with these keys:
@@ -19,7 +23,7 @@ Text:
 {description}
 """
     import json, re
-    content = llm.call(prompt)
+    content = call_llm(llm, prompt)
 
     def ensure_keys(d: dict) -> dict:
         for k in [
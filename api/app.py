@@ -1,16 +1,324 @@
-from fastapi import FastAPI
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, JSONResponse, HTMLResponse, FileResponse
+from fastapi.routing import APIRoute
+from werkzeug.http import parse_etags
+
+from a2wsgi import WSGIMiddleware
+
+import deadline
+import json_codec
+import main_api
+import metrics
+import profiling
+import tracing
+from jira_async import AsyncJiraClient
+from splunk_async import AsyncSplunkClient
+from report_cache import accepted_encodings
+from report_engine import build_report_async, fetch_service_paths_async
+from report_render import render_html
+from resilience import BackendUnavailable, health_snapshot
+from singleflight import AsyncSingleFlight
+
+
+class FastJSONResponse(JSONResponse):
+    """Same bytes as the Flask side's jsonify (sorted keys, compact, UTF-8)."""
+
+    def render(self, content) -> bytes:
+        return json_codec.dumps_bytes(content, sort_keys=True)
+
+
+class TimedRoute(APIRoute):
+    """Records the route's latency and in-flight count and runs it in a trace span (with an
+    X-Debug-Timing breakdown on request) and, when asked or sampled, under the profiler;
+    requests that fall through to the mounted Flask app get the same from its own hooks."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            status = 500
+            t0 = time.perf_counter()
+            metrics.HTTP_IN_FLIGHT.inc()
+            profile = None
+            wanted = profiling.requested_mode(
+                request.query_params.get('profile') or request.headers.get(profiling.PROFILE_HEADER),
+                request.headers.get(profiling.TOKEN_HEADER), path)
+            if wanted:
+                profile = profiling.begin(wanted[0], f'{request.method} {path}', forced=wanted[1])
+            try:
+                with tracing.span(f'{request.method} {path}', route=path) as root:
+                    try:
+                        response = await handler(request)
+                        status = response.status_code
+                    finally:
+                        profile_id = profile.stop(status) if profile is not None else ''
+                    if profile is not None and profile.forced and profile_id:
+                        response.headers['X-Profile-Id'] = profile_id
+                    root.set(status=status)
+                    if tracing.debug_requested(request.headers.get(tracing.DEBUG_HEADER)):
+                        response.headers.update(tracing.debug_headers(root))
+                return response
+            except BackendUnavailable:
+                status = 503
+                raise
+            except deadline.DeadlineExceeded:
+                status = 504
+                raise
+            finally:
+                metrics.HTTP_IN_FLIGHT.dec()
+                metrics.HTTP_REQUEST_SECONDS.labels(request.method, path, status).observe(time.perf_counter() - t0)
+
+        return timed_handler
+
+
+async def _json_body(request: Request) -> dict:
+    body = await request.body()
+    if not body:
+        return {}
+    try:
+        data = json_codec.loads(body)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _watch_disconnect(request: Request, d: deadline.Deadline, interval: float = 0.5) -> None:
+    while not d.expired():
+        if await request.is_disconnected():
+            print(f"Client disconnected from {request.url.path}; cancelling upstream work")
+            d.cancel()
+            return
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def _request_deadline(request: Request):
+    """Deadline for the request's upstream calls, cancelled early if the client disconnects.
+
+    Enter after the body has been read: the watcher consumes receive() messages.
+    """
+    d, token = deadline.activate(deadline.request_budget(request.headers.get('x-request-timeout')))
+    watcher = asyncio.create_task(_watch_disconnect(request, d))
+    try:
+        yield d
+    finally:
+        watcher.cancel()
+        deadline.deactivate(token)
+
+
+def _partial_headers() -> dict:
+    return {'X-Partial-Results': 'true'} if deadline.is_partial() else {}
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return parse_etags(request.headers.get('if-none-match')).contains(etag.strip('"'))
+
+
+async def _report_model(request: Request, data: dict):
+    """(model, error_response, headers) like main_api._requested_report_model, built on the async clients.
+
+    While Splunk is unavailable the latest stored snapshot is served instead,
+    named in X-Served-From-Snapshot.
+    """
+    day = (data.get('date') or request.query_params.get('date', '')).strip()
+    if day:
+        model = await asyncio.to_thread(main_api.load_stored_model, day)
+        if model is None:
+            return None, FastJSONResponse({"error": f"No stored report for {day}; POST /report-refresh first"}, status_code=404), {}
+        return model, None, {}
+    state = request.app.state
+    builder = partial(build_report_async, state.splunk, state.jira, concurrency=state.report_concurrency)
+    try:
+        model = await main_api.REPORT_ENGINE.aget(
+            data.get('earliest') or '-1d', data.get('latest') or 'now', data.get('aem_services'), builder=builder
+        )
+    except BackendUnavailable as e:
+        day, model = await asyncio.to_thread(main_api.latest_stored_model)
+        if model is None:
+            raise
+        print(f"{e}; serving stored snapshot {day}")
+        return model, None, {'X-Served-From-Snapshot': day}
+    return model, None, {}
+
+
+async def _backend_unavailable(request: Request, e: BackendUnavailable):
+    return FastJSONResponse(
+        {"error": str(e), "backend": e.backend, "reason": e.reason},
+        status_code=503,
+        headers={'Retry-After': str(max(1, int(e.retry_after + 0.999)))},
+    )
+
+
+async def _deadline_exceeded(request: Request, e: deadline.DeadlineExceeded):
+    return FastJSONResponse({"error": str(e)}, status_code=504)
+
+
+def _dashboard_file(request: Request, html_path: str, gz_path: str) -> Response:
+    use_gz = 'gzip' in accepted_encodings(request.headers.get('accept-encoding')) and os.path.exists(gz_path)
+    path = gz_path if use_gz else html_path
+    resp = FileResponse(path, media_type='text/html', stat_result=os.stat(path))
+    etag = resp.headers.get('etag', '')
+    if etag and _not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag, 'Vary': 'Accept-Encoding'})
+    if use_gz:
+        resp.headers['Content-Encoding'] = 'gzip'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+
+def create_app(splunk_client: AsyncSplunkClient | None = None, jira_client: AsyncJiraClient | None = None):
+    """ASGI app: report, Jira and Splunk endpoints run async here; every other route is main_api's Flask app.
+
+    Clients default to ones created (and closed) by the lifespan, one pooled
+    httpx client per worker process.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Stores, PDF workers and scheduler start per worker process, not on import
+        main_api.startup()
+        owned = []
+        if splunk_client is None:
+            app.state.splunk = AsyncSplunkClient(max_connections=int(os.getenv('SPLUNK_MAX_CONNECTIONS', '20')))
+            owned.append(app.state.splunk)
+        if jira_client is None:
+            app.state.jira = AsyncJiraClient(max_connections=int(os.getenv('JIRA_MAX_CONNECTIONS', '10')))
+            owned.append(app.state.jira)
+        try:
+            yield
+        finally:
+            for client in owned:
+                await client.aclose()
+            main_api.shutdown()
 
-def create_app():
     app = FastAPI(
         title="Splunk Agent API",
         description="Standalone or orchestrated Splunk agent.",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
     )
+    app.router.route_class = TimedRoute
+    app.state.splunk = splunk_client
+    app.state.jira = jira_client
+    app.state.report_concurrency = int(os.getenv('REPORT_SERVICE_CONCURRENCY', '4'))
+    flights = AsyncSingleFlight(grace_seconds=float(os.getenv('COALESCE_GRACE_SECONDS', '30')))
+
+    app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024')))
+    app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+
+    app.add_exception_handler(BackendUnavailable, _backend_unavailable)
+    app.add_exception_handler(deadline.DeadlineExceeded, _deadline_exceeded)
 
     @app.get("/health")
     async def health():
-        return {"status": "ok"}
+        """Backend breaker states and bulkhead queue depths; status is "degraded" while any breaker
+        is not closed or any backend has queued calls."""
+        return FastJSONResponse(health_snapshot())
+
+    @app.post("/find-skysi")
+    async def find_skysi(request: Request):
+        data = await _json_body(request)
+        aem_service = data.get('aem_service', '')
+        if not aem_service:
+            return FastJSONResponse({"error": "Missing aem_service"}, status_code=400)
+        earliest = data.get('earliest') or '-1d'
+        latest = data.get('latest') or 'now'
+
+        async def build():
+            result, paths = await asyncio.gather(
+                request.app.state.jira.search_skysi_by_aem_service(aem_service),
+                fetch_service_paths_async(request.app.state.splunk, aem_service, earliest, latest),
+            )
+            return main_api.with_partial_flag(main_api.skysi_payload(result, aem_service, earliest, latest, paths))
+
+        key = ('find-skysi', aem_service.strip().lower(), earliest.strip(), latest.strip())
+        async with _request_deadline(request):
+            try:
+                payload, shared = await flights.do(key, build)
+            except BackendUnavailable:
+                payload = await asyncio.to_thread(main_api.snapshot_skysi_payload, aem_service, earliest, latest)
+                if payload is None:
+                    raise
+                return FastJSONResponse(payload, headers={'X-Served-From-Snapshot': payload['stale_snapshot']})
+            if shared:
+                print(f"Coalesced /find-skysi for {aem_service}")
+            return FastJSONResponse(payload, headers=_partial_headers())
+
+    @app.post("/process")
+    async def process(request: Request):
+        """Jira → AEM fields → Splunk for one ticket; the blocking pipeline runs in a worker thread
+        under this request's deadline, so a disconnect cancels its outstanding Splunk job."""
+        data = await _json_body(request)
+        async with _request_deadline(request):
+            payload, status = await asyncio.to_thread(main_api.process_request, data)
+            return FastJSONResponse(payload, status_code=status, headers=_partial_headers())
+
+    @app.api_route("/report", methods=["GET", "POST"])
+    async def report(request: Request):
+        """PDF report for a window (JSON body) or a stored day (?date=YYYY-MM-DD)."""
+        data = await _json_body(request)
+        async with _request_deadline(request):
+            model, error, headers = await _report_model(request, data)
+            if error:
+                return error
+            pdf, etag = await asyncio.to_thread(main_api.PDF_RENDERER.render, model)
+            if _not_modified(request, etag):
+                return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+            return Response(pdf, media_type='application/pdf', headers={
+                'Content-Disposition': 'attachment; filename="daily-forms-errors.pdf"',
+                'ETag': f'"{etag}"',
+                **headers,
+                **_partial_headers(),
+            })
+
+    @app.api_route("/report-dashboard", methods=["GET", "POST"])
+    async def report_dashboard(request: Request):
+        """HTML dashboard version of /report."""
+        data = await _json_body(request)
+        day = (data.get('date') or request.query_params.get('date', '')).strip()
+        if day:
+            html_path, gz_path = main_api.dashboard_html_paths(day)
+            if os.path.exists(html_path):
+                return _dashboard_file(request, html_path, gz_path)
+        async with _request_deadline(request):
+            model, error, headers = await _report_model(request, data)
+            if error:
+                return error
+            html = await asyncio.to_thread(render_html, model, 3)
+            return HTMLResponse(html, headers={**headers, **_partial_headers()})
+
+    @app.get("/skyops-last7")
+    async def skyops_last7(request: Request):
+        args = request.query_params
+        jql = main_api.skyops_jql(**main_api.skyops_args(args))
+        async with _request_deadline(request):
+            result = await request.app.state.jira.search(jql, extra_params=dict(main_api.ISSUE_LIST_PARAMS)) or {}
+            issues_out = main_api.sort_issue_rows(
+                main_api.issue_rows(result),
+                (args.get('sort') or '').strip().lower(),
+                (args.get('order') or 'asc').strip().lower(),
+            )
+            return FastJSONResponse(main_api.with_partial_flag({'count': len(issues_out), 'issues': issues_out, 'jql': jql}),
+                                    headers=_partial_headers())
+
+    @app.get("/csopm-open")
+    async def csopm_open(request: Request):
+        async with _request_deadline(request):
+            result = await request.app.state.jira.search(main_api.CSOPM_JQL, extra_params=dict(main_api.ISSUE_LIST_PARAMS)) or {}
+            issues_out = main_api.issue_rows(result)
+            return FastJSONResponse(main_api.with_partial_flag({'count': len(issues_out), 'issues': issues_out, 'jql': main_api.CSOPM_JQL}),
+                                    headers=_partial_headers())
 
-    # Add your other endpoints here
+    # Everything else (jobs, cached report views, daily stats) stays on Flask
+    app.mount("/", WSGIMiddleware(main_api.app))
 
-    return app
\ No newline at end of file
+    return app
@@ -0,0 +1,92 @@
+"""Encode time and bytes on the wire for a typical /report-week payload.
+
+Usage: python benchmarks/bench_json_encoding.py [--messages 300] [--repeat 20]
+
+Builds seven synthetic daily reports, merges them with the weekly rollup code
+(the same path /report-week uses) and compares the stdlib encoder as Flask's
+default provider called it against compact stdlib and orjson output, then the
+gzip and brotli sizes of the body.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bench_pdf_render import synthetic_model  # noqa: E402
+from report_rollups import empty_rollup, merge_daily, period_for, render_rollup  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def week_payload(messages_per_day: int) -> dict:
+    key, start, end = period_for('week', '2026-10-16')
+    state = empty_rollup('week', key, start, end)
+    for i in range(7):
+        day = f"2026-10-{10 + i:02d}"
+        report = synthetic_model(messages_per_day).to_dict()
+        # Vary services per day so the merge produces a realistic spread
+        for it in report['report_items']:
+            it['aem_service'] = f"{it['aem_service']}-{i % 3}"
+        for r in report['svc_rows']:
+            r['aem_service'] = f"{r['aem_service']}-{i % 3}"
+        merge_daily(state, day, report)
+    return render_rollup(state)
+
+
+def best_of(fn, repeat: int) -> tuple[float, bytes]:
+    best, out = None, b''
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300, help='messages per daily report')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = week_payload(args.messages)
+    encoders = [
+        ('stdlib (flask default)', lambda: json.dumps(payload, sort_keys=True, ensure_ascii=True).encode('utf-8')),
+        ('stdlib compact', lambda: json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')),
+    ]
+    if orjson is not None:
+        encoders.append(('orjson', lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)))
+    else:
+        print("orjson not installed; skipping")
+
+    print(f"/report-week payload: {len(payload.get('report_items') or [])} services, {args.messages} messages/day x 7 days\n")
+    print(f"{'encoder':<24} {'encode (ms)':>11} {'raw (KB)':>9} {'gzip (KB)':>10} {'gzip (ms)':>10} {'br (KB)':>8} {'br (ms)':>8}")
+    for name, fn in encoders:
+        seconds, body = best_of(fn, args.repeat)
+        gz_s, gz = best_of(lambda: gzip.compress(body, compresslevel=6, mtime=0), max(1, args.repeat // 4))
+        line = f"{name:<24} {seconds * 1000:>11.2f} {len(body) / 1024:>9.1f} {len(gz) / 1024:>10.1f} {gz_s * 1000:>10.2f}"
+        if brotli is not None:
+            br_s, br = best_of(lambda: brotli.compress(body, quality=5), max(1, args.repeat // 4))
+            line += f" {len(br) / 1024:>8.1f} {br_s * 1000:>8.2f}"
+        else:
+            line += f" {'-':>8} {'-':>8}"
+        print(line)
+    if brotli is None:
+        print("\nbrotli not installed; br columns skipped")
+
+
+if __name__ == '__main__':
+    main()
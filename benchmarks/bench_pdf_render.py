@@ -0,0 +1,82 @@
+"""Compare /report PDF rendering: Table-per-line code blocks vs the CodeBlock flowable.
+
+Usage: python benchmarks/bench_pdf_render.py [--sizes 10,100,1000] [--repeat 3]
+
+Builds a synthetic report with the given number of messages (10 per path,
+20-line stack traces with a few unbroken long tokens) and reports wall time,
+tracemalloc peak and output size for each renderer.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_engine import ReportModel, ReportItem, ServiceRow, PathEntry, MessageEntry  # noqa: E402
+from report_render import render_pdf  # noqa: E402
+
+
+def synthetic_model(messages: int) -> ReportModel:
+    frames = [f"\tat com.adobe.forms.submit.Handler{i}.process(Handler{i}.java:{100 + i})" for i in range(18)]
+    token = 'x' * 260  # long unbroken token (serialized payloads, base64) that forces hard wrapping
+    items, rows = [], []
+    n_paths = max(1, messages // 10)
+    per_service = 5
+    for s in range(0, n_paths, per_service):
+        svc = f"cm-p{1000 + s}-e{s % 7}"
+        paths = []
+        for p in range(s, min(s + per_service, n_paths)):
+            count = min(10, messages - p * 10)
+            msgs = [
+                MessageEntry(
+                    msg=f"com.adobe.forms.SubmitException: submit failed ({p}/{m}) {token}\n" + "\n".join(frames),
+                    time=f"2026-10-18 10:{p % 60:02d}:{m:02d}",
+                )
+                for m in range(count)
+            ]
+            paths.append(PathEntry(path=f"/content/forms/af/form-{p}/jcr:content/guideContainer.af.submit.jsp",
+                                   times=[f"2026-10-18 10:{p % 60:02d}:{m:02d}" for m in range(count)], messages=msgs))
+        errs = sum(len(pe.messages) for pe in paths)
+        rows.append(ServiceRow(aem_service=svc, program_name=f"Program {s}", error_count=errs))
+        items.append(ReportItem(aem_service=svc, error_count=errs, total_form_submissions=errs * 20,
+                                program_name=f"Program {s}", paths=paths))
+    return ReportModel(earliest='-1d', latest='now', generated_at='2026-10-18T12:00:00Z',
+                       services=[r.aem_service for r in rows], svc_rows=rows, report_items=items)
+
+
+def measure(model: ReportModel, table_code_blocks: bool, repeat: int) -> dict:
+    best, peak, size = None, 0, 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        pdf = render_pdf(model, table_code_blocks=table_code_blocks)
+        elapsed = time.perf_counter() - t0
+        _cur, p = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, p)
+        size = len(pdf)
+    return {"seconds": best, "peak_mb": peak / (1024 * 1024), "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8}  {'renderer':<10} {'time (s)':>9} {'peak (MB)':>10} {'pdf (KB)':>9}")
+    for n in [int(x) for x in args.sizes.split(',') if x.strip()]:
+        model = synthetic_model(n)
+        results = {}
+        for name, table in (('table', True), ('codeblock', False)):
+            r = results[name] = measure(model, table, args.repeat)
+            print(f"{n:>8}  {name:<10} {r['seconds']:>9.3f} {r['peak_mb']:>10.1f} {r['bytes'] / 1024:>9.0f}")
+        speedup = results['table']['seconds'] / max(results['codeblock']['seconds'], 1e-9)
+        print(f"{'':>8}  speedup {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""Benchmark the report hot paths on synthetic data and compare against a stored baseline.
+
+Usage: python benchmarks/bench_report_pipeline.py [--sizes 200,1000,5000] [--repeat 3]
+                                                  [--only build_report,render_html] [--save-baseline]
+
+Cases, each over growing synthetic inputs (synthetic.py, fixed seed):
+  build_report      build_report_data for the last day, against the local Splunk/Jira stand-ins
+  map_messages      window-to-path mapping (map_messages_to_paths); size = failure windows
+  rollup_merge      /report-week and /report-month: rebuild a rollup from 7 / 30 daily snapshots and render it
+  aggregate_range   /report-range under a month: SQL aggregation over 7 / 30 daily snapshots
+  render_html       dashboard HTML (render_html) for the day's report
+  render_pdf        /report PDF (render_pdf, in-process) for the day's report
+  daily_stats       /daily-stats: open the daily counts store and read the range; size = days stored
+
+Reports median and best wall time, tracemalloc peak (from a separate run)
+and upstream calls made. With a baseline (default
+benchmarks/baseline_report_pipeline.json, written by --save-baseline) a
+case regresses when its time or peak memory grows beyond the tolerance or
+it makes more upstream calls; the exit status is then 1. Times are only
+comparable on the machine the baseline was saved on.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_TMP = tempfile.mkdtemp(prefix='bench-report-')
+# Keep the query log and traces of thousands of searches out of the working tree
+os.environ.setdefault('SPLUNK_QUERY_LOG_PATH', os.path.join(_TMP, 'splunk_query_log.jsonl'))
+os.environ.setdefault('TRACE_EXPORT_PATH', '')
+
+from synthetic import SyntheticAemLogs, SyntheticConfig, SPLUNK_TIME, DAY, fmt_time  # noqa: E402
+from standins import StandInServer, client_env  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_report_pipeline.json')
+SEED = 49
+# Fixed "now" (a Saturday 00:00 UTC) so every run sees the same data and week boundaries
+NOW = 1760745600.0
+CASES = ('build_report', 'map_messages', 'rollup_merge', 'aggregate_range', 'render_html', 'render_pdf', 'daily_stats')
+
+
+def logs_for(tenants: int, days: int = 1) -> SyntheticAemLogs:
+    return SyntheticAemLogs(SyntheticConfig(tenants=tenants, days=days, seed=SEED, now=NOW))
+
+
+def report_for_window(logs: SyntheticAemLogs, lo: float, hi: float):
+    """build_report's model for [lo, hi], from the synthetic rows through the real SPL builders and parsers."""
+    from splunk_tool import (services_with_errors_query, parse_services_with_errors, services_total_submissions_query,
+                             parse_services_total_submissions, latest_failures_by_path_query, parse_latest_failures_by_path,
+                             error_messages_query)
+    from report_engine import ReportModel, ReportItem, ServiceRow, map_messages_to_paths
+    earliest, latest = fmt_time(lo, SPLUNK_TIME), fmt_time(hi, SPLUNK_TIME)
+    rows = parse_services_with_errors(logs.search(services_with_errors_query(earliest, latest)))
+    totals = parse_services_total_submissions(logs.search(services_total_submissions_query(earliest, latest)))
+    svc_rows, items = [], []
+    for r in rows:
+        svc = r['aem_service']
+        svc_rows.append(ServiceRow(aem_service=svc, program_name=r['program_name'], error_count=r['error_count']))
+        failures = parse_latest_failures_by_path(logs.search(latest_failures_by_path_query(svc, 'prod', 'publish', earliest, latest)))
+        messages = logs.search(error_messages_query(svc, earliest, latest))
+        items.append(ReportItem(aem_service=svc, error_count=r['error_count'], total_form_submissions=totals.get(svc, 0),
+                                program_name=r['program_name'], paths=map_messages_to_paths(failures, messages)))
+    return ReportModel(earliest=earliest, latest=latest, generated_at=fmt_time(hi, '%Y-%m-%dT%H:%M:%SZ'),
+                       services=[r.aem_service for r in svc_rows], svc_rows=svc_rows, report_items=items)
+
+
+class Case:
+    """One benchmark: setup() builds the inputs once, run() is what gets timed."""
+
+    def __init__(self, name: str, size, setup, run, calls=None, teardown=None):
+        self.name = name
+        self.size = size
+        self.setup = setup
+        self.run = run
+        self.calls = calls  # () -> upstream calls so far, for cases that go upstream
+        self.teardown = teardown or (lambda: None)
+
+    @property
+    def case_id(self) -> str:
+        return f'{self.name}[{self.size}]'
+
+
+def build_report_case(tenants: int) -> Case:
+    state = {}
+
+    def setup():
+        splunk, jira = logs_for(tenants).standins()
+        state['servers'] = [StandInServer(splunk).start(), StandInServer(jira).start()]
+        state['standins'] = (splunk, jira)
+        os.environ.update(client_env(state['servers'][0].url, state['servers'][1].url))
+        import report_engine
+        state['build'] = report_engine.build_report_data
+
+    def run():
+        # Relative to the stand-in's fixed now, like the refresh job's -1d..now
+        return state['build']('-1d', 'now')
+
+    def calls():
+        return sum(sum(s.calls.values()) for s in state['standins'])
+
+    def teardown():
+        for server in state['servers']:
+            server.stop()
+
+    return Case('build_report', tenants, setup, run, calls, teardown)
+
+
+def map_messages_case(windows: int) -> Case:
+    state = {}
+
+    def setup():
+        rng = random.Random(windows)
+        failures, rows = {}, []
+        base = NOW - DAY
+        for w in range(windows):
+            ts = base + rng.uniform(0, DAY)
+            failures.setdefault(f'/content/forms/af/form-{w // 10}/jcr:content/guideContainer.af.submit.jsp', []).append(fmt_time(ts))
+            # Two error rows per window: one inside it, one that matches nothing
+            rows.append({'EventTimeFmt': fmt_time(ts + rng.uniform(0, 9)), 'msg': f'error {w % 50}'})
+            rows.append({'EventTimeFmt': fmt_time(base - rng.uniform(20, DAY)), 'msg': f'noise {w % 50}'})
+        state['args'] = (failures, rows)
+
+    def run():
+        from report_engine import map_messages_to_paths
+        return map_messages_to_paths(*state['args'])
+
+    return Case('map_messages', windows, setup, run)
+
+
+def _seeded_store(tenants: int, days: int):
+    from report_store import ReportStore
+    logs = logs_for(tenants, days)
+    store = ReportStore(os.path.join(tempfile.mkdtemp(dir=_TMP), 'reports.db'))
+    dates = []
+    for d in range(days, 0, -1):
+        lo = NOW - d * DAY
+        day = fmt_time(lo, '%Y-%m-%d')
+        store.save_report(day, report_for_window(logs, lo, lo + DAY).to_dict())
+        dates.append(day)
+    return store, dates
+
+
+def rollup_case(tenants: int, days: int) -> Case:
+    state = {}
+
+    def setup():
+        state['store'], state['dates'] = _seeded_store(tenants, days)
+
+    def run():
+        from report_rollups import rebuild_rollup, render_rollup
+        dates = state['dates']
+        return render_rollup(rebuild_rollup(state['store'], 'range', f'{dates[0]}..{dates[-1]}', dates[0], dates[-1]))
+
+    return Case('rollup_merge', f'{days}d x {tenants}', setup, run)
+
+
+def aggregate_case(tenants: int, days: int) -> Case:
+    state = {}
+
+    def setup():
+        state['store'], state['dates'] = _seeded_store(tenants, days)
+
+    def run():
+        return state['store'].aggregate_range(state['dates'][0], state['dates'][-1])
+
+    return Case('aggregate_range', f'{days}d x {tenants}', setup, run)
+
+
+def render_case(name: str, tenants: int) -> Case:
+    state = {}
+
+    def setup():
+        state['model'] = report_for_window(logs_for(tenants), NOW - DAY, NOW)
+
+    def run():
+        from report_render import render_html, render_pdf
+        if name == 'render_html':
+            return render_html(state['model'], 3)
+        return render_pdf(state['model'], 3)
+
+    return Case(name, tenants, setup, run)
+
+
+def daily_stats_case(days: int) -> Case:
+    state = {}
+
+    def setup():
+        from daily_counts_store import DailyCountsStore
+        path = os.path.join(tempfile.mkdtemp(dir=_TMP), 'daily_counts.bin')
+        rng = random.Random(days)
+        rows = []
+        for d in range(days, 0, -1):
+            total = rng.randint(200000, 600000)
+            failed = rng.randint(0, total // 100)
+            rows.append({'day': fmt_time(NOW - d * DAY, '%Y-%m-%d'), 'total': total, 'passed': total - failed, 'failed': failed})
+        DailyCountsStore(path).append(rows)
+        state['path'] = path
+
+    def run():
+        # A worker's first /daily-stats: open the store, read every stored day
+        from daily_counts_store import DailyCountsStore
+        stats = DailyCountsStore(state['path']).range()
+        return {"days": len(stats), "stats": stats}
+
+    return Case('daily_stats', days, setup, run)
+
+
+def cases(sizes: list[int], pdf_max: int) -> list[Case]:
+    out = []
+    for n in sizes:
+        out.append(build_report_case(n))
+    for n in sizes:
+        out.append(map_messages_case(n))
+    for days in (7, 30):
+        for n in sizes:
+            out.append(rollup_case(n, days))
+            out.append(aggregate_case(n, days))
+    for n in sizes:
+        out.append(render_case('render_html', n))
+    for n in (s for s in sizes if s <= pdf_max):
+        out.append(render_case('render_pdf', n))
+    for n in sizes:
+        out.append(daily_stats_case(n))
+    return out
+
+
+def measure(case: Case, repeat: int) -> dict:
+    times, calls = [], 0
+    # The report builder prints its service list; keep that out of the table
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        case.run()  # warm-up: first-call imports and caches stay out of the timings
+        for _ in range(repeat):
+            before = case.calls() if case.calls else 0
+            t0 = time.perf_counter()
+            case.run()
+            times.append(time.perf_counter() - t0)
+            if case.calls:
+                calls = case.calls() - before
+        tracemalloc.start()
+        case.run()
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": round(median(times), 6), "best_seconds": round(min(times), 6),
+            "peak_kib": round(peak / 1024, 1), "upstream_calls": calls}
+
+
+def regressions(result: dict, base: dict | None, time_tolerance: float, memory_tolerance: float) -> list[str]:
+    if not base:
+        return []
+    out = []
+    # Sub-10ms cases are noise-dominated; only flag them past an absolute floor as well
+    if result["seconds"] > base["seconds"] * (1 + time_tolerance) and result["seconds"] - base["seconds"] > 0.01:
+        out.append(f'time {base["seconds"]:.4f}s -> {result["seconds"]:.4f}s')
+    if result["peak_kib"] > base["peak_kib"] * (1 + memory_tolerance) and result["peak_kib"] - base["peak_kib"] > 256:
+        out.append(f'peak {base["peak_kib"]:.0f}KiB -> {result["peak_kib"]:.0f}KiB')
+    if result["upstream_calls"] > base["upstream_calls"]:
+        out.append(f'upstream calls {base["upstream_calls"]} -> {result["upstream_calls"]}')
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='200,1000,5000', help='tenants (windows for map_messages, days for daily_stats)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='', help=f'comma-separated subset of: {", ".join(CASES)}')
+    parser.add_argument('--pdf-max', type=int, default=1000, help='largest size rendered to PDF')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the baseline instead of comparing')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='allowed relative slowdown (0.5 = +50%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(',') if x.strip()]
+    only = {x.strip() for x in args.only.split(',') if x.strip()}
+    unknown = only - set(CASES)
+    if unknown:
+        parser.error(f'unknown case(s): {", ".join(sorted(unknown))}')
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('cases', {})
+
+    results, failed = {}, []
+    print(f"{'case':<34} {'median (s)':>10} {'best (s)':>9} {'peak (MB)':>10} {'upstream':>9}  vs baseline")
+    for case in cases(sizes, args.pdf_max):
+        if only and case.name not in only:
+            continue
+        case.setup()
+        try:
+            r = results[case.case_id] = measure(case, args.repeat)
+        finally:
+            case.teardown()
+        base = baseline.get(case.case_id)
+        problems = regressions(r, base, args.time_tolerance, args.memory_tolerance)
+        if problems:
+            failed.append((case.case_id, problems))
+        verdict = 'REGRESSED: ' + '; '.join(problems) if problems else (
+            f'{r["seconds"] / base["seconds"]:.2f}x' if base and base["seconds"] else '-')
+        print(f"{case.case_id:<34} {r['seconds']:>10.4f} {r['best_seconds']:>9.4f} {r['peak_kib'] / 1024:>10.1f} "
+              f"{r['upstream_calls']:>9}  {verdict}")
+        sys.stdout.flush()
+
+    if args.save_baseline:
+        existing = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                existing = json.load(f).get('cases', {})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version.split()[0], "saved_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                       "repeat": args.repeat, "cases": {**existing, **results}}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+    elif failed:
+        print(f'{len(failed)} case(s) regressed against {args.baseline}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
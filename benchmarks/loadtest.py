@@ -0,0 +1,376 @@
+"""Replay dashboard traffic against the API and check latency/error SLOs.
+
+Usage: python benchmarks/loadtest.py [--users 20] [--duration 60] [--workers 2] [--tenants 2000]
+                                     [--env REPORT_ENGINE_TTL=60] [--slo 'GET /report-data:p95<=0.5']
+       python benchmarks/loadtest.py --target http://host:8000 ...   (an API that is already running)
+
+Without --target the harness starts the local Splunk/Jira stand-ins on
+synthetic data (standins.py --synthetic-tenants) and the API under uvicorn
+with --workers processes, isolated in a temp dir, seeds today's report and
+the daily counts through /report-refresh and /daily-stats-refresh, then runs
+the load. --env passes settings to the API (cache TTLs, pool sizes, ...) so
+worker counts and cache settings can be compared before a peak period.
+
+Each virtual user loops over sessions, with exponential think time between them:
+  dashboard  what Dashboard.js/DailyGraph.js fire in parallel on load: /report-data?fields=summary,
+             /report-dates, /csopm-open, /daily-stats; then, for --drilldown-fraction of sessions,
+             /report-data/service/<svc> for one service
+  lookup     App.js: POST /find-skysi for a failing service; for --process-fraction of lookups
+             POST /process with the first SKYSI key (off by default: App.js stops after
+             /find-skysi and /process needs the LLM)
+
+Reports count, errors, p50/p95/p99/max latency and throughput per endpoint.
+SLOs are ENDPOINT:METRIC<=VALUE or >=VALUE, ENDPOINT an endpoint label as
+printed or * for every endpoint, METRIC one of p50, p95, p99, max,
+error_rate, rps. Any --slo replaces the defaults. A breach exits with 1.
+"""
+import os
+import re
+import sys
+import math
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SLOS = (
+    '*:error_rate<=0.01',
+    'GET /report-data:p95<=0.5',
+    'GET /report-dates:p95<=0.2',
+    'GET /daily-stats:p95<=0.3',
+    'GET /csopm-open:p95<=1.0',
+    'GET /report-data/service/{svc}:p95<=0.5',
+    'POST /find-skysi:p95<=2.0',
+)
+METRICS = ('p50', 'p95', 'p99', 'max', 'error_rate', 'rps')
+_SLO = re.compile(r'^(.+):(\w+)\s*(<=|>=)\s*([0-9.]+)$')
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values), math.ceil(pct / 100.0 * len(values))) - 1)]
+
+
+class Recorder:
+    """Latency samples and errors per endpoint label, shared by every virtual user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict] = defaultdict(lambda: defaultdict(int))
+
+    def request(self, client: httpx.Client, label: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        t0 = time.perf_counter()
+        try:
+            resp = client.request(method, url, **kwargs)
+            status = resp.status_code
+        except Exception as e:
+            resp, status = None, type(e).__name__
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.samples[label].append(elapsed)
+            self.statuses[label][status] += 1
+            if resp is None or resp.status_code >= 400:
+                self.errors[label] += 1
+        return resp
+
+    def summary(self, seconds: float) -> dict:
+        out = {}
+        with self._lock:
+            for label, samples in sorted(self.samples.items()):
+                s = sorted(samples)
+                out[label] = {
+                    "count": len(s),
+                    "errors": self.errors[label],
+                    "error_rate": round(self.errors[label] / len(s), 4),
+                    "p50": round(percentile(s, 50), 4),
+                    "p95": round(percentile(s, 95), 4),
+                    "p99": round(percentile(s, 99), 4),
+                    "max": round(s[-1], 4),
+                    "rps": round(len(s) / seconds, 2) if seconds else 0.0,
+                    "statuses": {str(k): v for k, v in self.statuses[label].items()},
+                }
+        return out
+
+
+def parse_slo(spec: str) -> tuple[str, str, str, float]:
+    m = _SLO.match(spec.strip())
+    if not m or m.group(2) not in METRICS:
+        raise ValueError(f'bad SLO {spec!r}: expected ENDPOINT:METRIC<=VALUE with METRIC one of {", ".join(METRICS)}')
+    return m.group(1).strip(), m.group(2), m.group(3), float(m.group(4))
+
+
+def breaches(summary: dict, slos: list[tuple[str, str, str, float]]) -> list[str]:
+    out = []
+    for endpoint, metric, op, limit in slos:
+        labels = list(summary) if endpoint == '*' else [endpoint]
+        for label in labels:
+            stats = summary.get(label)
+            if stats is None:
+                # An SLO on an endpoint that saw no traffic is a misconfigured run, not a pass
+                if endpoint != '*':
+                    out.append(f'{label}: no requests recorded for {metric}{op}{limit:g}')
+                continue
+            value = stats[metric]
+            if (op == '<=' and value > limit) or (op == '>=' and value < limit):
+                out.append(f'{label}: {metric}={value:g} (SLO {op}{limit:g})')
+    return out
+
+
+class Traffic:
+    """The dashboard and lookup sessions, as the frontend issues them."""
+
+    def __init__(self, base_url: str, recorder: Recorder, services: list[str], args):
+        self.base_url = base_url.rstrip('/')
+        self.rec = recorder
+        self.services = services
+        self.args = args
+        # Browsers fan the dashboard calls out in parallel; so do we
+        self.fanout = ThreadPoolExecutor(max_workers=max(4, args.users * 4), thread_name_prefix='loadtest-fanout')
+
+    def dashboard(self, client: httpx.Client, rng: random.Random) -> None:
+        calls = [
+            ('GET /report-data', '/report-data', {'fields': 'summary'}),
+            ('GET /report-dates', '/report-dates', None),
+            ('GET /csopm-open', '/csopm-open', None),
+            ('GET /daily-stats', '/daily-stats', None),
+        ]
+        wait([self.fanout.submit(self.rec.request, client, label, 'GET', self.base_url + path, params=params)
+              for label, path, params in calls])
+        if self.services and rng.random() < self.args.drilldown_fraction:
+            svc = rng.choice(self.services)
+            self.rec.request(client, 'GET /report-data/service/{svc}', 'GET',
+                             f'{self.base_url}/report-data/service/{quote(svc, safe="")}')
+
+    def lookup(self, client: httpx.Client, rng: random.Random) -> None:
+        if not self.services:
+            return
+        svc = rng.choice(self.services)
+        resp = self.rec.request(client, 'POST /find-skysi', 'POST', self.base_url + '/find-skysi',
+                                json={'aem_service': svc})
+        if resp is None or resp.status_code != 200 or rng.random() >= self.args.process_fraction:
+            return
+        try:
+            found = resp.json()
+            issues = (found.get('skysi') or {}).get('issues') or found.get('issues') or []
+        except Exception:
+            return
+        if issues:
+            self.rec.request(client, 'POST /process', 'POST', self.base_url + '/process',
+                             json={'jira_id': issues[0].get('key'), 'earliest': '-1d', 'latest': 'now'})
+
+    def user(self, index: int, start_at: float, stop_at: float) -> None:
+        rng = random.Random(f'{self.args.seed}:{index}')
+        time.sleep(max(0.0, start_at - time.time()))
+        with httpx.Client(timeout=self.args.timeout, headers={'Accept-Encoding': 'gzip'}) as client:
+            while time.time() < stop_at:
+                if rng.random() < self.args.lookup_fraction:
+                    self.lookup(client, rng)
+                else:
+                    self.dashboard(client, rng)
+                if self.args.think > 0:
+                    time.sleep(min(rng.expovariate(1.0 / self.args.think), max(0.0, stop_at - time.time())))
+
+    def run(self) -> float:
+        """Run every user for the configured duration (users start spread over --ramp); return elapsed seconds."""
+        t0 = time.time()
+        stop_at = t0 + self.args.ramp + self.args.duration
+        threads = [threading.Thread(target=self.user, name=f'loadtest-user-{i}', daemon=True,
+                                    args=(i, t0 + self.args.ramp * i / max(1, self.args.users), stop_at))
+                   for i in range(self.args.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.fanout.shutdown()
+        return time.time() - t0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(base_url: str, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'API exited with status {proc.returncode} during startup')
+        try:
+            if httpx.get(base_url + '/health', timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'API not healthy after {timeout:g}s')
+
+
+class LocalStack:
+    """Stand-ins on synthetic data plus the API under uvicorn, all in a temp dir."""
+
+    def __init__(self, args):
+        self.args = args
+        self.procs: list[subprocess.Popen] = []
+        self.tmp = tempfile.mkdtemp(prefix='loadtest-')
+        self.base_url = ''
+
+    def start(self) -> 'LocalStack':
+        a = self.args
+        standins = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'standins.py'), '--synthetic-tenants', str(a.tenants),
+             '--synthetic-days', str(a.days), '--splunk-port', str(_free_port()), '--jira-port', str(_free_port()),
+             '--latency', str(a.upstream_latency), '--jitter', str(a.upstream_jitter),
+             '--job-seconds', str(a.job_seconds), '--seed', str(a.seed)],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        self.procs.append(standins)
+        env = dict(os.environ)
+        # standins.py prints the client settings once both servers listen
+        while True:
+            line = standins.stdout.readline()
+            if not line:
+                raise RuntimeError(f'stand-ins exited with status {standins.wait()}')
+            if line.startswith('export '):
+                key, _, value = line[len('export '):].strip().partition('=')
+                env[key] = value
+                if key == 'JIRA_API_TOKEN':
+                    break
+        env.update({
+            'REPORT_CACHE_PATH': os.path.join(self.tmp, 'report_cache.json'),
+            'REPORT_DB_PATH': os.path.join(self.tmp, 'report_store.sqlite3'),
+            'DAILY_COUNTS_PATH': os.path.join(self.tmp, 'daily_counts.bin'),
+            'SPLUNK_QUERY_LOG_PATH': os.path.join(self.tmp, 'splunk_query_log.jsonl'),
+            'TRACE_EXPORT_PATH': os.path.join(self.tmp, 'traces.jsonl'),
+            'PROFILE_DIR': os.path.join(self.tmp, 'profiles'),
+            'REFRESH_SCHEDULER_ENABLED': 'false',
+        })
+        for item in a.env:
+            key, _, value = item.partition('=')
+            env[key] = value
+        port = _free_port()
+        api = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'api.app:create_app', '--factory', '--host', '127.0.0.1',
+             '--port', str(port), '--workers', str(a.workers), '--log-level', 'warning'],
+            cwd=ROOT, env=env)
+        self.procs.append(api)
+        self.base_url = f'http://127.0.0.1:{port}'
+        _wait_healthy(self.base_url, api, a.startup_timeout)
+        self.seed()
+        return self
+
+    def seed(self) -> None:
+        """Today's report and the daily counts, built by the API itself from the stand-ins."""
+        for path, body in (('/report-refresh', {'wait': True}),
+                           ('/daily-stats-refresh', {'days': self.args.days, 'wait': True})):
+            t0 = time.perf_counter()
+            resp = httpx.post(self.base_url + path, json=body, timeout=self.args.startup_timeout)
+            if resp.status_code != 200:
+                raise RuntimeError(f'{path} failed during seeding: {resp.status_code} {resp.text[:200]}')
+            print(f'Seeded {path} in {time.perf_counter() - t0:.1f}s')
+
+    def stop(self) -> None:
+        for proc in reversed(self.procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        print(f'Splunk query log and traces of the run are in {self.tmp}')
+
+
+def report_services(base_url: str, timeout: float) -> list[str]:
+    """Failing services from today's report: the ones people drill into and look up."""
+    try:
+        resp = httpx.get(base_url + '/report-data', timeout=timeout)
+        return list(resp.json().get('services') or []) if resp.status_code == 200 else []
+    except Exception as e:
+        print(f'Failed to read services from /report-data: {e}')
+        return []
+
+
+def print_summary(summary: dict, seconds: float) -> None:
+    print(f'\n{"endpoint":<34}{"count":>8}{"errors":>8}{"p50 (s)":>10}{"p95 (s)":>10}{"p99 (s)":>10}{"max (s)":>10}{"req/s":>9}')
+    for label, s in summary.items():
+        print(f'{label:<34}{s["count"]:>8}{s["errors"]:>8}{s["p50"]:>10.4f}{s["p95"]:>10.4f}'
+              f'{s["p99"]:>10.4f}{s["max"]:>10.4f}{s["rps"]:>9.2f}')
+    total = sum(s['count'] for s in summary.values())
+    print(f'\n{total} requests in {seconds:.1f}s ({total / seconds if seconds else 0:.1f} req/s)')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Load-test the dashboard API with SLO checks.')
+    parser.add_argument('--target', help='base URL of a running API; default starts stand-ins and the API locally')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of load after the ramp')
+    parser.add_argument('--ramp', type=float, default=5.0, help='seconds over which users start')
+    parser.add_argument('--think', type=float, default=1.0, help='mean think time between sessions (s)')
+    parser.add_argument('--lookup-fraction', type=float, default=0.2, help='share of sessions that are /find-skysi lookups')
+    parser.add_argument('--drilldown-fraction', type=float, default=0.3, help='share of dashboard sessions opening a service')
+    parser.add_argument('--process-fraction', type=float, default=0.0, help='share of lookups followed by /process')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--slo', action='append', default=[], help="e.g. 'GET /report-data:p95<=0.5' (repeatable)")
+    parser.add_argument('--json-out', help='write the per-endpoint results and breaches here')
+    local = parser.add_argument_group('local stack (without --target)')
+    local.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', '1')), help='uvicorn worker processes')
+    local.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='API setting (repeatable)')
+    local.add_argument('--tenants', type=int, default=2000, help='synthetic tenants behind the stand-ins')
+    local.add_argument('--days', type=int, default=7, help='days of synthetic history')
+    local.add_argument('--upstream-latency', type=float, default=0.05, help='seconds added to every stand-in response')
+    local.add_argument('--upstream-jitter', type=float, default=0.05)
+    local.add_argument('--job-seconds', type=float, default=0.0, help='time before a Splunk job is done')
+    local.add_argument('--startup-timeout', type=float, default=300.0, help='seconds allowed for startup and seeding')
+    args = parser.parse_args(argv)
+
+    try:
+        slos = [parse_slo(s) for s in (args.slo or DEFAULT_SLOS)]
+    except ValueError as e:
+        parser.error(str(e))
+
+    stack = None
+    try:
+        if args.target:
+            base_url = args.target
+        else:
+            stack = LocalStack(args).start()
+            base_url = stack.base_url
+        services = report_services(base_url, args.timeout)
+        if not services:
+            print('No services in /report-data; lookups and drill-downs are skipped')
+        recorder = Recorder()
+        print(f'Load: {args.users} users for {args.duration:g}s (+{args.ramp:g}s ramp) against {base_url}')
+        seconds = Traffic(base_url, recorder, services, args).run()
+    finally:
+        if stack:
+            stack.stop()
+
+    summary = recorder.summary(seconds)
+    print_summary(summary, seconds)
+    failed = breaches(summary, slos)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({"target": base_url, "users": args.users, "seconds": round(seconds, 2),
+                       "workers": None if args.target else args.workers, "env": args.env,
+                       "endpoints": summary, "breaches": failed}, f, indent=2)
+    if failed:
+        print('\nSLO breaches:\n  ' + '\n  '.join(failed))
+        return 1
+    print('\nAll SLOs met')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
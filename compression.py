@@ -0,0 +1,70 @@
+import gzip
+
+from report_cache import MIN_COMPRESS_BYTES, accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def _compressible(mimetype: str) -> bool:
+    return (mimetype or '').startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response, accept_encoding: str | None, min_size: int = MIN_COMPRESS_BYTES,
+                      gzip_level: int = 6, brotli_quality: int = 5):
+    """Compress a buffered response in place with br or gzip when the client accepts it.
+
+    Leaves alone anything already encoded (precompressed snapshots and
+    dashboard files), streamed or file-backed responses, non-text payloads
+    such as PDFs, and bodies below min_size.
+    """
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    if not _compressible(response.mimetype) or 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return response
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        encoding = 'br'
+    elif 'gzip' in accepted:
+        encoding = 'gzip'
+    else:
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=brotli_quality)
+    else:
+        compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag:
+        # A different representation needs its own validator
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def init_compression(app, min_size: int = MIN_COMPRESS_BYTES, gzip_level: int = 6, brotli_quality: int = 5) -> None:
+    """Register an after_request hook that compresses JSON/HTML/text responses."""
+    from flask import request
+
+    @app.after_request
+    def _compress(response):
+        try:
+            return compress_response(response, request.headers.get('Accept-Encoding'), min_size, gzip_level, brotli_quality)
+        except Exception as e:
+            print(f"Response compression failed: {e}")
+            return response
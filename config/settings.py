@@ -4,7 +4,10 @@ def get_api_config():
     return {
         "host": os.getenv("API_HOST", "0.0.0.0"),
         "port": int(os.getenv("API_PORT", "8000")),
-        "debug": os.getenv("API_DEBUG", "false").lower() == "true"
+        "debug": os.getenv("API_DEBUG", "false").lower() == "true",
+        # Worker processes; refresh jobs and results are shared through the report store
+        "workers": int(os.getenv("API_WORKERS", "1")),
+        "keep_alive": int(os.getenv("API_KEEP_ALIVE", "5")),
     }
 
     
\ No newline at end of file
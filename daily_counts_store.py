@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import struct
+import threading
+from array import array
+from datetime import date, datetime
+
+# Append-only file of fixed-width records, one per (re)computed day:
+#   int32 day ordinal, int64 total, int64 passed, int64 failed (little-endian)
+# A later record for the same day supersedes earlier ones. The in-memory view is
+# three arrays indexed by (ordinal - first ordinal), so a date range is a slice.
+RECORD = struct.Struct('<iqqq')
+MISSING = -1
+
+_PER_DAY_RE = re.compile(r'^daily_counts_(\d{4}-\d{2}-\d{2})\.json$')
+
+
+def _ordinal(day: str) -> int:
+    return datetime.strptime(day[:10], '%Y-%m-%d').toordinal()
+
+
+class DailyCountsStore:
+    """Daily submission counts (total/passed/failed) backed by an append-only binary file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._base = None
+        self._total = array('q')
+        self._passed = array('q')
+        self._failed = array('q')
+        self._count = 0
+        self._offset = 0
+
+    def stamp(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _set(self, ordinal: int, total: int, passed: int, failed: int) -> None:
+        if self._base is None:
+            self._base = ordinal
+        if ordinal < self._base:
+            pad = self._base - ordinal
+            for arr in (self._total, self._passed, self._failed):
+                arr[0:0] = array('q', [MISSING]) * pad
+            self._base = ordinal
+        idx = ordinal - self._base
+        if idx >= len(self._total):
+            pad = idx + 1 - len(self._total)
+            for arr in (self._total, self._passed, self._failed):
+                arr.extend(array('q', [MISSING]) * pad)
+        if self._total[idx] == MISSING:
+            self._count += 1
+        self._total[idx] = total
+        self._passed[idx] = passed
+        self._failed[idx] = failed
+
+    def _refresh(self) -> None:
+        """Apply records appended since the last read (by this or another process). Caller holds the lock."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self._offset:
+            # File was replaced; start over
+            self._base = None
+            self._total, self._passed, self._failed = array('q'), array('q'), array('q')
+            self._count = 0
+            self._offset = 0
+        end = size - (size % RECORD.size)
+        if end <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            buf = f.read(end - self._offset)
+        for ordinal, total, passed, failed in RECORD.iter_unpack(buf):
+            self._set(ordinal, total, passed, failed)
+        self._offset = end
+
+    def append(self, rows: list[dict]) -> int:
+        """Append {day, total, passed, failed} rows. Returns the number written."""
+        packed = []
+        for r in rows:
+            day = (r.get('day') or '')[:10]
+            if not day:
+                continue
+            packed.append(RECORD.pack(_ordinal(day), int(r.get('total', 0)), int(r.get('passed', 0)), int(r.get('failed', 0))))
+        if not packed:
+            return 0
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(b''.join(packed))
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+        return len(packed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def days(self) -> set[str]:
+        with self._lock:
+            self._refresh()
+            if self._base is None:
+                return set()
+            return {
+                date.fromordinal(self._base + i).strftime('%Y-%m-%d')
+                for i, t in enumerate(self._total) if t != MISSING
+            }
+
+    def range(self, start: str | None = None, end: str | None = None) -> list[dict]:
+        """Stats for start..end inclusive (either bound optional), oldest first."""
+        with self._lock:
+            self._refresh()
+            if self._base is None:
+                return []
+            lo = max(_ordinal(start) - self._base, 0) if start else 0
+            hi = min(_ordinal(end) - self._base, len(self._total) - 1) if end else len(self._total) - 1
+            out = []
+            for i in range(lo, hi + 1):
+                total = self._total[i]
+                if total == MISSING:
+                    continue
+                out.append({
+                    'day': date.fromordinal(self._base + i).strftime('%Y-%m-%d'),
+                    'total': total,
+                    'passed': self._passed[i],
+                    'failed': self._failed[i],
+                })
+            return out
+
+    def import_json_dir(self, folder: str) -> int:
+        """Migrate submission-count/daily_counts_YYYY-MM-DD.json files for days not yet stored."""
+        if not os.path.isdir(folder):
+            return 0
+        known = self.days()
+        rows = []
+        for fn in sorted(os.listdir(folder)):
+            m = _PER_DAY_RE.match(fn)
+            if not m or m.group(1) in known:
+                continue
+            try:
+                with open(os.path.join(folder, fn), 'r', encoding='utf-8') as f:
+                    j = json.load(f)
+                rows.append({
+                    'day': (j.get('day') or m.group(1))[:10],
+                    'total': int(j.get('total', 0)),
+                    'passed': int(j.get('passed', 0)),
+                    'failed': int(j.get('failed', 0)),
+                })
+            except Exception as e:
+                print(f"Failed to import daily counts {fn}: {e}")
+        return self.append(rows)
+
+    def import_if_newer(self, path: str) -> int:
+        """Append the stats of a consolidated {"stats": [...]} JSON file written after the store last changed.
+
+        Keeps a hand-edited or regenerated daily_counts.json authoritative over older
+        records, like it was when /daily-stats read the JSON directly.
+        """
+        try:
+            if os.stat(path).st_mtime_ns <= (self.stamp() or (0,))[0]:
+                return 0
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f).get('stats')
+            return self.append([r for r in (stats or []) if isinstance(r, dict)])
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"Failed to import daily counts from {path}: {e}")
+            return 0
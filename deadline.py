@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '120'))
+# Floor for a single upstream call so a nearly spent budget still gets a usable timeout
+MIN_UPSTREAM_TIMEOUT = 1.0
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """Time budget for one request, shared by every upstream call made on its behalf.
+
+    Upstream helpers read it through current() and size their timeouts from
+    remaining(). cancel() (client went away) ends the budget immediately and
+    wakes anything blocked in wait(). When work is cut short the helpers call
+    mark_partial() so the response can say its results are incomplete.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + max(0.0, seconds)
+        self._cancelled = threading.Event()
+        self.partial = False
+        self.reasons: list[str] = []
+
+    def remaining(self) -> float:
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to seconds (bounded by the budget); True when the deadline ended meanwhile."""
+        return self._cancelled.wait(min(seconds, self.remaining())) or self.expired()
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: the remaining budget, at most cap. Raises DeadlineExceeded when spent."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded('client disconnected' if self.cancelled else 'request deadline exceeded')
+        return max(MIN_UPSTREAM_TIMEOUT, min(cap, remaining))
+
+    def mark_partial(self, reason: str) -> None:
+        self.partial = True
+        if len(self.reasons) < 20:
+            self.reasons.append(reason)
+
+
+_current: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar('request_deadline', default=None)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+def upstream_timeout(cap: float) -> float:
+    """Timeout for one upstream call under the current deadline (cap when there is none)."""
+    d = _current.get()
+    if d is None:
+        return cap
+    try:
+        return d.timeout(cap)
+    except DeadlineExceeded as e:
+        d.mark_partial(str(e))
+        raise
+
+
+def is_partial() -> bool:
+    d = _current.get()
+    return bool(d and d.partial)
+
+
+def request_budget(header_value: str | None, default: float = REQUEST_DEADLINE_SECONDS) -> float:
+    """Budget from an X-Request-Timeout header (seconds), never more than default."""
+    try:
+        requested = float(header_value) if header_value else default
+    except (TypeError, ValueError):
+        requested = default
+    return max(0.0, min(requested, default))
+
+
+def activate(seconds: float) -> tuple[Deadline, contextvars.Token]:
+    d = Deadline(seconds)
+    return d, _current.set(d)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    d, token = activate(seconds)
+    try:
+        yield d
+    finally:
+        deactivate(token)
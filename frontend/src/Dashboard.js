@@ -157,6 +157,8 @@ export default function Dashboard() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [data, setData] = useState(null);
+  const [details, setDetails] = useState({}); // aem_service -> full report item (paths + messages)
+  const [detailLoading, setDetailLoading] = useState({});
   const query = '';
   const [themeMode, setThemeMode] = useState('light'); // light | dark
   const [reportDate, setReportDate] = useState(''); // YYYY-MM-DD or '' for latest
@@ -190,9 +192,10 @@ export default function Dashboard() {
         if (reportDate === 'WEEKLY') {
           url = `${API_BASE}/report-week`;
         } else if (reportDate) {
-          url = `${API_BASE}/report-data?date=${encodeURIComponent(reportDate)}`;
+          // Summary only; per-service paths/messages load when a service is expanded
+          url = `${API_BASE}/report-data?fields=summary&date=${encodeURIComponent(reportDate)}`;
         } else {
-          url = `${API_BASE}/report-data`;
+          url = `${API_BASE}/report-data?fields=summary`;
         }
         const res = await fetch(url);
         if (!res.ok) {
@@ -200,7 +203,10 @@ export default function Dashboard() {
           throw new Error(err.error || `Failed to load cached report data (${res.status})`);
         }
         const json = await res.json();
-        if (isMounted) setData(json);
+        if (isMounted) {
+          setDetails({});
+          setData(json);
+        }
       } catch (e) {
         if (isMounted) setError(e.message || 'Failed to load data');
       } finally {
@@ -277,6 +283,23 @@ export default function Dashboard() {
     return { reportItems: items, totals: { services: items.length, errors: totalErrors } };
   }, [reportItemsRaw, query]);
 
+  const loadServiceDetail = async (item) => {
+    const svc = item?.aem_service;
+    if (!svc || Array.isArray(item.paths) || details[svc] || detailLoading[svc]) return;
+    setDetailLoading((m) => ({ ...m, [svc]: true }));
+    try {
+      const qs = reportDate && reportDate !== 'WEEKLY' ? `?date=${encodeURIComponent(reportDate)}` : '';
+      const res = await fetch(`${API_BASE}/report-data/service/${encodeURIComponent(svc)}${qs}`);
+      if (res.ok) {
+        const j = await res.json();
+        setDetails((m) => ({ ...m, [svc]: j }));
+      }
+    } catch {
+    } finally {
+      setDetailLoading((m) => ({ ...m, [svc]: false }));
+    }
+  };
+
   const revenueLoss = useMemo(() => (totals?.errors || 0) * 4, [totals?.errors]);
 
   const istDateTime = useMemo(() => {
@@ -900,7 +923,7 @@ export default function Dashboard() {
             <Typography variant="h5" sx={{ mb: 1 }}>Services</Typography>
             <Stack spacing={2}>
               {reportItems.map((item) => (
-                <Accordion key={item.aem_service} defaultExpanded={false} disableGutters>
+                <Accordion key={item.aem_service} defaultExpanded={false} disableGutters onChange={(_e, expanded) => { if (expanded) loadServiceDetail(item); }}>
                   <AccordionSummary expandIcon={<ExpandMoreIcon />}>
                     <Box sx={{ display: 'flex', alignItems: 'center', gap: 1, flexWrap: 'wrap' }}>
                       <Typography variant="subtitle1" sx={{ fontWeight: 700 }}>
@@ -912,7 +935,10 @@ export default function Dashboard() {
                   </AccordionSummary>
                   <AccordionDetails>
                     <Stack spacing={2}>
-                      {(item.paths || []).slice(0, 10).map((pe, idx) => (
+                      {detailLoading[item.aem_service] && (
+                        <Skeleton variant="rectangular" height={120} />
+                      )}
+                      {((details[item.aem_service] || item).paths || []).slice(0, 10).map((pe, idx) => (
                         <Paper key={`${item.aem_service}-${idx}`} variant="outlined" sx={{ p: 1.5 }}>
                           <Stack spacing={1}>
                             <Chip label={`Path`} size="medium" sx={{ bgcolor: '#1976d2', color: '#fff', width: 'fit-content' }} />
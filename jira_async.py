@@ -0,0 +1,49 @@
+import httpx
+
+from deadline import upstream_timeout
+import metrics
+import tracing
+from resilience import JIRA
+from jira_tool import JIRA_HTTP_TIMEOUT, jira_search_request, skysi_jql
+
+
+class AsyncJiraClient:
+    """Jira search for the ASGI app on a pooled httpx.AsyncClient.
+
+    Same request and error dicts as jira_tool.jira_query_tool.
+    """
+
+    def __init__(self, max_connections: int = 10, timeout: float = JIRA_HTTP_TIMEOUT,
+                 transport: httpx.AsyncBaseTransport | None = None):
+        self._client = httpx.AsyncClient(
+            verify=False,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def search(self, query: str, extra_params: dict | None = None) -> dict:
+        req, error = jira_search_request(query, extra_params)
+        if error:
+            return {"error": error}
+        try:
+            async with JIRA.acall() as call:
+                with metrics.upstream('jira', 'search'):
+                    response = await self._client.get(req["url"], headers=req["headers"], params=req["params"], auth=req["auth"],
+                                                     timeout=upstream_timeout(JIRA_HTTP_TIMEOUT))
+                    tracing.annotate(status=response.status_code)
+                if response.status_code >= 500:
+                    call.fail(f"HTTP {response.status_code}")
+            if response.status_code == 200:
+                return response.json()
+            return {"error": f"Failed to fetch Jira issues: {response.text}", "status": response.status_code}
+        except Exception as e:
+            return {"error": f"Error querying Jira: {e}"}
+
+    async def search_skysi_by_aem_service(self, aem_service: str) -> dict:
+        if not aem_service:
+            return {"issues": []}
+        return await self.search(skysi_jql(aem_service))
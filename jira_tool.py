@@ -1,6 +1,10 @@
 import os
 import requests
 from dotenv import load_dotenv
+from deadline import upstream_timeout
+import metrics
+import tracing
+from resilience import JIRA
 
 load_dotenv()
 
@@ -8,14 +12,31 @@ JIRA_URL = os.getenv("JIRA_URL")
 JIRA_USER = os.getenv("JIRA_USER")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
 JIRA_BEARER_TOKEN = os.getenv("JIRA_BEARER_TOKEN")
+# Cap per Jira call; a request deadline lowers it to the remaining budget
+JIRA_HTTP_TIMEOUT = float(os.getenv("JIRA_HTTP_TIMEOUT", "30"))
 
-def jira_query_tool(query: str, extra_params: dict | None = None) -> dict:
+def _jira_request(method: str, url: str, operation: str, **kwargs):
+    """One Jira REST call through the Jira bulkhead and breaker, with a deadline-derived timeout.
+
+    operation names the call in the upstream latency metrics.
+    """
+    with JIRA.call() as call, metrics.upstream('jira', operation):
+        response = requests.request(method, url, verify=False, timeout=upstream_timeout(JIRA_HTTP_TIMEOUT), **kwargs)
+        tracing.annotate(status=response.status_code)
+        if response.status_code >= 500:
+            call.fail(f"HTTP {response.status_code}")
+        return response
+
+def jira_search_request(query: str, extra_params: dict | None = None) -> tuple[dict | None, str | None]:
+    """(request, error) for GET /rest/api/2/search; request has url, params, headers and auth.
+
+    Shared by jira_query_tool and the async client in jira_async.py.
+    """
     jira_url = os.getenv("JIRA_URL")
     jira_user = os.getenv("JIRA_USER")
     jira_token = os.getenv("JIRA_API_TOKEN")
     if not jira_url:
-        return {"error": "Jira URL not set in environment variables."}
-    url = f"{jira_url}/rest/api/2/search"
+        return None, "Jira URL not set in environment variables."
     params = {"jql": query}
     if isinstance(extra_params, dict):
         params.update(extra_params)
@@ -26,10 +47,16 @@ def jira_query_tool(query: str, extra_params: dict | None = None) -> dict:
         headers["Authorization"] = f"Bearer {JIRA_BEARER_TOKEN}"
     else:
         if not all([jira_user, jira_token]):
-            return {"error": "Jira credentials not set. Provide JIRA_BEARER_TOKEN or JIRA_USER + JIRA_API_TOKEN."}
+            return None, "Jira credentials not set. Provide JIRA_BEARER_TOKEN or JIRA_USER + JIRA_API_TOKEN."
         auth = (jira_user, jira_token)
+    return {"url": f"{jira_url}/rest/api/2/search", "params": params, "headers": headers, "auth": auth}, None
+
+def jira_query_tool(query: str, extra_params: dict | None = None) -> dict:
+    req, error = jira_search_request(query, extra_params)
+    if error:
+        return {"error": error}
     try:
-        response = requests.get(url, headers=headers, params=params, auth=auth, verify=False)
+        response = _jira_request("GET", req["url"], "search", headers=req["headers"], params=req["params"], auth=req["auth"])
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch Jira issues: {response.text}", "status": response.status_code}
@@ -52,7 +79,7 @@ def create_jira_issue(project, issue_type, component, summary, description):
             "labels": ["csme_requested"]
         }
     }
-    response = requests.post(url, json=data, auth=auth, headers=headers, verify=False)
+    response = _jira_request("POST", url, "create_issue", json=data, auth=auth, headers=headers)
     if response.status_code == 201:
         return response.json().get("key")
     else:
@@ -69,7 +96,7 @@ def add_jira_comment(issue_key, comment, time=None):
         body += f"{time}\n"
     body += f"{{code}}\n{comment}\n{{code}}"
     data = {"body": body}
-    response = requests.post(url, json=data, auth=auth, headers=headers, verify=False)
+    response = _jira_request("POST", url, "add_comment", json=data, auth=auth, headers=headers)
     if response.status_code == 201:
         return True
     else:
@@ -90,7 +117,7 @@ def link_jira_issues(blocker_key, blocked_key):
         "outwardIssue": {"key": blocker_key},
         "comment": {"body": f"Linked automatically: {blocker_key} blocks {blocked_key}"}
     }
-    response = requests.post(url, json=data, auth=auth, headers=headers, verify=False)
+    response = _jira_request("POST", url, "link_issues", json=data, auth=auth, headers=headers)
     if response.status_code in (200, 201):
         return True
     else:
@@ -101,7 +128,7 @@ def get_linked_forms_jira(skysi_key):
     url = f"{JIRA_URL}/rest/api/2/issue/{skysi_key}"
     auth = (JIRA_USER, JIRA_API_TOKEN)
     headers = {"Accept": "application/json"}
-    response = requests.get(url, auth=auth, headers=headers, verify=False)
+    response = _jira_request("GET", url, "get_issue", auth=auth, headers=headers)
     if response.status_code == 200:
         issue = response.json()
         for link in issue.get("fields", {}).get("issuelinks", []):
@@ -117,7 +144,7 @@ def get_jira_comments(issue_key):
     url = f"{JIRA_URL}/rest/api/2/issue/{issue_key}/comment"
     auth = (JIRA_USER, JIRA_API_TOKEN)
     headers = {"Accept": "application/json"}
-    response = requests.get(url, auth=auth, headers=headers, verify=False)
+    response = _jira_request("GET", url, "get_comments", auth=auth, headers=headers)
     if response.status_code == 200:
         return [c["body"] for c in response.json().get("comments", [])]
     else:
@@ -128,7 +155,7 @@ def get_jira_status(issue_key):
     url = f"{JIRA_URL}/rest/api/2/issue/{issue_key}"
     auth = (JIRA_USER, JIRA_API_TOKEN)
     headers = {"Accept": "application/json"}
-    response = requests.get(url, auth=auth, headers=headers, verify=False)
+    response = _jira_request("GET", url, "get_issue", auth=auth, headers=headers)
     if response.status_code == 200:
         issue = response.json()
         return issue.get("fields", {}).get("status", {}).get("name", "")
@@ -136,14 +163,16 @@ def get_jira_status(issue_key):
         print(f"Failed to fetch status for {issue_key}: {response.status_code} {response.text}")
         return "" 
 
-def search_skysi_by_aem_service(aem_service: str) -> dict:
-    """Search SKYSI issues by aem_service, restricted to open/new/in progress and FormSubmitErrors."""
-    if not aem_service:
-        return {"issues": []}
+def skysi_jql(aem_service: str) -> str:
     # JQL: project = SKYSI AND summary ~ FormSubmitErrors AND status in (Open, "In Progress", New) AND text ~ aem_service
-    jql = (
+    return (
         'project = SKYSI AND issuetype = Incident AND Alert  ~ "FormSubmitErrors" AND '
         'status NOT IN (Resolved) AND '
         f'text ~ "{aem_service}"'
     )
-    return jira_query_tool(jql)
\ No newline at end of file
+
+def search_skysi_by_aem_service(aem_service: str) -> dict:
+    """Search SKYSI issues by aem_service, restricted to open/new/in progress and FormSubmitErrors."""
+    if not aem_service:
+        return {"issues": []}
+    return jira_query_tool(skysi_jql(aem_service))
\ No newline at end of file
@@ -0,0 +1,210 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+ACTIVE = ('queued', 'running')
+# How often a job run elsewhere is re-read while waiting on it
+POLL_SECONDS = 0.5
+
+
+@dataclass
+class Job:
+    """A unit of background work (a report or daily-stats refresh)."""
+    id: str
+    kind: str
+    key: str
+    status: str = 'queued'  # queued | running | succeeded | failed
+    progress: float = 0.0
+    message: str = ''
+    result: Any = None
+    error: str = ''
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    # Set for a job running in another process: returns its latest stored record
+    poll: Callable[[], dict | None] | None = field(default=None, repr=False)
+
+    def report(self, progress: float, message: str = '') -> None:
+        """Called by the job body to publish progress (0.0 - 1.0)."""
+        self.progress = max(0.0, min(1.0, float(progress)))
+        if message:
+            self.message = message
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self.poll is None:
+            return self.done.wait(timeout)
+        end = None if timeout is None else time.monotonic() + timeout
+        while not self.done.is_set():
+            record = self.poll()
+            if record is None:
+                self.status, self.error = 'failed', 'job record disappeared'
+                self.done.set()
+                break
+            self.update(record)
+            if self.done.is_set():
+                break
+            remaining = POLL_SECONDS if end is None else end - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(POLL_SECONDS, remaining))
+        return True
+
+    def update(self, record: dict) -> None:
+        for k in ('status', 'progress', 'message', 'result', 'error', 'started_at', 'finished_at'):
+            setattr(self, k, record.get(k))
+        if self.status not in ACTIVE:
+            self.done.set()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Runs refresh work on a small dedicated pool so it never occupies request threads.
+
+    Submitting work whose (kind, key) matches a queued or running job returns
+    that job instead of starting a duplicate. With a store (ReportStore) the
+    job records are shared through SQLite, so every worker process can look a
+    job up and duplicates coalesce across processes; running jobs are re-saved
+    every heartbeat seconds, and one not saved for stale_after is abandoned.
+    """
+
+    def __init__(self, max_workers: int = 2, keep_finished: int = 200, store=None,
+                 heartbeat: float = 5.0, stale_after: float = 60.0):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh-job')
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._active: dict[tuple[str, str], Job] = {}
+        self._keep_finished = keep_finished
+        self._store = store
+        self._heartbeat = heartbeat
+        self._stale_after = stale_after
+        self._beating = False
+
+    def submit(self, kind: str, key: str, fn: Callable[[Job], Any]) -> tuple[Job, bool]:
+        """Queue fn(job). Returns (job, created); created is False when coalesced onto a running job."""
+        with self._lock:
+            existing = self._active.get((kind, key))
+            if existing is not None:
+                return existing, False
+            job = Job(id=uuid.uuid4().hex, kind=kind, key=key)
+            if self._store is not None:
+                try:
+                    record, created = self._store.claim_job(job.to_dict(), self._stale_after)
+                    if not created:
+                        return self._remote(record), False
+                    self._store.prune_jobs(self._keep_finished)
+                except Exception as e:
+                    # Still run it here; only cross-process visibility is lost
+                    print(f"Failed to record job {kind} in the store: {e}")
+            self._jobs[job.id] = job
+            self._active[(kind, key)] = job
+            self._prune()
+            self._start_heartbeat()
+        self._pool.submit(self._run, job, fn)
+        return job, True
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.status = 'running'
+        job.started_at = time.time()
+        self._save(job)
+        try:
+            job.result = fn(job)
+            job.progress = 1.0
+            job.status = 'succeeded'
+        except Exception as e:
+            print(f"Job {job.kind} {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            with self._lock:
+                if self._active.get((job.kind, job.key)) is job:
+                    del self._active[(job.kind, job.key)]
+            job.done.set()
+
+    def _save(self, job: Job) -> None:
+        if self._store is None:
+            return
+        try:
+            self._store.save_job(job.to_dict())
+        except Exception as e:
+            print(f"Failed to save job {job.id}: {e}")
+
+    def _start_heartbeat(self) -> None:
+        # Caller holds the lock
+        if self._store is None or self._beating:
+            return
+        self._beating = True
+        threading.Thread(target=self._beat, name='refresh-job-heartbeat', daemon=True).start()
+
+    def _beat(self) -> None:
+        """Re-save running jobs (progress included) so other processes see them alive."""
+        while True:
+            time.sleep(self._heartbeat)
+            with self._lock:
+                active = list(self._active.values())
+            for job in active:
+                if not job.done.is_set():
+                    self._save(job)
+
+    def _remote(self, record: dict) -> Job:
+        job = Job(**record)
+        job.poll = lambda: self._store.load_job(job.id, self._stale_after)
+        if job.status not in ACTIVE:
+            job.done.set()
+        return job
+
+    def _prune(self) -> None:
+        # Caller holds the lock. Drop the oldest finished jobs beyond keep_finished.
+        finished = [j for j in self._jobs.values() if j.done.is_set()]
+        for j in finished[:max(0, len(finished) - self._keep_finished)]:
+            self._jobs.pop(j.id, None)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self._store is None:
+            return job
+        try:
+            record = self._store.load_job(job_id, self._stale_after)
+        except Exception as e:
+            print(f"Failed to load job {job_id}: {e}")
+            return None
+        return self._remote(record) if record else None
+
+    def list(self, limit: int = 50) -> list[Job]:
+        with self._lock:
+            local = list(self._jobs.values())[-limit:][::-1]
+        if self._store is None:
+            return local
+        try:
+            records = self._store.list_jobs(limit)
+        except Exception as e:
+            print(f"Failed to list jobs: {e}")
+            return local
+        # Jobs running here have fresher progress than their last heartbeat
+        mine = {j.id: j for j in local}
+        return [mine.get(r['id']) or self._remote(r) for r in records]
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._active)
@@ -0,0 +1,64 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is not installed
+    orjson = None
+
+
+def dumps_bytes(obj, sort_keys: bool = False, default=None) -> bytes:
+    """Compact UTF-8 JSON (no whitespace, non-ASCII kept as-is)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys, default=default).encode('utf-8')
+
+
+def dumps(obj, sort_keys: bool = False, default=None) -> str:
+    return dumps_bytes(obj, sort_keys=sort_keys, default=default).decode('utf-8')
+
+
+def loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib encoder.
+
+    Output matches the default provider's semantics (sorted keys, Flask's
+    handling of dates, decimals, UUIDs and dataclasses) but is always UTF-8
+    rather than ASCII-escaped.
+    """
+
+    # Keyword arguments orjson can honor; anything else goes to json.dumps
+    _ORJSON_KWARGS = frozenset(('default', 'ensure_ascii', 'sort_keys', 'indent', 'separators'))
+
+    def _orjson_option(self, kwargs: dict) -> int:
+        # Datetimes go through Flask's default (HTTP date) like the stdlib provider
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, **kwargs) -> bytes:
+        if orjson is None or not self._ORJSON_KWARGS.issuperset(kwargs):
+            return self.dumps(obj, **kwargs).encode('utf-8')
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=self._orjson_option(kwargs))
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or not self._ORJSON_KWARGS.issuperset(kwargs):
+            if not kwargs.get('indent'):
+                kwargs.setdefault('separators', (',', ':'))
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
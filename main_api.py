@@ -1,19 +1,34 @@
 import os
+import re
+import threading
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file, g
 import json
 from crewai import LLM, Agent, Task, Crew
 from jira_tool import jira_query_tool, create_jira_issue, add_jira_comment, link_jira_issues, get_linked_forms_jira, get_jira_comments, get_jira_status, search_skysi_by_aem_service
 from aem_extractor_tool import extract_aem_fields_from_description
 from splunk_tool import splunk_search_tool, splunk_search_rows, get_last_error_paths, list_services_with_errors, get_top_error_times, get_latest_failures_by_path, build_multi_window_error_query, list_services_total_submissions, get_daily_submission_stats, get_daily_counts_for_date
+from report_store import ReportStore
+from daily_counts_store import DailyCountsStore
+from jobs import JobQueue
+from scheduler import RefreshScheduler, get_scheduler_config
+from singleflight import SingleFlight
+from report_cache import ReportSnapshotCache, conditional_response, accepted_encodings
+from report_rollups import update_rollups, get_rollup, render_rollup, range_report, period_for
+from report_engine import ReportEngine, ReportModel, ReportItem, build_report_data, merge_report_delta, fetch_service_paths
+from report_render import render_html, PdfRenderPool
+from report_index import ReportIndexCache, SORT_KEYS, MAX_PAGE_SIZE
+from json_codec import FastJSONProvider
+from compression import init_compression
+import time
+import deadline
+import metrics
+import tracing
+import profiling
+from search_perf import QUERY_LOG, RANK_KEYS, search_origin
+from resilience import BackendUnavailable, call_llm, health_snapshot
 from datetime import datetime, timedelta
 from flask_cors import CORS
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, XPreformatted, PageBreak, Table, TableStyle, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import mm
 
 load_dotenv()
 
@@ -22,10 +37,117 @@ llm = LLM(
 )
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+init_compression(app, min_size=int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024')))
+
+@app.before_request
+def _start_request_deadline():
+    # Budget for every Splunk/Jira call made while serving this request
+    g.deadline, g.deadline_token = deadline.activate(deadline.request_budget(request.headers.get('X-Request-Timeout')))
+    g.request_started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.trace_span, g.trace_token = tracing.start_span(f'{request.method} {route}', route=route)
+    wanted = profiling.requested_mode(request.args.get('profile') or request.headers.get(profiling.PROFILE_HEADER),
+                                      request.headers.get(profiling.TOKEN_HEADER), route)
+    if wanted:
+        g.profile = profiling.begin(wanted[0], f'{request.method} {route}', forced=wanted[1])
+
+@app.after_request
+def _flag_partial_response(response):
+    if deadline.is_partial():
+        response.headers['X-Partial-Results'] = 'true'
+    if g.get('served_snapshot'):
+        response.headers['X-Served-From-Snapshot'] = g.served_snapshot
+    return response
+
+@app.after_request
+def _remember_status(response):
+    # Observed at teardown, after the compression hook has run
+    g.response_status = response.status_code
+    if g.get('trace_span') is not None and tracing.debug_requested(request.headers.get(tracing.DEBUG_HEADER)):
+        response.headers.update(tracing.debug_headers(g.trace_span))
+    profile = g.pop('profile', None)
+    if profile is not None:
+        # Stopped before compression; the id is only handed to callers who asked with the token
+        profile_id = profile.stop(response.status_code)
+        if profile.forced and profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.errorhandler(BackendUnavailable)
+def _backend_unavailable(e):
+    # Fail fast while a backend's breaker is open or its queue is full
+    resp = jsonify({"error": str(e), "backend": e.backend, "reason": e.reason})
+    resp.status_code = 503
+    resp.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.999)))
+    return resp
+
+@app.errorhandler(deadline.DeadlineExceeded)
+def _deadline_exceeded(e):
+    # The request's budget ran out while it waited (e.g. on a coalesced call)
+    resp = jsonify({"error": str(e)})
+    resp.status_code = 504
+    return resp
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Backend breaker states and bulkhead queue depths."""
+    return jsonify(health_snapshot())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of this process's request, upstream, cache and in-flight metrics."""
+    return app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/profiles', methods=['GET'])
+def profiles_list():
+    """Stored request profiles, newest first (needs X-Profile-Token)."""
+    if not profiling.PROFILE_TOKEN:
+        return jsonify({"error": "Profiling is not enabled"}), 404
+    if not profiling.authorized(request.headers.get(profiling.TOKEN_HEADER)):
+        return jsonify({"error": "Invalid profile token"}), 403
+    return jsonify({"profiles": profiling.PROFILES.list()})
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def profiles_get(profile_id):
+    """One stored profile: ?format=txt (summary, default), pstats or collapsed."""
+    if not profiling.PROFILE_TOKEN:
+        return jsonify({"error": "Profiling is not enabled"}), 404
+    if not profiling.authorized(request.headers.get(profiling.TOKEN_HEADER)):
+        return jsonify({"error": "Invalid profile token"}), 403
+    fmt = (request.args.get('format') or 'txt').strip().lower()
+    path = profiling.PROFILES.artifact(profile_id, fmt)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if fmt == 'pstats':
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=f'{profile_id}.pstats')
+    return send_file(path, mimetype='text/plain; charset=utf-8')
+
+@app.teardown_request
+def _end_request_deadline(_exc=None):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop(500)  # the handler raised before after_request could stop it
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.HTTP_IN_FLIGHT.dec()
+        # Route template, not the raw path, keeps the label set bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_REQUEST_SECONDS.labels(request.method, route, g.get('response_status', 500)).observe(
+            time.perf_counter() - started)
+    trace_span = g.pop('trace_span', None)
+    if trace_span is not None:
+        trace_span.set(status=g.get('response_status', 500))
+        tracing.end_span(trace_span, g.pop('trace_token'), str(_exc) if _exc else '')
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        try:
+            deadline.deactivate(token)
+        except ValueError:
+            pass  # set in another context (e.g. a copied one); nothing to undo here
 
-# In-memory cache for report JSON
-REPORT_CACHE = {}
 REPORT_CACHE_PATH = os.getenv('REPORT_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'report_cache.json'))
 
 def _resolve_cache_file_path() -> str:
@@ -83,485 +205,525 @@ def _resolve_cache_dir_and_file() -> tuple[str, str]:
             pass
         return (dir_path, os.path.join(dir_path, 'report_cache.json'))
 
-def build_report_data(earliest: str, latest: str, services: list[str] | None = None) -> dict:
-    # 1) Top services and counts
-    svc_rows = list_services_with_errors(earliest, latest)
-    # print(f"Services with errors: {svc_rows}")
-    counts_map = {r['aem_service']: r.get('error_count', 0) for r in svc_rows}
-    program_map = {r['aem_service']: r.get('program_name', '<unknown program name>') for r in svc_rows}
-    jira_base = os.getenv('JIRA_URL', 'https://jira.corp.adobe.com')
-    for r in svc_rows:
-        aem_service_val = r.get('aem_service', '')
-        skysi_key = ''
-        try:
-            lookup = search_skysi_by_aem_service(aem_service_val) if aem_service_val else {}
-            issues = lookup.get('issues') or []
-            if issues:
-                skysi_key = issues[0].get('key', '')
-        except Exception:
-            skysi_key = ''
-        r['skysi_key'] = skysi_key
-        r['skysi_url'] = f"{jira_base}/browse/{skysi_key}" if skysi_key else ''
-
-    if not services:
-        services = [r['aem_service'] for r in svc_rows]
-
-    print(f"Services: {services}")
-
-    # 2) Per-service aggregation
-    totals_map = list_services_total_submissions(earliest, latest)
-    report_items = []
-    for aem_service in services:
-        failures_by_path = get_latest_failures_by_path(aem_service, "prod", "publish", earliest=earliest, latest=latest, per_path_limit=10)
-
-        base_error = (
-            f'index=dx_aem_engineering sourcetype=aemerror level=ERROR '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(*guideContainer.af.submit.jsp* OR *FormSubmitActionManagerServiceImpl* OR *AdaptiveFormSubmitServlet*) '
-            f'earliest="{earliest}" latest="{latest}" '
-        )
-        sub = (
-            '[ search index=dx_aem_engineering sourcetype=aemaccess '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(path="/adobe/forms/af/submit*" OR path="*guideContainer.af.submit.jsp") code>=500 '
-            f'earliest="{earliest}" latest="{latest}" '
-            '| sort 0 - _time '
-            '| streamstats count as failCount by path '
-            '| where failCount <= 10 '
-            '| eval f_start=_time, f_end=_time+10 '
-            '| eval query="(_time>=" . f_start . " AND _time<=" . f_end . ")" '
-            '| stats values(query) as queries '
-            '| eval search="(" . mvjoin(queries," OR ") . ")" '
-            '| fields search ] '
-        )
-        final_query = base_error + sub + '| eval EventTimeFmt=strftime(_time,"%Y-%m-%d %H:%M:%S") | table EventTimeFmt msg'
-        rows = splunk_search_rows(final_query) or []
-        # print(f"Rows: {rows}")
-
-        from datetime import datetime as _dt
-        windows = []
-        for p, times in failures_by_path.items():
-            for tstr in times:
-                try:
-                    sdt = _dt.strptime(tstr, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    continue
-                edt = sdt + timedelta(seconds=10)
-                windows.append((p, sdt, edt))
-
-        path_to_msgs = {p: [] for p in failures_by_path.keys()}
-        path_to_seen = {p: set() for p in failures_by_path.keys()}
-        for r in rows:
-            et = (r.get('EventTimeFmt') or '').split('.')[0]
-            msg = (r.get('msg') or '').strip()
-            if not et or not msg:
-                continue
-            try:
-                evt_dt = _dt.strptime(et, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-            matched = None
-            for p, sdt, edt in windows:
-                if sdt <= evt_dt <= edt:
-                    matched = p
-                    break
-            if matched and msg not in path_to_seen[matched] and len(path_to_msgs[matched]) < 10:
-                # Store both time and message so UI can show timestamp next to each message
-                path_to_msgs[matched].append({"time": et, "msg": msg})
-                path_to_seen[matched].add(msg)
-
-        path_entries = []
-        for p, times in failures_by_path.items():
-            path_entries.append({
-                "path": p,
-                "time": ", ".join(times[:10]),
-                "messages": path_to_msgs.get(p, [])
-            })
-
-        total_forms = totals_map.get(aem_service, 0)
-        print(f"Total forms for {aem_service}: {total_forms}")
-        report_items.append({
-            "aem_service": aem_service,
-            "error_count": counts_map.get(aem_service, 0),
-            "total_form_submissions": total_forms,
-            "failure_rate_pct": round((counts_map.get(aem_service, 0) / total_forms) * 100, 2) if total_forms else 0.0,
-            "program_name": program_map.get(aem_service, '<unknown program name>'),
-            "paths": path_entries
-        })
+def _resolve_report_db_path() -> str:
+    """SQLite report store location: REPORT_DB_PATH, else report_store.sqlite3 next to the cache files."""
+    explicit = os.getenv('REPORT_DB_PATH')
+    if explicit:
+        return explicit
+    dir_path, _default_file = _resolve_cache_dir_and_file()
+    return os.path.join(dir_path, 'report_store.sqlite3')
 
-    from datetime import datetime
-    return {
-        "generated_at": datetime.utcnow().isoformat() + "Z",
-        "earliest": earliest,
-        "latest": latest,
-        "services": services,
-        "svc_rows": svc_rows,
-        "report_items": report_items,
-    }
+# Opened (and migrated) by startup(), or on first use
+REPORT_STORE = ReportStore(_resolve_report_db_path())
+
+DAILY_COUNTS = DailyCountsStore(os.getenv(
+    'DAILY_COUNTS_PATH', os.path.join(os.path.dirname(__file__), 'submission-count', 'daily_counts.bin')
+))
 
-def render_dashboard_html(svc_rows: list, report_items: list, earliest: str, latest: str) -> str:
-    from html import escape as html_escape
-    def trunc15(msg: str) -> str:
-        _lines = (msg or '').split('\n')
-        return ('\n'.join(_lines[:15]) + '\n...') if len(_lines) > 15 else msg
-    css = (
-        "body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 24px; }"
-        "h1 { color: #0D47A1; }"
-        "h2 { color: #1565C0; margin-top: 24px; }"
-        ".summary { border-collapse: collapse; width: 100%; margin: 12px 0; }"
-        ".summary th { background:#1565C0; color:#fff; padding:6px; text-align:left; }"
-        ".summary td { border:1px solid #B0BEC5; padding:6px; }"
-        ".path-badge { background:#1976D2; color:#fff; padding:4px 6px; border-radius:4px; display:inline-block; }"
-        ".time { color:#546E7A; margin:6px 0; }"
-        ".msg-title { color:#37474F; font-weight:600; margin:8px 0 4px; }"
-        "pre.msg { background:#ECEFF1; border:1px solid #B0BEC5; padding:4px; white-space:pre-wrap; word-break:break-word; }"
+# One report build per window serves the JSON, HTML and PDF outputs
+REPORT_ENGINE = ReportEngine(ttl=float(os.getenv('REPORT_ENGINE_TTL', '300')))
+
+# PDF layout runs in worker processes; rendered bytes are kept per report hash
+PDF_RENDERER = PdfRenderPool(
+    max_workers=int(os.getenv('PDF_RENDER_WORKERS', '2')),
+    max_entries=int(os.getenv('PDF_CACHE_ENTRIES', '16')),
+)
+
+def _serialize_json(data) -> bytes:
+    # Compact JSON like jsonify() sends, computed once per snapshot
+    return app.json.dumps_bytes(data) + b"\n"
+
+# Refresh work runs here rather than on request threads; job records live in the
+# report store so /jobs and coalescing work across API worker processes
+REFRESH_JOBS = JobQueue(max_workers=int(os.getenv('REFRESH_WORKERS', '2')), store=REPORT_STORE)
+# Budget for one whole report-refresh job; a job cut short stores nothing
+REFRESH_JOB_DEADLINE_SECONDS = float(os.getenv('REFRESH_JOB_DEADLINE_SECONDS', '900'))
+metrics.Gauge('refresh_jobs_active', 'Report and daily-stats refresh jobs queued or running.').set_collector(
+    lambda: {(): REFRESH_JOBS.active_count()})
+
+# Identical concurrent /find-skysi and /process calls share one computation
+REQUEST_FLIGHTS = SingleFlight(grace_seconds=float(os.getenv('COALESCE_GRACE_SECONDS', '30')))
+
+# Parsed report snapshots keyed by date; invalidated by store writes or a refresh
+REPORT_SNAPSHOTS = ReportSnapshotCache(_serialize_json)
+
+# Filter/sort/lookup index per snapshot for /report-data queries
+REPORT_INDEXES = ReportIndexCache()
+
+def _snapshot_response(snap):
+    """Serve a cached snapshot honoring If-None-Match / If-Modified-Since and Accept-Encoding."""
+    status, body, headers = conditional_response(
+        snap,
+        request.headers.get('If-None-Match'),
+        request.headers.get('If-Modified-Since'),
+        request.headers.get('Accept-Encoding'),
     )
-    parts = [
-        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Daily Forms Submit Errors Dashboard</title>",
-        f"<style>{css}</style></head><body>",
-        "<h1>Daily Forms Submit Errors Dashboard</h1>",
-        f"<div>Range: {html_escape(earliest)} → {html_escape(latest)}</div>",
-    ]
-    if svc_rows:
-        parts.append("<table class='summary'>")
-        parts.append("<tr><th>TenantID</th><th>ProgramName</th><th>ErrorCount</th><th>SKYSI</th></tr>")
-        for r in svc_rows:
-            skysi = r.get('skysi_key')
-            skysi_url = r.get('skysi_url')
-            skysi_html = f"<a href='{html_escape(skysi_url)}'>{html_escape(skysi)}</a>" if skysi and skysi_url else "-"
-            parts.append(
-                "<tr>"
-                f"<td>{html_escape(r.get('aem_service',''))}</td>"
-                f"<td>{html_escape(r.get('program_name','<unknown program name>'))}</td>"
-                f"<td>{int(r.get('error_count',0))}</td>"
-                f"<td>{skysi_html}</td>"
-                "</tr>"
-            )
-        parts.append("</table>")
-    for item in report_items:
-        svc_title = (
-            f"Service: {item['aem_service']} "
-            f"Program Name: {item.get('program_name','<unknown program name>')} "
-            f"(Failures: {item.get('error_count', 0)})"
-        )
-        parts.append(f"<h2>{html_escape(svc_title)}</h2>")
-        for pe in item.get('paths', [])[:10]:
-            parts.append(f"<div class='path-badge'>Path: {html_escape(pe.get('path',''))}</div>")
-            if pe.get('time'):
-                parts.append(f"<div class='time'>Time: {html_escape(pe['time'])}</div>")
-            msgs = pe.get('messages') or []
-            if not msgs:
-                parts.append("<div style='color:#B71C1C'>&lt;no messages&gt;</div>")
-                continue
-            for idx, m in enumerate(msgs, start=1):
-                # Support both string messages and {time,msg} objects
-                try:
-                    text = m if isinstance(m, str) else (m.get('msg', '') if isinstance(m, dict) else str(m))
-                except Exception:
-                    text = str(m)
-                parts.append(f"<div class='msg-title'>Message {idx}</div>")
-                parts.append(f"<pre class='msg'>{html_escape(trunc15(text))}</pre>")
-    parts.append("</body></html>")
-    return ''.join(parts)
+    if status == 304:
+        return app.response_class(status=304, headers=headers)
+    return app.response_class(body, status=status, headers=headers, mimetype='application/json')
+
+def _load_cached_report(date_arg: str = ''):
+    """Snapshot for date_arg, else today's, else the most recent one written."""
+    from datetime import datetime as _dt
+    day = date_arg or _dt.utcnow().strftime('%Y-%m-%d')
+    def load():
+        return REPORT_STORE.load_report(day) or REPORT_STORE.latest_report()
+    try:
+        return REPORT_SNAPSHOTS.get(f'report:{day}', REPORT_STORE.stamp, load)
+    except Exception as e:
+        print(f"Failed to read report store: {e}")
+        return None
 
 @app.route('/report-dates', methods=['GET'])
 def report_dates():
-    """List available dated cache files as YYYY-MM-DD, newest first."""
+    """List available report snapshot dates as YYYY-MM-DD, newest first."""
     try:
-        dir_path, default_file = _resolve_cache_dir_and_file()
-        names = []
-        for fn in os.listdir(dir_path):
-            if fn.startswith('report_cache_') and fn.endswith('.json'):
-                mid = fn[len('report_cache_'):-len('.json')]
-                names.append(mid)
-        names = sorted(names, reverse=True)
-        return jsonify({"dates": names})
+        snap = REPORT_SNAPSHOTS.get('dates', REPORT_STORE.stamp, lambda: {"dates": REPORT_STORE.list_dates()})
+        return _snapshot_response(snap)
     except Exception as e:
         print(f"Failed to list report dates: {e}")
         return jsonify({"dates": []})
 
-@app.route('/report-refresh', methods=['POST'])
-def report_refresh():
-    """Compute and cache report JSON (to be triggered by cron)."""
-    data = request.json or {}
-    earliest = data.get('earliest') or '-1d'
-    latest = data.get('latest') or 'now'
-    services = data.get('aem_services')
+def _utc_label(epoch: int) -> str:
+    return datetime.utcfromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S')
 
-    result = build_report_data(earliest, latest, services)
-    REPORT_CACHE['data'] = result
-    dated_file = None
+def _day_start(day: str) -> int:
+    """Epoch second of 00:00 UTC on day (YYYY-MM-DD)."""
+    return int((datetime.strptime(day, '%Y-%m-%d') - datetime(1970, 1, 1)).total_seconds())
+
+def _day_snapshot(day: str) -> tuple[dict | None, int | None]:
+    """(snapshot, hwm) for day if it is a day-aligned snapshot (00:00 UTC .. hwm), else (None, None)."""
+    try:
+        hwm = REPORT_STORE.high_water_mark(day)
+        base = REPORT_STORE.load_report(day) if hwm else None
+    except Exception as e:
+        print(f"Failed to read previous snapshot for incremental refresh: {e}")
+        return None, None
+    if not base or base.get('earliest') != _utc_label(_day_start(day)):
+        # Older rolling '-1d' snapshots can't be extended without overlapping the previous day
+        return None, None
+    return base, hwm
+
+def _extend_snapshot(base: dict, day_start: int, hwm: int, until: int, progress=None) -> dict:
+    """base (complete up to hwm) plus the delta report for [hwm, until].
+
+    Errors and paths are only queried for the delta; submission totals are one
+    aggregate over the whole day so far, since every service's denominator moves.
+    """
+    totals = list_services_total_submissions(str(day_start), str(until))
+    # The merge replaces every denominator with these, so the delta needn't query its own
+    delta = build_report_data(str(hwm), str(until), None, progress=progress, totals=totals)
+    delta['latest'] = _utc_label(until)
+    return merge_report_delta(base, delta, totals)
+
+def _store_snapshot(day: str, result: dict, hwm: int | None) -> None:
     try:
-        from datetime import datetime as _dt
-        dir_path, default_file = _resolve_cache_dir_and_file()
-        # Determine today's dated file name from generated_at (UTC date)
-        gen = result.get('generated_at', '')[:10]
+        REPORT_STORE.save_report(day, result, hwm=hwm)
+        update_rollups(REPORT_STORE, day, result)
+        REPORT_SNAPSHOTS.bump_generation()
+        REPORT_SNAPSHOTS.put(f'report:{day}', result, REPORT_STORE.stamp())
+    except Exception as e:
+        print(f"Failed to write report store: {e}")
+    try:
+        write_dashboard_files(day, result)
+    except Exception as e:
+        print(f"Failed to write dashboard HTML for {day}: {e}")
+
+def refresh_report(earliest: str | None = None, latest: str | None = None, services: list[str] | None = None, full: bool = False, progress=None) -> dict:
+    """Build (or incrementally extend) today's snapshot and store it.
+
+    By default a day's snapshot covers 00:00 UTC to the refresh time, so days
+    never overlap in the week/month rollups. An existing snapshot for today is
+    extended by querying only [high-water mark, now]; the first refresh of a
+    day also extends yesterday's snapshot up to midnight. An explicit window or
+    service list is built as given and stored under the UTC date it was
+    generated; full=True rebuilds today's snapshot from midnight.
+
+    Under a deadline, a result cut short (deadline.is_partial()) is returned
+    with partial=True but not stored, so the high-water mark stays put and the
+    next refresh queries the same window again.
+    """
+    import time as _time
+    now_epoch = int(_time.time())
+    if earliest or latest or services:
+        result = REPORT_ENGINE.get(earliest or '-1d', latest or 'now', services, progress=progress, refresh=True).to_dict()
+        # Snapshot date is the UTC date of generated_at
+        day = datetime.utcnow().strftime('%Y-%m-%d')
         try:
-            dt = _dt.strptime(gen, '%Y-%m-%d')
+            day = datetime.strptime(result.get('generated_at', '')[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
         except Exception:
-            dt = _dt.utcnow()
-        dated_name = f"report_cache_{dt.strftime('%Y-%m-%d')}.json"
-        dated_file = os.path.join(dir_path, dated_name)
-        # Write dated file as primary
-        with open(dated_file, 'w', encoding='utf-8') as f2:
-            json.dump(result, f2, ensure_ascii=False, indent=2)
-        # Also write legacy latest snapshot for backward compatibility
+            pass
+        partial = deadline.is_partial()
+        if not partial:
+            # Not day-aligned: no high-water mark to continue from
+            _store_snapshot(day, result, None)
+        return {"mode": "full", "date": day, "result": result, "partial": partial}
+
+    day = _utc_label(now_epoch)[:10]
+    day_start = _day_start(day)
+    yesterday = _utc_label(day_start - 86400)[:10]
+    prev, prev_hwm = _day_snapshot(yesterday)
+    if prev and prev_hwm < day_start:
         try:
-            with open(default_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-        except Exception as _e:
-            print(f"Failed to write latest cache file: {_e}")
-    except Exception as e:
-        print(f"Failed to write report cache file: {e}")
+            completed = _extend_snapshot(prev, day_start - 86400, prev_hwm, day_start)
+            if deadline.is_partial():
+                print(f"Deadline cut the {yesterday} snapshot short; leaving it at its high-water mark")
+            else:
+                _store_snapshot(yesterday, completed, day_start)
+        except Exception as e:
+            print(f"Failed to complete the {yesterday} snapshot: {e}")
+
+    base, hwm = (None, None) if full else _day_snapshot(day)
+    if base and hwm < now_epoch:
+        mode = 'incremental'
+        result = _extend_snapshot(base, day_start, hwm, now_epoch, progress=progress)
+    else:
+        mode = 'full'
+        result = build_report_data(str(day_start), str(now_epoch), None, progress=progress)
+        result['earliest'], result['latest'] = _utc_label(day_start), _utc_label(now_epoch)
+    partial = deadline.is_partial()
+    if not partial:
+        _store_snapshot(day, result, now_epoch)
+    return {"mode": mode, "date": day, "result": result, "partial": partial}
+
+def submit_report_refresh(earliest=None, latest=None, services=None, full: bool = False):
+    """Queue refresh_report(); identical requests coalesce onto the running job. Returns (job, created)."""
+    def run(job):
+        with deadline.deadline_scope(REFRESH_JOB_DEADLINE_SECONDS):
+            out = refresh_report(earliest, latest, services, full, progress=job.report)
+        return {
+            "mode": out["mode"],
+            "date": out["date"],
+            "generated_at": out["result"].get("generated_at"),
+            "partial": out["partial"],
+            "path": REPORT_STORE.db_path,
+        }
+    key = f"{earliest or '-1d'}|{latest or 'now'}|{','.join(sorted(services or []))}|{full}"
+    return REFRESH_JOBS.submit('report-refresh', key, run)
+
+def submit_daily_stats_refresh(days: int):
+    """Queue refresh_daily_stats(). Returns (job, created)."""
+    return REFRESH_JOBS.submit('daily-stats-refresh', str(days), lambda job: refresh_daily_stats(days, progress=job.report))
+
+def _job_response(job, created: bool, wait: bool):
+    """202 with the job id, or the finished job when the caller asked to wait."""
+    if wait:
+        job.wait()
+        status = 200 if job.status == 'succeeded' else 500
+        # Same shape the synchronous endpoints used to return, plus the job record
+        return jsonify({**(job.result or {}), "status": "ok" if status == 200 else job.status, "job_id": job.id, "job": job.to_dict()}), status
     return jsonify({
-        "status": "ok",
-        "generated_at": result.get("generated_at"),
-        "path": dated_file or _resolve_cache_file_path()
-    })
+        "status": job.status,
+        "job_id": job.id,
+        "coalesced": not created,
+        "job_url": f"/jobs/{job.id}",
+    }), 202
 
-@app.route('/report-data', methods=['GET'])
-def report_data():
-    """Return cached JSON. Optional query: ?date=YYYY-MM-DD to fetch dated cache."""
-    date_arg = request.args.get('date', '').strip()
+@app.route('/report-refresh', methods=['POST'])
+def report_refresh():
+    """Queue a report refresh (to be triggered by cron) and return its job id.
+
+    Optional JSON body: {"earliest", "latest", "aem_services", "full": true to skip the incremental merge,
+    "wait": true to block until the job finishes}
+    """
+    data = request.json or {}
+    earliest, latest = data.get('earliest'), data.get('latest')
+    services = data.get('aem_services')
+    full = bool(data.get('full'))
+    job, created = submit_report_refresh(earliest, latest, services, full)
+    return _job_response(job, created, bool(data.get('wait')))
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status and progress of a background refresh job."""
+    job = REFRESH_JOBS.get(job_id)
+    if not job:
+        return jsonify({"error": "unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs', methods=['GET'])
+def job_list():
+    """Most recent background jobs, newest first."""
+    return jsonify({"jobs": [j.to_dict() for j in REFRESH_JOBS.list()]})
+
+@app.route('/splunk-query-costs', methods=['GET'])
+def splunk_query_costs():
+    """SPL templates from the Splunk query log, costliest first.
+
+    Query: sort (total_run_duration default, avg_run_duration, max_run_duration,
+    total_scan_count, avg_scan_count, count), limit (default 20), origin
+    (only templates run from that function, e.g. get_latest_failures_by_path).
+    """
+    sort = request.args.get('sort', '').strip() or 'total_run_duration'
+    if sort not in RANK_KEYS:
+        return jsonify({"error": f"sort must be one of: {', '.join(RANK_KEYS)}"}), 400
     try:
-        dir_path, default_file = _resolve_cache_dir_and_file()
-        target_file = default_file
-        if date_arg:
-            candidate = os.path.join(dir_path, f'report_cache_{date_arg}.json')
-            if os.path.exists(candidate):
-                target_file = candidate
-        else:
-            # No date specified: prefer today's dated cache if present
-            from datetime import datetime as _dt
-            today = _dt.utcnow().strftime('%Y-%m-%d')
-            today_file = os.path.join(dir_path, f'report_cache_{today}.json')
-            if os.path.exists(today_file):
-                target_file = today_file
-        if os.path.exists(target_file):
-            with open(target_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            REPORT_CACHE['data'] = data
-            return jsonify(data)
-    except Exception as e:
-        print(f"Failed to read report cache file: {e}")
-    if 'data' in REPORT_CACHE:
-        return jsonify(REPORT_CACHE['data'])
-    return jsonify({"error": "no cached data; POST /report-refresh first"}), 404
+        limit = max(1, min(int(request.args.get('limit', '20')), 500))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    origin = request.args.get('origin', '').strip()
+    return jsonify({"sort": sort, "templates": QUERY_LOG.rank(sort, limit, origin)})
+
+_REPORT_DATA_PARAMS = ('service', 'program', 'q', 'sort', 'order', 'page', 'page_size', 'fields')
+
+def _report_query_options(args) -> dict:
+    """Validated /report-data query options; raises ValueError with a client-facing message."""
+    sort = args.get('sort', '').strip() or 'error_count'
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+    order = args.get('order', '').strip().lower() or ('asc' if sort in ('aem_service', 'program_name') else 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+    try:
+        page = int(args.get('page', '1'))
+        page_size = int(args['page_size']) if args.get('page_size') else (50 if 'page' in args else None)
+    except ValueError:
+        raise ValueError("page and page_size must be integers")
+    if page < 1 or (page_size is not None and not 1 <= page_size <= MAX_PAGE_SIZE):
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+    return {
+        "service": args.get('service', '').strip(),
+        "program": args.get('program', '').strip(),
+        "q": args.get('q', '').strip(),
+        "sort": sort,
+        "order": order,
+        "page": page,
+        "page_size": page_size,
+        "fields": args.get('fields', '').strip(),
+    }
 
-@app.route('/report-week', methods=['GET'])
-def report_week():
-    """Merge daily caches for a Saturday→Friday week and return a weekly report.
+@app.route('/report-data', methods=['GET'])
+def report_data():
+    """Return cached JSON. Optional query: ?date=YYYY-MM-DD to fetch a dated snapshot.
 
-    Query params:
-      - friday: YYYY-MM-DD (optional). If omitted, uses the most recent Friday (UTC today or earlier).
+    Filtering/paging (any of these switches to an indexed view with a 'page' block):
+    service, program, q (case-insensitive substring), sort, order, page, page_size,
+    fields=summary (items without paths) or a comma list of item fields.
     """
-    from datetime import datetime as _dt, timedelta as _td
-    friday_arg = (request.args.get('friday') or '').strip()
+    snap = _load_cached_report(request.args.get('date', '').strip())
+    if not snap:
+        return jsonify({"error": "no cached data; POST /report-refresh first"}), 404
+    if not any(k in request.args for k in _REPORT_DATA_PARAMS):
+        return _snapshot_response(snap)
     try:
-        dir_path, _default_file = _resolve_cache_dir_and_file()
-        # Determine target Friday (UTC)
-        if friday_arg:
-            friday = _dt.strptime(friday_arg, '%Y-%m-%d')
-        else:
-            today = _dt.utcnow().date()
-            # weekday(): Monday=0 ... Sunday=6 → Friday=4
-            # If today is before Friday in the week, go back to last Friday
-            delta_days = (today.weekday() - 4) % 7
-            friday = _dt(today.year, today.month, today.day) - _td(days=delta_days)
-        # Build date list Saturday→Friday inclusive
-        start = friday - _td(days=6)
-        date_list = [(start + _td(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-
-        # Load available daily reports (support both YYYY-MM-DD and YYYY_MM_DD filenames)
-        daily_reports = []
-        try:
-            import re
-            files = []
-            for fn in os.listdir(dir_path):
-                m = re.match(r'^report_cache_(\d{4})[-_](\d{2})[-_](\d{2})\.json$', fn)
-                if not m:
-                    continue
-                y, mo, da = m.groups()
-                try:
-                    d_obj = _dt(int(y), int(mo), int(da))
-                except Exception:
-                    continue
-                if start.date() <= d_obj.date() <= friday.date():
-                    files.append((d_obj.date(), os.path.join(dir_path, fn)))
-            # Sort by date ascending
-            files.sort(key=lambda t: t[0])
-            for _d, fp in files:
-                try:
-                    with open(fp, 'r', encoding='utf-8') as f:
-                        daily_reports.append(json.load(f))
-                except Exception as _e:
-                    print(f"Failed to read daily cache {fp}: {_e}")
-        except Exception as _e:
-            print(f"Failed to enumerate daily caches in {dir_path}: {_e}")
-
-        if not daily_reports:
-            return jsonify({"error": "No daily caches found for requested week", "week": {"start": start.strftime('%Y-%m-%d'), "friday": friday.strftime('%Y-%m-%d')}}), 404
+        opts = _report_query_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    key = f"report-data:{snap.etag}:" + '&'.join(f"{k}={opts[k]}" for k in sorted(opts))
+    view = REPORT_SNAPSHOTS.get(key, REPORT_STORE.stamp, lambda: REPORT_INDEXES.get(snap).query(**opts))
+    return _snapshot_response(view)
+
+@app.route('/report-data/service/<path:aem_service>', methods=['GET'])
+def report_data_service(aem_service):
+    """Full detail (paths and messages) for one service of a cached snapshot. Optional ?date=YYYY-MM-DD."""
+    snap = _load_cached_report(request.args.get('date', '').strip())
+    if not snap:
+        return jsonify({"error": "no cached data; POST /report-refresh first"}), 404
+    view = REPORT_SNAPSHOTS.get(
+        f"report-data:{snap.etag}:service:{aem_service.lower()}",
+        REPORT_STORE.stamp,
+        lambda: REPORT_INDEXES.get(snap).service(aem_service),
+    )
+    if view is None:
+        return jsonify({"error": f"service {aem_service} not in report", "generated_at": snap.data.get('generated_at')}), 404
+    return _snapshot_response(view)
 
-        # Aggregate per-service
-        from collections import defaultdict
-        error_count_by_service = defaultdict(int)
-        total_submissions_by_service = defaultdict(int)
-        program_name_by_service = {}
-        skysi_by_service = {}
-        # path -> set of msgs (unique by text), also keep (time,msg)
-        messages_by_service_and_path = defaultdict(lambda: defaultdict(dict))  # svc->{path->{msg_text: time}}
-
-        for rep in daily_reports:
-            items = rep.get('report_items') or []
-            svc_rows = rep.get('svc_rows') or []
-            # Use svc_rows to capture SKYSI and program name if present
-            for r in svc_rows:
-                svc = r.get('aem_service') or ''
-                if not svc:
-                    continue
-                program = r.get('program_name')
-                if program and svc not in program_name_by_service:
-                    program_name_by_service[svc] = program
-                skysi_key = r.get('skysi_key')
-                skysi_url = r.get('skysi_url')
-                if skysi_key and svc not in skysi_by_service:
-                    skysi_by_service[svc] = {"skysi_key": skysi_key, "skysi_url": skysi_url}
-
-            for it in items:
-                svc = it.get('aem_service') or ''
-                if not svc:
-                    continue
-                error_count_by_service[svc] += int(it.get('error_count') or 0)
-                total_submissions_by_service[svc] += int(it.get('total_form_submissions') or 0)
-                if svc not in program_name_by_service:
-                    pn = it.get('program_name')
-                    if pn:
-                        program_name_by_service[svc] = pn
-                for pe in (it.get('paths') or []):
-                    p = pe.get('path') or ''
-                    if not p:
-                        continue
-                    for m in (pe.get('messages') or []):
-                        # messages are either string or {time,msg}
-                        if isinstance(m, dict):
-                            msg_text = (m.get('msg') or '').strip()
-                            msg_time = (m.get('time') or '').strip()
-                        else:
-                            msg_text = str(m).strip()
-                            msg_time = ''
-                        if not msg_text:
-                            continue
-                        # store first seen time for this text
-                        if msg_text not in messages_by_service_and_path[svc][p]:
-                            messages_by_service_and_path[svc][p][msg_text] = msg_time
-
-        # Build weekly structures
-        weekly_services = sorted(error_count_by_service.keys(), key=lambda s: error_count_by_service[s], reverse=True)
-
-        weekly_svc_rows = []
-        for svc in weekly_services:
-            skysi = skysi_by_service.get(svc) or {}
-            weekly_svc_rows.append({
-                'aem_service': svc,
-                'program_name': program_name_by_service.get(svc, '<unknown program name>'),
-                'error_count': error_count_by_service[svc],
-                'skysi_key': skysi.get('skysi_key', ''),
-                'skysi_url': skysi.get('skysi_url', ''),
-            })
-
-        weekly_report_items = []
-        for svc in weekly_services:
-            path_entries = []
-            for p, msg_map in messages_by_service_and_path[svc].items():
-                # limit to 10 unique messages per path
-                limited_msgs = []
-                for idx, (txt, tme) in enumerate(msg_map.items()):
-                    if idx >= 10:
-                        break
-                    limited_msgs.append({'time': tme, 'msg': txt} if tme else {'msg': txt})
-                # derive up to 3 distinct times for the badge from messages
-                times = [m.get('time') for m in limited_msgs if isinstance(m, dict) and m.get('time')]
-                times = [t for t in times if t]
-                badge_time = ', '.join(times[:10]) if times else ''
-                path_entries.append({'path': p, 'time': badge_time, 'messages': limited_msgs})
-
-            total_forms = total_submissions_by_service[svc]
-            errs = error_count_by_service[svc]
-            failure_pct = round((errs / total_forms) * 100, 2) if total_forms else 0.0
-            weekly_report_items.append({
-                'aem_service': svc,
-                'error_count': errs,
-                'total_form_submissions': total_forms,
-                'failure_rate_pct': failure_pct,
-                'program_name': program_name_by_service.get(svc, '<unknown program name>'),
-                'paths': path_entries,
-            })
-
-        weekly = {
+def _default_friday():
+    """Most recent Friday (UTC today or earlier) as a datetime."""
+    from datetime import datetime as _dt, timedelta as _td
+    today = _dt.utcnow().date()
+    # weekday(): Monday=0 ... Sunday=6 → Friday=4
+    # If today is before Friday in the week, go back to last Friday
+    delta_days = (today.weekday() - 4) % 7
+    return _dt(today.year, today.month, today.day) - _td(days=delta_days)
+
+def _week_snapshot(friday):
+    """Cached weekly payload for the Saturday→Friday week ending on friday (a datetime), or None."""
+    from datetime import datetime as _dt, timedelta as _td
+    # Build date list Saturday→Friday inclusive
+    start = friday - _td(days=6)
+    date_list = [(start + _td(days=i)).strftime('%Y-%m-%d') for i in range(7)]
+
+    def load():
+        state = get_rollup(REPORT_STORE, 'week', friday.strftime('%Y-%m-%d'))
+        if not state:
+            return None
+        merged = render_rollup(state)
+        return {
             'generated_at': _dt.utcnow().isoformat() + 'Z',
             'earliest': start.strftime('%Y-%m-%d 00:00:00'),
             'latest': friday.strftime('%Y-%m-%d 23:59:59'),
-            'services': weekly_services,
-            'svc_rows': weekly_svc_rows,
-            'report_items': weekly_report_items,
+            'services': merged['services'],
+            'svc_rows': merged['svc_rows'],
+            'report_items': merged['report_items'],
             'week': {
                 'start': start.strftime('%Y-%m-%d'),
                 'friday': friday.strftime('%Y-%m-%d'),
                 'dates': date_list,
             }
         }
-        return jsonify(weekly)
-    except Exception as e:
-        print(f"Failed to build weekly report: {e}")
-        return jsonify({"error": "Failed to build weekly report"}), 500
+    return REPORT_SNAPSHOTS.get(f"week:{friday.strftime('%Y-%m-%d')}", REPORT_STORE.stamp, load)
 
-@app.route('/report-dashboard-view', methods=['GET'])
-def report_dashboard_view():
-    """Render dashboard HTML from cached JSON only. Optional ?date=YYYY-MM-DD."""
-    cached = None
-    date_arg = request.args.get('date', '').strip()
+@app.route('/report-week', methods=['GET'])
+def report_week():
+    """Merge daily snapshots for a Saturday→Friday week and return a weekly report.
+
+    Query params:
+      - friday: YYYY-MM-DD (optional). If omitted, uses the most recent Friday (UTC today or earlier).
+    """
+    from datetime import datetime as _dt, timedelta as _td
+    friday_arg = (request.args.get('friday') or '').strip()
     try:
-        dir_path, default_file = _resolve_cache_dir_and_file()
-        target_file = default_file
-        if date_arg:
-            candidate = os.path.join(dir_path, f'report_cache_{date_arg}.json')
-            if os.path.exists(candidate):
-                target_file = candidate
-        else:
-            from datetime import datetime as _dt
-            today = _dt.utcnow().strftime('%Y-%m-%d')
-            today_file = os.path.join(dir_path, f'report_cache_{today}.json')
-            if os.path.exists(today_file):
-                target_file = today_file
-        if os.path.exists(target_file):
-            with open(target_file, 'r', encoding='utf-8') as f:
-                cached = json.load(f)
-            REPORT_CACHE['data'] = cached
-        else:
-            cached = REPORT_CACHE.get('data')
+        # Determine target Friday (UTC)
+        friday = _dt.strptime(friday_arg, '%Y-%m-%d') if friday_arg else _default_friday()
+        snap = _week_snapshot(friday)
+        if not snap:
+            start = friday - _td(days=6)
+            return jsonify({"error": "No daily caches found for requested week", "week": {"start": start.strftime('%Y-%m-%d'), "friday": friday.strftime('%Y-%m-%d')}}), 404
+        return _snapshot_response(snap)
     except Exception as e:
-        print(f"Failed to read report cache file for dashboard: {e}")
-        cached = REPORT_CACHE.get('data')
-    if not cached:
-        return ("No cached data. Please POST /report-refresh first.", 404, { 'Content-Type': 'text/plain; charset=utf-8' })
-    html = render_dashboard_html(cached.get('svc_rows', []), cached.get('report_items', []), cached.get('earliest',''), cached.get('latest',''))
-    return (html, 200, { 'Content-Type': 'text/html; charset=utf-8' })
+        print(f"Failed to build weekly report: {e}")
+        return jsonify({"error": "Failed to build weekly report"}), 500
 
-@app.route('/skyops-last7', methods=['GET'])
-def skyops_last7():
-    """Fetch SKYOPS issues created in the last N days (default 7) filtered by labels and component.
+@app.route('/report-month', methods=['GET'])
+def report_month():
+    """Monthly report served from the month rollup.
 
     Query params:
-      - days: integer, defaults to 7
+      - month: YYYY-MM (optional). Defaults to the current UTC month.
     """
-    start = (request.args.get('start') or '').strip()  # YYYY-MM-DD
+    from datetime import datetime as _dt
+    month_arg = (request.args.get('month') or '').strip() or _dt.utcnow().strftime('%Y-%m')
+    try:
+        key, start, end = period_for('month', month_arg)
+    except Exception:
+        return jsonify({"error": "month must be YYYY-MM"}), 400
+    try:
+        def load():
+            state = get_rollup(REPORT_STORE, 'month', start)
+            if not state:
+                return None
+            merged = render_rollup(state)
+            return {
+                'generated_at': _dt.utcnow().isoformat() + 'Z',
+                'earliest': f'{start} 00:00:00',
+                'latest': f'{end} 23:59:59',
+                'services': merged['services'],
+                'svc_rows': merged['svc_rows'],
+                'report_items': merged['report_items'],
+                'month': {'month': key, 'start': start, 'end': end, 'dates': merged['dates']},
+            }
+        snap = REPORT_SNAPSHOTS.get(f'month:{key}', REPORT_STORE.stamp, load)
+        if not snap:
+            return jsonify({"error": "No daily caches found for requested month", "month": {"month": key, "start": start, "end": end}}), 404
+        return _snapshot_response(snap)
+    except Exception as e:
+        print(f"Failed to build monthly report: {e}")
+        return jsonify({"error": "Failed to build monthly report"}), 500
+
+@app.route('/report-range', methods=['GET'])
+def report_range():
+    """Report merged over an arbitrary date range. Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)."""
+    from datetime import datetime as _dt
+    start = (request.args.get('start') or '').strip()
     end = (request.args.get('end') or '').strip()
-    fetch_all = (request.args.get('all') or '').strip().lower() in ('1','true','yes')
     try:
-        days = int(request.args.get('days', '7'))
+        if (_dt.strptime(end, '%Y-%m-%d') - _dt.strptime(start, '%Y-%m-%d')).days < 0:
+            raise ValueError('end before start')
     except Exception:
-        days = 7
-    # Combined JQL: SKYOPS and FORMS (Adaptive Forms components)
+        return jsonify({"error": "start and end must be YYYY-MM-DD with start <= end"}), 400
+    try:
+        def load():
+            merged = range_report(REPORT_STORE, start, end)
+            if not merged:
+                return None
+            return {
+                'generated_at': _dt.utcnow().isoformat() + 'Z',
+                'earliest': f'{start} 00:00:00',
+                'latest': f'{end} 23:59:59',
+                'services': merged['services'],
+                'svc_rows': merged['svc_rows'],
+                'report_items': merged['report_items'],
+                'range': {'start': start, 'end': end, 'dates': merged['dates']},
+            }
+        snap = REPORT_SNAPSHOTS.get(f'range:{start}:{end}', REPORT_STORE.stamp, load)
+        if not snap:
+            return jsonify({"error": "No daily caches found for requested range", "range": {"start": start, "end": end}}), 404
+        return _snapshot_response(snap)
+    except Exception as e:
+        print(f"Failed to build range report: {e}")
+        return jsonify({"error": "Failed to build range report"}), 500
+
+def dashboard_html_paths(day: str) -> tuple[str, str]:
+    dir_path, _default_file = _resolve_cache_dir_and_file()
+    html_path = os.path.join(dir_path, f'report_dashboard_{day}.html')
+    return html_path, html_path + '.gz'
+
+def write_dashboard_files(day: str, data: dict) -> str:
+    """Render a snapshot's dashboard once, writing report_dashboard_<day>.html and .html.gz next to the store."""
+    import gzip
+    html_path, gz_path = dashboard_html_paths(day)
+    body = render_html(ReportModel.from_dict(data)).encode('utf-8')
+    # .gz first: once the .html exists, its compressed copy does too
+    for path, payload in ((gz_path, gzip.compress(body, compresslevel=9, mtime=0)), (html_path, body)):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    return html_path
+
+def _snapshot_day(date_arg: str = '') -> str | None:
+    """Stored snapshot date for date_arg (or today), else the most recent one, like _load_cached_report."""
+    from datetime import datetime as _dt
+    day = date_arg or _dt.utcnow().strftime('%Y-%m-%d')
+    try:
+        dates = REPORT_SNAPSHOTS.get('dates', REPORT_STORE.stamp, lambda: {"dates": REPORT_STORE.list_dates()}).data['dates']
+    except Exception as e:
+        print(f"Failed to list report dates: {e}")
+        return None
+    if day in dates:
+        return day
+    return dates[0] if dates else None
+
+def _send_dashboard_file(day: str):
+    html_path, gz_path = dashboard_html_paths(day)
+    if not os.path.exists(html_path):
+        # Snapshots imported or stored before pre-rendering: render once, serve the file from then on
+        data = REPORT_STORE.load_report(day)
+        if not data:
+            return ("No cached data. Please POST /report-refresh first.", 404, { 'Content-Type': 'text/plain; charset=utf-8' })
+        write_dashboard_files(day, data)
+    use_gz = 'gzip' in accepted_encodings(request.headers.get('Accept-Encoding')) and os.path.exists(gz_path)
+    resp = send_file(gz_path if use_gz else html_path, mimetype='text/html', conditional=True, etag=True)
+    if use_gz:
+        resp.headers['Content-Encoding'] = 'gzip'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+@app.route('/report-dashboard-view', methods=['GET'])
+def report_dashboard_view():
+    """Serve the pre-rendered dashboard HTML of a stored snapshot. Optional ?date=YYYY-MM-DD."""
+    day = _snapshot_day(request.args.get('date', '').strip())
+    if not day:
+        return ("No cached data. Please POST /report-refresh first.", 404, { 'Content-Type': 'text/plain; charset=utf-8' })
+    try:
+        return _send_dashboard_file(day)
+    except Exception as e:
+        print(f"Failed to serve dashboard HTML for {day}: {e}")
+        return ("Failed to render dashboard", 500, { 'Content-Type': 'text/plain; charset=utf-8' })
+
+ISSUE_LIST_PARAMS = {'fields': 'summary,status,created,assignee', 'maxResults': 200}
+
+CSOPM_JQL = (
+    'project = CSOPM '
+    'AND status in (closed, done, complete) '
+    'AND "CSO Severity" not in ("Sev 1", "Sev 2", "Sev 3", "Sev 4") '
+    'AND (assignee in (membersOf(ORG-SALILT-ALL), membersOf(ORG-SALILT-ALL-TEMP))) '
+    'AND assignee != salilt'
+)
+
+def skyops_jql(start: str = '', end: str = '', fetch_all: bool = False, days: int = 7) -> str:
+    """Combined SKYOPS/FORMS (Adaptive Forms components) JQL for /skyops-last7."""
     base = (
         '('
         '  ('
@@ -579,8 +741,8 @@ def skyops_last7():
         'AND status NOT IN (Done, Closed, Resolved) '
     )
     if fetch_all:
-        jql = base
-    elif start and end:
+        return base
+    if start and end:
         # Use DATE-ONLY bounds as requested: yyyy/MM/dd
         def _date_only(s: str) -> str:
             s = (s or '').strip()
@@ -588,18 +750,12 @@ def skyops_last7():
                 return ''
             s = s[:10]  # YYYY-MM-DD
             return s.replace('-', '/')
-        start_q = _date_only(start)
-        end_q = _date_only(end)
-        jql = base + f'AND created >= "{start_q}" AND created <= "{end_q}"'
-    else:
-        jql = base + f'AND created >= -{days}d'
-    # Limit fields for performance
-    result = jira_query_tool(jql, extra_params={
-        'fields': 'summary,status,created,assignee',
-        'maxResults': 200
-    }) or {}
+        return base + f'AND created >= "{_date_only(start)}" AND created <= "{_date_only(end)}"'
+    return base + f'AND created >= -{days}d'
+
+def issue_rows(result: dict) -> list[dict]:
     issues_out = []
-    for it in (result.get('issues') or []):
+    for it in ((result or {}).get('issues') or []):
         key = it.get('key')
         fields = it.get('fields') or {}
         issues_out.append({
@@ -609,56 +765,58 @@ def skyops_last7():
             'created': fields.get('created', ''),
             'assignee': (fields.get('assignee') or {}).get('displayName', ''),
         })
-    # Optional sorting support: sort by status | created | assignee
-    sort_by = (request.args.get('sort') or '').strip().lower()
-    sort_order = (request.args.get('order') or 'asc').strip().lower()
+    return issues_out
+
+def sort_issue_rows(issues_out: list[dict], sort_by: str, sort_order: str = 'asc') -> list[dict]:
+    """Optional sorting support: sort by status | created | assignee."""
     reverse = (sort_order == 'desc')
-    if sort_by in ('status', 'created', 'assignee'):
-        if sort_by == 'status':
-            issues_out.sort(key=lambda x: (x.get('status') or '').lower(), reverse=reverse)
-        elif sort_by == 'created':
-            issues_out.sort(key=lambda x: (x.get('created') or ''), reverse=reverse)
-        elif sort_by == 'assignee':
-            issues_out.sort(key=lambda x: (x.get('assignee') or '').lower(), reverse=reverse)
+    if sort_by == 'status':
+        issues_out.sort(key=lambda x: (x.get('status') or '').lower(), reverse=reverse)
+    elif sort_by == 'created':
+        issues_out.sort(key=lambda x: (x.get('created') or ''), reverse=reverse)
+    elif sort_by == 'assignee':
+        issues_out.sort(key=lambda x: (x.get('assignee') or '').lower(), reverse=reverse)
+    return issues_out
+
+def skyops_args(args) -> dict:
+    """skyops_jql arguments from /skyops-last7 query params (start, end, all, days)."""
+    try:
+        days = int(args.get('days', '7'))
+    except Exception:
+        days = 7
+    return {
+        'start': (args.get('start') or '').strip(),  # YYYY-MM-DD
+        'end': (args.get('end') or '').strip(),
+        'fetch_all': (args.get('all') or '').strip().lower() in ('1', 'true', 'yes'),
+        'days': days,
+    }
+
+@app.route('/skyops-last7', methods=['GET'])
+def skyops_last7():
+    """Fetch SKYOPS issues created in the last N days (default 7) filtered by labels and component.
+
+    Query params:
+      - days: integer, defaults to 7
+    """
+    jql = skyops_jql(**skyops_args(request.args))
+    # Limit fields for performance
+    result = jira_query_tool(jql, extra_params=dict(ISSUE_LIST_PARAMS)) or {}
+    issues_out = sort_issue_rows(
+        issue_rows(result),
+        (request.args.get('sort') or '').strip().lower(),
+        (request.args.get('order') or 'asc').strip().lower(),
+    )
     return jsonify({'count': len(issues_out), 'issues': issues_out, 'jql': jql})
 
 @app.route('/csopm-open', methods=['GET'])
 def csopm_open():
     """Fetch CSOPM tickets that are open (not closed/done/complete) assigned to specific org members except 'salilt'."""
-    jql = (
-        'project = CSOPM '
-        'AND status in (closed, done, complete) '
-        'AND "CSO Severity" not in ("Sev 1", "Sev 2", "Sev 3", "Sev 4") '
-        'AND (assignee in (membersOf(ORG-SALILT-ALL), membersOf(ORG-SALILT-ALL-TEMP))) '
-        'AND assignee != salilt'
-    )
-    result = jira_query_tool(jql, extra_params={
-        'fields': 'summary,status,created,assignee',
-        'maxResults': 200
-    }) or {}
-    issues_out = []
-    for it in (result.get('issues') or []):
-        key = it.get('key')
-        fields = it.get('fields') or {}
-        issues_out.append({
-            'key': key,
-            'summary': fields.get('summary', ''),
-            'status': (fields.get('status') or {}).get('name', ''),
-            'created': fields.get('created', ''),
-            'assignee': (fields.get('assignee') or {}).get('displayName', ''),
-        })
-    return jsonify({'count': len(issues_out), 'issues': issues_out, 'jql': jql})
+    result = jira_query_tool(CSOPM_JQL, extra_params=dict(ISSUE_LIST_PARAMS)) or {}
+    issues_out = issue_rows(result)
+    return jsonify({'count': len(issues_out), 'issues': issues_out, 'jql': CSOPM_JQL})
 
-@app.route('/daily-stats-refresh', methods=['POST'])
-def daily_stats_refresh():
-    """Compute daily submission stats for the past N days and save to JSON in daily-data/daily_stats.json.
-    Optional JSON body: {"days": 120}
-    """
-    try:
-        data = request.json or {}
-        days = int(data.get('days', 1))
-    except Exception:
-        days = 120
+def refresh_daily_stats(days: int, progress=None) -> dict:
+    """Compute per-day submission counts for the last `days` days (ending yesterday) and append them to the store."""
     # Build date-wise stats using strict 1-day windows to ensure
     # Total, Passed (code<500) and Failed (code>=500) are accurate per day
     from datetime import datetime as _dt, timedelta as _td
@@ -666,90 +824,105 @@ def daily_stats_refresh():
     base = _dt.utcnow().date() - _td(days=1)
     # Generate oldest→newest, ending at "yesterday"
     date_list = [ (base - _td(days=i)).strftime('%Y-%m-%d') for i in range(max(1, days)-1, -1, -1) ]
+    # Hand-edited or regenerated JSON first, so the counts computed below supersede it
+    import_daily_stats_files()
     stats = []
-    for d in date_list:
+    for idx, d in enumerate(date_list):
+        if progress:
+            progress(idx / len(date_list), f"day {idx + 1}/{len(date_list)}: {d}")
         try:
             stats.append(get_daily_counts_for_date(d))
         except Exception as _e:
             print(f"Failed to compute counts for {d}: {_e}")
+    DAILY_COUNTS.append(stats)
+    return {"directory": os.path.dirname(DAILY_COUNTS.path), "path": DAILY_COUNTS.path, "count": len(stats)}
+
+@app.route('/daily-stats-refresh', methods=['POST'])
+def daily_stats_refresh():
+    """Queue computation of daily submission stats for the past N days into the daily counts store.
+    Optional JSON body: {"days": 120, "wait": true}
+    """
+    data = request.json or {}
     try:
-        # Write individual per-day files only
-        base_dir = os.path.join(os.path.dirname(__file__), 'submission-count')
-        os.makedirs(base_dir, exist_ok=True)
-        for item in stats:
-            try:
-                day = (item.get('day') or '')[:10]
-                if not day:
-                    continue
-                single_payload = {
-                    "day": day,
-                    "total": int(item.get('total', 0)),
-                    "passed": int(item.get('passed', 0)),
-                    "failed": int(item.get('failed', 0)),
-                }
-                # Write only the supported naming style used by the graph aggregator
-                fp_counts = os.path.join(base_dir, f'daily_counts_{day}.json')
-                with open(fp_counts, 'w', encoding='utf-8') as fpc:
-                    json.dump(single_payload, fpc, ensure_ascii=False, indent=2)
-            except Exception as _e:
-                print(f"Failed to write per-day file: {_e}")
-        return jsonify({"status": "ok", "directory": base_dir, "count": len(stats)})
-    except Exception as e:
-        print(f"Failed to write daily_stats.json: {e}")
-        return jsonify({"error": "Failed to write daily stats"}), 500
+        days = int(data.get('days', 1))
+    except Exception:
+        days = 120
+    job, created = submit_daily_stats_refresh(days)
+    return _job_response(job, created, bool(data.get('wait')))
 
-@app.route('/daily-stats', methods=['GET'])
-def daily_stats():
-    """Return daily stats JSON if present, else compute ad-hoc for last 60 days."""
-    # Prefer new submission-count/daily_counts.json
+def _daily_stats_sources() -> tuple[str, str]:
+    """(consolidated daily_counts.json, legacy daily_stats.json) folded into the store when newer."""
     new_path = os.path.join(os.path.dirname(__file__), 'submission-count', 'daily_counts.json')
-    legacy_path = None
     try:
         dir_path, _default = _resolve_cache_dir_and_file()
         legacy_path = os.path.join(dir_path, 'daily_stats.json')
     except Exception:
         legacy_path = os.path.join(os.path.dirname(__file__), 'daily-data', 'daily_stats.json')
-    if os.path.exists(new_path):
-        try:
-            with open(new_path, 'r', encoding='utf-8') as f:
-                return jsonify(json.load(f))
-        except Exception:
-            pass
-    if legacy_path and os.path.exists(legacy_path):
+    return (new_path, legacy_path)
+
+def import_daily_stats_files() -> int:
+    """Append daily_counts.json / daily_stats.json to the store when written after it.
+
+    A JSON file edited or regenerated since the store was written wins, as it
+    did before the store existed. Runs at startup and with each daily-stats
+    refresh so /daily-stats reads stay read-only.
+    """
+    new_path, legacy_path = _daily_stats_sources()
+    # Legacy first, so the consolidated file supersedes it
+    return sum(DAILY_COUNTS.import_if_newer(path) for path in (legacy_path, new_path) if path)
+
+def _file_stamp(*paths) -> tuple:
+    out = []
+    for p in paths:
         try:
-            with open(legacy_path, 'r', encoding='utf-8') as f:
-                return jsonify(json.load(f))
-        except Exception:
-            pass
-    # Fallback: aggregate individual per-day files submission-count/daily_counts_YYYY-MM-DD.json
-    try:
-        folder = os.path.join(os.path.dirname(__file__), 'submission-count')
-        files = []
-        if os.path.isdir(folder):
-            for fn in os.listdir(folder):
-                if fn.startswith('daily_counts_') and fn.endswith('.json'):
-                    files.append(os.path.join(folder, fn))
-        stats = []
-        for fp in files:
+            st = os.stat(p)
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+def _load_daily_stats(start: str | None = None, end: str | None = None) -> dict:
+    new_path, legacy_path = _daily_stats_sources()
+    if len(DAILY_COUNTS):
+        stats = DAILY_COUNTS.range(start, end)
+        return {"days": len(stats), "stats": stats}
+    def in_range(payload: dict) -> dict:
+        if not (start or end) or not isinstance(payload.get('stats'), list):
+            return payload
+        stats = [r for r in payload['stats'] if (not start or r.get('day', '') >= start) and (not end or r.get('day', '') <= end)]
+        return {**payload, "days": len(stats), "stats": stats}
+    # Consolidated submission-count/daily_counts.json, then legacy daily_stats.json
+    for path in (new_path, legacy_path):
+        if path and os.path.exists(path):
             try:
-                with open(fp, 'r', encoding='utf-8') as f:
-                    j = json.load(f)
-                day = (j.get('day') or '')[:10]
-                total = int(j.get('total', 0))
-                passed = int(j.get('passed', 0))
-                failed = int(j.get('failed', 0))
-                if day:
-                    stats.append({'day': day, 'total': total, 'passed': passed, 'failed': failed})
+                with open(path, 'r', encoding='utf-8') as f:
+                    return in_range(json.load(f))
             except Exception:
-                continue
-        stats.sort(key=lambda x: x['day'])
-        if stats:
-            return jsonify({"days": len(stats), "stats": stats})
-    except Exception as e:
-        print(f"Failed to aggregate per-day counts: {e}")
+                pass
     # fallback compute
     stats = get_daily_submission_stats(days=60)
-    return jsonify({"days": 60, "stats": stats})
+    return in_range({"days": 60, "stats": stats})
+
+@app.route('/daily-stats', methods=['GET'])
+def daily_stats():
+    """Return daily stats from the daily counts store, else compute ad-hoc for last 60 days.
+    Optional query: ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive).
+    """
+    from datetime import datetime as _dt
+    start = (request.args.get('from') or '').strip() or None
+    end = (request.args.get('to') or '').strip() or None
+    try:
+        for v in (start, end):
+            if v:
+                _dt.strptime(v, '%Y-%m-%d')
+    except Exception:
+        return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+    snap = REPORT_SNAPSHOTS.get(
+        f"daily-stats:{start or ''}:{end or ''}",
+        lambda: (DAILY_COUNTS.stamp(),) + _file_stamp(*_daily_stats_sources()),
+        lambda: _load_daily_stats(start, end),
+    )
+    return _snapshot_response(snap)
 
 @app.route('/daily-stats/day', methods=['GET'])
 def daily_stats_day():
@@ -859,7 +1032,7 @@ Write a concise 1-line summary for a Jira bug, prefixed with '[{program}][p{aem_
 Summary should describe the main issue based on this Splunk error message:
 {splunk_msg}
 """
-    content = llm.call(prompt)
+    content = call_llm(llm, prompt)
     import re
     match = re.search(r'\[.*?\]\[.*?\].*', content)
     if match:
@@ -877,24 +1050,51 @@ New error message:
 Existing comments:
 {chr(10).join(existing_comments)}
 """
-    result = llm.call(prompt)
+    result = call_llm(llm, prompt)
     return "YES" in result.upper()
 
-@app.route('/process', methods=['POST'])
-def process():
-    data = request.json
+def with_partial_flag(payload: dict) -> dict:
+    """Mark a JSON payload whose upstream searches were cut short by the request deadline."""
+    d = deadline.current()
+    if d and d.partial and isinstance(payload, dict):
+        return {**payload, 'partial': True, 'partial_reasons': list(d.reasons)}
+    return payload
+
+def process_request(data: dict) -> tuple[dict, int]:
+    """/process body → (payload, status); shared by the Flask route and the ASGI handler."""
     jira_id = data.get("jira_id")
     user_earliest = data.get("earliest")
     user_latest = data.get("latest")
     print(f"Jira ID: {jira_id}")
     if not jira_id:
-        return jsonify({"error": "Missing required field: jira_id"}), 400
+        return {"error": "Missing required field: jira_id"}, 400
+    # Several viewers opening the same ticket share one Jira/LLM/Splunk run
+    key = ('process', str(jira_id).strip().upper(), (user_earliest or '').strip(), (user_latest or '').strip())
+    def run():
+        # Flag inside the flight so coalesced callers see the leader's partial results as partial
+        payload, status = _process_ticket(jira_id, user_earliest, user_latest)
+        return with_partial_flag(payload), status
+    (payload, status), shared = REQUEST_FLIGHTS.do(key, run)
+    if shared:
+        print(f"Coalesced /process for {jira_id}")
+    return payload, status
 
+@app.route('/process', methods=['POST'])
+def process():
+    payload, status = process_request(request.json or {})
+    return jsonify(payload), status
+
+@search_origin
+@tracing.traced('process.ticket')
+def _process_ticket(jira_id, user_earliest=None, user_latest=None) -> tuple[dict, int]:
+    """Jira fetch → AEM field extraction → Splunk searches for one ticket. Returns (payload, status)."""
     # 1. Jira Agent fetches ticket
     jira_agent = JiraAgent(llm=llm).get()
     def fetch_jira():
         return jira_query_tool(f'issue = {jira_id}')
-    jira_result = fetch_jira()
+    with tracing.span('process.jira_fetch', jira_id=str(jira_id)) as s:
+        jira_result = fetch_jira()
+        s.set(issues=len(jira_result.get("issues") or []))
     aem_fields = extract_aem_fields_from_description(jira_result["issues"][0]["fields"].get("description", ""), llm) if jira_result.get("issues") else {}
     print(f"AEM Fields: {aem_fields}")
     # Normalize extracted fields to avoid 'None' string or None values
@@ -904,7 +1104,7 @@ def process():
             aem_fields[key] = ""
     # If AEM fields are empty, stop here and return context without proceeding
     if not aem_fields:
-        return jsonify({
+        return ({
             "aem_fields": aem_fields,
             "jira_result": jira_result,
             "splunk_result": [],
@@ -913,7 +1113,7 @@ def process():
         }), 200
     # If AEM service is missing, stop as Splunk query depends on it
     if not str(aem_fields.get("aem_service", "")).strip():
-        return jsonify({
+        return ({
             "aem_fields": aem_fields,
             "jira_result": jira_result,
             "splunk_result": [],
@@ -946,14 +1146,16 @@ def process():
             baseline_latest = "now"
 
         # New strategy: use latest top error times and search ±30s windows around each
-        times = get_top_error_times(
-            aem_fields.get("aem_service", ""),
-            aem_fields.get("env_type", ""),
-            aem_fields.get("aem_tier", ""),
-            earliest=baseline_earliest,
-            latest=baseline_latest,
-            limit=10
-        )
+        with tracing.span('process.top_error_times') as s:
+            times = get_top_error_times(
+                aem_fields.get("aem_service", ""),
+                aem_fields.get("env_type", ""),
+                aem_fields.get("aem_tier", ""),
+                earliest=baseline_earliest,
+                latest=baseline_latest,
+                limit=10
+            )
+            s.set(times=len(times))
         print(f"Top error times: {times}")
 
         all_results = []
@@ -972,7 +1174,9 @@ def process():
             l = fmt(t + timedelta(seconds=10))
             query = build_splunk_query(aem_fields, date_created="", user_earliest=e, user_latest=l)
             print(f"Splunk per-time-window query: {query}")
-            res = splunk_search_tool(query, llm=llm, use_llm=False)
+            with tracing.span('process.window_search', window_center=t_str) as s:
+                res = splunk_search_tool(query, llm=llm, use_llm=False)
+                s.set(rows=len(res) if isinstance(res, list) else 0)
             if isinstance(res, list):
                 seen_msgs_window = set()
                 for r in res:
@@ -989,12 +1193,15 @@ def process():
         if not all_results:
             query = build_splunk_query(aem_fields, date_created, user_earliest, user_latest)
             print(f"Splunk fallback query: {query}")
-            return splunk_search_tool(query, llm=llm, use_llm=False)
+            with tracing.span('process.fallback_search') as s:
+                res = splunk_search_tool(query, llm=llm, use_llm=False)
+                s.set(rows=len(res) if isinstance(res, list) else 0)
+            return res
         return all_results
     splunk_result = run_splunk((aem_fields, jira_result))
     # print(f"Splunk Result: {splunk_result}")
     # For testing: return only Splunk results (skip Forms Jira creation)
-    return jsonify({
+    return ({
         "aem_fields": aem_fields,
         "jira_result": jira_result,
         "splunk_result": splunk_result
@@ -1110,7 +1317,21 @@ def find_skysi():
     latest = data.get('latest')
     if not aem_service:
         return jsonify({"error": "Missing aem_service"}), 400
-    result = search_skysi_by_aem_service(aem_service)
+    key = ('find-skysi', aem_service.strip().lower(), (earliest or '-1d').strip(), (latest or 'now').strip())
+    try:
+        payload, shared = REQUEST_FLIGHTS.do(key, lambda: with_partial_flag(_find_skysi_payload(aem_service, earliest, latest)))
+    except BackendUnavailable:
+        payload = snapshot_skysi_payload(aem_service, earliest or '-1d', latest or 'now')
+        if payload is None:
+            raise
+        g.served_snapshot = payload['stale_snapshot']
+        return jsonify(payload), 200
+    if shared:
+        print(f"Coalesced /find-skysi for {aem_service}")
+    return jsonify(payload), 200
+
+def skysi_payload(result: dict, aem_service: str, earliest: str, latest: str, paths) -> dict:
+    """/find-skysi response from the SKYSI search result and the service's PathEntry list."""
     # Log SKYSI ticket id (first match) for quick visibility
     try:
         issues = result.get('issues') or []
@@ -1121,575 +1342,214 @@ def find_skysi():
             print("No SKYSI ticket found for given aem_service")
     except Exception:
         print("No SKYSI ticket found for given aem_service")
-
-    # Default date window: last 1 day for quick lookups
-    if not earliest:
-        earliest = '-1d'
-    if not latest:
-        latest = 'now'
-
-    # Build per-path multi-window errors using access-derived failure times
-    failures_by_path = get_latest_failures_by_path(
-        aem_service, 'prod', 'publish', earliest=earliest, latest=latest, per_path_limit=10
-    )
-    # print(f"Failures by path: {failures_by_path}")
-    # Build a single aemerror query with a subsearch that generates OR windows across all failures
-    path_details = []
-    base_error = (
-        f'index=dx_aem_engineering sourcetype=aemerror level=ERROR '
-        f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-        '(*guideContainer.af.submit.jsp* OR *FormSubmitActionManagerServiceImpl* OR *AdaptiveFormSubmitServlet*) '
-        f'earliest="{earliest}" latest="{latest}" '
-    )
-    sub = (
-        '[ search index=dx_aem_engineering sourcetype=aemaccess '
-        f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-        '(path="/adobe/forms/af/submit*" OR path="*guideContainer.af.submit.jsp") code>=500 '
-        f'earliest="{earliest}" latest="{latest}" '
-        '| sort 0 - _time '
-        '| streamstats count as failCount by path '
-        '| where failCount <= 10 '
-        '| eval f_start=_time, f_end=_time+10 '
-        '| eval query="(_time>=" . f_start . " AND _time<=" . f_end . ")" '
-        '| stats values(query) as queries '
-        '| eval search="(" . mvjoin(queries," OR ") . ")" '
-        '| fields search ] '
-    )
-    final_query = base_error + sub + '| eval EventTimeFmt=strftime(_time,"%Y-%m-%d %H:%M:%S") | table EventTimeFmt msg'
-    # print(f"Combined multi-window query: {final_query}")
-    rows = splunk_search_rows(final_query) or []
-
-    # print(f"Rows: {rows}")
-
-    # Build time windows per path for mapping: [start, end] (10s)
-    from datetime import datetime as _dt
-    windows = []
-    for p, times in failures_by_path.items():
-        for tstr in times:
-            try:
-                start_dt = _dt.strptime(tstr, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-            end_dt = start_dt + timedelta(seconds=10)
-            windows.append((p, start_dt, end_dt))
-
-    # Map error rows to paths via EventTimeFmt ∈ [start, end]
-    path_to_msgs, path_to_seen = {}, {}
-    for p in failures_by_path.keys():
-        path_to_msgs[p] = []
-        path_to_seen[p] = set()
-
-    for r in rows:
-        et = r.get('EventTimeFmt') or ''
-        msg = (r.get('msg') or '').strip()
-        if not et or not msg:
-            continue
-        try:
-            evt_dt = _dt.strptime(et.split('.')[0], "%Y-%m-%d %H:%M:%S")
-        except Exception:
-            continue
-        matched = None
-        for p, sdt, edt in windows:
-            if sdt <= evt_dt <= edt:
-                matched = p
-                break
-        if matched and msg not in path_to_seen[matched]:
-            if len(path_to_msgs[matched]) < 10:
-                path_to_msgs[matched].append(msg)
-                path_to_seen[matched].add(msg)
-
-    for p, times in failures_by_path.items():
-        path_details.append({'path': p, 'times': times, 'messages': path_to_msgs.get(p, [])})
-
-
-    # print(f"Path details: {path_details}")
-
-    return jsonify({
+    return {
         'skysi': result,
         'aem_service': aem_service,
         'earliest': earliest,
         'latest': latest,
-        'paths': path_details
-    }), 200
-
-@app.route('/report', methods=['POST'])
-def report():
-    data = request.json or {}
-    earliest = data.get('earliest')
-    latest = data.get('latest')
-    services = data.get('aem_services')  # optional explicit list
-
-    # Default to last 1 day when not provided
-    if not earliest:
-        earliest = '-1d'
-    if not latest:
-        latest = 'now'
-
-    # 1) Get top services and error counts
-    svc_rows = list_services_with_errors(earliest, latest)
-    counts_map = {r['aem_service']: r.get('error_count', 0) for r in svc_rows}
-    # Map of aem_service -> program_name for later title enrichment
-    program_map = {r['aem_service']: r.get('program_name', '<unknown program name>') for r in svc_rows}
-    # Enrich with SKYSI ticket keys per TenantID
-    jira_base = os.getenv('JIRA_URL', 'https://jira.corp.adobe.com')
-    for r in svc_rows:
-        aem_service_val = r.get('aem_service', '')
-        skysi_key = ''
-        try:
-            lookup = search_skysi_by_aem_service(aem_service_val) if aem_service_val else {}
-            issues = lookup.get('issues') or []
-            if issues:
-                skysi_key = issues[0].get('key', '')
-        except Exception:
-            skysi_key = ''
-        r['skysi_key'] = skysi_key
-        if skysi_key:
-            r['skysi_url'] = f"{jira_base}/browse/{skysi_key}"
-        else:
-            r['skysi_url'] = ''
-    if not services:
-        services = [r['aem_service'] for r in svc_rows]
-
-    # 2) For each service, collect failing paths and errors using the same combined subsearch + time-window mapping as /find-skysi
-    report_items = []
-    for aem_service in services:
-        failures_by_path = get_latest_failures_by_path(aem_service, "prod", "publish", earliest=earliest, latest=latest, per_path_limit=10)
-        # print(f"Failures by path for {aem_service}: {failures_by_path}")
-
-        # Single aemerror query with subsearch-generated OR windows across all failures
-        base_error = (
-            f'index=dx_aem_engineering sourcetype=aemerror level=ERROR '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(*guideContainer.af.submit.jsp* OR *FormSubmitActionManagerServiceImpl* OR *AdaptiveFormSubmitServlet*) '
-            f'earliest="{earliest}" latest="{latest}" '
-        )
-        sub = (
-            '[ search index=dx_aem_engineering sourcetype=aemaccess '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(path="/adobe/forms/af/submit*" OR path="*guideContainer.af.submit.jsp") code>=500 '
-            f'earliest="{earliest}" latest="{latest}" '
-            '| sort 0 - _time '
-            '| streamstats count as failCount by path '
-            '| where failCount <= 10 '
-            '| eval f_start=_time, f_end=_time+10 '
-            '| eval query="(_time>=" . f_start . " AND _time<=" . f_end . ")" '
-            '| stats values(query) as queries '
-            '| eval search="(" . mvjoin(queries," OR ") . ")" '
-            '| fields search ] '
-        )
-        final_query = base_error + sub + '| eval EventTimeFmt=strftime(_time,"%Y-%m-%d %H:%M:%S") | table EventTimeFmt msg'
-        # print(f"Combined multi-window query (report) for {aem_service}: {final_query}")
-        rows = splunk_search_rows(final_query) or []
-
-        # Map rows back to paths via EventTimeFmt within [FailureTime, FailureTime+10s]
-        from datetime import datetime as _dt
-        windows = []
-        for p, times in failures_by_path.items():
-            for tstr in times:
-                try:
-                    sdt = _dt.strptime(tstr, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    continue
-                edt = sdt + timedelta(seconds=10)
-                windows.append((p, sdt, edt))
-
-        path_to_msgs = {p: [] for p in failures_by_path.keys()}
-        path_to_seen = {p: set() for p in failures_by_path.keys()}
-        for r in rows:
-            et = (r.get('EventTimeFmt') or '').split('.')[0]
-            msg = (r.get('msg') or '').strip()
-            if not et or not msg:
-                continue
-            try:
-                evt_dt = _dt.strptime(et, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-            matched = None
-            for p, sdt, edt in windows:
-                if sdt <= evt_dt <= edt:
-                    matched = p
-                    break
-            if matched and msg not in path_to_seen[matched] and len(path_to_msgs[matched]) < 10:
-                path_to_msgs[matched].append(msg)
-                path_to_seen[matched].add(msg)
-
-        path_entries = []
-        for p, times in failures_by_path.items():
-            path_entries.append({
-                "path": p,
-                "time": ", ".join(times[:3]),
-                "messages": path_to_msgs.get(p, [])
-            })
-
-        report_items.append({
-            "aem_service": aem_service,
-            "error_count": counts_map.get(aem_service, 0),
-            "program_name": program_map.get(aem_service, '<unknown program name>'),
-            "paths": path_entries
-        })
+        'paths': [
+            {'path': pe.path, 'times': pe.times, 'messages': [m.msg for m in pe.messages]}
+            for pe in paths
+        ],
+    }
 
-    # 3) Build a formatted PDF (H1/H2/H3, spacing, wrapped stack traces)
-    buf = BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36
-    )
-    styles = getSampleStyleSheet()
-    h1 = styles["Heading1"]
-    h2 = styles["Heading2"]
-    h3 = styles["Heading3"]
-    body = styles["BodyText"]
-    # Slightly adjust sizes
-    h1.fontSize = 18; h1.leading = 22; h1.textColor = colors.HexColor('#0D47A1')
-    h2.fontSize = 14; h2.leading = 18; h2.textColor = colors.HexColor('#1565C0')
-    h3.fontSize = 12; h3.leading = 16; h3.textColor = colors.HexColor('#1976D2')
-    code_style = ParagraphStyle(
-        name="Code",
-        parent=body,
-        fontName="Courier",
-        fontSize=8,
-        leading=10,
-        textColor=colors.black,
-    )
-    # Paragraph-based code style that wraps long tokens and supports splitting across pages
-    code_para_style = ParagraphStyle(
-        name="CodePara",
-        parent=body,
-        fontName="Courier",
-        fontSize=7,
-        leading=8,
-        textColor=colors.black,
-        wordWrap='CJK',
-        allowWidows=1,
-        allowOrphans=1,
-        splitLongWords=True,
-    )
-    msg_title_style = ParagraphStyle(
-        name='MsgTitle',
-        parent=body,
-        fontName='Helvetica-Bold',
-        fontSize=9,
-        leading=11,
-        textColor=colors.HexColor('#37474F'),
-    )
+def _find_skysi_payload(aem_service: str, earliest: str | None = None, latest: str | None = None) -> dict:
+    """SKYSI lookup plus per-path failure times and correlated error messages for one service."""
+    result = search_skysi_by_aem_service(aem_service)
+    # Default date window: last 1 day for quick lookups
+    earliest = earliest or '-1d'
+    latest = latest or 'now'
+    # Per-path failure times and the aemerror messages inside each failure window
+    return skysi_payload(result, aem_service, earliest, latest, fetch_service_paths(aem_service, earliest, latest))
 
-    def header_footer(canv, _doc):
-        canv.saveState()
-        # Header band
-        canv.setFillColor(colors.HexColor('#E3F2FD'))
-        canv.rect(0, A4[1]-20, A4[0], 20, stroke=0, fill=1)
-        canv.setFillColor(colors.HexColor('#0D47A1'))
-        canv.setFont("Helvetica-Bold", 10)
-        canv.drawString(36, A4[1]-14, "Daily Forms Submit Errors Report")
-        # Footer
-        canv.setFillColor(colors.HexColor('#90A4AE'))
-        canv.setFont("Helvetica", 8)
-        canv.drawRightString(A4[0]-36, 14, f"Page {_doc.page}")
-        canv.restoreState()
-
-    def path_badge(path_text: str) -> Table:
-        p = Paragraph(path_text, ParagraphStyle(
-            name="PathBadge",
-            parent=h3,
-            textColor=colors.white,
-        ))
-        t = Table([[p]], colWidths=[A4[0]-72])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#1976D2')),
-            ('LEFTPADDING', (0,0), (-1,-1), 6),
-            ('RIGHTPADDING', (0,0), (-1,-1), 6),
-            ('TOPPADDING', (0,0), (-1,-1), 4),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-            ('ROUNDEDCORNERS', (0,0), (-1,-1), 4),
-        ]))
-        return t
-
-    def code_block_wrapped(msg: str) -> Table:
-        # Escape XML entities for Paragraph
+def load_stored_model(day: str) -> ReportModel | None:
+    try:
+        stored = REPORT_STORE.load_report(day)
+    except Exception as e:
+        print(f"Failed to read report store: {e}")
+        stored = None
+    return ReportModel.from_dict(stored) if stored else None
+
+def latest_stored_model() -> tuple[str | None, ReportModel | None]:
+    """(day, model) of the most recent stored snapshot, served while Splunk's breaker is open."""
+    day = _snapshot_day()
+    model = load_stored_model(day) if day else None
+    return (day, model) if model is not None else (None, None)
+
+_RELATIVE_TIME_RE = re.compile(r'^([+-]\d+)([smhdw])(?:@([smhd]))?$')
+_TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+def _splunk_time_epoch(value: str | None, now: float) -> float | None:
+    """Epoch second of a Splunk earliest/latest value (relative to now), or None for forms not understood."""
+    v = (value or '').strip()
+    if v in ('', 'now'):
+        return now
+    if re.fullmatch(r'\d+(\.\d+)?', v):
+        return float(v)
+    m = _RELATIVE_TIME_RE.match(v)
+    if m:
+        t = now + int(m.group(1)) * _TIME_UNITS[m.group(2)]
+        return t - t % _TIME_UNITS[m.group(3)] if m.group(3) else t
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y:%H:%M:%S'):
         try:
-            from xml.sax.saxutils import escape as _xml_escape
-            safe = _xml_escape(msg)
-        except Exception:
-            safe = msg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-
-        # Split into lines and create one row per line so the table can paginate across pages
-        lines = safe.split('\n')
-        rows = []
-        for line in lines:
-            # Ensure super-long tokens can wrap by inserting zero-width space hints every ~100 chars when no spaces
-            if len(line) > 120 and (' ' not in line):
-                chunks = [line[i:i+100] for i in range(0, len(line), 100)]
-                line = '\u200b'.join(chunks)
-            rows.append([Paragraph(line or ' ', code_para_style)])
-
-        t = Table(rows or [[Paragraph(' ', code_para_style)]], colWidths=[A4[0]-72])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#ECEFF1')),
-            ('BOX', (0,0), (-1,-1), 0.5, colors.HexColor('#B0BEC5')),
-            ('LEFTPADDING', (0,0), (-1,-1), 4),
-            ('RIGHTPADDING', (0,0), (-1,-1), 4),
-            ('TOPPADDING', (0,0), (-1,-1), 4),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ]))
-        return t
-
-    story = []
-    story.append(Paragraph("Daily Forms Submit Errors Report", h1))
-    story.append(Paragraph(f"Range: {earliest or '<auto>'} -> {latest or '<auto>'}", ParagraphStyle(name='sub', parent=body, textColor=colors.HexColor('#455A64'))))
-    story.append(Spacer(1, 10))
-
-    # Summary table at top: TenantID, ProgramName, ErrorCount, SKYSI
-    if svc_rows:
-        header_style = ParagraphStyle(name='tblhdr', parent=body, textColor=colors.white, fontName='Helvetica-Bold')
-        cell_style = ParagraphStyle(name='tblcell', parent=body, textColor=colors.black)
-        data_rows = [[
-            Paragraph('TenantID', header_style),
-            Paragraph('ProgramName', header_style),
-            Paragraph('ErrorCount', header_style),
-            Paragraph('SKYSI', header_style)
-        ]]
-        for r in svc_rows:
-            skysi_key = r.get('skysi_key') or ''
-            skysi_url = r.get('skysi_url') or ''
-            if skysi_key and skysi_url:
-                skysi_cell = Paragraph(f'<link href="{skysi_url}">{skysi_key}</link>', cell_style)
-            else:
-                skysi_cell = Paragraph('-', cell_style)
-            data_rows.append([
-                Paragraph(r.get('aem_service',''), cell_style),
-                Paragraph(r.get('program_name','<unknown program name>'), cell_style),
-                Paragraph(str(r.get('error_count', 0)), cell_style),
-                skysi_cell
-            ])
-        col_widths = [150, A4[0]-72-150-80-90, 80, 90]
-        tbl = Table(data_rows, colWidths=col_widths)
-        tbl.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#1565C0')),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('ALIGN', (2,1), (2,-1), 'RIGHT'),
-            ('ALIGN', (3,1), (3,-1), 'LEFT'),
-            ('GRID', (0,0), (-1,-1), 0.25, colors.HexColor('#B0BEC5')),
-            ('LEFTPADDING', (0,0), (-1,-1), 6),
-            ('RIGHTPADDING', (0,0), (-1,-1), 6),
-            ('TOPPADDING', (0,0), (-1,-1), 4),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ]))
-        # Zebra striping for readability
-        for i in range(1, len(data_rows)):
-            if i % 2 == 0:
-                tbl.setStyle(TableStyle([
-                    ('BACKGROUND', (0,i), (-1,i), colors.HexColor('#ECEFF1')),
-                ]))
-        story.append(tbl)
-        story.append(Spacer(1, 12))
-
-    for item in report_items:
-        svc_title = (
-            f"Service: {item['aem_service']} "
-            f"Program Name: {item.get('program_name', '<unknown program name>')} "
-            f"(Failures: {item.get('error_count', 0)})"
-        )
-        story.append(Paragraph(svc_title, h2))
-        story.append(Spacer(1, 6))
-        for pe in item['paths'][:10]:
-            story.append(path_badge(f"Path: {pe['path']}"))
-            story.append(Spacer(1, 6))
-            if pe['time']:
-                story.append(Paragraph(f"Time: {pe['time']}", ParagraphStyle(name='time', parent=body, textColor=colors.HexColor('#546E7A'))))
-                story.append(Spacer(1, 6))
-            if not pe['messages']:
-                story.append(Paragraph("<no messages>", ParagraphStyle(name='nomsg', parent=body, textColor=colors.HexColor('#B71C1C'))))
-                story.append(Spacer(1, 10))
-                continue
-            for mi, m in enumerate(pe['messages'], start=1):
-                # Message heading
-                story.append(Paragraph(f"Message {mi}", msg_title_style))
-                story.append(Spacer(1, 4))
-                # limit to first 20 lines for readability
-                _lines = (m or '').split('\n')
-                if len(_lines) > 20:
-                    m_trunc = '\n'.join(_lines[:20]) + '\n...'
-                else:
-                    m_trunc = m
-                story.append(code_block_wrapped(m_trunc))
-                story.append(Spacer(1, 12))
-        story.append(Spacer(1, 12))
-
-    doc.build(story, onFirstPage=header_footer, onLaterPages=header_footer)
-    pdf = buf.getvalue()
-    buf.close()
+            return (datetime.strptime(v[:19], fmt) - datetime(1970, 1, 1)).total_seconds()
+        except ValueError:
+            pass
+    return None
+
+def _snapshot_covers(data: dict, earliest: str, latest: str, now: float) -> bool:
+    """True when the snapshot's window (relative values as of its generated_at) contains the requested one."""
+    generated = _splunk_time_epoch(data.get('generated_at'), now) or now
+    bounds = (_splunk_time_epoch(data.get('earliest') or '-1d', generated), _splunk_time_epoch(data.get('latest'), generated),
+              _splunk_time_epoch(earliest, now), _splunk_time_epoch(latest, now))
+    if None in bounds:
+        return False
+    snap_lo, snap_hi, req_lo, req_hi = bounds
+    return snap_lo <= req_lo and req_hi <= snap_hi
+
+def snapshot_skysi_payload(aem_service: str, earliest: str, latest: str) -> dict | None:
+    """/find-skysi answered from a stored snapshot (SKYSI key and paths as of that refresh).
+
+    Only a snapshot whose window covers earliest..latest qualifies; otherwise
+    None, and the caller reports the backend as unavailable.
+    """
+    now = time.time()
+    req_hi = _splunk_time_epoch(latest, now)
+    # The day the requested window ends on, else the latest one stored. Resolve the day
+    # first and load that snapshot, so stale_snapshot names the data served.
+    day = _snapshot_day(_utc_label(int(req_hi))[:10] if req_hi is not None else '')
+    snap = _load_cached_report(day) if day else None
+    if not snap or not snap.data or not _snapshot_covers(snap.data, earliest, latest, now):
+        return None
+    index = REPORT_INDEXES.get(snap)
+    item = index.service(aem_service)
+    if item is None:
+        return None
+    row = next((r for r in snap.data.get('svc_rows') or [] if r.get('aem_service') == item.get('aem_service')), {})
+    result = {'issues': [{'key': row['skysi_key']}]} if row.get('skysi_key') else {'issues': []}
+    paths = ReportItem.from_dict(item).paths
+    return {**skysi_payload(result, aem_service, earliest, latest, paths), 'stale_snapshot': day}
+
+def _requested_report_model(data: dict):
+    """(model, error_response) for a /report or /report-dashboard request.
+
+    With a date the stored snapshot for that day is rendered without touching
+    Splunk; otherwise the model for the window is built once and shared.
+    """
+    day = (data.get('date') or request.args.get('date', '')).strip()
+    if day:
+        model = load_stored_model(day)
+        if model is None:
+            return None, (jsonify({"error": f"No stored report for {day}; POST /report-refresh first"}), 404)
+        return model, None
+    earliest = data.get('earliest') or '-1d'
+    latest = data.get('latest') or 'now'
+    services = data.get('aem_services')  # optional explicit list
+    try:
+        return REPORT_ENGINE.get(earliest, latest, services), None
+    except BackendUnavailable as e:
+        day, model = latest_stored_model()
+        if model is None:
+            raise
+        print(f"{e}; serving stored snapshot {day}")
+        g.served_snapshot = day
+        return model, None
+
+@app.route('/report', methods=['GET', 'POST'])
+def report():
+    """PDF report for a window (JSON body) or a stored day (?date=YYYY-MM-DD)."""
+    model, error = _requested_report_model(request.get_json(silent=True) or {})
+    if error:
+        return error
+    pdf, etag = PDF_RENDERER.render(model)
+    if request.if_none_match.contains(etag):
+        return app.response_class(status=304, headers={'ETag': f'"{etag}"'})
     return (pdf, 200, {
         'Content-Type': 'application/pdf',
-        'Content-Disposition': 'attachment; filename="daily-forms-errors.pdf"'
+        'Content-Disposition': 'attachment; filename="daily-forms-errors.pdf"',
+        'ETag': f'"{etag}"',
     })
 
-@app.route('/report-dashboard', methods=['POST'])
+@app.route('/report-dashboard', methods=['GET', 'POST'])
 def report_dashboard():
-    """HTML dashboard version of /report. Does not modify /report."""
-    data = request.json or {}
-    earliest = data.get('earliest') or '-1d'
-    latest = data.get('latest') or 'now'
-    services = data.get('aem_services')  # optional
-
-    # 1) Get top services and error counts
-    svc_rows = list_services_with_errors(earliest, latest)
-    counts_map = {r['aem_service']: r.get('error_count', 0) for r in svc_rows}
-    program_map = {r['aem_service']: r.get('program_name', '<unknown program name>') for r in svc_rows}
-    jira_base = os.getenv('JIRA_URL', 'https://jira.corp.adobe.com')
-    for r in svc_rows:
-        aem_service_val = r.get('aem_service', '')
-        skysi_key = ''
-        try:
-            lookup = search_skysi_by_aem_service(aem_service_val) if aem_service_val else {}
-            issues = lookup.get('issues') or []
-            if issues:
-                skysi_key = issues[0].get('key', '')
-        except Exception:
-            skysi_key = ''
-        r['skysi_key'] = skysi_key
-        r['skysi_url'] = f"{jira_base}/browse/{skysi_key}" if skysi_key else ''
-    if not services:
-        services = [r['aem_service'] for r in svc_rows]
-
-    # 2) Build per-service details (reuse /report logic)
-    report_items = []
-    for aem_service in services:
-        failures_by_path = get_latest_failures_by_path(aem_service, "prod", "publish", earliest=earliest, latest=latest, per_path_limit=10)
-        base_error = (
-            f'index=dx_aem_engineering sourcetype=aemerror level=ERROR '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(*guideContainer.af.submit.jsp* OR *FormSubmitActionManagerServiceImpl* OR *AdaptiveFormSubmitServlet*) '
-            f'earliest="{earliest}" latest="{latest}" '
-        )
-        sub = (
-            '[ search index=dx_aem_engineering sourcetype=aemaccess '
-            f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
-            '(path="/adobe/forms/af/submit*" OR path="*guideContainer.af.submit.jsp") code>=500 '
-            f'earliest="{earliest}" latest="{latest}" '
-            '| sort 0 - _time '
-            '| streamstats count as failCount by path '
-            '| where failCount <= 10 '
-            '| eval f_start=_time, f_end=_time+10 '
-            '| eval query="(_time>=" . f_start . " AND _time<=" . f_end . ")" '
-            '| stats values(query) as queries '
-            '| eval search="(" . mvjoin(queries," OR ") . ")" '
-            '| fields search ] '
-        )
-        final_query = base_error + sub + '| eval EventTimeFmt=strftime(_time,"%Y-%m-%d %H:%M:%S") | table EventTimeFmt msg'
-        rows = splunk_search_rows(final_query) or []
-
-        from datetime import datetime as _dt
-        windows = []
-        for p, times in failures_by_path.items():
-            for tstr in times:
-                try:
-                    sdt = _dt.strptime(tstr, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    continue
-                edt = sdt + timedelta(seconds=10)
-                windows.append((p, sdt, edt))
-
-        path_to_msgs = {p: [] for p in failures_by_path.keys()}
-        path_to_seen = {p: set() for p in failures_by_path.keys()}
-        for r in rows:
-            et = (r.get('EventTimeFmt') or '').split('.')[0]
-            msg = (r.get('msg') or '').strip()
-            if not et or not msg:
-                continue
-            try:
-                evt_dt = _dt.strptime(et, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-            matched = None
-            for p, sdt, edt in windows:
-                if sdt <= evt_dt <= edt:
-                    matched = p
-                    break
-            if matched and msg not in path_to_seen[matched] and len(path_to_msgs[matched]) < 10:
-                path_to_msgs[matched].append(msg)
-                path_to_seen[matched].add(msg)
-
-        path_entries = []
-        for p, times in failures_by_path.items():
-            path_entries.append({
-                "path": p,
-                "time": ", ".join(times[:3]),
-                "messages": path_to_msgs.get(p, [])
-            })
-
-        report_items.append({
-            "aem_service": aem_service,
-            "error_count": counts_map.get(aem_service, 0),
-            "program_name": program_map.get(aem_service, '<unknown program name>'),
-            "paths": path_entries
-        })
+    """HTML dashboard version of /report."""
+    data = request.get_json(silent=True) or {}
+    day = (data.get('date') or request.args.get('date', '')).strip()
+    if day and os.path.exists(dashboard_html_paths(day)[0]):
+        return _send_dashboard_file(day)
+    model, error = _requested_report_model(data)
+    if error:
+        return error
+    html = render_html(model, max_times=3)
+    return (html, 200, { 'Content-Type': 'text/html; charset=utf-8' })
 
-    # 3) Render HTML
-    from html import escape as html_escape
-    def trunc15(msg: str) -> str:
-        _lines = (msg or '').split('\n')
-        return ('\n'.join(_lines[:15]) + '\n...') if len(_lines) > 15 else msg
-
-    css = """
-    body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 24px; }
-    h1 { color: #0D47A1; }
-    h2 { color: #1565C0; margin-top: 24px; }
-    .summary { border-collapse: collapse; width: 100%; margin: 12px 0; }
-    .summary th { background:#1565C0; color:#fff; padding:6px; text-align:left; }
-    .summary td { border:1px solid #B0BEC5; padding:6px; }
-    .path-badge { background:#1976D2; color:#fff; padding:4px 6px; border-radius:4px; display:inline-block; }
-    .time { color:#546E7A; margin:6px 0; }
-    .msg-title { color:#37474F; font-weight:600; margin:8px 0 4px; }
-    pre.msg { background:#ECEFF1; border:1px solid #B0BEC5; padding:4px; white-space:pre-wrap; word-break:break-word; }
-    """
+def prewarm_report_caches(_task: str = '') -> None:
+    """Load today's snapshot, the current week and the report dates into the parsed/compressed caches."""
+    from datetime import datetime as _dt
+    from report_rollups import week_bounds
+    _load_cached_report()
+    REPORT_SNAPSHOTS.get('dates', REPORT_STORE.stamp, lambda: {"dates": REPORT_STORE.list_dates()})
+    _week_snapshot(_default_friday())
+    # The week today's refresh lands in ends on the coming Friday
+    _week_snapshot(_dt.strptime(week_bounds(_dt.utcnow().strftime('%Y-%m-%d'))[1], '%Y-%m-%d'))
+
+def _start_scheduler() -> RefreshScheduler | None:
+    cfg = get_scheduler_config()
+    if not cfg["enabled"]:
+        return None
+    sched = RefreshScheduler(REPORT_STORE, jitter=cfg["jitter"], after_run=prewarm_report_caches)
+    sched.add_task('report-refresh', cfg["report_interval"], lambda: submit_report_refresh()[0].wait())
+    sched.add_task('daily-stats-refresh', cfg["daily_stats_interval"], lambda: submit_daily_stats_refresh(cfg["daily_stats_days"])[0].wait())
+    sched.start()
+    # Don't make the first dashboard user after a restart pay for cold caches
+    threading.Thread(target=prewarm_report_caches, name='cache-prewarm', daemon=True).start()
+    return sched
+
+def _migrate_stores() -> None:
+    """One-time imports of the JSON files older versions wrote, then any newer daily-stats JSON."""
+    try:
+        imported = REPORT_STORE.import_json_dir(
+            *_resolve_cache_dir_and_file(), on_saved=lambda day, data: update_rollups(REPORT_STORE, day, data))
+        if imported:
+            print(f"Imported {imported} report cache file(s) into {REPORT_STORE.db_path}")
+    except Exception as e:
+        print(f"Failed to import report cache files: {e}")
+    try:
+        if not len(DAILY_COUNTS):
+            imported = DAILY_COUNTS.import_json_dir(os.path.join(os.path.dirname(__file__), 'submission-count'))
+            if imported:
+                print(f"Imported {imported} daily count file(s) into {DAILY_COUNTS.path}")
+    except Exception as e:
+        print(f"Failed to import daily count files: {e}")
+    import_daily_stats_files()
 
-    parts = [
-        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Daily Forms Submit Errors Dashboard</title>",
-        f"<style>{css}</style></head><body>",
-        "<h1>Daily Forms Submit Errors Dashboard</h1>",
-        f"<div>Range: {html_escape(earliest)} → {html_escape(latest)}</div>",
-    ]
-
-    # Summary table
-    if svc_rows:
-        parts.append("<table class='summary'>")
-        parts.append("<tr><th>TenantID</th><th>ProgramName</th><th>ErrorCount</th><th>SKYSI</th></tr>")
-        for r in svc_rows:
-            skysi = r.get('skysi_key')
-            skysi_url = r.get('skysi_url')
-            skysi_html = f"<a href='{html_escape(skysi_url)}'>{html_escape(skysi)}</a>" if skysi and skysi_url else "-"
-            parts.append(
-                "<tr>"
-                f"<td>{html_escape(r.get('aem_service',''))}</td>"
-                f"<td>{html_escape(r.get('program_name','<unknown program name>'))}</td>"
-                f"<td>{int(r.get('error_count',0))}</td>"
-                f"<td>{skysi_html}</td>"
-                "</tr>"
-            )
-        parts.append("</table>")
-
-    # Per-service sections
-    for item in report_items:
-        svc_title = (
-            f"Service: {item['aem_service']} "
-            f"Program Name: {item.get('program_name','<unknown program name>')} "
-            f"(Failures: {item.get('error_count', 0)})"
-        )
-        parts.append(f"<h2>{html_escape(svc_title)}</h2>")
-        for pe in item['paths'][:10]:
-            parts.append(f"<div class='path-badge'>Path: {html_escape(pe['path'])}</div>")
-            if pe.get('time'):
-                parts.append(f"<div class='time'>Time: {html_escape(pe['time'])}</div>")
-            msgs = pe.get('messages') or []
-            if not msgs:
-                parts.append("<div style='color:#B71C1C'>&lt;no messages&gt;</div>")
-                continue
-            for idx, m in enumerate(msgs, start=1):
-                parts.append(f"<div class='msg-title'>Message {idx}</div>")
-                parts.append(f"<pre class='msg'>{html_escape(trunc15(m))}</pre>")
+SCHEDULER = None
+_STARTED = False
+_START_LOCK = threading.Lock()
 
-    parts.append("</body></html>")
-    html = ''.join(parts)
-    return (html, 200, { 'Content-Type': 'text/html; charset=utf-8' })
+def startup() -> None:
+    """Open the stores, start the PDF workers and (when REFRESH_SCHEDULER_ENABLED) the refresh scheduler.
+
+    Importing this module has no such side effects; the ASGI app's lifespan and
+    the dev server below call this once per process.
+    """
+    global SCHEDULER, _STARTED
+    with _START_LOCK:
+        if _STARTED:
+            return
+        _STARTED = True
+        REPORT_STORE.open()
+        _migrate_stores()
+        PDF_RENDERER.start()
+        SCHEDULER = _start_scheduler()
+
+def shutdown() -> None:
+    if SCHEDULER is not None:
+        SCHEDULER.stop()
 
 if __name__ == "__main__":
-    app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
+    # Flask's dev server, for working on the Flask routes alone; deployments run api.app under uvicorn
+    from config.settings import get_api_config
+    _cfg = get_api_config()
+    startup()
+    app.run(debug=_cfg["debug"], host=_cfg["host"], port=_cfg["port"])
\ No newline at end of file
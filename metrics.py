@@ -0,0 +1,272 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+import tracing
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; wide enough for millisecond cache hits and multi-minute Splunk searches
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(names: tuple, values: tuple, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _num(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple, object] = {}
+        REGISTRY.register(self)
+
+    def labels(self, *values, **kw):
+        if kw:
+            values = tuple(kw[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def family_name(self) -> str:
+        return self.name
+
+    def render(self) -> str:
+        name = self.family_name()
+        lines = [f'# HELP {name} {self.help}', f'# TYPE {name} {self.kind}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def family_name(self) -> str:
+        return f'{self.name}_total'
+
+    def _samples(self) -> list[str]:
+        return [f'{self.name}_total{_label_str(self.labelnames, k)} {_num(c.value)}'
+                for k, c in sorted(self._children.items())]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by a collector returning {label values: value}."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._collector: Callable[[], dict] | None = None
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_collector(self, fn: Callable[[], dict]) -> None:
+        self._collector = fn
+
+    @contextmanager
+    def track(self, *values):
+        child = self.labels(*values)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+    def _samples(self) -> list[str]:
+        if self._collector is not None:
+            try:
+                items = {tuple(str(v) for v in k): float(val) for k, val in self._collector().items()}
+            except Exception as e:
+                print(f"Metrics collector for {self.name} failed: {e}")
+                items = {}
+        else:
+            items = {k: c.value for k, c in self._children.items()}
+        return [f'{self.name}{_label_str(self.labelnames, k)} {_num(v)}' for k, v in sorted(items.items())]
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for k, c in sorted(self._children.items()):
+            with c._lock:
+                counts, total = list(c.counts), c.sum
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = f'le="{_num(bound)}"'
+                lines.append(f'{self.name}_bucket{_label_str(self.labelnames, k, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_str(self.labelnames, k)} {_num(total)}')
+            lines.append(f'{self.name}_count{_label_str(self.labelnames, k)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return '\n'.join(m.render() for m in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def render() -> bytes:
+    """Every metric of this process in Prometheus text format.
+
+    Values are per process: with several uvicorn workers each scrape reads
+    whichever worker answers, so scrape workers individually or run one.
+    """
+    return REGISTRY.render().encode('utf-8')
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route template.',
+    ('method', 'route', 'status'))
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being handled.')
+
+UPSTREAM_SECONDS = Histogram(
+    'upstream_request_duration_seconds', 'Latency of one upstream call (Splunk REST, Jira REST, LLM).',
+    ('backend', 'operation'))
+
+SPLUNK_JOBS_IN_FLIGHT = Gauge('splunk_jobs_in_flight', 'Splunk search jobs created and not yet finished or cancelled.')
+SPLUNK_SEARCHES = Counter('splunk_searches', 'Splunk searches run, by outcome (ok, partial, error).', ('search', 'outcome'))
+SPLUNK_RESULT_ROWS = Counter('splunk_result_rows', 'Result rows returned by Splunk searches.', ('search',))
+SPLUNK_RESULT_BYTES = Counter('splunk_result_bytes', 'Bytes of Splunk results and preview responses.', ('search',))
+SPLUNK_JOB_RUN_SECONDS = Histogram('splunk_job_run_duration_seconds', "Splunk's own runDuration for finished or cancelled jobs.",
+                                   ('search',))
+SPLUNK_SCANNED_EVENTS = Counter('splunk_scanned_events', 'Events scanned by Splunk jobs (scanCount).', ('search',))
+
+CACHE_REQUESTS = Counter('cache_requests', 'In-process cache lookups, by cache and result (hit, miss).', ('cache', 'result'))
+
+_SOURCETYPE = re.compile(r'sourcetype="?([\w:-]+)')
+
+
+def search_label(query: str) -> str:
+    """Bounded label for a Splunk query: its sourcetype (aemaccess, aemerror, ...) or "other"."""
+    m = _SOURCETYPE.search(query or '')
+    return m.group(1) if m else 'other'
+
+
+@contextmanager
+def upstream(backend: str, operation: str, span: bool = True):
+    """Time one upstream call into UPSTREAM_SECONDS, inside a "<backend>.<operation>" trace span
+    unless span=False (status polls, which would flood a trace)."""
+    with UPSTREAM_SECONDS.labels(backend, operation).time():
+        if not span:
+            yield
+            return
+        with tracing.span(f'{backend}.{operation}'):
+            yield
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    result = 'hit' if hit else 'miss'
+    CACHE_REQUESTS.labels(cache, result).inc()
+    tracing.annotate(**{f'cache.{cache}': result})
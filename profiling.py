@@ -0,0 +1,223 @@
+import io
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import Counter
+
+# Shared secret for on-demand profiling (X-Profile-Token header); unset disables ?profile=1 and /profiles
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+# Fraction of all requests profiled without being asked (stored only); 0 turns background sampling off
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+# cprofile: deterministic, pstats artifact; sample: stack sampler, collapsed-stack artifact
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample').strip().lower()
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '200'))
+MODES = ('cprofile', 'sample')
+TOKEN_HEADER = 'X-Profile-Token'
+PROFILE_HEADER = 'X-Profile'
+# Never sampled in the background: scrapes and probes would crowd out the requests worth profiling
+_UNSAMPLED_ROUTES = {'/metrics', '/health', '/profiles', '/profiles/<profile_id>', '/profiles/{profile_id}'}
+_SLUG = re.compile(r'[^A-Za-z0-9]+')
+_PROFILE_ID = re.compile(r'^[\w.-]+$')
+
+
+def authorized(token: str | None) -> bool:
+    return bool(PROFILE_TOKEN) and hmac.compare_digest((token or '').encode(), PROFILE_TOKEN.encode())
+
+
+def requested_mode(flag: str | None, token: str | None, route: str = '') -> tuple[str, bool] | None:
+    """(mode, forced) when this request should be profiled, else None.
+
+    flag is ?profile= or the X-Profile header: 1/true for the default mode or a
+    mode name. It only counts with a valid X-Profile-Token; otherwise the
+    request may still be picked by PROFILE_SAMPLE_RATE.
+    """
+    flag = (flag or '').strip().lower()
+    if flag and flag not in ('0', 'false', 'no', 'off') and authorized(token):
+        return (flag if flag in MODES else PROFILE_MODE), True
+    if PROFILE_SAMPLE_RATE > 0 and route not in _UNSAMPLED_ROUTES and random.random() < PROFILE_SAMPLE_RATE:
+        return PROFILE_MODE, False
+    return None
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack every interval seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+# One profile per process at a time: cProfile can't nest, and a second sampler would
+# double the overhead for no extra information
+_active = threading.Lock()
+
+
+class RequestProfile:
+    """Profiles the calling thread between start() and stop().
+
+    On the ASGI side the calling thread is the event loop, so anything else
+    the loop runs meanwhile shows up too; profile a quiet worker, or the
+    Flask routes (one thread per request), when that matters.
+    """
+
+    def __init__(self, mode: str, label: str, forced: bool):
+        self.mode = mode
+        self.label = label
+        self.forced = forced
+        self.profile_id = ''
+        self._profiler: cProfile.Profile | None = None
+        self._sampler: _StackSampler | None = None
+        self._t0 = 0.0
+
+    def start(self) -> 'RequestProfile':
+        self._t0 = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+            self._sampler.start()
+        return self
+
+    def stop(self, status: int = 0) -> str:
+        """Stop profiling, store the artifact and return its id ('' if it couldn't be stored)."""
+        try:
+            elapsed = time.perf_counter() - self._t0
+            if self._profiler is not None:
+                self._profiler.disable()
+                self.profile_id = PROFILES.save_pstats(self._profiler, self.label, status, elapsed)
+            elif self._sampler is not None:
+                self._sampler.stop()
+                self.profile_id = PROFILES.save_collapsed(self._sampler.stacks, self.label, status, elapsed)
+        except Exception as e:
+            print(f"Failed to store profile for {self.label}: {e}")
+        finally:
+            _active.release()
+        return self.profile_id
+
+
+def begin(mode: str, label: str, forced: bool = False) -> RequestProfile | None:
+    """Start profiling the current thread, or None if another request is being profiled."""
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfile(mode, label, forced).start()
+    except Exception as e:
+        _active.release()
+        print(f"Failed to start profiler for {label}: {e}")
+        return None
+
+
+class ProfileStore:
+    """Profile artifacts on disk, newest PROFILE_KEEP kept.
+
+    Each profile is <id>.pstats (load with pstats/snakeviz) or <id>.collapsed
+    (flamegraph.pl / speedscope input), plus <id>.txt with a readable summary.
+    """
+
+    def __init__(self, path: str, keep: int = PROFILE_KEEP):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _new_id(self, label: str, status: int, elapsed: float) -> str:
+        slug = _SLUG.sub('-', label).strip('-').lower()[:60] or 'request'
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{status}-{int(elapsed * 1000)}ms-{random.getrandbits(24):06x}"
+
+    def save_pstats(self, profiler: cProfile.Profile, label: str, status: int, elapsed: float) -> str:
+        profile_id = self._new_id(label, status, elapsed)
+        os.makedirs(self.path, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.path, profile_id + '.pstats'))
+        out = io.StringIO()
+        out.write(f"{label} status={status} elapsed={elapsed:.3f}s\n\n")
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(60)
+        self._write(profile_id + '.txt', out.getvalue())
+        self._prune()
+        return profile_id
+
+    def save_collapsed(self, stacks: Counter, label: str, status: int, elapsed: float) -> str:
+        profile_id = self._new_id(label, status, elapsed)
+        os.makedirs(self.path, exist_ok=True)
+        self._write(profile_id + '.collapsed', ''.join(f'{stack} {n}\n' for stack, n in stacks.most_common()))
+        # Summary: functions by self samples (leaf of the stack) and by inclusive samples
+        total = sum(stacks.values()) or 1
+        own, inclusive = Counter(), Counter()
+        for stack, n in stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += n
+            for f in set(frames):
+                inclusive[f] += n
+        lines = [f"{label} status={status} elapsed={elapsed:.3f}s samples={sum(stacks.values())} "
+                 f"interval={PROFILE_SAMPLE_INTERVAL * 1000:g}ms", '', 'self%  function']
+        lines += [f'{n * 100 / total:5.1f}  {f}' for f, n in own.most_common(30)]
+        lines += ['', 'total%  function']
+        lines += [f'{n * 100 / total:5.1f}  {f}' for f, n in inclusive.most_common(30)]
+        self._write(profile_id + '.txt', '\n'.join(lines) + '\n')
+        self._prune()
+        return profile_id
+
+    def _write(self, name: str, text: str) -> None:
+        with open(os.path.join(self.path, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def _prune(self) -> None:
+        with self._lock:
+            ids = self.list()
+            for profile_id in ids[self.keep:]:
+                for ext in ('.pstats', '.collapsed', '.txt'):
+                    try:
+                        os.remove(os.path.join(self.path, profile_id + ext))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self) -> list[str]:
+        """Stored profile ids, newest first."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        stamped = []
+        for n in names:
+            if n.endswith('.txt'):
+                try:
+                    stamped.append((os.stat(os.path.join(self.path, n)).st_mtime_ns, n[:-4]))
+                except FileNotFoundError:
+                    continue
+        return [profile_id for _, profile_id in sorted(stamped, reverse=True)]
+
+    def artifact(self, profile_id: str, fmt: str = 'txt') -> str | None:
+        """Path of one artifact (txt, pstats or collapsed), or None if it doesn't exist."""
+        if not _PROFILE_ID.match(profile_id or '') or fmt not in ('txt', 'pstats', 'collapsed'):
+            return None
+        p = os.path.join(self.path, f'{profile_id}.{fmt}')
+        return p if os.path.exists(p) else None
+
+
+PROFILES = ProfileStore(PROFILE_DIR)
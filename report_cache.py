@@ -0,0 +1,205 @@
+import gzip
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression overhead isn't worth it.
+MIN_COMPRESS_BYTES = 1024
+
+
+@dataclass(frozen=True)
+class ReportSnapshot:
+    """A parsed report plus its pre-serialized (and pre-compressed) response bodies.
+
+    Snapshots are shared between request threads, so `data` must be treated as
+    read-only; a refresh publishes a new snapshot instead of mutating this one.
+    """
+    key: str
+    version: tuple
+    data: Any
+    body: bytes
+    etag: str = ''
+    gzip_body: bytes | None = None
+    br_body: bytes | None = None
+    created_at: float = field(default_factory=time.time)
+
+
+def build_snapshot(key: str, version: tuple, data: Any, body: bytes) -> ReportSnapshot:
+    """Compute the content hash and compressed variants once, when the snapshot is published."""
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    gz = br = None
+    if len(body) >= MIN_COMPRESS_BYTES:
+        gz = gzip.compress(body, compresslevel=6, mtime=0)
+        if brotli is not None:
+            br = brotli.compress(body, quality=5)
+    return ReportSnapshot(key=key, version=version, data=data, body=body, etag=etag, gzip_body=gz, br_body=br)
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    out = set()
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            out.add(token)
+    return out
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag.strip('"')
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"') == bare:
+            return True
+    return False
+
+
+def conditional_response(snap: ReportSnapshot, if_none_match: str | None = None,
+                         if_modified_since: str | None = None,
+                         accept_encoding: str | None = None) -> tuple[int, bytes, dict]:
+    """Pick (status, body, headers) for a snapshot given the request's validators and Accept-Encoding.
+
+    Framework-neutral so Flask and ASGI handlers share it. If-None-Match wins over
+    If-Modified-Since, as RFC 9110 requires.
+    """
+    headers = {
+        'ETag': snap.etag,
+        'Last-Modified': formatdate(snap.created_at, usegmt=True),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    not_modified = False
+    if if_none_match:
+        not_modified = _etag_matches(if_none_match, snap.etag)
+    elif if_modified_since:
+        try:
+            not_modified = int(snap.created_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except Exception:
+            not_modified = False
+    if not_modified:
+        return (304, b'', headers)
+    accepted = accepted_encodings(accept_encoding)
+    if snap.br_body is not None and 'br' in accepted:
+        headers['Content-Encoding'] = 'br'
+        return (200, snap.br_body, headers)
+    if snap.gzip_body is not None and ('gzip' in accepted or '*' in accepted):
+        headers['Content-Encoding'] = 'gzip'
+        return (200, snap.gzip_body, headers)
+    return (200, snap.body, headers)
+
+
+class ReportSnapshotCache:
+    """Thread-safe, versioned cache of report snapshots.
+
+    Each entry is tagged with a version (the refresh generation plus whatever
+    stamp the caller passes, e.g. the store's write generation). A lookup with a
+    different version reloads the entry; entries are replaced atomically under
+    the lock, never mutated in place.
+    """
+
+    def __init__(self, serialize: Callable[[Any], bytes], max_entries: int = 64, name: str = 'report_snapshot'):
+        self.name = name
+        self._serialize = serialize
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, ReportSnapshot] = OrderedDict()
+        # key -> [lock, holders]; dropped when the last loader or waiter leaves, so
+        # client-chosen keys (filters, services, ranges) can't grow it without bound
+        self._key_locks: dict[str, list] = {}
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def bump_generation(self) -> int:
+        """Invalidate every entry (called after a refresh lands)."""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def _version(self, stamp) -> tuple:
+        return (self._generation, stamp)
+
+    def _lookup(self, key: str, version: tuple) -> ReportSnapshot | None:
+        with self._lock:
+            snap = self._entries.get(key)
+            if snap is not None and snap.version == version:
+                self._entries.move_to_end(key)
+                return snap
+            return None
+
+    def put(self, key: str, data: Any, stamp=None, version: tuple | None = None) -> ReportSnapshot:
+        snap = build_snapshot(key, version or self._version(stamp), data, self._serialize(data))
+        with self._lock:
+            self._entries[key] = snap
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return snap
+
+    def get(self, key: str, stamp_fn: Callable[[], Any], loader: Callable[[], Any]) -> ReportSnapshot | None:
+        """Return the snapshot for key, calling loader() only when it is missing or stale.
+
+        stamp_fn() returns the backing data's current stamp (e.g. the store's
+        write generation). It is read before loading, so a write landing during
+        the load leaves the entry stale rather than tagging old data as current.
+        Concurrent misses for the same key wait for a single load; a loader
+        returning None is not cached.
+        """
+        snap = self._lookup(key, self._version(stamp_fn()))
+        if snap is not None:
+            metrics.cache_result(self.name, True)
+            return snap
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                version = (self._generation, stamp_fn())
+                snap = self._lookup(key, version)
+                # Loaded by the request we waited on: a hit for this one
+                metrics.cache_result(self.name, snap is not None)
+                if snap is not None:
+                    return snap
+                data = loader()
+                if data is None:
+                    return None
+                # Tag with the version seen before loading so a write racing the load wins.
+                return self.put(key, data, version=version)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1] and self._key_locks.get(key) is entry:
+                    del self._key_locks[key]
+
+    def invalidate(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
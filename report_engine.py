@@ -0,0 +1,501 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import deadline
+import metrics
+import tracing
+from jira_tool import search_skysi_by_aem_service
+from splunk_tool import list_services_with_errors, list_services_total_submissions, get_latest_failures_by_path, error_message_rows
+from singleflight import SingleFlight, AsyncSingleFlight
+
+UNKNOWN_PROGRAM = '<unknown program name>'
+
+
+@dataclass
+class MessageEntry:
+    msg: str
+    # None for snapshots written before messages carried a timestamp
+    time: str | None = None
+
+    def to_dict(self):
+        if self.time is None:
+            return self.msg
+        # Like the legacy weekly payload: no "time" key when there is no timestamp
+        return {"time": self.time, "msg": self.msg} if self.time else {"msg": self.msg}
+
+    @classmethod
+    def from_dict(cls, m) -> 'MessageEntry':
+        if isinstance(m, dict):
+            return cls(msg=m.get('msg', ''), time=m.get('time', ''))
+        return cls(msg=str(m))
+
+
+@dataclass
+class PathEntry:
+    path: str
+    times: list[str] = field(default_factory=list)
+    messages: list[MessageEntry] = field(default_factory=list)
+
+    def to_dict(self, max_times: int = 10) -> dict:
+        return {
+            "path": self.path,
+            "time": ", ".join(self.times[:max_times]),
+            "messages": [m.to_dict() for m in self.messages],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'PathEntry':
+        return cls(
+            path=d.get('path', ''),
+            times=[t for t in (d.get('time') or '').split(', ') if t],
+            messages=[MessageEntry.from_dict(m) for m in (d.get('messages') or [])],
+        )
+
+
+@dataclass
+class ServiceRow:
+    aem_service: str
+    program_name: str = UNKNOWN_PROGRAM
+    error_count: int = 0
+    skysi_key: str = ''
+    skysi_url: str = ''
+
+    def to_dict(self) -> dict:
+        return {
+            "aem_service": self.aem_service,
+            "program_name": self.program_name,
+            "error_count": self.error_count,
+            "skysi_key": self.skysi_key,
+            "skysi_url": self.skysi_url,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'ServiceRow':
+        return cls(
+            aem_service=d.get('aem_service', ''),
+            program_name=d.get('program_name', UNKNOWN_PROGRAM),
+            error_count=int(d.get('error_count') or 0),
+            skysi_key=d.get('skysi_key') or '',
+            skysi_url=d.get('skysi_url') or '',
+        )
+
+
+@dataclass
+class ReportItem:
+    aem_service: str
+    error_count: int = 0
+    total_form_submissions: int = 0
+    program_name: str = UNKNOWN_PROGRAM
+    paths: list[PathEntry] = field(default_factory=list)
+
+    @property
+    def failure_rate_pct(self) -> float:
+        if not self.total_form_submissions:
+            return 0.0
+        return round((self.error_count / self.total_form_submissions) * 100, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "aem_service": self.aem_service,
+            "error_count": self.error_count,
+            "total_form_submissions": self.total_form_submissions,
+            "failure_rate_pct": self.failure_rate_pct,
+            "program_name": self.program_name,
+            "paths": [pe.to_dict() for pe in self.paths],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'ReportItem':
+        return cls(
+            aem_service=d.get('aem_service', ''),
+            error_count=int(d.get('error_count') or 0),
+            total_form_submissions=int(d.get('total_form_submissions') or 0),
+            program_name=d.get('program_name', UNKNOWN_PROGRAM),
+            paths=[PathEntry.from_dict(pe) for pe in (d.get('paths') or [])],
+        )
+
+
+@dataclass
+class ReportModel:
+    """One report window: the summary table plus per-service path/message detail."""
+    earliest: str
+    latest: str
+    generated_at: str = ''
+    services: list[str] = field(default_factory=list)
+    svc_rows: list[ServiceRow] = field(default_factory=list)
+    report_items: list[ReportItem] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """The JSON snapshot shape stored by /report-refresh and served by /report-data."""
+        return {
+            "generated_at": self.generated_at,
+            "earliest": self.earliest,
+            "latest": self.latest,
+            "services": list(self.services),
+            "svc_rows": [r.to_dict() for r in self.svc_rows],
+            "report_items": [it.to_dict() for it in self.report_items],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'ReportModel':
+        return cls(
+            earliest=d.get('earliest') or '',
+            latest=d.get('latest') or '',
+            generated_at=d.get('generated_at') or '',
+            services=list(d.get('services') or []),
+            svc_rows=[ServiceRow.from_dict(r) for r in (d.get('svc_rows') or [])],
+            report_items=[ReportItem.from_dict(it) for it in (d.get('report_items') or [])],
+        )
+
+
+def map_messages_to_paths(failures_by_path: dict, rows: list[dict], per_path_limit: int = 10) -> list[PathEntry]:
+    """Attach each error row to the path whose failure window [t, t+10s] contains it."""
+    windows = []
+    for p, times in failures_by_path.items():
+        for tstr in times:
+            try:
+                sdt = datetime.strptime(tstr, "%Y-%m-%d %H:%M:%S")
+            except Exception:
+                continue
+            windows.append((p, sdt, sdt + timedelta(seconds=10)))
+
+    entries = {p: PathEntry(path=p, times=list(times)) for p, times in failures_by_path.items()}
+    seen = {p: set() for p in failures_by_path.keys()}
+    for r in rows:
+        et = (r.get('EventTimeFmt') or '').split('.')[0]
+        msg = (r.get('msg') or '').strip()
+        if not et or not msg:
+            continue
+        try:
+            evt_dt = datetime.strptime(et, "%Y-%m-%d %H:%M:%S")
+        except Exception:
+            continue
+        matched = None
+        for p, sdt, edt in windows:
+            if sdt <= evt_dt <= edt:
+                matched = p
+                break
+        if matched and msg not in seen[matched] and len(entries[matched].messages) < per_path_limit:
+            entries[matched].messages.append(MessageEntry(msg=msg, time=et))
+            seen[matched].add(msg)
+    return list(entries.values())
+
+
+@tracing.traced('report.service_paths')
+def fetch_service_paths(aem_service: str, earliest: str, latest: str, per_path_limit: int = 10) -> list[PathEntry]:
+    """Failing paths for one service with their latest failure times and correlated error messages."""
+    tracing.annotate(aem_service=aem_service)
+    failures_by_path = get_latest_failures_by_path(
+        aem_service, "prod", "publish", earliest=earliest, latest=latest, per_path_limit=per_path_limit
+    )
+    rows = error_message_rows(aem_service, earliest, latest) or []
+    return map_messages_to_paths(failures_by_path, rows, per_path_limit)
+
+
+@tracing.traced('report.service_paths')
+async def fetch_service_paths_async(splunk, aem_service: str, earliest: str, latest: str, per_path_limit: int = 10) -> list[PathEntry]:
+    """fetch_service_paths on an AsyncSplunkClient; the two searches run concurrently."""
+    tracing.annotate(aem_service=aem_service)
+    failures_by_path, rows = await asyncio.gather(
+        splunk.get_latest_failures_by_path(aem_service, "prod", "publish", earliest=earliest, latest=latest, per_path_limit=per_path_limit),
+        splunk.error_message_rows(aem_service, earliest, latest),
+    )
+    return map_messages_to_paths(failures_by_path, rows, per_path_limit)
+
+
+def _skysi_key(lookup: dict) -> str:
+    issues = (lookup or {}).get('issues') or []
+    return issues[0].get('key', '') if issues else ''
+
+
+def lookup_skysi_key(aem_service: str) -> str:
+    try:
+        return _skysi_key(search_skysi_by_aem_service(aem_service) if aem_service else {})
+    except Exception:
+        return ''
+
+
+async def lookup_skysi_key_async(jira, aem_service: str) -> str:
+    try:
+        return _skysi_key(await jira.search_skysi_by_aem_service(aem_service))
+    except Exception:
+        return ''
+
+
+@tracing.traced('report.build')
+def build_report(earliest: str, latest: str, services: list[str] | None = None, progress=None,
+                 totals: dict | None = None) -> ReportModel:
+    """Query Splunk (and Jira for SKYSI keys) for one window. Always goes upstream; see ReportEngine for caching.
+
+    totals: submission counts per service for this window, when the caller already has them.
+    """
+    # 1) Top services and counts
+    jira_base = os.getenv('JIRA_URL', 'https://jira.corp.adobe.com')
+    svc_rows = []
+    for r in list_services_with_errors(earliest, latest):
+        row = ServiceRow(
+            aem_service=r['aem_service'],
+            program_name=r.get('program_name', UNKNOWN_PROGRAM),
+            error_count=r.get('error_count', 0),
+        )
+        row.skysi_key = lookup_skysi_key(row.aem_service)
+        row.skysi_url = f"{jira_base}/browse/{row.skysi_key}" if row.skysi_key else ''
+        svc_rows.append(row)
+    by_service = {r.aem_service: r for r in svc_rows}
+
+    if not services:
+        services = [r.aem_service for r in svc_rows]
+
+    print(f"Services: {services}")
+
+    # 2) Per-service aggregation
+    totals_map = list_services_total_submissions(earliest, latest) if totals is None else totals
+    report_items = []
+    for idx, aem_service in enumerate(services):
+        if progress:
+            progress(idx / max(len(services), 1), f"service {idx + 1}/{len(services)}: {aem_service}")
+        row = by_service.get(aem_service)
+        report_items.append(ReportItem(
+            aem_service=aem_service,
+            error_count=row.error_count if row else 0,
+            total_form_submissions=totals_map.get(aem_service, 0),
+            program_name=row.program_name if row else UNKNOWN_PROGRAM,
+            paths=fetch_service_paths(aem_service, earliest, latest),
+        ))
+
+    return ReportModel(
+        earliest=earliest,
+        latest=latest,
+        generated_at=datetime.utcnow().isoformat() + "Z",
+        services=list(services),
+        svc_rows=svc_rows,
+        report_items=report_items,
+    )
+
+
+@tracing.traced('report.build')
+async def build_report_async(splunk, jira, earliest: str, latest: str, services: list[str] | None = None,
+                             concurrency: int = 4) -> ReportModel:
+    """build_report on the async Splunk/Jira clients.
+
+    Same queries and result; the SKYSI lookups, the totals search and up to
+    `concurrency` services' path searches are in flight at once instead of
+    one after another.
+    """
+    jira_base = os.getenv('JIRA_URL', 'https://jira.corp.adobe.com')
+    rows, totals_map = await asyncio.gather(
+        splunk.list_services_with_errors(earliest, latest),
+        splunk.list_services_total_submissions(earliest, latest),
+    )
+    svc_rows = [
+        ServiceRow(aem_service=r['aem_service'], program_name=r.get('program_name', UNKNOWN_PROGRAM), error_count=r.get('error_count', 0))
+        for r in rows
+    ]
+    keys = await asyncio.gather(*(lookup_skysi_key_async(jira, r.aem_service) for r in svc_rows))
+    for row, key in zip(svc_rows, keys):
+        row.skysi_key = key
+        row.skysi_url = f"{jira_base}/browse/{key}" if key else ''
+    by_service = {r.aem_service: r for r in svc_rows}
+
+    if not services:
+        services = [r.aem_service for r in svc_rows]
+
+    print(f"Services: {services}")
+
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def service_paths(aem_service):
+        async with limit:
+            return await fetch_service_paths_async(splunk, aem_service, earliest, latest)
+
+    all_paths = await asyncio.gather(*(service_paths(s) for s in services))
+    report_items = []
+    for aem_service, paths in zip(services, all_paths):
+        row = by_service.get(aem_service)
+        report_items.append(ReportItem(
+            aem_service=aem_service,
+            error_count=row.error_count if row else 0,
+            total_form_submissions=totals_map.get(aem_service, 0),
+            program_name=row.program_name if row else UNKNOWN_PROGRAM,
+            paths=paths,
+        ))
+
+    return ReportModel(
+        earliest=earliest,
+        latest=latest,
+        generated_at=datetime.utcnow().isoformat() + "Z",
+        services=list(services),
+        svc_rows=svc_rows,
+        report_items=report_items,
+    )
+
+
+def build_report_data(earliest: str, latest: str, services: list[str] | None = None, progress=None,
+                      totals: dict | None = None) -> dict:
+    return build_report(earliest, latest, services, progress=progress, totals=totals).to_dict()
+
+
+def merge_report_delta(base: dict, delta: dict, window_totals: dict | None = None, per_path_limit: int = 10) -> dict:
+    """Merge a report for [high-water mark, now] into an existing snapshot.
+
+    Counts add up, each path keeps its most recent per_path_limit failure times,
+    and messages are unioned (newest first) under the same per-path cap. The
+    result spans base's earliest to delta's latest.
+
+    window_totals are submission counts per service over the merged window
+    (list_services_total_submissions from base's earliest to delta's latest)
+    and become every service's denominator. Without them the delta's item
+    totals are added, which misses traffic of services that didn't fail in
+    the delta and traffic before a service's first failure.
+    """
+    rows = {r['aem_service']: dict(r) for r in (base.get('svc_rows') or [])}
+    for r in (delta.get('svc_rows') or []):
+        svc = r['aem_service']
+        if svc not in rows:
+            rows[svc] = dict(r)
+            continue
+        cur = rows[svc]
+        cur['error_count'] = int(cur.get('error_count') or 0) + int(r.get('error_count') or 0)
+        if r.get('skysi_key'):
+            cur['skysi_key'] = r['skysi_key']
+            cur['skysi_url'] = r.get('skysi_url', '')
+    svc_rows = sorted(rows.values(), key=lambda r: int(r.get('error_count') or 0), reverse=True)
+
+    items = {it['aem_service']: it for it in (base.get('report_items') or [])}
+    for it in (delta.get('report_items') or []):
+        svc = it['aem_service']
+        prev = items.get(svc)
+        if prev is None:
+            items[svc] = it
+            continue
+        paths = {pe['path']: pe for pe in (prev.get('paths') or [])}
+        for pe in (it.get('paths') or []):
+            old = paths.get(pe['path'])
+            if old is None:
+                paths[pe['path']] = pe
+                continue
+            times = {t for t in (old.get('time') or '').split(', ') if t}
+            times.update(t for t in (pe.get('time') or '').split(', ') if t)
+            msgs, seen = [], set()
+            for m in list(pe.get('messages') or []) + list(old.get('messages') or []):
+                text = m.get('msg', '') if isinstance(m, dict) else str(m)
+                if text in seen or len(msgs) >= per_path_limit:
+                    continue
+                seen.add(text)
+                msgs.append(m)
+            paths[pe['path']] = {
+                "path": pe['path'],
+                "time": ", ".join(sorted(times, reverse=True)[:per_path_limit]),
+                "messages": msgs,
+            }
+        errs = int(prev.get('error_count') or 0) + int(it.get('error_count') or 0)
+        total_forms = int(prev.get('total_form_submissions') or 0) + int(it.get('total_form_submissions') or 0)
+        items[svc] = {
+            "aem_service": svc,
+            "error_count": errs,
+            "total_form_submissions": total_forms,
+            "failure_rate_pct": round((errs / total_forms) * 100, 2) if total_forms else 0.0,
+            "program_name": prev.get('program_name') or it.get('program_name', UNKNOWN_PROGRAM),
+            "paths": list(paths.values()),
+        }
+    if window_totals is not None:
+        for svc, it in items.items():
+            errs = int(it.get('error_count') or 0)
+            total_forms = int(window_totals.get(svc) or 0)
+            items[svc] = {**it, "total_form_submissions": total_forms,
+                          "failure_rate_pct": round((errs / total_forms) * 100, 2) if total_forms else 0.0}
+    report_items = sorted(items.values(), key=lambda it: int(it.get('error_count') or 0), reverse=True)
+    services = [it['aem_service'] for it in report_items]
+    return {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "earliest": base.get('earliest'),
+        "latest": delta.get('latest') or base.get('latest'),
+        "services": services,
+        "svc_rows": svc_rows,
+        "report_items": report_items,
+    }
+
+
+class ReportEngine:
+    """Builds report models and caches them by window.
+
+    Relative windows ("-1d" .. "now") move with the clock, so entries expire
+    after ttl seconds. Concurrent requests for the same window share one build,
+    which lets /report, /report-dashboard and /report-refresh reuse a single
+    round of Splunk queries.
+    """
+
+    def __init__(self, builder=build_report, ttl: float = 300.0, max_entries: int = 32):
+        self._builder = builder
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._models: OrderedDict[tuple, tuple[float, ReportModel]] = OrderedDict()
+        self._flights = SingleFlight(grace_seconds=0)
+        self._async_flights = AsyncSingleFlight()
+
+    @staticmethod
+    def window_key(earliest: str, latest: str, services: list[str] | None = None) -> tuple:
+        return (earliest, latest, tuple(services) if services else None)
+
+    def cached(self, earliest: str, latest: str, services: list[str] | None = None) -> ReportModel | None:
+        key = self.window_key(earliest, latest, services)
+        with self._lock:
+            hit = self._models.get(key)
+            if hit is not None and time.time() - hit[0] > self._ttl:
+                del self._models[key]
+                hit = None
+            if hit is not None:
+                self._models.move_to_end(key)
+        metrics.cache_result('report_model', hit is not None)
+        return hit[1] if hit is not None else None
+
+    def put(self, model: ReportModel, services: list[str] | None = None) -> None:
+        key = self.window_key(model.earliest, model.latest, services)
+        with self._lock:
+            self._models[key] = (time.time(), model)
+            self._models.move_to_end(key)
+            while len(self._models) > self._max_entries:
+                self._models.popitem(last=False)
+
+    def get(self, earliest: str, latest: str, services: list[str] | None = None, progress=None, refresh: bool = False) -> ReportModel:
+        """Cached model for the window, building it when missing, expired or refresh=True."""
+        if not refresh:
+            model = self.cached(earliest, latest, services)
+            if model is not None:
+                return model
+
+        def build():
+            model = self._builder(earliest, latest, services, progress=progress)
+            # A build cut short by a request deadline is served once, not cached
+            if not deadline.is_partial():
+                self.put(model, services)
+            return model
+
+        model, _shared = self._flights.do(self.window_key(earliest, latest, services), build)
+        return model
+
+    async def aget(self, earliest: str, latest: str, services: list[str] | None = None, builder=None,
+                   refresh: bool = False) -> ReportModel:
+        """get() for the ASGI app. builder is an async (earliest, latest, services) -> ReportModel;
+        without one the blocking builder runs in a worker thread."""
+        if not refresh:
+            model = self.cached(earliest, latest, services)
+            if model is not None:
+                return model
+        if builder is None:
+            return await asyncio.to_thread(self.get, earliest, latest, services, None, refresh)
+
+        async def build():
+            model = await builder(earliest, latest, services)
+            if not deadline.is_partial():
+                self.put(model, services)
+            return model
+
+        model, _shared = await self._async_flights.do(self.window_key(earliest, latest, services), build)
+        return model
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+import metrics
+
+SORT_KEYS = ('error_count', 'failure_rate_pct', 'total_form_submissions', 'aem_service', 'program_name')
+ITEM_FIELDS = ('aem_service', 'program_name', 'error_count', 'total_form_submissions', 'failure_rate_pct', 'paths')
+MAX_PAGE_SIZE = 500
+
+
+class ReportIndex:
+    """Lookup structures over one report snapshot for /report-data queries.
+
+    Built once per snapshot: per-service items, lower-cased search keys and a
+    paths-free summary of every item, so a filtered/paged summary request
+    never walks or serializes the messages.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.items = list(data.get('report_items') or [])
+        self.by_service = {it.get('aem_service', ''): it for it in self.items}
+        self._by_service_lower = {k.lower(): v for k, v in self.by_service.items()}
+        self._keys = [
+            ((it.get('aem_service') or '').lower(), (it.get('program_name') or '').lower())
+            for it in self.items
+        ]
+        self.summaries = []
+        for it in self.items:
+            paths = it.get('paths') or []
+            summary = {k: v for k, v in it.items() if k != 'paths'}
+            summary['path_count'] = len(paths)
+            summary['message_count'] = sum(len(pe.get('messages') or []) for pe in paths)
+            self.summaries.append(summary)
+
+    def service(self, aem_service: str) -> dict | None:
+        return self.by_service.get(aem_service) or self._by_service_lower.get((aem_service or '').lower())
+
+    def _matches(self, keys: tuple[str, str], service: str, program: str, q: str) -> bool:
+        svc, prog = keys
+        if service and service not in svc:
+            return False
+        if program and program not in prog:
+            return False
+        if q and q not in svc and q not in prog:
+            return False
+        return True
+
+    def query(self, service: str = '', program: str = '', q: str = '', sort: str = 'error_count',
+              order: str = 'desc', page: int = 1, page_size: int | None = None, fields: str = '') -> dict:
+        """Filtered, sorted, paginated view of the snapshot in the usual /report-data shape plus a 'page' block.
+
+        service/program/q are case-insensitive substring filters (q matches either).
+        fields is 'summary' (items without paths, with path/message counts) or a
+        comma list of item fields; empty returns full items.
+        """
+        service, program, q = service.lower(), program.lower(), q.lower()
+        idx = [i for i, keys in enumerate(self._keys) if self._matches(keys, service, program, q)]
+
+        def sort_key(i):
+            v = self.items[i].get(sort)
+            return (v or '').lower() if sort in ('aem_service', 'program_name') else float(v or 0)
+        idx.sort(key=sort_key, reverse=(order == 'desc'))
+
+        total = len(idx)
+        if page_size:
+            pages = max(1, -(-total // page_size))
+            idx = idx[(page - 1) * page_size: page * page_size]
+        else:
+            page, pages = 1, 1
+
+        if fields == 'summary':
+            items = [self.summaries[i] for i in idx]
+        elif fields:
+            wanted = [f for f in fields.split(',') if f in ITEM_FIELDS]
+            items = [{f: self.items[i].get(f) for f in wanted} for i in idx]
+        else:
+            items = [self.items[i] for i in idx]
+
+        svc_rows = [
+            r for r in (self.data.get('svc_rows') or [])
+            if self._matches(((r.get('aem_service') or '').lower(), (r.get('program_name') or '').lower()), service, program, q)
+        ]
+        return {
+            "generated_at": self.data.get('generated_at'),
+            "earliest": self.data.get('earliest'),
+            "latest": self.data.get('latest'),
+            "services": [self.items[i].get('aem_service') for i in idx],
+            "svc_rows": svc_rows,
+            "report_items": items,
+            "page": {"page": page, "page_size": page_size or total, "pages": pages, "total": total, "sort": sort, "order": order},
+        }
+
+
+class ReportIndexCache:
+    """ReportIndex per snapshot etag (a few recent snapshots)."""
+
+    def __init__(self, max_entries: int = 8):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes: OrderedDict[str, ReportIndex] = OrderedDict()
+
+    def get(self, snap) -> ReportIndex:
+        with self._lock:
+            index = self._indexes.get(snap.etag)
+            if index is not None:
+                self._indexes.move_to_end(snap.etag)
+        metrics.cache_result('report_index', index is not None)
+        if index is not None:
+            return index
+        index = ReportIndex(snap.data)
+        with self._lock:
+            self._indexes[snap.etag] = index
+            while len(self._indexes) > self._max_entries:
+                self._indexes.popitem(last=False)
+        return index
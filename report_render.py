@@ -0,0 +1,418 @@
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from html import escape as html_escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+import json_codec
+from report_engine import ReportModel, UNKNOWN_PROGRAM
+from singleflight import SingleFlight
+
+# Renderers take a ReportModel, so the same model (fresh from Splunk or loaded
+# from a stored snapshot) can be turned into any of the three outputs.
+
+
+def _truncate_lines(msg: str, limit: int) -> str:
+    _lines = (msg or '').split('\n')
+    return ('\n'.join(_lines[:limit]) + '\n...') if len(_lines) > limit else msg
+
+
+class CodeBlock(Flowable):
+    """Monospaced text on a shaded, boxed background, drawn as a single text object.
+
+    Courier is fixed width, so wrapping is a character count rather than
+    Paragraph layout per line, and split() cuts between lines so long stack
+    traces still flow across pages.
+    """
+
+    def __init__(self, text: str = '', font_name: str = 'Courier', font_size: float = 7, leading: float = 8,
+                 padding: float = 4, background=colors.HexColor('#ECEFF1'), border=colors.HexColor('#B0BEC5'),
+                 lines: list[str] | None = None):
+        super().__init__()
+        self.text = text
+        self.font_name = font_name
+        self.font_size = font_size
+        self.leading = leading
+        self.padding = padding
+        self.background = background
+        self.border = border
+        self._lines = lines
+        self._wrapped_width = None if lines is None else -1
+
+    def _wrap_lines(self, avail_width: float) -> list[str]:
+        char_width = stringWidth('M', self.font_name, self.font_size)
+        cols = max(1, int((avail_width - 2 * self.padding) // char_width))
+        out = []
+        for line in (self.text or '').split('\n'):
+            line = line.expandtabs(4)
+            if len(line) <= cols:
+                out.append(line)
+                continue
+            out.extend(line[i:i + cols] for i in range(0, len(line), cols))
+        return out
+
+    def wrap(self, availWidth, availHeight):
+        if self._wrapped_width is None or (self._wrapped_width != -1 and self._wrapped_width != availWidth):
+            self._lines = self._wrap_lines(availWidth)
+            self._wrapped_width = availWidth
+        self.width = availWidth
+        self.height = len(self._lines or ['']) * self.leading + 2 * self.padding
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        fit = int((availHeight - 2 * self.padding) // self.leading)
+        if fit < 1 or fit >= len(self._lines):
+            return []
+        kw = dict(font_name=self.font_name, font_size=self.font_size, leading=self.leading,
+                  padding=self.padding, background=self.background, border=self.border)
+        return [CodeBlock(lines=self._lines[:fit], **kw), CodeBlock(lines=self._lines[fit:], **kw)]
+
+    def draw(self):
+        canv = self.canv
+        canv.saveState()
+        canv.setFillColor(self.background)
+        canv.setStrokeColor(self.border)
+        canv.setLineWidth(0.5)
+        canv.rect(0, 0, self.width, self.height, stroke=1, fill=1)
+        text = canv.beginText(self.padding, self.height - self.padding - self.font_size)
+        text.setFont(self.font_name, self.font_size, self.leading)
+        text.setFillColor(colors.black)
+        for line in self._lines or ['']:
+            text.textLine(line)
+        canv.drawText(text)
+        canv.restoreState()
+
+
+def render_json(model: ReportModel) -> dict:
+    return model.to_dict()
+
+
+def render_html(model: ReportModel, max_times: int = 10) -> str:
+    css = (
+        "body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 24px; }"
+        "h1 { color: #0D47A1; }"
+        "h2 { color: #1565C0; margin-top: 24px; }"
+        ".summary { border-collapse: collapse; width: 100%; margin: 12px 0; }"
+        ".summary th { background:#1565C0; color:#fff; padding:6px; text-align:left; }"
+        ".summary td { border:1px solid #B0BEC5; padding:6px; }"
+        ".path-badge { background:#1976D2; color:#fff; padding:4px 6px; border-radius:4px; display:inline-block; }"
+        ".time { color:#546E7A; margin:6px 0; }"
+        ".msg-title { color:#37474F; font-weight:600; margin:8px 0 4px; }"
+        "pre.msg { background:#ECEFF1; border:1px solid #B0BEC5; padding:4px; white-space:pre-wrap; word-break:break-word; }"
+    )
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Daily Forms Submit Errors Dashboard</title>",
+        f"<style>{css}</style></head><body>",
+        "<h1>Daily Forms Submit Errors Dashboard</h1>",
+        f"<div>Range: {html_escape(model.earliest)} → {html_escape(model.latest)}</div>",
+    ]
+    if model.svc_rows:
+        parts.append("<table class='summary'>")
+        parts.append("<tr><th>TenantID</th><th>ProgramName</th><th>ErrorCount</th><th>SKYSI</th></tr>")
+        for r in model.svc_rows:
+            skysi_html = f"<a href='{html_escape(r.skysi_url)}'>{html_escape(r.skysi_key)}</a>" if r.skysi_key and r.skysi_url else "-"
+            parts.append(
+                "<tr>"
+                f"<td>{html_escape(r.aem_service)}</td>"
+                f"<td>{html_escape(r.program_name)}</td>"
+                f"<td>{int(r.error_count)}</td>"
+                f"<td>{skysi_html}</td>"
+                "</tr>"
+            )
+        parts.append("</table>")
+    for item in model.report_items:
+        svc_title = (
+            f"Service: {item.aem_service} "
+            f"Program Name: {item.program_name} "
+            f"(Failures: {item.error_count})"
+        )
+        parts.append(f"<h2>{html_escape(svc_title)}</h2>")
+        for pe in item.paths[:10]:
+            parts.append(f"<div class='path-badge'>Path: {html_escape(pe.path)}</div>")
+            if pe.times:
+                parts.append(f"<div class='time'>Time: {html_escape(', '.join(pe.times[:max_times]))}</div>")
+            if not pe.messages:
+                parts.append("<div style='color:#B71C1C'>&lt;no messages&gt;</div>")
+                continue
+            for idx, m in enumerate(pe.messages, start=1):
+                parts.append(f"<div class='msg-title'>Message {idx}</div>")
+                parts.append(f"<pre class='msg'>{html_escape(_truncate_lines(m.msg, 15))}</pre>")
+    parts.append("</body></html>")
+    return ''.join(parts)
+
+
+def render_pdf(model: ReportModel, max_times: int = 3, table_code_blocks: bool = False) -> bytes:
+    """Formatted PDF (H1/H2/H3, spacing, wrapped stack traces).
+
+    table_code_blocks switches back to the older one-Table-row-per-line code
+    blocks; it is kept for benchmarks/bench_pdf_render.py.
+    """
+    buf = BytesIO()
+    doc = SimpleDocTemplate(
+        buf, pagesize=A4, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36
+    )
+    styles = getSampleStyleSheet()
+    h1 = styles["Heading1"]
+    h2 = styles["Heading2"]
+    h3 = styles["Heading3"]
+    body = styles["BodyText"]
+    # Slightly adjust sizes
+    h1.fontSize = 18; h1.leading = 22; h1.textColor = colors.HexColor('#0D47A1')
+    h2.fontSize = 14; h2.leading = 18; h2.textColor = colors.HexColor('#1565C0')
+    h3.fontSize = 12; h3.leading = 16; h3.textColor = colors.HexColor('#1976D2')
+    # Paragraph-based code style that wraps long tokens and supports splitting across pages
+    code_para_style = ParagraphStyle(
+        name="CodePara",
+        parent=body,
+        fontName="Courier",
+        fontSize=7,
+        leading=8,
+        textColor=colors.black,
+        wordWrap='CJK',
+        allowWidows=1,
+        allowOrphans=1,
+        splitLongWords=True,
+    )
+    msg_title_style = ParagraphStyle(
+        name='MsgTitle',
+        parent=body,
+        fontName='Helvetica-Bold',
+        fontSize=9,
+        leading=11,
+        textColor=colors.HexColor('#37474F'),
+    )
+
+    def header_footer(canv, _doc):
+        canv.saveState()
+        # Header band
+        canv.setFillColor(colors.HexColor('#E3F2FD'))
+        canv.rect(0, A4[1]-20, A4[0], 20, stroke=0, fill=1)
+        canv.setFillColor(colors.HexColor('#0D47A1'))
+        canv.setFont("Helvetica-Bold", 10)
+        canv.drawString(36, A4[1]-14, "Daily Forms Submit Errors Report")
+        # Footer
+        canv.setFillColor(colors.HexColor('#90A4AE'))
+        canv.setFont("Helvetica", 8)
+        canv.drawRightString(A4[0]-36, 14, f"Page {_doc.page}")
+        canv.restoreState()
+
+    def path_badge(path_text: str) -> Table:
+        p = Paragraph(path_text, ParagraphStyle(
+            name="PathBadge",
+            parent=h3,
+            textColor=colors.white,
+        ))
+        t = Table([[p]], colWidths=[A4[0]-72])
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#1976D2')),
+            ('LEFTPADDING', (0,0), (-1,-1), 6),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+            ('ROUNDEDCORNERS', (0,0), (-1,-1), 4),
+        ]))
+        return t
+
+    def code_block_wrapped(msg: str) -> Table:
+        # Escape XML entities for Paragraph
+        try:
+            from xml.sax.saxutils import escape as _xml_escape
+            safe = _xml_escape(msg)
+        except Exception:
+            safe = msg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+        # Split into lines and create one row per line so the table can paginate across pages
+        lines = safe.split('\n')
+        rows = []
+        for line in lines:
+            # Ensure super-long tokens can wrap by inserting zero-width space hints every ~100 chars when no spaces
+            if len(line) > 120 and (' ' not in line):
+                chunks = [line[i:i+100] for i in range(0, len(line), 100)]
+                line = '\u200b'.join(chunks)
+            rows.append([Paragraph(line or ' ', code_para_style)])
+
+        t = Table(rows or [[Paragraph(' ', code_para_style)]], colWidths=[A4[0]-72])
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#ECEFF1')),
+            ('BOX', (0,0), (-1,-1), 0.5, colors.HexColor('#B0BEC5')),
+            ('LEFTPADDING', (0,0), (-1,-1), 4),
+            ('RIGHTPADDING', (0,0), (-1,-1), 4),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ]))
+        return t
+
+    story = []
+    story.append(Paragraph("Daily Forms Submit Errors Report", h1))
+    story.append(Paragraph(f"Range: {model.earliest or '<auto>'} -> {model.latest or '<auto>'}", ParagraphStyle(name='sub', parent=body, textColor=colors.HexColor('#455A64'))))
+    story.append(Spacer(1, 10))
+
+    # Summary table at top: TenantID, ProgramName, ErrorCount, SKYSI
+    if model.svc_rows:
+        header_style = ParagraphStyle(name='tblhdr', parent=body, textColor=colors.white, fontName='Helvetica-Bold')
+        cell_style = ParagraphStyle(name='tblcell', parent=body, textColor=colors.black)
+        data_rows = [[
+            Paragraph('TenantID', header_style),
+            Paragraph('ProgramName', header_style),
+            Paragraph('ErrorCount', header_style),
+            Paragraph('SKYSI', header_style)
+        ]]
+        for r in model.svc_rows:
+            if r.skysi_key and r.skysi_url:
+                skysi_cell = Paragraph(f'<link href="{r.skysi_url}">{r.skysi_key}</link>', cell_style)
+            else:
+                skysi_cell = Paragraph('-', cell_style)
+            data_rows.append([
+                Paragraph(r.aem_service, cell_style),
+                Paragraph(r.program_name or UNKNOWN_PROGRAM, cell_style),
+                Paragraph(str(r.error_count), cell_style),
+                skysi_cell
+            ])
+        col_widths = [150, A4[0]-72-150-80-90, 80, 90]
+        tbl = Table(data_rows, colWidths=col_widths)
+        tbl.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#1565C0')),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+            ('ALIGN', (2,1), (2,-1), 'RIGHT'),
+            ('ALIGN', (3,1), (3,-1), 'LEFT'),
+            ('GRID', (0,0), (-1,-1), 0.25, colors.HexColor('#B0BEC5')),
+            ('LEFTPADDING', (0,0), (-1,-1), 6),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ]))
+        # Zebra striping for readability
+        for i in range(1, len(data_rows)):
+            if i % 2 == 0:
+                tbl.setStyle(TableStyle([
+                    ('BACKGROUND', (0,i), (-1,i), colors.HexColor('#ECEFF1')),
+                ]))
+        story.append(tbl)
+        story.append(Spacer(1, 12))
+
+    for item in model.report_items:
+        svc_title = (
+            f"Service: {item.aem_service} "
+            f"Program Name: {item.program_name} "
+            f"(Failures: {item.error_count})"
+        )
+        story.append(Paragraph(svc_title, h2))
+        story.append(Spacer(1, 6))
+        for pe in item.paths[:10]:
+            story.append(path_badge(f"Path: {pe.path}"))
+            story.append(Spacer(1, 6))
+            if pe.times:
+                story.append(Paragraph(f"Time: {', '.join(pe.times[:max_times])}", ParagraphStyle(name='time', parent=body, textColor=colors.HexColor('#546E7A'))))
+                story.append(Spacer(1, 6))
+            if not pe.messages:
+                story.append(Paragraph("<no messages>", ParagraphStyle(name='nomsg', parent=body, textColor=colors.HexColor('#B71C1C'))))
+                story.append(Spacer(1, 10))
+                continue
+            for mi, m in enumerate(pe.messages, start=1):
+                # Message heading
+                story.append(Paragraph(f"Message {mi}", msg_title_style))
+                story.append(Spacer(1, 4))
+                # limit to first 20 lines for readability
+                m_trunc = _truncate_lines(m.msg, 20)
+                story.append(code_block_wrapped(m_trunc) if table_code_blocks else CodeBlock(m_trunc))
+                story.append(Spacer(1, 12))
+        story.append(Spacer(1, 12))
+
+    doc.build(story, onFirstPage=header_footer, onLaterPages=header_footer)
+    pdf = buf.getvalue()
+    buf.close()
+    return pdf
+
+
+def _render_pdf_payload(data: dict, max_times: int) -> bytes:
+    # Worker-process entry point: takes the plain dict so only JSON-able data crosses the process boundary
+    return render_pdf(ReportModel.from_dict(data), max_times=max_times)
+
+
+def report_hash(data: dict) -> str:
+    return hashlib.sha256(json_codec.dumps_bytes(data, sort_keys=True, default=str)).hexdigest()
+
+
+class PdfRenderPool:
+    """Renders report PDFs in worker processes and keeps the bytes per report hash.
+
+    reportlab layout is pure-Python CPU work; doing it in a process pool keeps it
+    from holding the GIL on request threads. Identical models (same snapshot)
+    are rendered once; concurrent requests for one share the render.
+    max_workers=0 renders inline.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 16):
+        self._max_workers = max_workers
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pdfs: OrderedDict[str, bytes] = OrderedDict()
+        self._flights = SingleFlight(grace_seconds=0)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Never fork: by now the server has threads (scheduler, jobs, HTTP clients),
+                # and a forked child can deadlock on a lock one of them held. The forkserver
+                # is started clean and preloads this module, so workers still start warm.
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if ctx.get_start_method() == 'forkserver':
+                    ctx.set_forkserver_preload(['report_render'])
+                self._pool = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=ctx)
+            return self._pool
+
+    def start(self) -> None:
+        """Launch the workers now (from startup) so the first /report doesn't wait for them."""
+        if self._max_workers <= 0:
+            return
+        try:
+            self._executor().submit(int).result()
+        except Exception as e:
+            print(f"Could not start PDF worker pool, rendering inline: {e}")
+            self._max_workers = 0
+
+    def _render(self, data: dict, max_times: int) -> bytes:
+        if self._max_workers <= 0:
+            return _render_pdf_payload(data, max_times)
+        try:
+            return self._executor().submit(_render_pdf_payload, data, max_times).result()
+        except BrokenProcessPool as e:
+            print(f"PDF worker pool broke, rendering inline: {e}")
+            with self._lock:
+                self._pool = None
+            return _render_pdf_payload(data, max_times)
+
+    def render(self, model: ReportModel, max_times: int = 3) -> tuple[bytes, str]:
+        """Return (pdf_bytes, etag)."""
+        data = model.to_dict()
+        key = f"{report_hash(data)[:32]}-{max_times}"
+        with self._lock:
+            pdf = self._pdfs.get(key)
+            if pdf is not None:
+                self._pdfs.move_to_end(key)
+                return pdf, key
+        pdf, _shared = self._flights.do(key, lambda: self._render(data, max_times))
+        with self._lock:
+            self._pdfs[key] = pdf
+            self._pdfs.move_to_end(key)
+            while len(self._pdfs) > self._max_entries:
+                self._pdfs.popitem(last=False)
+        return pdf, key
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,308 @@
+from datetime import datetime, timedelta
+
+# Weekly (Saturday→Friday) and monthly rollups of the daily report snapshots.
+# A rollup is a plain JSON-able dict that is merged additively as each daily
+# snapshot lands, so serving a week or month never re-reads the daily reports.
+# Week and month rollups also keep each day's contribution, so a re-saved day
+# (today, on every refresh) replaces just its own share.
+#
+#   {"kind", "key", "start", "end", "dates": [...],
+#    "svc_info": {svc: {"program_name", "skysi_key", "skysi_url"}},
+#    "services": {svc: {"error_count", "total_form_submissions", "order",
+#                       "paths": {path: [[msg, time], ...]}}},
+#    "days": {day: {"svc_info": {...}, "services": {svc: {"error_count",
+#                   "total_form_submissions", "paths"}}}}}
+
+PER_PATH_MESSAGE_LIMIT = 10
+
+
+def week_bounds(day: str) -> tuple[str, str]:
+    """(saturday, friday) of the report week containing day (YYYY-MM-DD)."""
+    d = datetime.strptime(day[:10], '%Y-%m-%d')
+    friday = d + timedelta(days=(4 - d.weekday()) % 7)
+    return ((friday - timedelta(days=6)).strftime('%Y-%m-%d'), friday.strftime('%Y-%m-%d'))
+
+
+def month_bounds(day: str) -> tuple[str, str]:
+    """(first, last) day of the calendar month containing day (YYYY-MM-DD or YYYY-MM)."""
+    d = datetime.strptime(day[:7], '%Y-%m')
+    nxt = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (d.strftime('%Y-%m-%d'), (nxt - timedelta(days=1)).strftime('%Y-%m-%d'))
+
+
+def period_for(kind: str, day: str) -> tuple[str, str, str]:
+    """(key, start, end) of the week/month rollup containing day. Weeks are keyed by Friday, months by YYYY-MM."""
+    if kind == 'week':
+        start, end = week_bounds(day)
+        return (end, start, end)
+    start, end = month_bounds(day)
+    return (start[:7], start, end)
+
+
+def empty_rollup(kind: str, key: str, start: str, end: str) -> dict:
+    state = {'kind': kind, 'key': key, 'start': start, 'end': end, 'dates': [], 'svc_info': {}, 'services': {}}
+    if kind in ('week', 'month'):
+        # Ad-hoc ranges are merged once and thrown away; only stored rollups need per-day shares
+        state['days'] = {}
+    return state
+
+
+def _set_info(info: dict, program: str | None = None, skysi_key: str | None = None, skysi_url: str | None = None):
+    if program and not info.get('program_name'):
+        info['program_name'] = program
+    if skysi_key and not info.get('skysi_key'):
+        info['skysi_key'] = skysi_key
+        info['skysi_url'] = skysi_url or ''
+
+
+def _add_paths(dst: dict, path: str, msgs, limit: int):
+    """Union (msg, time) pairs into dst[path], keeping first-seen order and at most limit entries."""
+    bucket = dst.get(path)
+    if bucket is not None and len(bucket) >= limit:
+        return
+    for msg_text, msg_time in msgs:
+        if bucket is None:
+            bucket = dst.setdefault(path, [])
+        if len(bucket) >= limit:
+            break
+        if any(existing == msg_text for existing, _t in bucket):
+            continue
+        bucket.append([msg_text, msg_time])
+
+
+def day_contribution(report: dict, per_path_limit: int = PER_PATH_MESSAGE_LIMIT) -> dict:
+    """One daily snapshot reduced to what a rollup keeps of it: service info, counts and capped messages."""
+    svc_info, services = {}, {}
+    for r in (report.get('svc_rows') or []):
+        svc = r.get('aem_service') or ''
+        if svc:
+            _set_info(svc_info.setdefault(svc, {}), r.get('program_name'), r.get('skysi_key'), r.get('skysi_url'))
+    for it in (report.get('report_items') or []):
+        svc = it.get('aem_service') or ''
+        if not svc:
+            continue
+        _set_info(svc_info.setdefault(svc, {}), it.get('program_name'))
+        agg = services.get(svc)
+        if agg is None:
+            agg = services[svc] = {'error_count': 0, 'total_form_submissions': 0, 'paths': {}}
+        agg['error_count'] += int(it.get('error_count') or 0)
+        agg['total_form_submissions'] += int(it.get('total_form_submissions') or 0)
+        for pe in (it.get('paths') or []):
+            p = pe.get('path') or ''
+            if not p:
+                continue
+            msgs = []
+            for m in (pe.get('messages') or []):
+                # messages are either string or {time,msg}
+                if isinstance(m, dict):
+                    msg_text = (m.get('msg') or '').strip()
+                    msg_time = (m.get('time') or '').strip()
+                else:
+                    msg_text = str(m).strip()
+                    msg_time = ''
+                if msg_text:
+                    msgs.append((msg_text, msg_time))
+            if msgs:
+                _add_paths(agg['paths'], p, msgs, per_path_limit)
+    return {'svc_info': svc_info, 'services': services}
+
+
+def _add_contribution(state: dict, contrib: dict, per_path_limit: int) -> None:
+    for svc, info in contrib['svc_info'].items():
+        _set_info(state['svc_info'].setdefault(svc, {}), info.get('program_name'), info.get('skysi_key'), info.get('skysi_url'))
+    for svc, src in contrib['services'].items():
+        agg = state['services'].get(svc)
+        if agg is None:
+            agg = state['services'][svc] = {'error_count': 0, 'total_form_submissions': 0, 'order': len(state['services']), 'paths': {}}
+        agg['error_count'] += src['error_count']
+        agg['total_form_submissions'] += src['total_form_submissions']
+        for p, msgs in src['paths'].items():
+            _add_paths(agg['paths'], p, [tuple(m) for m in msgs], per_path_limit)
+
+
+def merge_daily(state: dict, day: str, report: dict, per_path_limit: int = PER_PATH_MESSAGE_LIMIT) -> dict:
+    """Add one daily snapshot to a rollup in place (counts add, messages union under the per-path cap)."""
+    contrib = day_contribution(report, per_path_limit)
+    if 'days' in state:
+        state['days'][day] = contrib
+    _add_contribution(state, contrib, per_path_limit)
+    if day not in state['dates']:
+        state['dates'].append(day)
+        state['dates'].sort()
+    return state
+
+
+def replace_daily(state: dict, day: str, report: dict, per_path_limit: int = PER_PATH_MESSAGE_LIMIT) -> dict:
+    """Swap one day's contribution in a rollup that keeps per-day shares, in place.
+
+    Only the services the old or new contribution mentions are recomputed, from
+    the stored shares in date order, so the result equals merging the days afresh.
+    """
+    days = state['days']
+    old = days.get(day) or {'svc_info': {}, 'services': {}}
+    new = days[day] = day_contribution(report, per_path_limit)
+    if day not in state['dates']:
+        state['dates'].append(day)
+        state['dates'].sort()
+    ordered = [days[d] for d in state['dates'] if d in days]
+    for svc in set(old['svc_info']) | set(new['svc_info']):
+        info = {}
+        for c in ordered:
+            src = c['svc_info'].get(svc)
+            if src:
+                _set_info(info, src.get('program_name'), src.get('skysi_key'), src.get('skysi_url'))
+        if any(svc in c['svc_info'] for c in ordered):
+            state['svc_info'][svc] = info
+        else:
+            state['svc_info'].pop(svc, None)
+    for svc in set(old['services']) | set(new['services']):
+        shares = [c['services'][svc] for c in ordered if svc in c['services']]
+        if not shares:
+            state['services'].pop(svc, None)
+            continue
+        agg = state['services'][svc] = {'error_count': 0, 'total_form_submissions': 0, 'order': 0, 'paths': {}}
+        for src in shares:
+            agg['error_count'] += src['error_count']
+            agg['total_form_submissions'] += src['total_form_submissions']
+            for p, msgs in src['paths'].items():
+                _add_paths(agg['paths'], p, [tuple(m) for m in msgs], per_path_limit)
+    # Tie-break order is first appearance by date, as if the days were merged afresh
+    first_seen = {}
+    for c in ordered:
+        for svc in c['services']:
+            first_seen.setdefault(svc, len(first_seen))
+    for svc, agg in state['services'].items():
+        agg['order'] = first_seen[svc]
+    return state
+
+
+def merge_rollup(state: dict, other: dict, per_path_limit: int = PER_PATH_MESSAGE_LIMIT) -> dict:
+    """Append a later rollup (all of its dates after state's) to state in place."""
+    for svc, info in other['svc_info'].items():
+        _set_info(state['svc_info'].setdefault(svc, {}), info.get('program_name'), info.get('skysi_key'), info.get('skysi_url'))
+    for svc, src in sorted(other['services'].items(), key=lambda kv: kv[1]['order']):
+        agg = state['services'].get(svc)
+        if agg is None:
+            agg = state['services'][svc] = {'error_count': 0, 'total_form_submissions': 0, 'order': len(state['services']), 'paths': {}}
+        agg['error_count'] += src['error_count']
+        agg['total_form_submissions'] += src['total_form_submissions']
+        for p, msgs in src['paths'].items():
+            _add_paths(agg['paths'], p, [tuple(m) for m in msgs], per_path_limit)
+    state['dates'] = sorted(set(state['dates']) | set(other['dates']))
+    return state
+
+
+def render_rollup(state: dict) -> dict:
+    """Rollup → {dates, services, svc_rows, report_items} in the /report-week output shape."""
+    ordered = sorted(state['services'].items(), key=lambda kv: (-kv[1]['error_count'], kv[1]['order']))
+    services, svc_rows, report_items = [], [], []
+    for svc, agg in ordered:
+        info = state['svc_info'].get(svc) or {}
+        program = info.get('program_name') or '<unknown program name>'
+        errs = agg['error_count']
+        total_forms = agg['total_form_submissions']
+        services.append(svc)
+        svc_rows.append({
+            'aem_service': svc,
+            'program_name': program,
+            'error_count': errs,
+            'skysi_key': info.get('skysi_key', ''),
+            'skysi_url': info.get('skysi_url', ''),
+        })
+        path_entries = []
+        for p, msgs in agg['paths'].items():
+            limited_msgs = [{'time': t, 'msg': m} if t else {'msg': m} for m, t in msgs]
+            times = [t for _m, t in msgs if t]
+            path_entries.append({'path': p, 'time': ', '.join(times[:10]), 'messages': limited_msgs})
+        report_items.append({
+            'aem_service': svc,
+            'error_count': errs,
+            'total_form_submissions': total_forms,
+            'failure_rate_pct': round((errs / total_forms) * 100, 2) if total_forms else 0.0,
+            'program_name': program,
+            'paths': path_entries,
+        })
+    return {'dates': list(state['dates']), 'services': services, 'svc_rows': svc_rows, 'report_items': report_items}
+
+
+def rebuild_rollup(store, kind: str, key: str, start: str, end: str) -> dict:
+    """Recompute a rollup from the daily snapshots in the store."""
+    state = empty_rollup(kind, key, start, end)
+    for day in sorted(d for d in store.list_dates() if start <= d <= end):
+        report = store.load_report(day)
+        if report:
+            merge_daily(state, day, report)
+    return state
+
+
+def update_rollups(store, day: str, report: dict) -> None:
+    """Fold a freshly stored daily snapshot into its week and month rollups.
+
+    A new latest day is merged additively; a re-saved or out-of-order day
+    replaces only its own contribution. Each rollup's read-modify-write runs
+    in one store transaction. Rollups saved before per-day shares existed are
+    rebuilt from the store once.
+    """
+    for kind in ('week', 'month'):
+        key, start, end = period_for(kind, day)
+
+        def update(state, kind=kind, key=key, start=start, end=end):
+            if state is None or 'days' not in state:
+                return rebuild_rollup(store, kind, key, start, end)
+            if day in state['dates'] or (state['dates'] and day < state['dates'][-1]):
+                return replace_daily(state, day, report)
+            return merge_daily(state, day, report)
+
+        store.update_rollup(kind, key, update)
+
+
+def get_rollup(store, kind: str, day: str) -> dict | None:
+    """Stored rollup for the period containing day, else one merged in memory from the daily snapshots.
+
+    Read-only: rollups are written when a refresh lands (update_rollups), so
+    report reads never wait on the store's write lock.
+    """
+    key, start, end = period_for(kind, day)
+    state = store.load_rollup(kind, key)
+    if state is None:
+        state = rebuild_rollup(store, kind, key, start, end)
+        if not state['dates']:
+            return None
+    return state
+
+
+def rollup_range(store, start: str, end: str) -> dict | None:
+    """Merge an arbitrary start..end range: whole months from their rollups, partial months from daily snapshots."""
+    state = empty_rollup('range', f'{start}..{end}', start, end)
+    stored_dates = sorted(d for d in store.list_dates() if start <= d <= end)
+    cursor = start
+    while cursor <= end:
+        m_key, m_start, m_end = period_for('month', cursor)
+        if m_start >= start and m_end <= end:
+            month = get_rollup(store, 'month', m_start)
+            if month:
+                merge_rollup(state, month)
+        else:
+            lo, hi = max(m_start, start), min(m_end, end)
+            for day in (d for d in stored_dates if lo <= d <= hi):
+                report = store.load_report(day)
+                if report:
+                    merge_daily(state, day, report)
+        cursor = (datetime.strptime(m_end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return state if state['dates'] else None
+
+
+def range_report(store, start: str, end: str) -> dict | None:
+    """Rendered {dates, services, svc_rows, report_items} for start..end (inclusive).
+
+    Ranges covering at least one whole month are assembled from month rollups;
+    shorter ranges are a direct SQL aggregation over the daily snapshots.
+    """
+    cursor = start
+    while cursor <= end:
+        _key, m_start, m_end = period_for('month', cursor)
+        if m_start >= start and m_end <= end:
+            state = rollup_range(store, start, end)
+            return render_rollup(state) if state else None
+        cursor = (datetime.strptime(m_end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return store.aggregate_range(start, end)
@@ -0,0 +1,592 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+import json_codec
+from contextlib import contextmanager
+
+# Daily report snapshots used to live in report_cache_YYYY-MM-DD.json files that
+# were re-read and merged in Python on every weekly request. They are now kept in
+# normalized tables so date/service lookups and range aggregation run in SQLite.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_date TEXT NOT NULL,
+    generated_at TEXT,
+    earliest TEXT,
+    latest TEXT,
+    services TEXT,
+    hwm INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(report_date);
+
+CREATE TABLE IF NOT EXISTS service_rows (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    report_date TEXT NOT NULL,
+    aem_service TEXT NOT NULL,
+    program_name TEXT,
+    error_count INTEGER,
+    skysi_key TEXT,
+    skysi_url TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_service_rows_run ON service_rows(run_id, position);
+CREATE INDEX IF NOT EXISTS idx_service_rows_date ON service_rows(report_date, aem_service);
+CREATE INDEX IF NOT EXISTS idx_service_rows_service ON service_rows(aem_service, report_date);
+
+CREATE TABLE IF NOT EXISTS report_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    report_date TEXT NOT NULL,
+    aem_service TEXT NOT NULL,
+    error_count INTEGER,
+    total_form_submissions INTEGER,
+    failure_rate_pct REAL,
+    program_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_report_items_run ON report_items(run_id, position);
+CREATE INDEX IF NOT EXISTS idx_report_items_date ON report_items(report_date, aem_service);
+CREATE INDEX IF NOT EXISTS idx_report_items_service ON report_items(aem_service, report_date);
+
+CREATE TABLE IF NOT EXISTS path_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL REFERENCES report_items(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_path_entries_item ON path_entries(item_id, position);
+
+CREATE TABLE IF NOT EXISTS messages (
+    path_id INTEGER NOT NULL REFERENCES path_entries(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    time TEXT,
+    msg TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_path ON messages(path_id, position);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    period_key TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, period_key)
+);
+
+-- generation is bumped by every write to runs or rollups; stamp() reads it
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0);
+
+-- Background refresh jobs, shared by every worker process using the file
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_active ON jobs(kind, key, status);
+
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Per-service totals over a date range. Program name and SKYSI follow the old
+# merge order: first non-empty value by (date, svc_rows before report_items, position).
+_RANGE_SERVICES_SQL = """
+WITH items AS (
+    SELECT aem_service,
+           SUM(COALESCE(error_count, 0)) AS error_count,
+           SUM(COALESCE(total_form_submissions, 0)) AS total_form_submissions,
+           MIN(report_date || printf('%06d', position)) AS first_seen
+    FROM report_items
+    WHERE report_date BETWEEN :start AND :end AND aem_service <> ''
+    GROUP BY aem_service
+),
+programs AS (
+    SELECT aem_service, program_name,
+           ROW_NUMBER() OVER (PARTITION BY aem_service ORDER BY report_date, src, position) AS rn
+    FROM (
+        SELECT aem_service, program_name, report_date, 0 AS src, position FROM service_rows
+        WHERE report_date BETWEEN :start AND :end AND COALESCE(program_name, '') <> ''
+        UNION ALL
+        SELECT aem_service, program_name, report_date, 1 AS src, position FROM report_items
+        WHERE report_date BETWEEN :start AND :end AND COALESCE(program_name, '') <> ''
+    )
+),
+skysi AS (
+    SELECT aem_service, skysi_key, skysi_url,
+           ROW_NUMBER() OVER (PARTITION BY aem_service ORDER BY report_date, position) AS rn
+    FROM service_rows
+    WHERE report_date BETWEEN :start AND :end AND COALESCE(skysi_key, '') <> ''
+)
+SELECT i.aem_service, i.error_count, i.total_form_submissions,
+       p.program_name, s.skysi_key, s.skysi_url
+FROM items i
+LEFT JOIN programs p ON p.aem_service = i.aem_service AND p.rn = 1
+LEFT JOIN skysi s ON s.aem_service = i.aem_service AND s.rn = 1
+ORDER BY i.error_count DESC, i.first_seen
+"""
+
+# Unique messages per (service, path) over a date range, keeping the time of the
+# first occurrence and at most :per_path messages in first-seen order.
+_RANGE_MESSAGES_SQL = """
+WITH m AS (
+    SELECT ri.aem_service AS svc, pe.path AS path,
+           TRIM(msg.msg) AS msg, TRIM(COALESCE(msg.time, '')) AS time,
+           ri.report_date || printf('%06d%06d%06d', ri.position, pe.position, msg.position) AS ord
+    FROM messages msg
+    JOIN path_entries pe ON pe.id = msg.path_id
+    JOIN report_items ri ON ri.id = pe.item_id
+    WHERE ri.report_date BETWEEN :start AND :end
+      AND ri.aem_service <> '' AND pe.path <> '' AND TRIM(msg.msg) <> ''
+),
+firsts AS (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY svc, path, msg ORDER BY ord) AS occ FROM m
+),
+ranked AS (
+    SELECT svc, path, msg, time, ord,
+           ROW_NUMBER() OVER (PARTITION BY svc, path ORDER BY ord) AS rnk,
+           MIN(ord) OVER (PARTITION BY svc, path) AS path_ord
+    FROM firsts WHERE occ = 1
+)
+SELECT svc, path, msg, time FROM ranked
+WHERE rnk <= :per_path
+ORDER BY svc, path_ord, rnk
+"""
+
+_DATED_CACHE_RE = re.compile(r'^report_cache_(\d{4})[-_](\d{2})[-_](\d{2})\.json$')
+
+
+class ReportStore:
+    """Daily report snapshots (one current run per date) backed by SQLite."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._open_lock = threading.Lock()
+        self._opened = False
+
+    def open(self) -> None:
+        """Create the database and run schema migrations; done once, on first use at the latest."""
+        with self._open_lock:
+            if self._opened:
+                return
+            parent = os.path.dirname(self.db_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with self._session() as conn:
+                conn.executescript(SCHEMA)
+                cols = {r['name'] for r in conn.execute('PRAGMA table_info(runs)')}
+                if 'hwm' not in cols:
+                    conn.execute('ALTER TABLE runs ADD COLUMN hwm INTEGER')
+            self._opened = True
+
+    def _connect(self):
+        if not self._opened:
+            self.open()
+        return self._session()
+
+    @contextmanager
+    def _session(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump(conn) -> None:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+
+    def stamp(self) -> int | None:
+        """Write generation of the stored snapshots and rollups, shared by every process using the file.
+
+        Unlike the file's mtime/size it only moves on writes, not when a reader
+        opens or checkpoints the WAL.
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Failed to read report store generation: {e}")
+            return None
+
+    def save_report(self, report_date: str, data: dict, hwm: int | None = None) -> int:
+        """Replace the snapshot for report_date with data. Returns the new run id.
+
+        hwm is the epoch second the snapshot's data is complete up to; incremental
+        refreshes query only from there onwards.
+        """
+        with self._connect() as conn:
+            conn.execute('DELETE FROM runs WHERE report_date = ?', (report_date,))
+            cur = conn.execute(
+                'INSERT INTO runs (report_date, generated_at, earliest, latest, services, hwm) VALUES (?, ?, ?, ?, ?, ?)',
+                (report_date, data.get('generated_at'), data.get('earliest'), data.get('latest'),
+                 json_codec.dumps(data.get('services') or []), hwm),
+            )
+            run_id = cur.lastrowid
+            conn.executemany(
+                'INSERT INTO service_rows (run_id, position, report_date, aem_service, program_name, error_count, skysi_key, skysi_url) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, pos, report_date, r.get('aem_service') or '', r.get('program_name'),
+                     int(r.get('error_count') or 0), r.get('skysi_key'), r.get('skysi_url'))
+                    for pos, r in enumerate(data.get('svc_rows') or [])
+                ],
+            )
+            for pos, it in enumerate(data.get('report_items') or []):
+                total = it.get('total_form_submissions')
+                rate = it.get('failure_rate_pct')
+                cur = conn.execute(
+                    'INSERT INTO report_items (run_id, position, report_date, aem_service, error_count, total_form_submissions, failure_rate_pct, program_name) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (run_id, pos, report_date, it.get('aem_service') or '', int(it.get('error_count') or 0),
+                     int(total) if total is not None else None,
+                     float(rate) if rate is not None else None,
+                     it.get('program_name')),
+                )
+                item_id = cur.lastrowid
+                for ppos, pe in enumerate(it.get('paths') or []):
+                    cur = conn.execute(
+                        'INSERT INTO path_entries (item_id, position, path, time) VALUES (?, ?, ?, ?)',
+                        (item_id, ppos, pe.get('path') or '', pe.get('time')),
+                    )
+                    path_id = cur.lastrowid
+                    msg_rows = []
+                    for mpos, m in enumerate(pe.get('messages') or []):
+                        # Messages are either plain strings or {time, msg}; a NULL time keeps the string form.
+                        if isinstance(m, dict):
+                            msg_rows.append((path_id, mpos, m.get('time') or '', m.get('msg') or ''))
+                        else:
+                            msg_rows.append((path_id, mpos, None, str(m)))
+                    conn.executemany(
+                        'INSERT INTO messages (path_id, position, time, msg) VALUES (?, ?, ?, ?)', msg_rows
+                    )
+            self._bump(conn)
+            return run_id
+
+    def _load_run(self, conn, run) -> dict:
+        run_id = run['id']
+        svc_rows = [
+            {
+                'aem_service': r['aem_service'],
+                'program_name': r['program_name'],
+                'error_count': r['error_count'],
+                'skysi_key': r['skysi_key'],
+                'skysi_url': r['skysi_url'],
+            }
+            for r in conn.execute(
+                'SELECT * FROM service_rows WHERE run_id = ? ORDER BY position', (run_id,)
+            )
+        ]
+        items = conn.execute(
+            'SELECT * FROM report_items WHERE run_id = ? ORDER BY position', (run_id,)
+        ).fetchall()
+        paths_by_item = {}
+        for pe in conn.execute(
+            'SELECT pe.* FROM path_entries pe JOIN report_items ri ON ri.id = pe.item_id '
+            'WHERE ri.run_id = ? ORDER BY pe.item_id, pe.position', (run_id,)
+        ):
+            paths_by_item.setdefault(pe['item_id'], []).append(pe)
+        msgs_by_path = {}
+        for m in conn.execute(
+            'SELECT m.* FROM messages m JOIN path_entries pe ON pe.id = m.path_id '
+            'JOIN report_items ri ON ri.id = pe.item_id WHERE ri.run_id = ? ORDER BY m.path_id, m.position',
+            (run_id,),
+        ):
+            msg = m['msg'] if m['time'] is None else {'time': m['time'], 'msg': m['msg']}
+            msgs_by_path.setdefault(m['path_id'], []).append(msg)
+        report_items = []
+        for it in items:
+            out = {'aem_service': it['aem_service'], 'error_count': it['error_count']}
+            if it['total_form_submissions'] is not None:
+                out['total_form_submissions'] = it['total_form_submissions']
+            if it['failure_rate_pct'] is not None:
+                out['failure_rate_pct'] = it['failure_rate_pct']
+            out['program_name'] = it['program_name']
+            out['paths'] = [
+                {'path': pe['path'], 'time': pe['time'], 'messages': msgs_by_path.get(pe['id'], [])}
+                for pe in paths_by_item.get(it['id'], [])
+            ]
+            report_items.append(out)
+        return {
+            'generated_at': run['generated_at'],
+            'earliest': run['earliest'],
+            'latest': run['latest'],
+            'services': json_codec.loads(run['services'] or '[]'),
+            'svc_rows': svc_rows,
+            'report_items': report_items,
+        }
+
+    def load_report(self, report_date: str) -> dict | None:
+        with self._connect() as conn:
+            run = conn.execute(
+                'SELECT * FROM runs WHERE report_date = ? ORDER BY id DESC LIMIT 1', (report_date,)
+            ).fetchone()
+            return self._load_run(conn, run) if run else None
+
+    def high_water_mark(self, report_date: str) -> int | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT hwm FROM runs WHERE report_date = ? ORDER BY id DESC LIMIT 1', (report_date,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest_report(self) -> dict | None:
+        """Most recently written snapshot (the old report_cache.json)."""
+        with self._connect() as conn:
+            run = conn.execute('SELECT * FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+            return self._load_run(conn, run) if run else None
+
+    def list_dates(self) -> list[str]:
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute('SELECT DISTINCT report_date FROM runs ORDER BY report_date DESC')]
+
+    def aggregate_range(self, start: str, end: str, per_path_limit: int = 10) -> dict | None:
+        """Merge daily snapshots for start..end (YYYY-MM-DD, inclusive) the way /report-week always has.
+
+        Returns {dates, services, svc_rows, report_items} or None when no snapshot falls in the range.
+        """
+        params = {'start': start, 'end': end, 'per_path': per_path_limit}
+        with self._connect() as conn:
+            dates = [r[0] for r in conn.execute(
+                'SELECT DISTINCT report_date FROM runs WHERE report_date BETWEEN ? AND ? ORDER BY report_date',
+                (start, end),
+            )]
+            if not dates:
+                return None
+            svc_totals = conn.execute(_RANGE_SERVICES_SQL, params).fetchall()
+            msg_rows = conn.execute(_RANGE_MESSAGES_SQL, params).fetchall()
+
+        paths_by_service = {}
+        for r in msg_rows:
+            msgs = paths_by_service.setdefault(r['svc'], {}).setdefault(r['path'], [])
+            msgs.append({'time': r['time'], 'msg': r['msg']} if r['time'] else {'msg': r['msg']})
+
+        services, svc_rows, report_items = [], [], []
+        for r in svc_totals:
+            svc = r['aem_service']
+            program = r['program_name'] or '<unknown program name>'
+            errs = r['error_count']
+            total_forms = r['total_form_submissions']
+            services.append(svc)
+            svc_rows.append({
+                'aem_service': svc,
+                'program_name': program,
+                'error_count': errs,
+                'skysi_key': r['skysi_key'] or '',
+                'skysi_url': r['skysi_url'] or '',
+            })
+            path_entries = []
+            for p, msgs in paths_by_service.get(svc, {}).items():
+                times = [m['time'] for m in msgs if m.get('time')]
+                path_entries.append({'path': p, 'time': ', '.join(times[:10]), 'messages': msgs})
+            report_items.append({
+                'aem_service': svc,
+                'error_count': errs,
+                'total_form_submissions': total_forms,
+                'failure_rate_pct': round((errs / total_forms) * 100, 2) if total_forms else 0.0,
+                'program_name': program,
+                'paths': path_entries,
+            })
+        return {'dates': dates, 'services': services, 'svc_rows': svc_rows, 'report_items': report_items}
+
+    def load_rollup(self, kind: str, period_key: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT state FROM rollups WHERE kind = ? AND period_key = ?', (kind, period_key)
+            ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def save_rollup(self, state: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO rollups (kind, period_key, start_date, end_date, state, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)',
+                (state['kind'], state['key'], state['start'], state['end'],
+                 json_codec.dumps(state)),
+            )
+            self._bump(conn)
+
+    def update_rollup(self, kind: str, period_key: str, update) -> dict | None:
+        """Read-modify-write one rollup in a single transaction.
+
+        update(state or None) returns the state to store (or None to leave it);
+        concurrent refresh jobs and processes serialize on the write lock instead
+        of overwriting each other's merge.
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT state FROM rollups WHERE kind = ? AND period_key = ?', (kind, period_key)
+            ).fetchone()
+            state = update(json_codec.loads(row[0]) if row else None)
+            if state is not None:
+                conn.execute(
+                    'INSERT OR REPLACE INTO rollups (kind, period_key, start_date, end_date, state, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)',
+                    (state['kind'], state['key'], state['start'], state['end'], json_codec.dumps(state)),
+                )
+                self._bump(conn)
+            return state
+
+    def try_acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take (or renew) the named lease for ttl seconds unless another owner holds it unexpired.
+
+        Processes sharing this database file use it so only one of them runs a
+        given scheduled refresh.
+        """
+        import time
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM leases WHERE expires_at < ?', (now,))
+            cur = conn.execute(
+                'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET expires_at = excluded.expires_at WHERE leases.owner = excluded.owner',
+                (name, owner, now + ttl),
+            )
+            return cur.rowcount > 0
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+    @staticmethod
+    def _job_row(row) -> dict:
+        job = {k: row[k] for k in row.keys() if k != 'updated_at'}
+        job['result'] = json_codec.loads(row['result']) if row['result'] else None
+        job['message'] = job['message'] or ''
+        job['error'] = job['error'] or ''
+        return job
+
+    def _write_job(self, conn, job: dict, now: float) -> None:
+        conn.execute(
+            'INSERT OR REPLACE INTO jobs (id, kind, key, status, progress, message, result, error, created_at, '
+            'started_at, finished_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (job['id'], job['kind'], job['key'], job['status'], job['progress'], job['message'],
+             json_codec.dumps(job['result']) if job['result'] is not None else None, job['error'],
+             job['created_at'], job['started_at'], job['finished_at'], now),
+        )
+
+    def claim_job(self, job: dict, stale_after: float) -> tuple[dict, bool]:
+        """Record job unless a job with its kind and key is already queued or running in any process.
+
+        Returns (job to follow, created). Active jobs not saved for stale_after
+        seconds belong to a worker that went away and are marked failed.
+        """
+        import time
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'abandoned: worker stopped', finished_at = ?, updated_at = ? "
+                "WHERE status IN ('queued', 'running') AND updated_at < ?",
+                (now, now, now - stale_after),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND key = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1", (job['kind'], job['key']),
+            ).fetchone()
+            if row:
+                return self._job_row(row), False
+            self._write_job(conn, job, now)
+            return job, True
+
+    def save_job(self, job: dict) -> None:
+        import time
+        with self._connect() as conn:
+            self._write_job(conn, job, time.time())
+
+    def load_job(self, job_id: str, stale_after: float | None = None) -> dict | None:
+        """Job by id; an active one not saved for stale_after seconds is reported (and stored) as failed."""
+        import time
+        now = time.time()
+        with self._connect() as conn:
+            if stale_after is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'abandoned: worker stopped', finished_at = ?, updated_at = ? "
+                    "WHERE id = ? AND status IN ('queued', 'running') AND updated_at < ?",
+                    (now, now, job_id, now - stale_after),
+                )
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> list[dict]:
+        """Most recently created jobs first."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+        return [self._job_row(r) for r in rows]
+
+    def prune_jobs(self, keep_finished: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND id NOT IN ("
+                "SELECT id FROM jobs WHERE status NOT IN ('queued', 'running') ORDER BY created_at DESC LIMIT ?)",
+                (keep_finished,),
+            )
+
+    def drop_rollups_covering(self, day: str) -> None:
+        """Forget rollups that include day so they are rebuilt from the daily snapshots."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM rollups WHERE start_date <= ? AND end_date >= ?', (day, day))
+            self._bump(conn)
+
+    def import_json_dir(self, dir_path: str, default_file: str | None = None, on_saved=None) -> int:
+        """Migrate report_cache_YYYY-MM-DD.json (and the legacy latest snapshot) for dates not yet stored.
+
+        on_saved(day, data) runs after each import (e.g. to fold it into the
+        rollups); without it, rollups covering the day are dropped instead.
+        """
+        if not os.path.isdir(dir_path):
+            return 0
+        known = set(self.list_dates())
+        candidates = []
+        for fn in os.listdir(dir_path):
+            m = _DATED_CACHE_RE.match(fn)
+            if m:
+                candidates.append(('-'.join(m.groups()), os.path.join(dir_path, fn)))
+        candidates.sort()
+        if default_file and os.path.exists(default_file):
+            # The legacy file is only a copy of the newest dated snapshot; import it last so it never wins.
+            candidates.append((None, default_file))
+        imported = 0
+        for day, fp in candidates:
+            try:
+                with open(fp, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                day = day or (data.get('generated_at') or '')[:10]
+                if not day or day in known:
+                    continue
+                self.save_report(day, data)
+                if on_saved:
+                    on_saved(day, data)
+                else:
+                    self.drop_rollups_covering(day)
+                known.add(day)
+                imported += 1
+            except Exception as e:
+                print(f"Failed to import report cache {fp}: {e}")
+        return imported
@@ -0,0 +1,304 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+import deadline
+import metrics
+
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling a backend whose breaker is open or whose queue is full."""
+
+    def __init__(self, backend: str, reason: str, retry_after: float = 0.0):
+        super().__init__(f"{backend} unavailable: {reason}")
+        self.backend = backend
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('event', 'loop', 'future')
+
+    def __init__(self, loop=None, future=None):
+        self.event = threading.Event() if future is None else None
+        self.loop = loop
+        self.future = future
+
+    def grant(self) -> None:
+        if self.future is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda f=self.future: f.done() or f.set_result(True))
+
+
+class Bulkhead:
+    """At most max_concurrent calls in flight, at most max_queue waiting; beyond that, reject.
+
+    Shared by worker threads (Flask, jobs) and coroutines (ASGI handlers) in
+    the same process. A released slot is handed to the oldest waiter.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
+
+    def _enter_or_queue(self, waiter_factory):
+        # Caller holds the lock. Returns None when a slot was taken, else the queued waiter.
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise BackendUnavailable(self.name, 'queue full', retry_after=1.0)
+        waiter = waiter_factory()
+        self._waiters.append(waiter)
+        return waiter
+
+    def _give_up(self, waiter: _Waiter) -> bool:
+        """True when the waiter was still queued (and is now removed); False if it was granted meanwhile."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                return False
+            self.rejected += 1
+            return True
+
+    def _wait_budget(self) -> float:
+        d = deadline.current()
+        return min(self.queue_timeout, d.remaining()) if d else self.queue_timeout
+
+    def acquire(self) -> None:
+        with self._lock:
+            waiter = self._enter_or_queue(_Waiter)
+        if waiter is None:
+            return
+        if not waiter.event.wait(self._wait_budget()) and self._give_up(waiter):
+            raise BackendUnavailable(self.name, 'queue wait timed out', retry_after=1.0)
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._enter_or_queue(lambda: _Waiter(loop, loop.create_future()))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._wait_budget())
+        except asyncio.TimeoutError:
+            if self._give_up(waiter):
+                raise BackendUnavailable(self.name, 'queue wait timed out', retry_after=1.0)
+        except asyncio.CancelledError:
+            if not self._give_up(waiter):
+                self.release()  # slot was handed to us as we were cancelled
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the next waiter; active stays the same
+                self._waiters.popleft().grant()
+            else:
+                self.active -= 1
+
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+class CircuitBreaker:
+    """closed → open after failure_threshold consecutive failures (errors or calls slower than
+    slow_call_seconds); open → half-open after reset_timeout, where one trial call decides."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, slow_call_seconds: float, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ''
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN:
+                wait = self.opened_at + self.reset_timeout - time.monotonic()
+                if wait > 0:
+                    raise BackendUnavailable(self.name, 'circuit open', retry_after=wait)
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise BackendUnavailable(self.name, 'circuit half-open, trial call in flight', retry_after=1.0)
+                self._trial_in_flight = True
+
+    def record(self, elapsed: float, error: str = '') -> None:
+        if not error and elapsed > self.slow_call_seconds:
+            error = f"slow call ({elapsed:.1f}s)"
+        with self._lock:
+            self._trial_in_flight = False
+            if not error:
+                self.failures = 0
+                self.state = self.CLOSED
+                return
+            self.failures += 1
+            self.last_error = error
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"Circuit for {self.name} opened: {error}")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """The call never reached the backend (rejected or cancelled); record nothing."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+
+class _Call:
+    __slots__ = ('error',)
+
+    def __init__(self):
+        self.error = ''
+
+    def fail(self, error: str) -> None:
+        """Count this call as a failure even though it returned (HTTP 5xx, abandoned search).
+
+        The request's results are then incomplete, so it is flagged partial
+        (and the report built from it is not cached).
+        """
+        self.error = error or 'failed'
+        d = deadline.current()
+        if d is not None:
+            d.mark_partial(f"upstream call failed: {self.error}")
+
+
+class Backend:
+    """Bulkhead + circuit breaker for one upstream (Splunk, Jira, LLM)."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 failure_threshold: int, slow_call_seconds: float, reset_timeout: float):
+        self.name = name
+        self.bulkhead = Bulkhead(name, max_concurrent, max_queue, queue_timeout)
+        self.breaker = CircuitBreaker(name, failure_threshold, slow_call_seconds, reset_timeout)
+
+    @contextmanager
+    def call(self):
+        self.breaker.before_call()
+        try:
+            self.bulkhead.acquire()
+        except BackendUnavailable:
+            self.breaker.release_trial()  # a rejected call says nothing about the backend
+            raise
+        handle, t0 = _Call(), time.monotonic()
+        try:
+            yield handle
+        except Exception as e:
+            handle.fail(str(e) or type(e).__name__)
+            raise
+        finally:
+            self._finish(handle, t0)
+
+    @asynccontextmanager
+    async def acall(self):
+        self.breaker.before_call()
+        try:
+            await self.bulkhead.aacquire()
+        except (BackendUnavailable, asyncio.CancelledError):
+            self.breaker.release_trial()
+            raise
+        handle, t0 = _Call(), time.monotonic()
+        try:
+            yield handle
+        except asyncio.CancelledError:
+            self.bulkhead.release()
+            self.breaker.release_trial()
+            raise
+        except Exception as e:
+            handle.fail(str(e) or type(e).__name__)
+            self._finish(handle, t0)
+            raise
+        self._finish(handle, t0)
+
+    def _finish(self, handle: _Call, t0: float) -> None:
+        self.bulkhead.release()
+        self.breaker.record(time.monotonic() - t0, handle.error)
+
+    def available(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN or self.breaker.retry_after() <= 0
+
+    def snapshot(self) -> dict:
+        b = self.breaker
+        return {
+            "state": b.state,
+            "in_flight": self.bulkhead.active,
+            "max_concurrent": self.bulkhead.max_concurrent,
+            "queued": self.bulkhead.queued(),
+            "max_queue": self.bulkhead.max_queue,
+            "rejected": self.bulkhead.rejected,
+            "consecutive_failures": b.failures,
+            "last_error": b.last_error,
+            "retry_after": round(b.retry_after(), 1),
+        }
+
+
+def _backend_from_env(name: str, prefix: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                      failure_threshold: int, slow_call_seconds: float, reset_timeout: float) -> Backend:
+    env = lambda key, default: float(os.getenv(f"{prefix}_{key}", str(default)))
+    return Backend(
+        name,
+        max_concurrent=int(env('MAX_CONCURRENT', max_concurrent)),
+        max_queue=int(env('MAX_QUEUE', max_queue)),
+        queue_timeout=env('QUEUE_TIMEOUT', queue_timeout),
+        failure_threshold=int(env('BREAKER_FAILURES', failure_threshold)),
+        slow_call_seconds=env('SLOW_CALL_SECONDS', slow_call_seconds),
+        reset_timeout=env('BREAKER_RESET_SECONDS', reset_timeout),
+    )
+
+
+# Splunk's per-user concurrent search quota is the scarce resource; stay under it
+SPLUNK = _backend_from_env('splunk', 'SPLUNK', 8, 32, 30, 5, 120, 30)
+JIRA = _backend_from_env('jira', 'JIRA', 10, 50, 10, 5, 20, 30)
+LLM = _backend_from_env('llm', 'LLM', 4, 16, 30, 3, 60, 60)
+BACKENDS = {b.name: b for b in (SPLUNK, JIRA, LLM)}
+
+
+def call_llm(llm, prompt: str):
+    """llm.call(prompt) through the LLM bulkhead and breaker."""
+    with LLM.call(), metrics.upstream('llm', 'call'):
+        return llm.call(prompt)
+
+
+# Scraped from the live bulkheads and breakers rather than tracked separately
+_BACKEND_GAUGES = (
+    ('backend_calls_in_flight', 'Calls holding a backend bulkhead slot.', lambda b: b.bulkhead.active),
+    ('backend_calls_queued', 'Calls waiting for a backend bulkhead slot.', lambda b: b.bulkhead.queued()),
+    ('backend_circuit_open', '1 while the backend breaker is open or half-open.',
+     lambda b: int(b.breaker.state != CircuitBreaker.CLOSED)),
+)
+for _name, _help, _value in _BACKEND_GAUGES:
+    metrics.Gauge(_name, _help, ('backend',)).set_collector(
+        lambda value=_value: {(name,): value(b) for name, b in BACKENDS.items()})
+
+
+def health_snapshot() -> dict:
+    backends = {name: b.snapshot() for name, b in BACKENDS.items()}
+    degraded = any(s['state'] != CircuitBreaker.CLOSED or s['queued'] for s in backends.values())
+    return {"status": "degraded" if degraded else "ok", "backends": backends}
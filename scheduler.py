@@ -0,0 +1,95 @@
+import os
+import time
+import random
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+
+def get_scheduler_config() -> dict:
+    """Scheduler settings from the environment (intervals and jitter in seconds)."""
+    return {
+        "enabled": os.getenv("REFRESH_SCHEDULER_ENABLED", "false").lower() == "true",
+        "report_interval": int(os.getenv("REPORT_REFRESH_INTERVAL", "3600")),
+        "daily_stats_interval": int(os.getenv("DAILY_STATS_REFRESH_INTERVAL", "86400")),
+        "daily_stats_days": int(os.getenv("DAILY_STATS_REFRESH_DAYS", "1")),
+        "jitter": int(os.getenv("REFRESH_JITTER", "60")),
+    }
+
+
+@dataclass
+class ScheduledTask:
+    name: str
+    interval: int
+    run: Callable[[], None]
+    next_run: float = 0.0
+
+
+class RefreshScheduler:
+    """Runs periodic refresh tasks on a daemon thread.
+
+    Time is cut into interval-sized windows; before running a task for a window
+    the scheduler takes a lease named after it in the shared store, so when
+    several processes or nodes run the scheduler only one refreshes each window.
+    after_run is called after every run (cache pre-warming).
+    """
+
+    def __init__(self, lease_store, jitter: int = 60, after_run: Callable[[str], None] | None = None):
+        self._lease_store = lease_store
+        self._jitter = max(0, jitter)
+        self._after_run = after_run
+        self._tasks: list[ScheduledTask] = []
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_task(self, name: str, interval: int, run: Callable[[], None]) -> None:
+        task = ScheduledTask(name=name, interval=max(60, interval), run=run)
+        task.next_run = self._next_run(task, time.time())
+        self._tasks.append(task)
+
+    def _next_run(self, task: ScheduledTask, now: float) -> float:
+        # Start of the next window plus jitter, so nodes don't all hit Splunk at once
+        window_start = (now // task.interval + 1) * task.interval
+        return window_start + random.uniform(0, self._jitter)
+
+    def start(self) -> None:
+        if self._thread is not None or not self._tasks:
+            return
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        print(f"Refresh scheduler started ({', '.join(f'{t.name} every {t.interval}s' for t in self._tasks)})")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            due = [t for t in self._tasks if t.next_run <= now]
+            for task in due:
+                self._run_once(task, now)
+                task.next_run = self._next_run(task, time.time())
+            wait = min(t.next_run for t in self._tasks) - time.time()
+            self._stop.wait(max(1.0, wait))
+
+    def _run_once(self, task: ScheduledTask, now: float) -> bool:
+        lease = f"{task.name}:{int(now // task.interval)}"
+        try:
+            # Held for the whole window, so a node whose timer fires later in it skips the run
+            if not self._lease_store.try_acquire_lease(lease, self._owner, task.interval):
+                return False
+        except Exception as e:
+            print(f"Scheduler could not take lease {lease}: {e}")
+            return False
+        try:
+            task.run()
+        except Exception as e:
+            print(f"Scheduled {task.name} failed: {e}")
+        if self._after_run:
+            try:
+                self._after_run(task.name)
+            except Exception as e:
+                print(f"Cache pre-warm after {task.name} failed: {e}")
+        return True
@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import hashlib
+import inspect
+import functools
+import threading
+import contextvars
+
+import json_codec
+import metrics
+
+SPLUNK_QUERY_LOG_PATH = os.getenv('SPLUNK_QUERY_LOG_PATH', os.path.join(os.path.dirname(__file__), 'splunk_query_log.jsonl'))
+# Searches whose run time (Splunk's runDuration or our wall time) reaches this are logged; 0 logs every search
+SLOW_QUERY_SECONDS = float(os.getenv('SPLUNK_SLOW_QUERY_SECONDS', '0'))
+QUERY_LOG_MAX_BYTES = int(os.getenv('SPLUNK_QUERY_LOG_MAX_BYTES', str(20 * 1024 * 1024)))
+MAX_QUERY_CHARS = 4000
+MAX_PHASES = 8
+
+RANK_KEYS = ('total_run_duration', 'avg_run_duration', 'max_run_duration', 'total_scan_count', 'avg_scan_count', 'count')
+
+_origin: contextvars.ContextVar[str] = contextvars.ContextVar('splunk_search_origin', default='')
+
+
+def search_origin(fn):
+    """Tag the Splunk searches run inside fn with its name in the query log.
+
+    Tagged functions may nest; the innermost one (the one that built the SPL)
+    wins. Works on coroutines too, including searches they gather.
+    """
+    name = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            token = _origin.set(name)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _origin.reset(token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _origin.set(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _origin.reset(token)
+    return wrapper
+
+
+def current_origin() -> str:
+    return _origin.get() or 'unknown'
+
+
+_QUOTED = re.compile(r'"(?:[^"\\]|\\.)*"')
+# field OP value, where value is a bare literal (not a function call); index/sourcetype stay as they are
+_COMPARISON = re.compile(r'\b([A-Za-z_][\w.]*)(\s*(?:!=|>=|<=|=|>|<)\s*)([^\s()\[\]|"=,<>!]++)(?!\()')
+_KEEP_FIELDS = {'index', 'sourcetype', 'source'}
+_IDENT_DIGITS = re.compile(r'(?<=[A-Za-z_])\d+\b')
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?![\w.])')
+_SPACES = re.compile(r'\s+')
+
+
+def spl_template(query: str) -> str:
+    """The query with its literals (services, times, thresholds) replaced by ?/N and runs
+    of identical pipeline stages (one eval per failure window, ...) collapsed, so one
+    builder's searches share a template whatever their arguments."""
+    t = _QUOTED.sub('"?"', query or '')
+    t = _COMPARISON.sub(lambda m: m.group(0) if m.group(1).lower() in _KEEP_FIELDS else f'{m.group(1)}{m.group(2)}?', t)
+    t = _IDENT_DIGITS.sub('N', t)
+    t = _NUMBER.sub('N', t)
+    t = _SPACES.sub(' ', t).strip()
+    stages = [_collapse_runs(stage.split(', '), ', ') for stage in t.split(' | ')]
+    return _collapse_runs(stages, ' | ')
+
+
+def _collapse_runs(parts: list[str], sep: str) -> str:
+    out = []
+    for part in parts:
+        if out and out[-1] in (part, part + ' ...'):
+            out[-1] = part + ' ...'
+            continue
+        out.append(part)
+    return sep.join(out)
+
+
+def template_id(template: str) -> str:
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:12]
+
+
+def job_stats(content: dict) -> dict:
+    """runDuration, scan/event/result counts and the costliest phases from a job's properties
+    (GET /services/search/jobs/{sid}); the phases are search.log's per-command timings."""
+    def number(key, cast=float):
+        try:
+            return cast(float(content.get(key) or 0))
+        except (TypeError, ValueError):
+            return cast(0)
+
+    phases = []
+    for phase, cost in (content.get('performance') or {}).items():
+        if isinstance(cost, dict):
+            try:
+                phases.append((phase, float(cost.get('duration_secs') or 0)))
+            except (TypeError, ValueError):
+                continue
+    phases.sort(key=lambda p: -p[1])
+    return {
+        "run_duration": round(number('runDuration'), 3),
+        "scan_count": number('scanCount', int),
+        "event_count": number('eventCount', int),
+        "result_count": number('resultCount', int),
+        "dispatch_state": content.get('dispatchState', '') or '',
+        "phases": {phase: round(secs, 3) for phase, secs in phases[:MAX_PHASES]},
+    }
+
+
+class QueryLog:
+    """Append-only JSONL log of Splunk searches and their job statistics.
+
+    Rotated to <path>.1 once it passes max_bytes, so ranking reads at most
+    about two files' worth. Appends from several worker processes are single
+    short writes in append mode.
+    """
+
+    def __init__(self, path: str, max_bytes: int = QUERY_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._summary: tuple[tuple, dict] | None = None
+
+    def append(self, entry: dict) -> None:
+        line = json_codec.dumps_bytes(entry) + b'\n'
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'ab') as f:
+                    f.write(line)
+            except Exception as e:
+                print(f"Failed to write Splunk query log {self.path}: {e}")
+
+    def stamp(self) -> tuple:
+        out = []
+        for p in (self.path + '.1', self.path):
+            try:
+                st = os.stat(p)
+                out.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def entries(self):
+        for p in (self.path + '.1', self.path):
+            try:
+                with open(p, 'rb') as f:
+                    for line in f:
+                        try:
+                            yield json_codec.loads(line)
+                        except Exception:
+                            continue  # a torn line from a concurrent writer
+            except FileNotFoundError:
+                continue
+
+    def _templates(self) -> dict:
+        stamp = self.stamp()
+        cached = self._summary
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        templates = {}
+        for e in self.entries():
+            tid = e.get('template_id')
+            if not tid:
+                continue
+            t = templates.get(tid)
+            if t is None:
+                t = templates[tid] = {
+                    "template_id": tid, "template": e.get('template', ''), "count": 0,
+                    "total_run_duration": 0.0, "max_run_duration": 0.0, "total_wall_seconds": 0.0,
+                    "total_scan_count": 0, "total_event_count": 0, "total_result_count": 0,
+                    "partial": 0, "errors": 0, "origins": set(), "phases": {},
+                }
+            run = float(e.get('run_duration') or 0)
+            t["count"] += 1
+            t["total_run_duration"] += run
+            t["max_run_duration"] = max(t["max_run_duration"], run)
+            t["total_wall_seconds"] += float(e.get('wall_seconds') or 0)
+            t["total_scan_count"] += int(e.get('scan_count') or 0)
+            t["total_event_count"] += int(e.get('event_count') or 0)
+            t["total_result_count"] += int(e.get('result_count') or 0)
+            t["partial"] += e.get('outcome') == 'partial'
+            t["errors"] += e.get('outcome') == 'error'
+            t["origins"].add(e.get('origin') or 'unknown')
+            for phase, secs in (e.get('phases') or {}).items():
+                t["phases"][phase] = t["phases"].get(phase, 0.0) + float(secs or 0)
+            # Latest example wins
+            t["example_query"] = e.get('query', '')
+            t["last_sid"] = e.get('sid', '')
+            t["last_seen"] = e.get('ts', 0)
+        self._summary = (stamp, templates)
+        return templates
+
+    def rank(self, sort: str = 'total_run_duration', limit: int = 20, origin: str = '') -> list[dict]:
+        """Templates ordered by cost, with per-template totals, averages, origins and top phases."""
+        out = []
+        for t in self._templates().values():
+            if origin and origin not in t["origins"]:
+                continue
+            n = t["count"]
+            row = {k: v for k, v in t.items() if k not in ('origins', 'phases')}
+            row.update({
+                "origins": sorted(t["origins"]),
+                "avg_run_duration": round(t["total_run_duration"] / n, 3),
+                "avg_wall_seconds": round(t["total_wall_seconds"] / n, 3),
+                "avg_scan_count": round(t["total_scan_count"] / n, 1),
+                "total_run_duration": round(t["total_run_duration"], 3),
+                "total_wall_seconds": round(t["total_wall_seconds"], 3),
+                "top_phases": dict(sorted(t["phases"].items(), key=lambda p: -p[1])[:5]),
+            })
+            row["top_phases"] = {k: round(v, 3) for k, v in row["top_phases"].items()}
+            out.append(row)
+        out.sort(key=lambda r: r[sort], reverse=True)
+        return out[:limit]
+
+
+QUERY_LOG = QueryLog(SPLUNK_QUERY_LOG_PATH)
+
+
+def record(query: str, sid: str | None, content: dict | None, rows: int, outcome: str, wall_seconds: float,
+           search: str = 'other') -> dict:
+    """Log one finished (or abandoned) search with its job statistics and origin."""
+    stats = job_stats(content or {})
+    template = spl_template(query)
+    entry = {
+        "ts": round(time.time(), 3),
+        "sid": sid or '',
+        "origin": current_origin(),
+        "template_id": template_id(template),
+        "template": template,
+        "query": (query or '')[:MAX_QUERY_CHARS],
+        "rows": rows,
+        "wall_seconds": round(wall_seconds, 3),
+        "outcome": outcome,
+        **stats,
+    }
+    if stats["run_duration"]:
+        metrics.SPLUNK_JOB_RUN_SECONDS.labels(search).observe(stats["run_duration"])
+        metrics.SPLUNK_SCANNED_EVENTS.labels(search).inc(stats["scan_count"])
+    if max(stats["run_duration"], wall_seconds) >= SLOW_QUERY_SECONDS:
+        QUERY_LOG.append(entry)
+    return entry
@@ -0,0 +1,152 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import deadline
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = 0.0
+
+
+def _wait_for(done: threading.Event) -> None:
+    """Block until done is set, or raise DeadlineExceeded when the current request's deadline ends first."""
+    d = deadline.current()
+    if d is None:
+        done.wait()
+        return
+    # Short slices so a cancelled request (client gone) stops waiting promptly
+    while not done.wait(min(0.25, d.remaining())):
+        if d.expired():
+            d.mark_partial('coalesced call outlived the request deadline')
+            raise deadline.DeadlineExceeded('client disconnected' if d.cancelled else 'request deadline exceeded')
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one execution.
+
+    The first caller for a key runs fn; callers arriving while it is in flight
+    block and receive the same result (or exception). A finished result stays
+    shareable for grace_seconds, so a burst of viewers opening the same
+    incident triggers a single round of Splunk/LLM work.
+
+    A caller waits at most until its own request deadline, then gets
+    DeadlineExceeded. A result the leader's deadline cut short
+    (deadline.is_partial()) goes to the callers already waiting for it, but
+    it is not kept for later ones.
+    """
+
+    def __init__(self, grace_seconds: float = 30.0, max_entries: int = 256):
+        self._grace = grace_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: OrderedDict[Hashable, _Call] = OrderedDict()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return (result, shared); shared is True when the result came from another caller's run."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and time.time() - call.finished_at > self._grace:
+                del self._calls[key]
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._evict()
+        if not leader:
+            _wait_for(call.done)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            if deadline.is_partial():
+                self._forget(key, call)
+        except Exception as e:
+            call.error = e
+            # Don't keep serving a failure during the grace period
+            self._forget(key, call)
+            raise
+        finally:
+            call.finished_at = time.time()
+            call.done.set()
+        return call.result, False
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Drop finished entries, oldest first, beyond max_entries.
+        if len(self._calls) <= self._max_entries:
+            return
+        for k in [k for k, c in self._calls.items() if c.done.is_set()]:
+            if len(self._calls) <= self._max_entries:
+                break
+            del self._calls[k]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for c in self._calls.values() if not c.done.is_set())
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop.
+
+    Concurrent awaits of a key share one task, and a successful result stays
+    shareable for grace_seconds unless the leader's deadline marked it partial.
+    The task is shielded, so a caller that goes away (cancelled request) does
+    not cancel the work others are waiting on; a caller whose own deadline
+    ends first gets DeadlineExceeded.
+    """
+
+    def __init__(self, grace_seconds: float = 0.0):
+        self._grace = grace_seconds
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return (result, shared); fn is a coroutine function."""
+        task = self._tasks.get(key)
+        if task is not None:
+            d = deadline.current()
+            if d is None:
+                return await asyncio.shield(task), True
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), d.remaining()), True
+            except asyncio.TimeoutError:
+                d.mark_partial('coalesced call outlived the request deadline')
+                raise deadline.DeadlineExceeded('request deadline exceeded') from None
+        partial = []
+
+        async def run():
+            result = await fn()
+            # The task runs in a copy of the leader's context, so this is the leader's deadline
+            if deadline.is_partial():
+                partial.append(True)
+            return result
+
+        task = self._tasks[key] = asyncio.ensure_future(run())
+        task.add_done_callback(lambda t: self._finished(key, t, bool(partial)))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key: Hashable, task: asyncio.Task, partial: bool = False) -> None:
+        if self._grace > 0 and not partial and not task.cancelled() and task.exception() is None:
+            asyncio.get_running_loop().call_later(self._grace, self._forget, key, task)
+        else:
+            self._forget(key, task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def in_flight(self) -> int:
+        return sum(1 for t in self._tasks.values() if not t.done())
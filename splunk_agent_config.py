@@ -3,7 +3,7 @@ from typing import Dict, Any
 
 def get_config() -> Dict[str, Any]:
     """Load configuration from environment variables"""
-    return {
+    config = {
         # "splunk_host": os.getenv("SPLUNK_HOST", "localhost"),
         # "splunk_port": int(os.getenv("SPLUNK_PORT", "8089")),
         'splunk_host': 'splunk.or1.adobe.net',
@@ -24,6 +24,13 @@ def get_config() -> Dict[str, Any]:
         "azure_openai_api_version": os.getenv("AZURE_OPENAI_API_VERSION"),
         "azure_openai_api_key": os.getenv("AZURE_OPENAI_API_KEY")
     }
+    # Environment wins over the defaults above, e.g. to point at a local stand-in (standins.py)
+    for key, env in (("splunk_host", "SPLUNK_HOST"), ("splunk_port", "SPLUNK_PORT"),
+                     ("splunk_username", "SPLUNK_USERNAME"), ("splunk_password", "SPLUNK_PASSWORD")):
+        if os.getenv(env):
+            config[key] = os.getenv(env)
+    config["splunk_scheme"] = os.getenv("SPLUNK_SCHEME", "https")
+    return config
 
 def validate_config(config: Dict[str, Any]) -> bool:
     """Validate required configuration values"""
@@ -0,0 +1,214 @@
+import time
+import asyncio
+
+import httpx
+
+import deadline
+import metrics
+import tracing
+from search_perf import current_origin, search_origin
+from resilience import SPLUNK
+from splunk_agent_config import get_config
+from splunk_tool import (
+    SPLUNK_SEARCH_TIMEOUT,
+    SPLUNK_HTTP_TIMEOUT,
+    SPLUNK_CANCEL_TIMEOUT,
+    SPLUNK_POLL_MIN,
+    splunk_base_url,
+    search_job_request,
+    parse_sid,
+    parse_results,
+    parse_job_state,
+    job_content,
+    cancel_job_request,
+    next_poll_interval,
+    record_search,
+    services_with_errors_query,
+    parse_services_with_errors,
+    services_total_submissions_query,
+    parse_services_total_submissions,
+    latest_failures_by_path_query,
+    parse_latest_failures_by_path,
+    error_messages_query,
+    daily_submission_stats_query,
+    parse_daily_submission_stats,
+    daily_counts_queries,
+    parse_count,
+    combine_daily_counts,
+)
+
+
+class AsyncSplunkClient:
+    """Splunk REST client for the ASGI app, on one pooled httpx.AsyncClient.
+
+    Sends the same requests and parses rows the same way as the blocking
+    helpers in splunk_tool; create one per event loop (the app lifespan does)
+    so searches reuse keep-alive connections instead of a handshake each.
+    """
+
+    def __init__(self, config: dict | None = None, max_connections: int = 20, timeout: float = SPLUNK_HTTP_TIMEOUT,
+                 transport: httpx.AsyncBaseTransport | None = None):
+        config = config or get_config()
+        self._client = httpx.AsyncClient(
+            base_url=splunk_base_url(config),
+            auth=(config['splunk_username'], config['splunk_password']),
+            verify=False,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def search_rows(self, query: str) -> list[dict]:
+        """splunk_tool.run_search_job on the pooled client: poll a normal job within the
+        current deadline, cancel it when the deadline ends, the client disconnects or
+        the awaiting task is cancelled. Goes through the Splunk bulkhead and breaker."""
+        search = metrics.search_label(query)
+        budget = deadline.current() or deadline.Deadline(SPLUNK_SEARCH_TIMEOUT)
+        marks = len(budget.reasons)
+        job, t0 = {}, time.perf_counter()
+        with tracing.span('splunk.search', search=search, origin=current_origin()):
+            try:
+                async with SPLUNK.acall() as call:
+                    rows, error = await self._search_rows(query, call, budget, job, search)
+            except Exception as e:
+                record_search(query, search, None, str(e) or type(e).__name__, job=job, wall_seconds=time.perf_counter() - t0)
+                raise
+            record_search(query, search, rows, error, len(budget.reasons) > marks, job, time.perf_counter() - t0)
+        return rows
+
+    async def _search_rows(self, query: str, call, budget: deadline.Deadline, job: dict,
+                           search: str) -> tuple[list[dict], str | None]:
+        try:
+            with metrics.upstream('splunk', 'job_create'):
+                response = await self._client.post(
+                    "/services/search/jobs",
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    data=search_job_request(query, exec_mode="normal"),
+                    timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT),
+                )
+        except deadline.DeadlineExceeded as e:
+            budget.mark_partial(f"splunk search skipped: {e}")
+            return [], None
+        except httpx.TimeoutException:
+            if not budget.expired():
+                raise
+            budget.mark_partial("splunk search timed out before it started")
+            return [], None
+        if response.status_code not in (200, 201):
+            if response.status_code >= 500:
+                call.fail(f"HTTP {response.status_code}")
+            return [], f"HTTP {response.status_code}"
+        try:
+            body = response.json()
+        except Exception:
+            body = None
+        sid = parse_sid(response.text, body)
+        if not sid:
+            return [], "no sid"
+        job['sid'] = sid
+        with metrics.SPLUNK_JOBS_IN_FLIGHT.track():
+            try:
+                with tracing.span('splunk.job_wait', sid=sid):
+                    finished = await self._wait_for_job(sid, budget, job)
+                if not finished:
+                    reason = 'client disconnected' if budget.cancelled else 'deadline'
+                    return await self._abandon_job(sid, budget, reason, call, search), None
+                with metrics.upstream('splunk', 'results'):
+                    results = await self._client.get(
+                        f"/services/search/jobs/{sid}/results",
+                        params={"output_mode": "json"},
+                        headers={"Accept": "application/json"},
+                        timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT),
+                    )
+            except (deadline.DeadlineExceeded, httpx.TimeoutException) as e:
+                return await self._abandon_job(sid, budget, str(e) or 'timeout', call, search), None
+            except asyncio.CancelledError:
+                await asyncio.shield(self._abandon_job(sid, budget, 'request cancelled', search=search))
+                raise
+        metrics.SPLUNK_RESULT_BYTES.labels(search).inc(len(results.content))
+        if results.status_code != 200:
+            if results.status_code >= 500:
+                call.fail(f"HTTP {results.status_code}")
+            return [], f"HTTP {results.status_code}"
+        try:
+            return parse_results(results.json()), None
+        except Exception as e:
+            return [], f"unparseable results: {e}"
+
+    async def _wait_for_job(self, sid: str, budget: deadline.Deadline, job: dict) -> bool:
+        interval = SPLUNK_POLL_MIN
+        while True:
+            with metrics.upstream('splunk', 'job_poll', span=False):
+                response = await self._client.get(
+                    f"/services/search/jobs/{sid}", params={"output_mode": "json"}, timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT)
+                )
+            if response.status_code != 200:
+                return True
+            body = response.json()
+            job['content'] = job_content(body)
+            done, _state = parse_job_state(body)
+            if done:
+                return True
+            await asyncio.sleep(min(interval, budget.remaining()))
+            if budget.expired():
+                return False
+            interval = next_poll_interval(interval)
+
+    async def _abandon_job(self, sid: str, budget: deadline.Deadline, reason: str, call=None,
+                           search: str = 'other') -> list[dict]:
+        if call is not None and not budget.cancelled:
+            call.fail(f"search abandoned: {reason}")
+        rows = []
+        try:
+            with metrics.upstream('splunk', 'results_preview'):
+                preview = await self._client.get(
+                    f"/services/search/jobs/{sid}/results_preview",
+                    params={"output_mode": "json"},
+                    headers={"Accept": "application/json"},
+                    timeout=SPLUNK_CANCEL_TIMEOUT,
+                )
+            metrics.SPLUNK_RESULT_BYTES.labels(search).inc(len(preview.content))
+            if preview.status_code == 200:
+                rows = parse_results(preview.json())
+        except Exception as e:
+            print(f"Failed to read partial results for Splunk job {sid}: {e}")
+        try:
+            with metrics.upstream('splunk', 'job_cancel'):
+                await self._client.post(f"/services/search/jobs/{sid}/control", data=cancel_job_request(), timeout=SPLUNK_CANCEL_TIMEOUT)
+        except Exception as e:
+            print(f"Failed to cancel Splunk job {sid}: {e}")
+        budget.mark_partial(f"splunk job {sid} cancelled ({reason}) with {len(rows)} preview rows")
+        return rows
+
+    @search_origin
+    async def list_services_with_errors(self, earliest: str = None, latest: str = None) -> list[dict]:
+        return parse_services_with_errors(await self.search_rows(services_with_errors_query(earliest, latest)))
+
+    @search_origin
+    async def list_services_total_submissions(self, earliest: str = None, latest: str = None) -> dict:
+        return parse_services_total_submissions(await self.search_rows(services_total_submissions_query(earliest, latest)))
+
+    @search_origin
+    async def get_latest_failures_by_path(self, aem_service: str, env_type: str, aem_tier: str, earliest: str = None,
+                                          latest: str = None, per_path_limit: int = 10) -> dict[str, list[str]]:
+        query = latest_failures_by_path_query(aem_service, env_type, aem_tier, earliest, latest, per_path_limit)
+        return parse_latest_failures_by_path(await self.search_rows(query))
+
+    @search_origin
+    async def error_message_rows(self, aem_service: str, earliest: str, latest: str) -> list[dict]:
+        return await self.search_rows(error_messages_query(aem_service, earliest, latest)) or []
+
+    @search_origin
+    async def get_daily_submission_stats(self, days: int = 60) -> list[dict]:
+        return parse_daily_submission_stats(await self.search_rows(daily_submission_stats_query(days)) or [])
+
+    @search_origin
+    async def get_daily_counts_for_window(self, earliest: str, latest: str) -> dict:
+        queries = daily_counts_queries(earliest, latest)
+        total, success, failure = await asyncio.gather(
+            *(self.search_rows(queries[k]) for k in ("total", "success", "failure"))
+        )
+        return combine_daily_counts(parse_count(total), parse_count(success), parse_count(failure))
@@ -5,10 +5,26 @@ from typing import Any
 from splunk_agent_config import get_config
 import xml.etree.ElementTree as ET
 import json
+import os
+import time
+import deadline
+import metrics
+import search_perf
+import tracing
+from search_perf import search_origin
+from resilience import SPLUNK, BackendUnavailable, call_llm
 
 # Suppress only the single InsecureRequestWarning from urllib3 needed for self-signed certs
 urllib3.disable_warnings(category=InsecureRequestWarning)
 
+# Overall budget for one search when no request deadline applies (background refreshes)
+SPLUNK_SEARCH_TIMEOUT = float(os.getenv('SPLUNK_SEARCH_TIMEOUT', '300'))
+# Cap on any single REST call; the remaining request budget lowers it further
+SPLUNK_HTTP_TIMEOUT = float(os.getenv('SPLUNK_HTTP_TIMEOUT', '30'))
+SPLUNK_CANCEL_TIMEOUT = 5.0
+SPLUNK_POLL_MIN = 0.2
+SPLUNK_POLL_MAX = 2.0
+
 def extract_fields_from_log_with_llm(raw_log: str, llm) -> dict:
     prompt = f"""
 Extract the following fields from this log and return as JSON:
@@ -26,7 +42,7 @@ Extract the following fields from this log and return as JSON:
 Log:
 {raw_log}
 """
-    content = llm.call(prompt)
+    content = call_llm(llm, prompt)
     import json, re
     try:
         match = re.search(r'\{[\s\S]*\}', content)
@@ -38,137 +54,268 @@ Log:
         return {"error": f"Failed to parse JSON: {e}", "raw": content}
 
 def splunk_search_tool(query: str, llm=None, use_llm: bool = False):
-    config = get_config()
-    url = f"https://{config['splunk_host']}:{config['splunk_port']}/services/search/jobs"
-    auth = (config['splunk_username'], config['splunk_password'])
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    # print(f"Splunk search is invoked with query")
-    data = {
-        "search": f"search {query}",
-        "exec_mode": "blocking"
-    }
     try:
-        response = requests.post(url, auth=auth, headers=headers, data=data, verify=False)
-        if response.status_code in (200, 201):
-            sid = None
-            # Try to get sid from JSON
-            try:
-                sid = response.json().get("sid")
-            except Exception:
-                pass
-            # If not found, try to parse sid from XML
-            if not sid:
-                try:
-                    root = ET.fromstring(response.text)
-                    sid_elem = root.find(".//sid")
-                    if sid_elem is not None:
-                        sid = sid_elem.text
-                except Exception:
-                    sid = None
-            if not sid:
-                return f"Splunk search started but no sid found. Raw response: {response.text}"
-            # Fetch results using sid
-            results_url = f"https://{config['splunk_host']}:{config['splunk_port']}/services/search/jobs/{sid}/results?output_mode=json"
-            results_response = requests.get(results_url, auth=auth, headers={"Accept": "application/json"}, verify=False)
-            if results_response.status_code == 200:
-                try:
-                    data = results_response.json()
-                    results = data.get("results", [])
-                    extracted = []
-                    print(f"Splunk results")
-                    for result in results[:10]:
-                        raw = result.get("_raw", "")
-                        if not use_llm:
-                            # Default: try to parse _raw as JSON, fallback to top-level
-                            raw_json = {}
-                            if raw:
-                                try:
-                                    raw_json = json.loads(raw)
-                                except Exception:
-                                    raw_json = {}
-                            def get_field(field):
-                                return raw_json.get(field) or result.get(field, "")
-                            msg = get_field("msg")
-                            if msg:
-                                msg_lines = msg.splitlines()
-                                if len(msg_lines) > 10:
-                                    msg = '\n'.join(msg_lines[:10]) + '\n... (truncated)'
-                                else:
-                                    msg = '\n'.join(msg_lines)
-                            extracted_fields = {
-                                "pod_name": get_field("pod_name"),
-                                "aem_envType": get_field("aem_envType"),
-                                "aem_tier": get_field("aem_tier"),
-                                "cluster": get_field("cluster"),
-                                "aem_program_id": get_field("aem_program_id"),
-                                "namespace": get_field("namespace"),
-                                "aem_release_id": get_field("aem_release_id"),
-                                "aem_service": get_field("aem_service"),
-                                "msg": msg,
-                            }
-                        else:
-                            # Optional LLM path (disabled by default)
-                            extracted_fields = {}
-                            if raw:
-                                try:
-                                    extracted_fields = extract_fields_from_log_with_llm(raw, llm)
-                                except Exception:
-                                    extracted_fields = {}
-                            msg = extracted_fields.get("msg", "")
-                            if msg:
-                                msg_lines = msg.splitlines()
-                                if len(msg_lines) > 10:
-                                    msg = '\n'.join(msg_lines[:10]) + '\n... (truncated)'
-                                else:
-                                    msg = '\n'.join(msg_lines)
-                                extracted_fields["msg"] = msg
-                        extracted.append(extracted_fields)
-                        # print("Extracted fields: ", extracted_fields)
-                    return extracted
-                except Exception as e:
-                    return f"Error parsing Splunk results: {e}\nRaw: {results_response.text}"
-            else:
-                return f"Splunk search job started, but failed to fetch results: {results_response.text}"
-        else:
-            return f"Splunk search failed: {response.text}"
+        results, error = run_search_job(query)
+    except (BackendUnavailable, deadline.DeadlineExceeded):
+        raise  # the API turns these into 503/504 instead of an error string in a 200
     except Exception as e:
         return f"Error querying Splunk: {e}"
+    if error:
+        return error
+    try:
+        extracted = []
+        print(f"Splunk results")
+        for result in results[:10]:
+            raw = result.get("_raw", "")
+            if not use_llm:
+                # Default: try to parse _raw as JSON, fallback to top-level
+                raw_json = {}
+                if raw:
+                    try:
+                        raw_json = json.loads(raw)
+                    except Exception:
+                        raw_json = {}
+                def get_field(field):
+                    return raw_json.get(field) or result.get(field, "")
+                msg = get_field("msg")
+                if msg:
+                    msg_lines = msg.splitlines()
+                    if len(msg_lines) > 10:
+                        msg = '\n'.join(msg_lines[:10]) + '\n... (truncated)'
+                    else:
+                        msg = '\n'.join(msg_lines)
+                extracted_fields = {
+                    "pod_name": get_field("pod_name"),
+                    "aem_envType": get_field("aem_envType"),
+                    "aem_tier": get_field("aem_tier"),
+                    "cluster": get_field("cluster"),
+                    "aem_program_id": get_field("aem_program_id"),
+                    "namespace": get_field("namespace"),
+                    "aem_release_id": get_field("aem_release_id"),
+                    "aem_service": get_field("aem_service"),
+                    "msg": msg,
+                }
+            else:
+                # Optional LLM path (disabled by default)
+                extracted_fields = {}
+                if raw:
+                    try:
+                        extracted_fields = extract_fields_from_log_with_llm(raw, llm)
+                    except (BackendUnavailable, deadline.DeadlineExceeded):
+                        raise
+                    except Exception:
+                        extracted_fields = {}
+                msg = extracted_fields.get("msg", "")
+                if msg:
+                    msg_lines = msg.splitlines()
+                    if len(msg_lines) > 10:
+                        msg = '\n'.join(msg_lines[:10]) + '\n... (truncated)'
+                    else:
+                        msg = '\n'.join(msg_lines)
+                    extracted_fields["msg"] = msg
+            extracted.append(extracted_fields)
+            # print("Extracted fields: ", extracted_fields)
+        return extracted
+    except (BackendUnavailable, deadline.DeadlineExceeded):
+        raise
+    except Exception as e:
+        return f"Error parsing Splunk results: {e}"
 
-def splunk_search_rows(query: str):
+def splunk_base_url(config: dict | None = None) -> str:
+    config = config or get_config()
+    return f"{config.get('splunk_scheme', 'https')}://{config['splunk_host']}:{config['splunk_port']}"
+
+def search_job_request(query: str, exec_mode: str = "normal") -> dict:
+    """Form body for POST /services/search/jobs."""
+    return {"search": f"search {query}", "exec_mode": exec_mode}
+
+def parse_sid(text: str, json_body: dict | None = None) -> str | None:
+    """Search id from a job-creation response (JSON, else Splunk's XML)."""
+    sid = (json_body or {}).get("sid") if isinstance(json_body, dict) else None
+    if sid:
+        return sid
+    try:
+        root = ET.fromstring(text)
+        sid_elem = root.find(".//sid")
+        if sid_elem is not None:
+            return sid_elem.text
+    except Exception:
+        pass
+    return None
+
+def parse_results(json_body) -> list[dict]:
+    if isinstance(json_body, dict):
+        return json_body.get("results", []) or []
+    return []
+
+def job_content(json_body) -> dict:
+    """The job's properties (runDuration, scanCount, performance, ...) from GET /services/search/jobs/{sid}."""
+    try:
+        return (json_body.get("entry") or [{}])[0].get("content") or {}
+    except Exception:
+        return {}
+
+def parse_job_state(json_body) -> tuple[bool, str]:
+    """(is_done, dispatchState) from GET /services/search/jobs/{sid}?output_mode=json."""
+    content = job_content(json_body)
+    state = content.get("dispatchState", "") or ""
+    done = content.get("isDone") in (True, 1, "1", "true") or state in ("DONE", "FAILED")
+    return done, state
+
+def cancel_job_request() -> dict:
+    """Form body for POST /services/search/jobs/{sid}/control."""
+    return {"action": "cancel"}
+
+def next_poll_interval(interval: float) -> float:
+    return min(interval * 1.5, SPLUNK_POLL_MAX)
+
+def _search_budget() -> deadline.Deadline:
+    # Background work (jobs, scheduler) has no request deadline; bound each search on its own
+    return deadline.current() or deadline.Deadline(SPLUNK_SEARCH_TIMEOUT)
+
+def _wait_for_job(base_url: str, auth: tuple, sid: str, budget: deadline.Deadline, job: dict) -> bool:
+    """Poll the job until it is done (True) or the budget ends (False), keeping its latest properties in job."""
+    interval = SPLUNK_POLL_MIN
+    while True:
+        with metrics.upstream('splunk', 'job_poll', span=False):
+            response = requests.get(f"{base_url}/services/search/jobs/{sid}", params={"output_mode": "json"}, auth=auth,
+                                    verify=False, timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT))
+        if response.status_code != 200:
+            # Unknown job or status error: let the results request report it
+            return True
+        body = response.json()
+        job['content'] = job_content(body)
+        done, _state = parse_job_state(body)
+        if done:
+            return True
+        if budget.wait(interval):
+            return False
+        interval = next_poll_interval(interval)
+
+def _abandon_job(base_url: str, auth: tuple, sid: str, budget: deadline.Deadline, reason: str, call=None,
+                 search: str = 'other') -> list[dict]:
+    """Keep what the job has found so far, cancel it on the search head and flag the request partial."""
+    if call is not None and not budget.cancelled:
+        # Too slow for the budget counts against Splunk's breaker; a client going away doesn't
+        call.fail(f"search abandoned: {reason}")
+    rows = []
+    try:
+        with metrics.upstream('splunk', 'results_preview'):
+            preview = requests.get(f"{base_url}/services/search/jobs/{sid}/results_preview", params={"output_mode": "json"},
+                                   auth=auth, headers={"Accept": "application/json"}, verify=False, timeout=SPLUNK_CANCEL_TIMEOUT)
+        metrics.SPLUNK_RESULT_BYTES.labels(search).inc(len(preview.content))
+        if preview.status_code == 200:
+            rows = parse_results(preview.json())
+    except Exception as e:
+        print(f"Failed to read partial results for Splunk job {sid}: {e}")
+    try:
+        with metrics.upstream('splunk', 'job_cancel'):
+            requests.post(f"{base_url}/services/search/jobs/{sid}/control", auth=auth, data=cancel_job_request(),
+                          verify=False, timeout=SPLUNK_CANCEL_TIMEOUT)
+    except Exception as e:
+        print(f"Failed to cancel Splunk job {sid}: {e}")
+    budget.mark_partial(f"splunk job {sid} cancelled ({reason}) with {len(rows)} preview rows")
+    return rows
+
+def run_search_job(query: str) -> tuple[list[dict] | None, str | None]:
+    """Run one search as a normal Splunk job within the current deadline. Returns (rows, error_text).
+
+    The job is polled instead of held open with exec_mode=blocking, so when the
+    budget runs out or the client disconnects we stop waiting, keep its
+    preview rows and cancel it rather than leaving it to finish on the search
+    head. HTTP errors come back as error text; connection errors raise, and
+    BackendUnavailable is raised without calling Splunk while its circuit is
+    open or its queue is full.
+    """
+    search = metrics.search_label(query)
+    budget = _search_budget()
+    marks = len(budget.reasons)
+    job, t0 = {}, time.perf_counter()
+    with tracing.span('splunk.search', search=search, origin=search_perf.current_origin()):
+        try:
+            with SPLUNK.call() as call:
+                rows, error = _run_search_job(query, call, budget, job, search)
+        except Exception as e:
+            record_search(query, search, None, str(e) or type(e).__name__, job=job, wall_seconds=time.perf_counter() - t0)
+            raise
+        record_search(query, search, rows, error, len(budget.reasons) > marks, job, time.perf_counter() - t0)
+    return rows, error
+
+def record_search(query: str, search: str, rows: list[dict] | None, error: str | None, partial: bool = False,
+                  job: dict | None = None, wall_seconds: float = 0.0) -> None:
+    """Search counters, plus a query-log entry with the job's statistics once a job was created."""
+    outcome = 'error' if error else 'partial' if partial else 'ok'
+    metrics.SPLUNK_SEARCHES.labels(search, outcome).inc()
+    if rows:
+        metrics.SPLUNK_RESULT_ROWS.labels(search).inc(len(rows))
+    tracing.annotate(outcome=outcome, rows=len(rows or []))
+    if job and job.get('sid'):
+        entry = search_perf.record(query, job['sid'], job.get('content'), len(rows or []), outcome, wall_seconds, search)
+        tracing.annotate(sid=entry['sid'], template_id=entry['template_id'], run_duration=entry['run_duration'],
+                         scan_count=entry['scan_count'])
+
+def _run_search_job(query: str, call, budget: deadline.Deadline, job: dict,
+                    search: str = 'other') -> tuple[list[dict] | None, str | None]:
     config = get_config()
-    url = f"https://{config['splunk_host']}:{config['splunk_port']}/services/search/jobs"
+    base_url = splunk_base_url(config)
     auth = (config['splunk_username'], config['splunk_password'])
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    data = {"search": f"search {query}", "exec_mode": "blocking"}
-    response = requests.post(url, auth=auth, headers=headers, data=data, verify=False)
+    try:
+        with metrics.upstream('splunk', 'job_create'):
+            response = requests.post(f"{base_url}/services/search/jobs", auth=auth, headers=headers,
+                                     data=search_job_request(query, exec_mode="normal"), verify=False,
+                                     timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT))
+    except deadline.DeadlineExceeded as e:
+        budget.mark_partial(f"splunk search skipped: {e}")
+        return [], None
+    except requests.Timeout:
+        if not budget.expired():
+            raise
+        budget.mark_partial("splunk search timed out before it started")
+        return [], None
     if response.status_code not in (200, 201):
-        return []
-    sid = None
+        if response.status_code >= 500:
+            call.fail(f"HTTP {response.status_code}")
+        return None, f"Splunk search failed: {response.text}"
     try:
-        sid = response.json().get("sid")
+        body = response.json()
     except Exception:
-        pass
+        body = None
+    sid = parse_sid(response.text, body)
     if not sid:
+        return None, f"Splunk search started but no sid found. Raw response: {response.text}"
+    job['sid'] = sid
+    with metrics.SPLUNK_JOBS_IN_FLIGHT.track():
         try:
-            root = ET.fromstring(response.text)
-            sid_elem = root.find(".//sid")
-            if sid_elem is not None:
-                sid = sid_elem.text
-        except Exception:
-            sid = None
-    if not sid:
-        return []
-    results_url = f"https://{config['splunk_host']}:{config['splunk_port']}/services/search/jobs/{sid}/results?output_mode=json"
-    results_response = requests.get(results_url, auth=auth, headers={"Accept": "application/json"}, verify=False)
+            with tracing.span('splunk.job_wait', sid=sid):
+                finished = _wait_for_job(base_url, auth, sid, budget, job)
+            if not finished:
+                reason = 'client disconnected' if budget.cancelled else 'deadline'
+                return _abandon_job(base_url, auth, sid, budget, reason, call, search), None
+            with metrics.upstream('splunk', 'results'):
+                results_response = requests.get(f"{base_url}/services/search/jobs/{sid}/results", params={"output_mode": "json"},
+                                                auth=auth, headers={"Accept": "application/json"}, verify=False,
+                                                timeout=budget.timeout(SPLUNK_HTTP_TIMEOUT))
+        except (deadline.DeadlineExceeded, requests.Timeout) as e:
+            return _abandon_job(base_url, auth, sid, budget, str(e) or 'timeout', call, search), None
+    metrics.SPLUNK_RESULT_BYTES.labels(search).inc(len(results_response.content))
     if results_response.status_code != 200:
-        return []
+        if results_response.status_code >= 500:
+            call.fail(f"HTTP {results_response.status_code}")
+        return None, f"Splunk search job started, but failed to fetch results: {results_response.text}"
     try:
-        data = results_response.json()
-        return data.get("results", [])
-    except Exception:
-        return []
+        return parse_results(results_response.json()), None
+    except Exception as e:
+        return None, f"Error parsing Splunk results: {e}\nRaw: {results_response.text}"
 
-def get_last_error_paths(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None):
+def splunk_search_rows(query: str):
+    rows, _error = run_search_job(query)
+    return rows or []
+
+# SPL builders (*_query) and row parsers (parse_*) are pure functions so the
+# blocking helpers below and the async client in splunk_async.py share them.
+
+def last_error_paths_query(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None) -> str:
     terms = ['index=dx_aem_engineering', 'sourcetype=aemaccess']
     if aem_service:
         terms.append(f'aem_service={aem_service}')
@@ -187,8 +334,9 @@ def get_last_error_paths(aem_service: str, env_type: str, aem_tier: str, earlies
         '| eval LastErrorTime=strftime(LastErrorTime, "%Y-%m-%d %H:%M:%S %Z") '
         '| table path, LastErrorTime'
     )
-    # print(f"Splunk query for last error paths: {query}")
-    rows = splunk_search_rows(query)
+    return query
+
+def parse_last_error_paths(rows: list[dict]) -> list[dict]:
     out = []
     for r in rows:
         path = r.get('path', '')
@@ -197,7 +345,11 @@ def get_last_error_paths(aem_service: str, env_type: str, aem_tier: str, earlies
             out.append({"path": path, "LastErrorTime": last})
     return out
 
-def list_services_with_errors(earliest: str = None, latest: str = None):
+@search_origin
+def get_last_error_paths(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None):
+    return parse_last_error_paths(splunk_search_rows(last_error_paths_query(aem_service, env_type, aem_tier, earliest, latest)))
+
+def services_with_errors_query(earliest: str = None, latest: str = None) -> str:
     terms = [
         'index=dx_aem_engineering',
         'sourcetype=aemaccess',
@@ -218,8 +370,9 @@ def list_services_with_errors(earliest: str = None, latest: str = None):
         '| stats count as ErrorCount by aem_service, program_name '
         '| sort - ErrorCount'
     )
-    # print(f"Splunk query for list services with errors: {query}")
-    rows = splunk_search_rows(query)
+    return query
+
+def parse_services_with_errors(rows: list[dict]) -> list[dict]:
     out = []
     for r in rows:
         svc = r.get('aem_service') or r.get('TenantID') or ''
@@ -236,7 +389,11 @@ def list_services_with_errors(earliest: str = None, latest: str = None):
             })
     return out
 
-def list_services_total_submissions(earliest: str = None, latest: str = None):
+@search_origin
+def list_services_with_errors(earliest: str = None, latest: str = None):
+    return parse_services_with_errors(splunk_search_rows(services_with_errors_query(earliest, latest)))
+
+def services_total_submissions_query(earliest: str = None, latest: str = None) -> str:
     terms = [
         'index=dx_aem_engineering',
         'sourcetype=aemaccess',
@@ -256,9 +413,9 @@ def list_services_total_submissions(earliest: str = None, latest: str = None):
         '| stats count as TotalFormSubmission by aem_service, program_name '
         '| sort - TotalFormSubmission'
     )
-    # print(f"Splunk query for list services total submissions: {query}")
-    rows = splunk_search_rows(query)
-    # print(f"Rows for list services total submissions: {rows}")
+    return query
+
+def parse_services_total_submissions(rows: list[dict]) -> dict:
     totals = {}
     for r in rows:
         svc = r.get('aem_service') or ''
@@ -270,6 +427,10 @@ def list_services_total_submissions(earliest: str = None, latest: str = None):
             totals[svc] = total
     return totals
 
+@search_origin
+def list_services_total_submissions(earliest: str = None, latest: str = None):
+    return parse_services_total_submissions(splunk_search_rows(services_total_submissions_query(earliest, latest)))
+
 def get_top_error_times(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None, limit: int = 10):
     # Use access logs with per-path streamstats to derive latest failure times
     path_to_times = get_latest_failures_by_path(aem_service, env_type, aem_tier, earliest, latest, per_path_limit=limit)
@@ -285,7 +446,7 @@ def get_top_error_times(aem_service: str, env_type: str, aem_tier: str, earliest
             uniq.append(t)
     return uniq
 
-def get_latest_failures_by_path(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None, per_path_limit: int = 10):
+def latest_failures_by_path_query(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None, per_path_limit: int = 10) -> str:
     terms = [
         'index=dx_aem_engineering',
         'sourcetype=aemaccess'
@@ -309,9 +470,9 @@ def get_latest_failures_by_path(aem_service: str, env_type: str, aem_tier: str,
         '| eval FailureTime=strftime(_time, "%Y-%m-%d %H:%M:%S") '
         '| table path, FailureTime'
     )
-    # print(f"Splunk query for latest failures by path: {query}")
-    rows = splunk_search_rows(query)
-    # print(f"Rows of paths with failures: {rows}")
+    return query
+
+def parse_latest_failures_by_path(rows: list[dict]) -> dict[str, list[str]]:
     path_to_times = {}
     for r in rows:
         p = r.get('path') or ''
@@ -321,6 +482,44 @@ def get_latest_failures_by_path(aem_service: str, env_type: str, aem_tier: str,
         path_to_times.setdefault(p, []).append(t)
     return path_to_times
 
+@search_origin
+def get_latest_failures_by_path(aem_service: str, env_type: str, aem_tier: str, earliest: str = None, latest: str = None, per_path_limit: int = 10):
+    query = latest_failures_by_path_query(aem_service, env_type, aem_tier, earliest, latest, per_path_limit)
+    return parse_latest_failures_by_path(splunk_search_rows(query))
+
+def error_messages_query(aem_service: str, earliest: str, latest: str) -> str:
+    """aemerror messages inside [t, t+10s] of the latest 10 access-log failures per path.
+
+    The subsearch turns those failure times into OR'ed _time windows, so one
+    search returns the messages for every failing path of the service.
+    """
+    base_error = (
+        f'index=dx_aem_engineering sourcetype=aemerror level=ERROR '
+        f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
+        '(*guideContainer.af.submit.jsp* OR *FormSubmitActionManagerServiceImpl* OR *AdaptiveFormSubmitServlet*) '
+        f'earliest="{earliest}" latest="{latest}" '
+    )
+    sub = (
+        '[ search index=dx_aem_engineering sourcetype=aemaccess '
+        f'aem_service={aem_service} aem_envType=prod aem_tier=publish '
+        '(path="/adobe/forms/af/submit*" OR path="*guideContainer.af.submit.jsp") code>=500 '
+        f'earliest="{earliest}" latest="{latest}" '
+        '| sort 0 - _time '
+        '| streamstats count as failCount by path '
+        '| where failCount <= 10 '
+        '| eval f_start=_time, f_end=_time+10 '
+        '| eval query="(_time>=" . f_start . " AND _time<=" . f_end . ")" '
+        '| stats values(query) as queries '
+        '| eval search="(" . mvjoin(queries," OR ") . ")" '
+        '| fields search ] '
+    )
+    return base_error + sub + '| eval EventTimeFmt=strftime(_time,"%Y-%m-%d %H:%M:%S") | table EventTimeFmt msg'
+
+@search_origin
+def error_message_rows(aem_service: str, earliest: str, latest: str) -> list[dict]:
+    """aemerror messages correlated to the service's latest access-log failures (see error_messages_query)."""
+    return splunk_search_rows(error_messages_query(aem_service, earliest, latest))
+
 def build_multi_window_error_query(aem_service: str, env_type: str, aem_tier: str, window_times: list[str], label_prefix: str = "") -> str:
     # window_times are strings in format YYYY-MM-DD HH:MM:SS; we will create [time, time+10s] windows
     terms = [
@@ -350,10 +549,7 @@ def build_multi_window_error_query(aem_service: str, env_type: str, aem_tier: st
     query = base + ' ' + ' '.join(evals) + f' | eval Window=case({case_expr}) | search Window!="Other" | table Window, _time, msg | sort Window, _time'
     return query
 
-def get_daily_submission_stats(days: int = 60):
-    """Return list of daily totals with fields: day, total, failed, passed.
-    Uses aemaccess logs filtered to prod/publish and form submit paths.
-    """
+def daily_submission_stats_query(days: int = 60) -> str:
     if days <= 0:
         days = 60
     base_terms = [
@@ -374,7 +570,9 @@ def get_daily_submission_stats(days: int = 60):
         '| eval passed=total - failed '
         '| sort day'
     )
-    rows = splunk_search_rows(query) or []
+    return query
+
+def parse_daily_submission_stats(rows: list[dict]) -> list[dict]:
     out = []
     for r in rows:
         day = r.get('day') or ''
@@ -391,6 +589,13 @@ def get_daily_submission_stats(days: int = 60):
             out.append({'day': day, 'total': total, 'failed': failed, 'passed': passed})
     return out
 
+@search_origin
+def get_daily_submission_stats(days: int = 60):
+    """Return list of daily totals with fields: day, total, failed, passed.
+    Uses aemaccess logs filtered to prod/publish and form submit paths.
+    """
+    return parse_daily_submission_stats(splunk_search_rows(daily_submission_stats_query(days)) or [])
+
 def _format_splunk_date_bounds(date_str: str) -> tuple[str, str]:
     """Return (earliest, latest) strings for a 1-day window starting at date 00:00 to next day 00:00.
     Splunk accepts MM/DD/YYYY:HH:MM:SS.
@@ -403,8 +608,7 @@ def _format_splunk_date_bounds(date_str: str) -> tuple[str, str]:
         return dt.strftime("%m/%d/%Y:%H:%M:%S")
     return (fmt(start), fmt(end))
 
-def _splunk_count(query: str) -> int:
-    rows = splunk_search_rows(query) or []
+def parse_count(rows: list[dict]) -> int:
     if rows and isinstance(rows, list):
         r0 = rows[0]
         for k in ("c", "count", "total"):
@@ -415,8 +619,11 @@ def _splunk_count(query: str) -> int:
                     pass
     return 0
 
-def get_daily_counts_for_window(earliest: str, latest: str) -> dict:
-    """Run three Splunk queries for a single-day window: total, success (code<500), failure (code>=500)."""
+def _splunk_count(query: str) -> int:
+    return parse_count(splunk_search_rows(query) or [])
+
+def daily_counts_queries(earliest: str, latest: str) -> dict[str, str]:
+    """Three count queries for a window: total, success (code<500), failure (code>=500)."""
     base = (
         'index="dx_aem_engineering" '
         'sourcetype=aemaccess '
@@ -425,17 +632,28 @@ def get_daily_counts_for_window(earliest: str, latest: str) -> dict:
         '(path="/adobe/forms/af/submit*" OR "guideContainer.af.submit.jsp") '
         f'earliest="{earliest}" latest="{latest}"'
     )
-    total_q = f'{base} | stats count as c'
-    success_q = f'{base} | where code < 500 | stats count as c'
-    failure_q = f'{base} | where (code >= 500) | stats count as c'
-    total = _splunk_count(total_q)
-    success = _splunk_count(success_q)
-    failure = _splunk_count(failure_q)
+    return {
+        "total": f'{base} | stats count as c',
+        "success": f'{base} | where code < 500 | stats count as c',
+        "failure": f'{base} | where (code >= 500) | stats count as c',
+    }
+
+def combine_daily_counts(total: int, success: int, failure: int) -> dict:
     # Guard: success + failure may not equal total due to missing codes; prefer derived passed but keep totals
     if success == 0 and failure <= total:
         success = max(total - failure, 0)
     return {"total": total, "passed": success, "failed": failure}
 
+@search_origin
+def get_daily_counts_for_window(earliest: str, latest: str) -> dict:
+    """Run three Splunk queries for a single-day window: total, success (code<500), failure (code>=500)."""
+    queries = daily_counts_queries(earliest, latest)
+    return combine_daily_counts(
+        _splunk_count(queries["total"]),
+        _splunk_count(queries["success"]),
+        _splunk_count(queries["failure"]),
+    )
+
 def get_daily_counts_for_date(date_str: str) -> dict:
     earliest, latest = _format_splunk_date_bounds(date_str)
     counts = get_daily_counts_for_window(earliest, latest)
@@ -0,0 +1,434 @@
+"""Local stand-ins for the Splunk and Jira REST APIs, for offline tests, benchmarks and load tests.
+
+Run both in the background and point the app at them through its usual settings:
+
+    python standins.py --fixtures fixtures.json --latency 0.05 --failure-rate 0.01
+    python standins.py --synthetic-tenants 20000   # answers from synthetic.py data instead
+    # prints SPLUNK_HOST/SPLUNK_PORT/SPLUNK_SCHEME/JIRA_URL/... to export before starting the API
+
+or in-process:
+
+    with StandInServer(SplunkStandIn(responder=my_rows)) as splunk, StandInServer(JiraStandIn()) as jira:
+        os.environ.update(client_env(splunk.url, jira.url))
+
+Splunk answers come from fixtures matched by SPL template id or regex, else
+from a responder callable (query -> rows), else no rows. Jira answers come
+from an in-memory issue set seeded by fixtures; created issues, comments and
+links are kept. Both count calls per endpoint and can add latency and fail
+a fraction of requests (or the next n) with a 5xx.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import urlsplit, parse_qs
+
+from search_perf import spl_template, template_id
+
+# Splunk jobs report this many scanned events per result row unless the fixture says otherwise
+SCAN_PER_RESULT = 10
+
+
+class _Faults:
+    """Latency and failure injection shared by both stand-ins. Seeded, so runs repeat."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 failure_status: int = 503, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._fail_next = 0
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+
+    def fail_next(self, n: int = 1) -> None:
+        with self._lock:
+            self._fail_next += n
+
+    def before(self, endpoint: str) -> int | None:
+        """Count the call, sleep the injected latency; a status code if this call should fail."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self._fail_next:
+                self._fail_next -= 1
+                fail = True
+            else:
+                fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+        if delay > 0:
+            time.sleep(delay)
+        return self.failure_status if fail else None
+
+
+class SplunkStandIn(_Faults):
+    """/services/search/jobs (create, status, results, results_preview, control) and /services/search/jobs/export."""
+
+    name = 'splunk'
+
+    def __init__(self, fixtures: list[dict] | None = None, responder: Callable[[str], list[dict]] | None = None,
+                 job_seconds: float = 0.0, **faults):
+        super().__init__(**faults)
+        self.fixtures = list(fixtures or [])
+        self.responder = responder
+        self.job_seconds = job_seconds
+        self.jobs: dict[str, dict] = {}
+        self.queries: list[str] = []
+        self._sids = itertools.count(1)
+
+    def add_fixture(self, query: str, results: list[dict], job: dict | None = None) -> None:
+        """Replay results for every search with query's SPL template."""
+        self.fixtures.append({"template_id": template_id(spl_template(query)), "query": query,
+                              "results": results, **({"job": job} if job else {})})
+
+    def _answer(self, query: str) -> tuple[list[dict], dict]:
+        tid = template_id(spl_template(query))
+        for f in self.fixtures:
+            if f.get('template_id') == tid or (f.get('match') and re.search(f['match'], query)):
+                return list(f.get('results') or []), dict(f.get('job') or {})
+        if self.responder is not None:
+            return list(self.responder(query) or []), {}
+        return [], {}
+
+    def _create(self, query: str) -> dict:
+        if query.startswith('search '):
+            query = query[len('search '):]
+        rows, stats = self._answer(query)
+        sid = f'standin_{next(self._sids)}_{int(time.time())}'
+        job = {"sid": sid, "query": query, "rows": rows, "stats": stats, "created": time.monotonic(), "cancelled": False}
+        with self._lock:
+            self.jobs[sid] = job
+            self.queries.append(query)
+        return job
+
+    def _content(self, job: dict) -> dict:
+        elapsed = time.monotonic() - job["created"]
+        run_for = float(job["stats"].get('runDuration', self.job_seconds))
+        done = elapsed >= run_for
+        state = 'FAILED' if job["cancelled"] else ('DONE' if done else ('QUEUED' if elapsed < run_for / 10 else 'RUNNING'))
+        n = len(job["rows"])
+        return {
+            "sid": job["sid"],
+            "isDone": done or job["cancelled"],
+            "dispatchState": state,
+            "runDuration": round(min(elapsed, run_for), 3),
+            "doneProgress": 1.0 if done else round(elapsed / run_for, 3),
+            "resultCount": n if done else 0,
+            "eventCount": int(job["stats"].get('eventCount', n)),
+            "scanCount": int(job["stats"].get('scanCount', n * SCAN_PER_RESULT)),
+            "performance": job["stats"].get('performance') or {
+                "command.search": {"duration_secs": round(run_for * 0.8, 3)},
+                "dispatch.fetch": {"duration_secs": round(run_for * 0.2, 3)},
+            },
+        }
+
+    def handle(self, method: str, path: str, params: dict, form: dict, body: bytes):
+        parts = [p for p in path.split('/') if p]
+        if parts[:3] != ['services', 'search', 'jobs']:
+            return 404, {"messages": [{"type": "ERROR", "text": f"Unknown endpoint {path}"}]}
+        rest = parts[3:]
+        if method == 'POST' and rest == ['export']:
+            endpoint = 'export'
+        elif method == 'POST' and not rest:
+            endpoint = 'job_create'
+        elif len(rest) == 1:
+            endpoint = 'job_status'
+        else:
+            endpoint = rest[1] if len(rest) == 2 else 'unknown'
+        failed = self.before(endpoint)
+        if failed:
+            return failed, {"messages": [{"type": "ERROR", "text": "injected failure"}]}
+
+        if endpoint == 'export':
+            rows, _ = self._answer((form.get('search') or '').removeprefix('search '))
+            lines = [json.dumps({"preview": False, "offset": i, "result": r}) for i, r in enumerate(rows)]
+            return 200, ('\n'.join(lines) + '\n').encode('utf-8'), 'application/json'
+        if endpoint == 'job_create':
+            job = self._create(form.get('search') or '')
+            if (form.get('output_mode') or params.get('output_mode')) == 'json':
+                return 201, {"sid": job["sid"]}
+            return 201, f'<?xml version="1.0" encoding="UTF-8"?>\n<response>\n  <sid>{job["sid"]}</sid>\n</response>\n'.encode(), 'text/xml'
+
+        job = self.jobs.get(rest[0])
+        if job is None:
+            return 404, {"messages": [{"type": "ERROR", "text": f"Unknown sid {rest[0]}"}]}
+        if endpoint == 'job_status':
+            return 200, {"entry": [{"name": job["sid"], "content": self._content(job)}]}
+        if endpoint == 'control':
+            job["cancelled"] = form.get('action') == 'cancel'
+            return 200, {"messages": [{"type": "INFO", "text": "Search job cancelled."}]}
+        if endpoint in ('results', 'results_preview'):
+            if endpoint == 'results' and not self._content(job)["isDone"]:
+                return 204, b'', 'application/json'
+            rows = job["rows"]
+            if endpoint == 'results_preview' and not self._content(job)["isDone"]:
+                # Part of the way through: the rows Splunk would have found so far
+                rows = rows[:int(len(rows) * self._content(job)["doneProgress"])]
+            offset = int(params.get('offset') or 0)
+            count = int(params.get('count') or 0)
+            rows = rows[offset:offset + count] if count else rows[offset:]
+            return 200, {"preview": endpoint == 'results_preview', "init_offset": offset, "results": rows}
+        return 404, {"messages": [{"type": "ERROR", "text": f"Unknown endpoint {path}"}]}
+
+
+# The JQL the app sends, reduced to what decides which issues match
+_JQL_KEY = re.compile(r'\b(?:issue|key)\s*=\s*"?([A-Z][A-Z0-9]+-\d+)', re.I)
+_JQL_PROJECT = re.compile(r'\bproject\s*=\s*"?(\w+)', re.I)
+_JQL_TEXT = re.compile(r'\btext\s*~\s*"([^"]*)"', re.I)
+_JQL_NOT_DONE = re.compile(r'\bstatus\s+NOT\s+IN\s*\(([^)]*)\)', re.I)
+
+
+class JiraStandIn(_Faults):
+    """/rest/api/2/search, /rest/api/2/issue[/<key>[/comment]] and /rest/api/2/issueLink.
+
+    Search understands issue/key =, project =, text ~ and status NOT IN;
+    anything else in the JQL is ignored, and fixtures can pin the issues for
+    a JQL regex instead.
+    """
+
+    name = 'jira'
+
+    def __init__(self, issues: list[dict] | None = None, searches: list[dict] | None = None, **faults):
+        super().__init__(**faults)
+        self.issues: dict[str, dict] = {i['key']: i for i in (issues or [])}
+        self.searches = list(searches or [])
+        self._ids = itertools.count(100000)
+        self._created = Counter()
+
+    def _matches(self, issue: dict, jql: str) -> bool:
+        key = issue['key']
+        fields = issue.get('fields') or {}
+        keys = _JQL_KEY.findall(jql)
+        if keys and key.upper() not in {k.upper() for k in keys}:
+            return False
+        projects = _JQL_PROJECT.findall(jql)
+        if projects and key.split('-')[0].upper() not in {p.upper() for p in projects}:
+            return False
+        for text in _JQL_TEXT.findall(jql):
+            comments = ' '.join(c.get('body', '') for c in (fields.get('comment') or {}).get('comments', []))
+            haystack = f"{fields.get('summary', '')} {fields.get('description', '')} {comments}".lower()
+            if text.lower() not in haystack:
+                return False
+        for excluded in _JQL_NOT_DONE.findall(jql):
+            names = {s.strip().strip('"').lower() for s in excluded.split(',')}
+            if ((fields.get('status') or {}).get('name') or '').lower() in names:
+                return False
+        return True
+
+    def _search(self, jql: str) -> list[dict]:
+        for s in self.searches:
+            if re.search(s['match'], jql):
+                return [self.issues.get(k, {"key": k}) if isinstance(k, str) else k for k in s.get('issues', [])]
+        return [i for i in self.issues.values() if self._matches(i, jql)]
+
+    def handle(self, method: str, path: str, params: dict, form: dict, body: bytes):
+        parts = [p for p in path.split('/') if p]
+        if parts[:3] != ['rest', 'api', '2'] or len(parts) < 4:
+            return 404, {"errorMessages": [f"Unknown endpoint {path}"]}
+        rest = parts[3:]
+        endpoint = {('search', 1): 'search', ('issueLink', 1): 'link_issues'}.get((rest[0], len(rest)))
+        if endpoint is None and rest[0] == 'issue':
+            endpoint = ('create_issue' if len(rest) == 1 else 'get_issue' if len(rest) == 2
+                        else 'add_comment' if method == 'POST' else 'get_comments')
+        failed = self.before(endpoint or 'unknown')
+        if failed:
+            return failed, {"errorMessages": ["injected failure"]}
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"errorMessages": ["Invalid JSON body"]}
+
+        if endpoint == 'search':
+            issues = self._search(params.get('jql') or '')
+            start, size = int(params.get('startAt') or 0), int(params.get('maxResults') or 50)
+            return 200, {"startAt": start, "maxResults": size, "total": len(issues), "issues": issues[start:start + size]}
+        if endpoint == 'create_issue':
+            fields = payload.get('fields') or {}
+            project = (fields.get('project') or {}).get('key') or 'TEST'
+            with self._lock:
+                self._created[project] += 1
+                key = f'{project}-{900000 + self._created[project]}'
+                issue_id = str(next(self._ids))
+            fields.setdefault('status', {"name": "Open"})
+            fields.setdefault('created', time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime()))
+            self.issues[key] = {"id": issue_id, "key": key, "fields": fields}
+            return 201, {"id": issue_id, "key": key, "self": f'/rest/api/2/issue/{issue_id}'}
+        if endpoint == 'link_issues':
+            inward, outward = (payload.get('inwardIssue') or {}).get('key'), (payload.get('outwardIssue') or {}).get('key')
+            link_type = payload.get('type') or {"name": "Blocks"}
+            for key, side, other in ((outward, 'inwardIssue', inward), (inward, 'outwardIssue', outward)):
+                if key in self.issues:
+                    self.issues[key].setdefault('fields', {}).setdefault('issuelinks', []).append(
+                        {"type": link_type, side: {"key": other}})
+            return 201, b'', 'application/json'
+
+        issue = self.issues.get(rest[1] if len(rest) > 1 else '')
+        if issue is None:
+            return 404, {"errorMessages": ["Issue does not exist or you do not have permission to see it."]}
+        comments = issue.setdefault('fields', {}).setdefault('comment', {"comments": []})['comments']
+        if endpoint == 'get_issue':
+            return 200, issue
+        if endpoint == 'add_comment':
+            comment = {"id": str(next(self._ids)), "body": payload.get('body', ''),
+                       "created": time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime())}
+            comments.append(comment)
+            return 201, comment
+        return 200, {"startAt": 0, "maxResults": len(comments), "total": len(comments), "comments": comments}
+
+
+def _handler_for(standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _serve(self):
+            url = urlsplit(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            form = {}
+            if 'application/x-www-form-urlencoded' in (self.headers.get('Content-Type') or ''):
+                form = {k: v[-1] for k, v in parse_qs(body.decode('utf-8', 'replace')).items()}
+            try:
+                status, payload, *content_type = standin.handle(self.command, url.path, params, form, body)
+            except Exception as e:
+                print(f"{standin.name} stand-in failed on {self.command} {self.path}: {e}")
+                status, payload, content_type = 500, {"error": str(e)}, []
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type[0] if content_type else 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class StandInServer:
+    """Serves one stand-in on 127.0.0.1 (port 0 picks a free one) from a background thread."""
+
+    def __init__(self, standin, host: str = '127.0.0.1', port: int = 0):
+        self.standin = standin
+        self._server = ThreadingHTTPServer((host, port), _handler_for(standin))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'{self.standin.name}-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def client_env(splunk_url: str, jira_url: str) -> dict:
+    """Environment that points splunk_tool/splunk_async and jira_tool/jira_async at the stand-ins.
+
+    Set it before importing those modules: jira_tool reads JIRA_URL and its
+    credentials at import.
+    """
+    splunk = urlsplit(splunk_url)
+    return {
+        "SPLUNK_SCHEME": splunk.scheme,
+        "SPLUNK_HOST": splunk.hostname,
+        "SPLUNK_PORT": str(splunk.port),
+        "SPLUNK_USERNAME": "standin",
+        "SPLUNK_PASSWORD": "standin",
+        "JIRA_URL": jira_url,
+        "JIRA_USER": "standin",
+        "JIRA_API_TOKEN": "standin",
+    }
+
+
+def load_fixtures(path: str) -> dict:
+    """{"splunk": [{"template_id"|"match", "results", "job"?}, ...],
+        "jira": {"issues": [...], "searches": [{"match", "issues"}]}}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_fixtures(path: str, splunk: SplunkStandIn | None = None, jira: JiraStandIn | None = None) -> None:
+    """Write the stand-ins' current fixtures and issues, e.g. after add_fixture() calls."""
+    data = {}
+    if splunk is not None:
+        data["splunk"] = splunk.fixtures
+    if jira is not None:
+        data["jira"] = {"issues": list(jira.issues.values()), "searches": jira.searches}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Local Splunk and Jira stand-ins.')
+    parser.add_argument('--fixtures', help='JSON fixtures file (see load_fixtures)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--splunk-port', type=int, default=8089)
+    parser.add_argument('--jira-port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds, 0..jitter')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of calls answered with 503')
+    parser.add_argument('--job-seconds', type=float, default=0.0, help='time before a Splunk job is done')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic-tenants', type=int, default=0,
+                        help='answer unmatched searches and seed Jira from synthetic.py data for this many tenants')
+    parser.add_argument('--synthetic-days', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else {}
+    faults = dict(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+    jira_fixtures = fixtures.get('jira') or {}
+    responder, issues = None, list(jira_fixtures.get('issues') or [])
+    if args.synthetic_tenants:
+        from synthetic import SyntheticAemLogs, SyntheticConfig
+        logs = SyntheticAemLogs(SyntheticConfig(tenants=args.synthetic_tenants, days=args.synthetic_days, seed=args.seed))
+        responder = logs.search
+        issues += logs.skysi_issues() + logs.forms_issues()
+    splunk = StandInServer(SplunkStandIn(fixtures.get('splunk'), responder, job_seconds=args.job_seconds, **faults),
+                           args.host, args.splunk_port).start()
+    jira = StandInServer(JiraStandIn(issues, jira_fixtures.get('searches'), **faults),
+                         args.host, args.jira_port).start()
+    for k, v in client_env(splunk.url, jira.url).items():
+        print(f'export {k}={v}')
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        splunk.stop()
+        jira.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+"""Seeded synthetic aemaccess/aemerror data for scale tests, shaped like production.
+
+Tenants (aem_service) submit forms at a lognormal daily rate over a few
+submit paths; a fraction of them fail in 5xx bursts, and most failures are
+followed within 10 seconds by a FormSubmitActionManagerServiceImpl stack
+trace in aemerror. The same data is available as raw event streams and as
+the result rows Splunk would return for the app's searches, so it can back
+the Splunk stand-in:
+
+    logs = SyntheticAemLogs(SyntheticConfig(tenants=20000, seed=7))
+    splunk, jira = logs.standins(latency=0.05)
+
+Only failures and error events are materialised; successful submissions
+are counted from the rates (and generated on the fly by access_events()).
+"""
+import re
+import sys
+import json
+import math
+import time
+import random
+import argparse
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+DAY = 86400
+SPLUNK_TIME = '%m/%d/%Y:%H:%M:%S'
+EVENT_TIME = '%Y-%m-%d %H:%M:%S'
+BURST_SHAPES = ('spike', 'flat', 'ramp')
+
+_ADJECTIVES = ('northern', 'global', 'united', 'first', 'civic', 'prime', 'coastal', 'metro', 'pacific', 'summit')
+_NOUNS = ('bank', 'insurance', 'health', 'mutual', 'motors', 'energy', 'telecom', 'airlines', 'retail', 'university')
+_FORMS = ('claim', 'enrollment', 'account-opening', 'loan-application', 'contact-us', 'address-change', 'kyc',
+          'beneficiary', 'quote', 'complaint', 'registration', 'renewal')
+_CAUSES = (
+    ('java.net.SocketTimeoutException', 'Read timed out'),
+    ('org.apache.http.conn.ConnectTimeoutException', 'Connect to {host}:443 failed: connect timed out'),
+    ('com.adobe.aemds.guide.service.GuideException', 'Error while submitting form: HTTP {status} returned by {host}'),
+    ('java.lang.NullPointerException', 'Cannot invoke "String.length()" because "{param}" is null'),
+    ('javax.jcr.AccessDeniedException', 'Access denied at /content/forms/af/{form}/jcr:content'),
+    ('com.adobe.forms.common.submitutils.CustomParameterException', 'Invalid value for parameter {param}'),
+    ('org.apache.sling.api.resource.PersistenceException', 'Unable to commit changes to /var/fd/{form}'),
+    ('javax.net.ssl.SSLHandshakeException', 'PKIX path building failed for {host}'),
+)
+_FRAMES = (
+    'com.adobe.forms.foundation.service.impl.FormSubmitActionManagerServiceImpl.submit(FormSubmitActionManagerServiceImpl.java:{line})',
+    'com.adobe.aemds.guide.servlet.AdaptiveFormSubmitServlet.doPost(AdaptiveFormSubmitServlet.java:{line2})',
+    'org.apache.sling.api.servlets.SlingAllMethodsServlet.mayService(SlingAllMethodsServlet.java:146)',
+    'org.apache.sling.scripting.jsp.jasper.runtime.HttpJspBase.service(guideContainer.af.submit.jsp:{line3})',
+    'org.apache.sling.engine.impl.filter.AbstractSlingFilterChain.doFilter(AbstractSlingFilterChain.java:68)',
+)
+
+
+@dataclass
+class SyntheticConfig:
+    tenants: int = 1000
+    days: int = 7  # history with failures, ending at `now`; older windows have submissions but no failures
+    failing_fraction: float = 0.1  # tenants with 5xx bursts
+    failure_rate: float = 0.02  # failed share of a failing tenant's submissions
+    submissions_per_day: float = 400.0  # median per tenant (lognormal)
+    burst_size: float = 12.0  # mean failures per burst
+    burst_seconds: float = 120.0
+    burst_shape: str = 'spike'  # spike: front-loaded, flat: uniform, ramp: building up
+    paths_per_tenant: int = 4
+    message_diversity: int = 40  # distinct stack traces across all tenants
+    correlation: float = 0.8  # share of failures followed by an aemerror event within 10s
+    noise_errors_per_day: float = 2.0  # uncorrelated aemerror events per failing tenant
+    skysi_fraction: float = 0.3  # failing tenants with an open SKYSI alert in Jira
+    seed: int = 0
+    now: float | None = None  # end of the generated history (epoch); default: current time, whole seconds
+
+    def scaled(self, factor: float) -> 'SyntheticConfig':
+        """Same shape with factor times the tenants (e.g. 10 for 10x peak)."""
+        return SyntheticConfig(**{**self.__dict__, 'tenants': int(self.tenants * factor)})
+
+
+@dataclass
+class Tenant:
+    index: int
+    aem_service: str
+    program_id: str
+    program_name: str
+    paths: list[str]
+    submissions_per_day: float
+    # (epoch, path index, status code) and (epoch, message index), both in time order
+    failures: list[tuple[float, int, int]] = field(default_factory=list)
+    errors: list[tuple[float, int]] = field(default_factory=list)
+    failure_times: list[float] = field(default_factory=list)
+    error_times: list[float] = field(default_factory=list)
+
+
+def fmt_time(ts: float, pattern: str = EVENT_TIME) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(pattern)
+
+
+def _parse_fmt(value: str, pattern: str) -> float:
+    return datetime.strptime(value, pattern).replace(tzinfo=timezone.utc).timestamp()
+
+
+_RELATIVE = re.compile(r'^(?:([+-]\d+)([smhdw]))?(?:@([smhdw]))?$')
+_UNIT = {'s': 1, 'm': 60, 'h': 3600, 'd': DAY, 'w': 7 * DAY}
+
+
+def splunk_time(value: str, now: float) -> float:
+    """Epoch for a Splunk time modifier: now, -7d, -1d@d, @h, MM/DD/YYYY:HH:MM:SS or an epoch."""
+    value = (value or '').strip()
+    if value in ('', 'now'):
+        return now
+    m = _RELATIVE.match(value)
+    if m and (m.group(1) or m.group(3)):
+        ts = now + (int(m.group(1)) * _UNIT[m.group(2)] if m.group(1) else 0)
+        if m.group(3):
+            ts -= ts % _UNIT[m.group(3)]
+        return ts
+    try:
+        return _parse_fmt(value, SPLUNK_TIME)
+    except ValueError:
+        return float(value)
+
+
+def _message_pool(n: int, seed: int) -> list[str]:
+    rng = random.Random(f'{seed}:messages')
+    pool = []
+    for i in range(max(1, n)):
+        exc, text = _CAUSES[i % len(_CAUSES)]
+        text = text.format(host=f'api{rng.randint(1, 40)}.{rng.choice(_NOUNS)}.example.com', status=rng.choice((400, 401, 403, 500, 502, 503)),
+                           param=rng.choice(('submitUrl', 'redirect', 'afSubmissionInfo', 'dataRef', 'token')),
+                           form=rng.choice(_FORMS))
+        frames = [f.format(line=rng.randint(180, 420), line2=rng.randint(90, 160), line3=rng.randint(20, 60)) for f in _FRAMES]
+        pool.append(
+            f'[{rng.choice(("qtp", "sling-default"))}-{rng.randint(1, 400)}] '
+            f'com.adobe.forms.foundation.service.impl.FormSubmitActionManagerServiceImpl Error while submitting form\n'
+            f'{exc}: {text}\n' + ''.join(f'\tat {f}\n' for f in frames[:rng.randint(3, len(frames))]).rstrip('\n'))
+    return pool
+
+
+class SyntheticAemLogs:
+    """Tenants, failure bursts and correlated error events for one config, plus the Splunk rows they imply."""
+
+    def __init__(self, config: SyntheticConfig | None = None):
+        self.config = config = config or SyntheticConfig()
+        if config.burst_shape not in BURST_SHAPES:
+            raise ValueError(f"burst_shape must be one of: {', '.join(BURST_SHAPES)}")
+        self.now = float(config.now if config.now is not None else int(time.time()))
+        self.start = self.now - config.days * DAY
+        self.messages = _message_pool(config.message_diversity, config.seed)
+        self.tenants = [self._tenant(i) for i in range(config.tenants)]
+        self.by_service = {t.aem_service: t for t in self.tenants}
+        self._day_factors: dict[int, float] = {}
+
+    # -- generation -------------------------------------------------------------------------
+
+    def _tenant(self, i: int) -> Tenant:
+        c = self.config
+        rng = random.Random(f'{c.seed}:tenant:{i}')
+        program = 10000 + i // 2  # programs usually have a couple of environments
+        paths = []
+        for _ in range(max(1, c.paths_per_tenant)):
+            form = f'{rng.choice(_FORMS)}-{rng.randint(1, 99)}'
+            paths.append(f'/content/forms/af/{form}/jcr:content/guideContainer.af.submit.jsp' if rng.random() < 0.6
+                         else f'/adobe/forms/af/submit/L2NvbnRlbnQvZm9ybXMvYWYv{rng.getrandbits(40):010x}')
+        t = Tenant(
+            index=i,
+            aem_service=f'cm-p{program}-e{100000 + i}',
+            program_id=str(program),
+            program_name=f'{_ADJECTIVES[program % len(_ADJECTIVES)]}-{_NOUNS[(program // 10) % len(_NOUNS)]}-{program}',
+            paths=paths,
+            submissions_per_day=c.submissions_per_day * rng.lognormvariate(0, 1.0),
+        )
+        if rng.random() < c.failing_fraction:
+            self._failures(t, rng)
+        return t
+
+    def _burst_offsets(self, rng: random.Random, n: int) -> list[float]:
+        c = self.config
+        if c.burst_shape == 'flat':
+            return [rng.uniform(0, c.burst_seconds) for _ in range(n)]
+        if c.burst_shape == 'ramp':
+            return [c.burst_seconds * math.sqrt(rng.random()) for _ in range(n)]
+        return [min(rng.expovariate(4.0 / c.burst_seconds), c.burst_seconds) for _ in range(n)]
+
+    def _failures(self, t: Tenant, rng: random.Random) -> None:
+        c = self.config
+        # Path popularity is skewed: the first path takes most of the traffic (and failures)
+        path_weights = [1.0 / (k + 1) for k in range(len(t.paths))]
+        # Each tenant keeps hitting a few messages, mostly the same one
+        own_messages = rng.sample(range(len(self.messages)), min(len(self.messages), rng.randint(1, 3)))
+        failures, errors = [], []
+        for day in range(c.days):
+            day_start = self.start + day * DAY
+            expected = t.submissions_per_day * c.failure_rate
+            bursts = max(0, round(rng.gauss(expected / c.burst_size, math.sqrt(expected / c.burst_size) or 0.5)))
+            for _ in range(bursts):
+                burst_start = day_start + rng.uniform(0, DAY - c.burst_seconds)
+                path = rng.choices(range(len(t.paths)), path_weights)[0]
+                message = own_messages[0] if rng.random() < 0.7 else rng.choice(own_messages)
+                code = rng.choices((500, 502, 503, 504), (6, 2, 1, 1))[0]
+                for offset in self._burst_offsets(rng, max(1, round(rng.expovariate(1 / c.burst_size)))):
+                    ts = round(burst_start + offset, 3)
+                    failures.append((ts, path, code))
+                    if rng.random() < c.correlation:
+                        errors.append((round(ts + rng.uniform(0.05, 9.5), 3), message))
+            for _ in range(int(rng.expovariate(1 / c.noise_errors_per_day)) if c.noise_errors_per_day else 0):
+                errors.append((round(day_start + rng.uniform(0, DAY), 3), rng.randrange(len(self.messages))))
+        t.failures = sorted(f for f in failures if f[0] < self.now)
+        t.errors = sorted(e for e in errors if e[0] < self.now)
+        t.failure_times = [f[0] for f in t.failures]
+        t.error_times = [e[0] for e in t.errors]
+
+    def _day_factor(self, day: int) -> float:
+        """Fleet-wide traffic multiplier for one UTC day: weekends are quieter."""
+        f = self._day_factors.get(day)
+        if f is None:
+            rng = random.Random(f'{self.config.seed}:day:{day}')
+            weekday = datetime.fromtimestamp(day * DAY, timezone.utc).weekday()
+            f = self._day_factors[day] = (0.55 if weekday >= 5 else 1.0) * rng.uniform(0.85, 1.15)
+        return f
+
+    # -- counts -------------------------------------------------------------------------------
+
+    def _window_failures(self, t: Tenant, earliest: float, latest: float) -> list[tuple[float, int, int]]:
+        return t.failures[bisect_left(t.failure_times, earliest):bisect_right(t.failure_times, latest)]
+
+    def _traffic_days(self, earliest: float, latest: float) -> float:
+        """Days of traffic in [earliest, latest], weighted by the per-day factors."""
+        total, ts = 0.0, earliest
+        while ts < latest:
+            day = int(ts // DAY)
+            end = min(latest, (day + 1) * DAY)
+            total += (end - ts) / DAY * self._day_factor(day)
+            ts = end
+        return total
+
+    def submissions(self, t: Tenant, earliest: float, latest: float) -> int:
+        """Submissions (successful and failed) of one tenant in a window."""
+        failed = len(self._window_failures(t, earliest, latest))
+        return int(t.submissions_per_day * self._traffic_days(earliest, latest)) + failed
+
+    # -- event streams ------------------------------------------------------------------------
+
+    def _access_event(self, t: Tenant, ts: float, path: int, code: int) -> dict:
+        return {
+            "_time": ts, "sourcetype": "aemaccess", "aem_service": t.aem_service, "aem_program_id": t.program_id,
+            "aem_envType": "prod", "aem_tier": "publish", "namespace": f"ns-team-{t.program_id}",
+            "path": t.paths[path], "method": "POST", "code": code,
+        }
+
+    def _error_event(self, t: Tenant, ts: float, message: int) -> dict:
+        return {
+            "_time": ts, "sourcetype": "aemerror", "level": "ERROR", "aem_service": t.aem_service,
+            "aem_program_id": t.program_id, "aem_envType": "prod", "aem_tier": "publish",
+            "namespace": f"ns-team-{t.program_id}", "cluster": f"ethos{10 + t.index % 50}-prod-va7",
+            "pod_name": f"{t.aem_service}-aem-publish-{t.index % 7}f8b9c-{t.index % 5}x2kq",
+            "aem_release_id": "21193", "msg": self.messages[message],
+        }
+
+    def access_events(self, earliest: float | None = None, latest: float | None = None):
+        """aemaccess submit events, per tenant in time order: generated successes interleaved with the failures."""
+        earliest = self.start if earliest is None else earliest
+        latest = self.now if latest is None else latest
+        for t in self.tenants:
+            rng = random.Random(f'{self.config.seed}:access:{t.index}')
+            weights = [1.0 / (k + 1) for k in range(len(t.paths))]
+            failures = self._window_failures(t, earliest, latest)
+            ok = sorted((round(rng.uniform(earliest, latest), 3), rng.choices(range(len(t.paths)), weights)[0])
+                        for _ in range(self.submissions(t, earliest, latest) - len(failures)))
+            events = [(ts, path, 200) for ts, path in ok] + failures
+            for ts, path, code in sorted(events):
+                yield self._access_event(t, ts, path, code)
+
+    def error_events(self, earliest: float | None = None, latest: float | None = None):
+        """aemerror events, per tenant in time order."""
+        earliest = self.start if earliest is None else earliest
+        latest = self.now if latest is None else latest
+        for t in self.tenants:
+            lo, hi = bisect_left(t.error_times, earliest), bisect_right(t.error_times, latest)
+            for ts, message in t.errors[lo:hi]:
+                yield self._error_event(t, ts, message)
+
+    # -- Splunk result sets -------------------------------------------------------------------
+
+    def services_with_errors(self, earliest: float, latest: float) -> list[dict]:
+        rows = []
+        for t in self.tenants:
+            n = len(self._window_failures(t, earliest, latest))
+            if n:
+                rows.append({"aem_service": t.aem_service, "program_name": t.program_name, "ErrorCount": str(n)})
+        rows.sort(key=lambda r: -int(r["ErrorCount"]))
+        return rows
+
+    def total_submissions(self, earliest: float, latest: float) -> list[dict]:
+        rows = [{"aem_service": t.aem_service, "program_name": t.program_name,
+                 "TotalFormSubmission": str(self.submissions(t, earliest, latest))} for t in self.tenants]
+        rows.sort(key=lambda r: -int(r["TotalFormSubmission"]))
+        return rows
+
+    def latest_failures(self, t: Tenant, earliest: float, latest: float, per_path_limit: int = 10) -> list[tuple[float, int]]:
+        """(time, path index) of the newest per_path_limit failures of each path, newest first."""
+        out, per_path = [], {}
+        for ts, path, _code in reversed(self._window_failures(t, earliest, latest)):
+            if per_path.get(path, 0) < per_path_limit:
+                per_path[path] = per_path.get(path, 0) + 1
+                out.append((ts, path))
+        return out
+
+    def errors_between(self, t: Tenant, earliest: float, latest: float) -> list[tuple[float, int]]:
+        return t.errors[bisect_left(t.error_times, earliest):bisect_right(t.error_times, latest)]
+
+    def correlated_messages(self, t: Tenant, earliest: float, latest: float) -> list[dict]:
+        """error_messages_query: aemerror events within [t, t+10s] of each path's latest 10 failures."""
+        seen, rows = set(), []
+        for ts, _path in self.latest_failures(t, earliest, latest, 10):
+            for ets, message in self.errors_between(t, ts, min(ts + 10, latest)):
+                if (ets, message) not in seen:
+                    seen.add((ets, message))
+                    rows.append((ets, message))
+        rows.sort(reverse=True)
+        return [{"EventTimeFmt": fmt_time(ets), "msg": self.messages[message]} for ets, message in rows]
+
+    def daily_stats(self, earliest: float, latest: float) -> list[dict]:
+        rows = []
+        day = int(earliest // DAY)
+        while day * DAY < latest:
+            lo, hi = max(earliest, day * DAY), min(latest, (day + 1) * DAY)
+            total = failed = 0
+            for t in self.tenants:
+                n = len(self._window_failures(t, lo, hi))
+                failed += n
+                total += int(t.submissions_per_day * self._traffic_days(lo, hi)) + n
+            rows.append({"day": fmt_time(day * DAY, '%Y-%m-%d'), "total": str(total), "failed": str(failed),
+                         "passed": str(total - failed)})
+            day += 1
+        return rows
+
+    # -- query dispatch -----------------------------------------------------------------------
+
+    def search(self, query: str) -> list[dict]:
+        """Rows Splunk would return for one of the app's SPL searches (see splunk_tool's *_query builders)."""
+        q = query or ''
+        m = re.search(r'earliest="([^"]*)"\s+latest="([^"]*)"', q)
+        earliest, latest = (splunk_time(m.group(1), self.now), splunk_time(m.group(2), self.now)) if m else (self.start, self.now)
+        svc = re.search(r'\baem_service=("?)([\w-]+)\1', q)
+        tenant = self.by_service.get(svc.group(2)) if svc else None
+        if svc and tenant is None:
+            return []
+
+        if 'stats count as ErrorCount' in q:
+            return self.services_with_errors(earliest, latest)
+        if 'stats count as TotalFormSubmission' in q:
+            return self.total_submissions(earliest, latest)
+        if 'sum(if(code>=500' in q:
+            return self.daily_stats(earliest, latest)
+        if 'stats count as c' in q:
+            tenants = [tenant] if tenant else self.tenants
+            failed = sum(len(self._window_failures(t, earliest, latest)) for t in tenants)
+            total = sum(self.submissions(t, earliest, latest) for t in tenants)
+            count = failed if 'code >= 500' in q else total - failed if 'code < 500' in q else total
+            return [{"c": str(count)}]
+        if tenant is None:
+            return []
+        if 'streamstats count as failureCount' in q:
+            limit = re.search(r'failureCount <= (\d+)', q)
+            limit = int(limit.group(1)) if limit else 10
+            return [{"path": tenant.paths[path], "FailureTime": fmt_time(ts)} for ts, path in self.latest_failures(tenant, earliest, latest, limit)]
+        if 'LastErrorTime' in q:
+            latest_by_path = {}
+            for ts, path in self.latest_failures(tenant, earliest, latest, 1):
+                latest_by_path[tenant.paths[path]] = fmt_time(ts, EVENT_TIME + ' UTC')
+            return [{"path": p, "LastErrorTime": v} for p, v in sorted(latest_by_path.items())]
+        if 'sourcetype=aemerror' in q and 'EventTimeFmt' in q:
+            return self.correlated_messages(tenant, earliest, latest)
+        if 'sourcetype=aemerror' in q and 'in_window' in q:
+            labels = dict(re.findall(r'in_window(\d+)=1,"([^"]*)"', q))
+            centers = list(dict.fromkeys(re.findall(r'strptime\("([^"]+)","%Y-%m-%d %H:%M:%S"\)', q)))
+            rows = []
+            for idx, center in enumerate(centers, start=1):
+                start = _parse_fmt(center, EVENT_TIME)
+                for ets, message in self.errors_between(tenant, start, start + 10):
+                    rows.append({"Window": labels.get(str(idx), f'#{idx}'), "_time": fmt_time(ets, '%Y-%m-%dT%H:%M:%S.000+00:00'),
+                                 "msg": self.messages[message]})
+            return sorted(rows, key=lambda r: (r["Window"], r["_time"]))
+        if 'sourcetype=aemerror' in q:
+            # Raw events, newest first, as the un-tabled error searches (/process) get them
+            events = []
+            for ets, message in reversed(self.errors_between(tenant, earliest, latest)[-1000:]):
+                e = self._error_event(tenant, ets, message)
+                e["_time"] = fmt_time(ets, '%Y-%m-%dT%H:%M:%S.000+00:00')
+                events.append({**e, "_raw": json.dumps(e)})
+            return events
+        return []
+
+    # -- stand-ins ----------------------------------------------------------------------------
+
+    def skysi_issues(self) -> list[dict]:
+        """Open SKYSI FormSubmitErrors alerts for a share of the failing tenants."""
+        issues = []
+        for t in self.tenants:
+            if t.failures and random.Random(f'{self.config.seed}:skysi:{t.index}').random() < self.config.skysi_fraction:
+                issues.append({"key": f"SKYSI-{50000 + t.index}", "fields": {
+                    "summary": f"[FormSubmitErrors] Form submissions failing on {t.aem_service}",
+                    "description": f"Alert FormSubmitErrors fired for aem_service {t.aem_service} (program {t.program_id})",
+                    "status": {"name": "Open"}, "created": fmt_time(t.failures[0][0], '%Y-%m-%dT%H:%M:%S.000+0000'),
+                    "issuetype": {"name": "Incident"},
+                }})
+        return issues
+
+    def forms_issues(self, n: int = 20) -> list[dict]:
+        """FORMS tickets naming failing tenants in their description, for /process runs."""
+        failing = [t for t in self.tenants if t.failures][:n]
+        return [{"key": f"FORMS-{70000 + i}", "fields": {
+            "summary": f"Form submission errors for {t.program_name}",
+            "description": f"Customer reports failed submissions.\naem_service: {t.aem_service}\nenvironment: prod publish",
+            "status": {"name": "Open"}, "created": fmt_time(t.failures[-1][0], '%Y-%m-%dT%H:%M:%S.000+0000'),
+        }} for i, t in enumerate(failing)]
+
+    def standins(self, **faults):
+        """(SplunkStandIn, JiraStandIn) answering from this data; faults as for the stand-ins (latency, ...)."""
+        from standins import SplunkStandIn, JiraStandIn
+        return (SplunkStandIn(responder=self.search, **faults),
+                JiraStandIn(issues=self.skysi_issues() + self.forms_issues(), **faults))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Write synthetic aemaccess/aemerror events as JSON lines.')
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--failing-fraction', type=float, default=0.1)
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    parser.add_argument('--burst-shape', choices=BURST_SHAPES, default='spike')
+    parser.add_argument('--message-diversity', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--access-out', default='aemaccess.jsonl')
+    parser.add_argument('--error-out', default='aemerror.jsonl')
+    args = parser.parse_args(argv)
+    logs = SyntheticAemLogs(SyntheticConfig(
+        tenants=args.tenants, days=args.days, failing_fraction=args.failing_fraction, failure_rate=args.failure_rate,
+        burst_shape=args.burst_shape, message_diversity=args.message_diversity, seed=args.seed))
+    for path, events in ((args.access_out, logs.access_events()), (args.error_out, logs.error_events())):
+        n = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for e in events:
+                f.write(json.dumps(e) + '\n')
+                n += 1
+        print(f'{path}: {n} events')
+    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
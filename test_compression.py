@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from flask import Flask, jsonify
+
+from compression import init_compression
+from json_codec import FastJSONProvider
+from report_cache import accepted_encodings
+
+BIG = {'rows': [{'aem_service': f'cm-p{i}-e{i}', 'error_count': i} for i in range(200)]}
+
+
+def make_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    init_compression(app, min_size=256)
+
+    @app.route('/big')
+    def big():
+        resp = jsonify(BIG)
+        resp.set_etag('abc')
+        return resp
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/pdf')
+    def pdf():
+        return app.response_class(b'%PDF' + b'0' * 4096, mimetype='application/pdf')
+
+    return app
+
+
+def test_json_is_gzipped_only_when_accepted_and_large_enough():
+    client = make_app().test_client()
+    resp = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert resp.headers['ETag'] == '"abc-gzip"'
+    assert json.loads(gzip.decompress(resp.data)) == BIG
+    assert 'Content-Encoding' not in client.get('/big').headers
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/pdf', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_accept_encoding_parsing_honors_q_zero():
+    assert accepted_encodings('gzip;q=0, br;q=0.5, identity') == {'br', 'identity'}
+    assert accepted_encodings(None) == set()
+
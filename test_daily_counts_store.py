@@ -0,0 +1,25 @@
+import os
+import json
+import time
+import tempfile
+
+from daily_counts_store import DailyCountsStore
+
+
+def test_newer_consolidated_json_supersedes_stored_records():
+    d = tempfile.mkdtemp()
+    store = DailyCountsStore(os.path.join(d, 'daily_counts.bin'))
+    store.append([{'day': '2026-10-01', 'total': 100, 'passed': 90, 'failed': 10}])
+    path = os.path.join(d, 'daily_counts.json')
+    time.sleep(0.01)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'days': 2, 'stats': [{'day': '2026-10-01', 'total': '120', 'passed': '110', 'failed': '10'},
+                                        {'day': '2026-10-02', 'total': 50, 'passed': 50, 'failed': 0}]}, f)
+    assert store.import_if_newer(path) == 2
+    assert [r['total'] for r in store.range()] == [120, 50]
+    # Already folded in: the store is now newer than the file
+    assert store.import_if_newer(path) == 0
+    store.append([{'day': '2026-10-02', 'total': 60, 'passed': 60, 'failed': 0}])
+    assert store.import_if_newer(path) == 0
+    assert [r['total'] for r in store.range()] == [120, 60]
+
@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+import deadline
+
+
+def test_upstream_timeout_is_capped_by_the_remaining_budget():
+    assert deadline.upstream_timeout(30) == 30  # no request deadline
+    with deadline.deadline_scope(5) as d:
+        assert 4 < deadline.upstream_timeout(30) <= 5
+        assert deadline.upstream_timeout(2) == 2
+        assert not deadline.is_partial()
+        d.expires_at = time.monotonic() + 0.2
+        # A nearly spent budget still gets a usable timeout
+        assert deadline.upstream_timeout(30) == deadline.MIN_UPSTREAM_TIMEOUT
+    assert deadline.current() is None
+
+
+def test_spent_budget_raises_and_marks_partial():
+    with deadline.deadline_scope(0) as d:
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.upstream_timeout(30)
+        assert deadline.is_partial() and d.reasons == ['request deadline exceeded']
+
+
+def test_cancel_wakes_waiters():
+    d = deadline.Deadline(30)
+    threading.Timer(0.05, d.cancel).start()
+    t0 = time.monotonic()
+    assert d.wait(10)
+    assert time.monotonic() - t0 < 1
+    with pytest.raises(deadline.DeadlineExceeded, match='client disconnected'):
+        d.timeout(5)
+
+
+def test_request_budget_never_exceeds_the_default():
+    assert deadline.request_budget('10', default=120) == 10
+    assert deadline.request_budget('600', default=120) == 120
+    assert deadline.request_budget('soon', default=120) == 120
+    assert deadline.request_budget(None, default=120) == 120
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import threading
+
+from jobs import JobQueue
+from report_store import ReportStore
+
+
+def make_store():
+    return ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+
+
+def blocking(release: threading.Event, result=None):
+    def fn(job):
+        job.report(0.5, 'half way')
+        release.wait(5)
+        return result
+    return fn
+
+
+def test_identical_submissions_coalesce_until_the_job_finishes():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    job, created = queue.submit('report-refresh', 'k', blocking(release, {'n': 1}))
+    again, created_again = queue.submit('report-refresh', 'k', blocking(release))
+    other, created_other = queue.submit('report-refresh', 'other', blocking(release))
+    assert created and not created_again and created_other
+    assert again is job and other is not job
+    release.set()
+    assert job.wait(5) and job.status == 'succeeded' and job.result == {'n': 1}
+    _next, created_next = queue.submit('report-refresh', 'k', lambda job: None)
+    assert created_next
+
+
+def test_failed_job_records_the_error():
+    queue = JobQueue(max_workers=1)
+
+    def boom(job):
+        raise RuntimeError('splunk down')
+
+    job, _ = queue.submit('daily-stats-refresh', '7', boom)
+    assert job.wait(5)
+    assert (job.status, job.error) == ('failed', 'splunk down')
+
+
+def test_workers_sharing_a_store_see_and_coalesce_each_others_jobs():
+    store = make_store()
+    # Two API worker processes, each with its own queue
+    first, second = JobQueue(store=store, heartbeat=0.1), JobQueue(store=store, heartbeat=0.1)
+    release = threading.Event()
+    job, created = first.submit('report-refresh', 'k', blocking(release, {'mode': 'full'}))
+    remote, created_remote = second.submit('report-refresh', 'k', blocking(release))
+    assert created and not created_remote
+    assert remote.id == job.id
+    looked_up = second.get(job.id)
+    assert looked_up is not None and looked_up.status in ('queued', 'running')
+    release.set()
+    assert remote.wait(5)
+    assert (remote.status, remote.result) == ('succeeded', {'mode': 'full'})
+    assert [j.id for j in second.list()] == [job.id]
+
+
+def test_job_left_by_a_stopped_worker_is_abandoned():
+    store = make_store()
+    release = threading.Event()
+    # A worker that stopped heartbeating (heartbeat far longer than stale_after)
+    gone = JobQueue(store=store, heartbeat=60, stale_after=0.2)
+    job, _ = gone.submit('report-refresh', 'k', blocking(release))
+    survivor = JobQueue(store=store, stale_after=0.2)
+    remote = survivor.get(job.id)
+    assert remote.wait(5)
+    assert remote.status == 'failed' and 'abandoned' in remote.error
+    _fresh, created = survivor.submit('report-refresh', 'k', lambda job: None)
+    assert created
+    release.set()
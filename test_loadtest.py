@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.loadtest import breaches, parse_slo, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 100)) == (50.0, 95.0, 100.0)
+    assert percentile([0.2], 99) == 0.2 and percentile([], 50) == 0.0
+
+
+def test_slo_parsing():
+    assert parse_slo(' /report:p95 <= 0.5') == ('/report', 'p95', '<=', 0.5)
+    assert parse_slo('*:rps>=20') == ('*', 'rps', '>=', 20.0)
+    for bad in ('/report:p90<=1', '/report p95<=1', '/report:p95<1'):
+        with pytest.raises(ValueError):
+            parse_slo(bad)
+
+
+def test_breaches_flag_limits_and_endpoints_without_traffic():
+    summary = {'/report': {'p95': 0.8, 'error_rate': 0.0, 'rps': 40.0},
+               '/services': {'p95': 0.1, 'error_rate': 0.05, 'rps': 5.0}}
+    slos = [parse_slo(s) for s in ('/report:p95<=0.5', '*:error_rate<=0.01', '*:rps>=10', '/find-skysi:p99<=2')]
+    assert breaches(summary, slos) == [
+        '/report: p95=0.8 (SLO <=0.5)',
+        '/services: error_rate=0.05 (SLO <=0.01)',
+        '/services: rps=5 (SLO >=10)',
+        '/find-skysi: no requests recorded for p99<=2',
+    ]
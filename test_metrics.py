@@ -0,0 +1,47 @@
+import metrics
+
+
+def family(name: str) -> list[str]:
+    return [line for line in metrics.render().decode().splitlines() if name in line]
+
+
+def test_counter_and_label_escaping():
+    c = metrics.Counter('test_jobs', 'Jobs run.', ('kind',))
+    c.labels('report').inc()
+    c.labels(kind='report').inc(2)
+    c.labels('a "quoted"\nkind').inc()
+    assert family('test_jobs') == [
+        '# HELP test_jobs_total Jobs run.',
+        '# TYPE test_jobs_total counter',
+        'test_jobs_total{kind="a \\"quoted\\"\\nkind"} 1',
+        'test_jobs_total{kind="report"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram('test_latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.labels('/report').observe(v)
+    assert family('test_latency_seconds')[2:] == [
+        'test_latency_seconds_bucket{route="/report",le="0.1"} 1',
+        'test_latency_seconds_bucket{route="/report",le="1"} 3',
+        'test_latency_seconds_bucket{route="/report",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/report"} 4.05',
+        'test_latency_seconds_count{route="/report"} 4',
+    ]
+
+
+def test_gauge_tracking_and_collectors():
+    g = metrics.Gauge('test_in_flight', 'In flight.')
+    with g.track():
+        assert family('test_in_flight')[-1] == 'test_in_flight 1'
+    assert family('test_in_flight')[-1] == 'test_in_flight 0'
+    collected = metrics.Gauge('test_queue_depth', 'Queued.', ('backend',))
+    collected.set_collector(lambda: {('splunk',): 2, ('jira',): 0})
+    assert family('test_queue_depth')[2:] == ['test_queue_depth{backend="jira"} 0', 'test_queue_depth{backend="splunk"} 2']
+
+
+def test_search_label_is_bounded():
+    assert metrics.search_label('index=x sourcetype=aemerror level=ERROR') == 'aemerror'
+    assert metrics.search_label('index=x sourcetype="aemaccess"') == 'aemaccess'
+    assert metrics.search_label('| makeresults') == 'other'
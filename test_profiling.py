@@ -0,0 +1,51 @@
+import os
+import time
+
+import profiling
+
+
+def busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_flag_needs_a_valid_token(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 0)
+    assert profiling.requested_mode('1', 'secret') == (profiling.PROFILE_MODE, True)
+    assert profiling.requested_mode('cprofile', 'secret') == ('cprofile', True)
+    assert profiling.requested_mode('1', 'wrong') is None
+    assert profiling.requested_mode('off', 'secret') is None
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', '')
+    assert profiling.requested_mode('1', '') is None  # no token configured: never forced
+
+
+def test_sampling_skips_operational_routes(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 1.0)
+    assert profiling.requested_mode(None, None, '/report') == (profiling.PROFILE_MODE, False)
+    assert profiling.requested_mode(None, None, '/metrics') is None
+
+
+def test_profiles_are_stored_one_at_a_time_and_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILES', profiling.ProfileStore(str(tmp_path), keep=2))
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_INTERVAL', 0.001)
+
+    p = profiling.begin('sample', 'GET /report')
+    assert profiling.begin('cprofile', 'GET /other') is None
+    busy(0.05)
+    sampled = p.stop(200)
+    assert 'busy (test_profiling.py' in open(profiling.PROFILES.artifact(sampled, 'collapsed')).read()
+
+    p = profiling.begin('cprofile', 'GET /report')
+    busy(0.01)
+    profiled = p.stop(200)
+    assert '-get-report-200-' in profiled
+    assert 'busy' in open(profiling.PROFILES.artifact(profiled)).read()
+    assert os.path.exists(profiling.PROFILES.artifact(profiled, 'pstats'))
+
+    p = profiling.begin('cprofile', 'GET /third')
+    third = p.stop(500)
+    assert profiling.PROFILES.list() == [third, profiled]
+    assert profiling.PROFILES.artifact(sampled) is None
+    assert profiling.PROFILES.artifact('../etc/passwd') is None
@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from report_cache import ReportSnapshotCache, conditional_response
+from report_store import ReportStore
+
+
+def make_cache():
+    return ReportSnapshotCache(lambda d: json.dumps(d).encode(), max_entries=4)
+
+
+def test_concurrent_misses_load_once_and_release_key_locks():
+    cache = make_cache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return {"ok": True}
+
+    threads = [threading.Thread(target=cache.get, args=('k', lambda: 1, loader)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    # One key per distinct client query; none may outlive its load
+    for i in range(100):
+        cache.get(f'report-data:q={i}', lambda: 1, lambda: {"i": i})
+    assert cache._key_locks == {}
+
+
+def test_write_during_load_leaves_entry_stale():
+    cache = make_cache()
+    stamp = [1]
+
+    def loader():
+        data = {"v": stamp[0]}
+        # Another worker writes after this load read the store
+        stamp[0] = 2
+        return data
+
+    assert cache.get('k', lambda: stamp[0], loader).data == {"v": 1}
+    assert cache.get('k', lambda: stamp[0], lambda: {"v": stamp[0]}).data == {"v": 2}
+
+
+def test_store_stamp_moves_only_on_writes():
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    before = store.stamp()
+    # Readers opening and closing connections must not change it
+    other = sqlite3.connect(store.db_path)
+    other.execute('SELECT 1 FROM runs').fetchall()
+    assert store.stamp() == before
+    other.close()
+    assert store.stamp() == before
+    store.save_report('2026-10-01', {'svc_rows': [], 'report_items': []})
+    assert store.stamp() != before
+
+
+def test_snapshot_validators_and_precompressed_bodies():
+    data = {'rows': [{'aem_service': f'cm-p{i}-e{i}', 'error_count': i} for i in range(200)]}
+    snap = make_cache().put('k', data, stamp=1)
+    status, body, headers = conditional_response(snap, accept_encoding='gzip')
+    assert status == 200 and headers['Content-Encoding'] == 'gzip' and gzip.decompress(body) == snap.body
+    status, body, _ = conditional_response(snap, if_none_match=f'W/{snap.etag}', accept_encoding='gzip')
+    assert (status, body) == (304, b'')
+    # If-None-Match wins over If-Modified-Since
+    status, _, _ = conditional_response(snap, if_none_match='"other"', if_modified_since=headers['Last-Modified'])
+    assert status == 200
+    assert conditional_response(snap, if_modified_since=headers['Last-Modified'])[0] == 304
@@ -0,0 +1,52 @@
+import json
+
+from report_cache import ReportSnapshotCache
+from report_index import ReportIndex, ReportIndexCache
+
+
+def snapshot() -> dict:
+    items = [
+        ('cm-p1-e1', 'Alpha Forms', 5, 100),
+        ('cm-p2-e2', 'Beta', 9, 30),
+        ('cm-p3-e3', 'alpha portal', 1, 400),
+    ]
+    return {
+        'generated_at': '2026-10-18T06:00:00Z', 'earliest': '-1d', 'latest': 'now',
+        'services': [s for s, *_ in items],
+        'svc_rows': [{'aem_service': s, 'program_name': p, 'error_count': e} for s, p, e, _t in items],
+        'report_items': [
+            {'aem_service': s, 'program_name': p, 'error_count': e, 'total_form_submissions': t,
+             'failure_rate_pct': round(e / t * 100, 2),
+             'paths': [{'path': '/a', 'time': '', 'messages': ['x', 'y']}, {'path': '/b', 'time': '', 'messages': []}]}
+            for s, p, e, t in items
+        ],
+    }
+
+
+def test_filter_sort_and_page():
+    index = ReportIndex(snapshot())
+    out = index.query(program='ALPHA', sort='total_form_submissions', order='asc')
+    assert out['services'] == ['cm-p1-e1', 'cm-p3-e3']
+    assert [r['aem_service'] for r in out['svc_rows']] == ['cm-p1-e1', 'cm-p3-e3']
+    page = index.query(sort='error_count', page=2, page_size=2)
+    assert page['services'] == ['cm-p3-e3']
+    assert page['page'] == {'page': 2, 'page_size': 2, 'pages': 2, 'total': 3, 'sort': 'error_count', 'order': 'desc'}
+    assert index.query(q='e2')['services'] == ['cm-p2-e2']
+
+
+def test_projections():
+    index = ReportIndex(snapshot())
+    summary = index.query(service='cm-p2', fields='summary')['report_items'][0]
+    assert 'paths' not in summary and (summary['path_count'], summary['message_count']) == (2, 2)
+    projected = index.query(service='cm-p2', fields='aem_service,error_count,bogus')['report_items']
+    assert projected == [{'aem_service': 'cm-p2-e2', 'error_count': 9}]
+    assert index.service('CM-P3-E3')['program_name'] == 'alpha portal'
+
+
+def test_index_is_built_once_per_snapshot():
+    cache = ReportSnapshotCache(lambda d: json.dumps(d).encode())
+    snap = cache.put('report:2026-10-18', snapshot(), stamp=1)
+    indexes = ReportIndexCache()
+    assert indexes.get(snap) is indexes.get(snap)
+    changed = cache.put('report:2026-10-18', {**snapshot(), 'report_items': []}, stamp=2)
+    assert indexes.get(changed) is not indexes.get(snap)
@@ -0,0 +1,95 @@
+import json
+
+from report_engine import ReportModel, merge_report_delta
+
+
+def baseline_report() -> dict:
+    """A snapshot in the shape the refresh endpoint stored before ReportModel existed."""
+    return {
+        "generated_at": "2026-10-18T06:00:00Z",
+        "earliest": "-1d",
+        "latest": "now",
+        "services": ["cm-p1-e1", "cm-p2-e2"],
+        "svc_rows": [
+            {"aem_service": "cm-p1-e1", "program_name": "Prog 1", "error_count": 3, "skysi_key": "SKYSI-1",
+             "skysi_url": "https://jira.example/browse/SKYSI-1"},
+            {"aem_service": "cm-p2-e2", "program_name": "<unknown program name>", "error_count": 1, "skysi_key": "",
+             "skysi_url": ""},
+        ],
+        "report_items": [
+            {"aem_service": "cm-p1-e1", "error_count": 3, "total_form_submissions": 300, "failure_rate_pct": 1.0,
+             "program_name": "Prog 1", "paths": [
+                 {"path": "/content/forms/af/a/jcr:content/guideContainer.af.submit.jsp",
+                  "time": "2026-10-17 10:00:00, 2026-10-17 10:05:00",
+                  "messages": [{"time": "2026-10-17 10:00:03", "msg": "SubmitException: a"},
+                               {"msg": "SubmitException: b"},
+                               "legacy plain message"]},
+                 {"path": "/content/forms/af/b/jcr:content/guideContainer.af.submit.jsp", "time": "", "messages": []},
+             ]},
+            {"aem_service": "cm-p2-e2", "error_count": 1, "total_form_submissions": 0, "failure_rate_pct": 0.0,
+             "program_name": "<unknown program name>", "paths": []},
+        ],
+    }
+
+
+def test_snapshot_round_trip_keeps_baseline_shape():
+    report = baseline_report()
+    again = ReportModel.from_dict(report).to_dict()
+    assert json.dumps(again, sort_keys=True) == json.dumps(report, sort_keys=True)
+
+
+def window_report(earliest: str, latest: str, items: dict) -> dict:
+    """A report for one window: items is {svc: (errors, submissions, [(path, time, msg), ...])}."""
+    report_items = []
+    for svc, (errs, total, failures) in items.items():
+        paths = {}
+        for path, when, msg in failures:
+            pe = paths.setdefault(path, {"path": path, "time": "", "messages": []})
+            pe["time"] = ", ".join(t for t in [when, pe["time"]] if t)
+            pe["messages"].append({"time": when, "msg": msg})
+        report_items.append({"aem_service": svc, "error_count": errs, "total_form_submissions": total,
+                             "failure_rate_pct": round(errs / total * 100, 2) if total else 0.0,
+                             "program_name": f"Prog {svc}", "paths": list(paths.values())})
+    return {"generated_at": "", "earliest": earliest, "latest": latest, "services": list(items),
+            "svc_rows": [{"aem_service": svc, "program_name": f"Prog {svc}", "error_count": e, "skysi_key": "", "skysi_url": ""}
+                         for svc, (e, _t, _f) in items.items()],
+            "report_items": report_items}
+
+
+def test_two_deltas_extend_the_window_and_add_up():
+    base = window_report("2026-10-19 00:00:00", "2026-10-19 01:00:00", {
+        "a": (10, 1000, [("/p1", "2026-10-19 00:10:00", "boom")]),
+        "b": (1, 100, [("/p2", "2026-10-19 00:20:00", "bang")]),
+    })
+    # Only a fails in either delta, but b keeps getting traffic
+    d1 = window_report("2026-10-19 01:00:00", "2026-10-19 02:00:00", {
+        "a": (5, 500, [("/p1", "2026-10-19 01:10:00", "boom"), ("/p3", "2026-10-19 01:30:00", "new")]),
+    })
+    d2 = window_report("2026-10-19 02:00:00", "2026-10-19 03:00:00", {
+        "a": (1, 400, [("/p1", "2026-10-19 02:05:00", "later")]),
+        "c": (2, 20, []),
+    })
+    # Submission totals over the whole window so far: b kept getting traffic, and c
+    # had 80 submissions before it first failed in d2
+    merged = merge_report_delta(base, d1, {"a": 1500, "b": 200, "c": 60})
+    merged = merge_report_delta(merged, d2, {"a": 1900, "b": 300, "c": 100})
+
+    assert (merged["earliest"], merged["latest"]) == ("2026-10-19 00:00:00", "2026-10-19 03:00:00")
+    items = {it["aem_service"]: it for it in merged["report_items"]}
+    assert {s: (it["error_count"], it["total_form_submissions"]) for s, it in items.items()} == \
+        {"a": (16, 1900), "b": (1, 300), "c": (2, 100)}
+    assert items["b"]["failure_rate_pct"] == 0.33
+    assert merged["services"] == ["a", "c", "b"]
+    assert {r["aem_service"]: r["error_count"] for r in merged["svc_rows"]} == {"a": 16, "b": 1, "c": 2}
+    p1 = next(pe for pe in items["a"]["paths"] if pe["path"] == "/p1")
+    assert p1["time"] == "2026-10-19 02:05:00, 2026-10-19 01:10:00, 2026-10-19 00:10:00"
+    assert [m["msg"] for m in p1["messages"]] == ["later", "boom"]
+    assert {pe["path"] for pe in items["a"]["paths"]} == {"/p1", "/p3"}
+
+
+def test_delta_without_totals_falls_back_to_its_items():
+    base = window_report("2026-10-19 00:00:00", "2026-10-19 01:00:00", {"a": (1, 10, []), "b": (1, 10, [])})
+    delta = window_report("2026-10-19 01:00:00", "2026-10-19 02:00:00", {"a": (1, 10, [])})
+    items = {it["aem_service"]: it for it in merge_report_delta(base, delta)["report_items"]}
+    assert (items["a"]["total_form_submissions"], items["b"]["total_form_submissions"]) == (20, 10)
+
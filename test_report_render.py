@@ -0,0 +1,35 @@
+import threading
+
+from report_engine import ReportModel
+from report_render import PdfRenderPool
+
+
+def model() -> ReportModel:
+    return ReportModel.from_dict({
+        'generated_at': '2026-10-18T06:00:00Z', 'earliest': '-1d', 'latest': 'now', 'services': ['cm-p1-e1'],
+        'svc_rows': [{'aem_service': 'cm-p1-e1', 'program_name': 'Prog 1', 'error_count': 2, 'skysi_key': '',
+                      'skysi_url': ''}],
+        'report_items': [{'aem_service': 'cm-p1-e1', 'error_count': 2, 'total_form_submissions': 40,
+                          'failure_rate_pct': 5.0, 'program_name': 'Prog 1',
+                          'paths': [{'path': '/content/forms/af/a', 'time': '10:00',
+                                     'messages': [{'time': '10:00', 'msg': 'submit failed'}]}]}],
+    })
+
+
+def test_pool_renders_from_a_threaded_process_and_caches_by_report():
+    # Threads holding locks while the pool starts are what made fork unsafe
+    stop = threading.Event()
+    busy = [threading.Thread(target=stop.wait, daemon=True) for _ in range(4)]
+    for t in busy:
+        t.start()
+    pool = PdfRenderPool(max_workers=1)
+    try:
+        pool.start()
+        pdf, etag = pool.render(model())
+        again, etag_again = pool.render(model())
+    finally:
+        stop.set()
+    assert pdf.startswith(b'%PDF')
+    assert again is pdf and etag_again == etag
+    assert pool._pool is not None and pool._max_workers == 1
+    assert pool._pool._mp_context.get_start_method() != 'fork'
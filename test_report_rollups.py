@@ -0,0 +1,90 @@
+import os
+import json
+import tempfile
+
+from report_rollups import update_rollups, rebuild_rollup, render_rollup, period_for, get_rollup
+from report_store import ReportStore
+
+
+def day_report(counts: dict, msg: str = 'boom') -> dict:
+    """A minimal daily snapshot: counts is {svc: (errors, submissions)}."""
+    return {
+        'generated_at': '', 'earliest': '-1d', 'latest': 'now', 'services': list(counts),
+        'svc_rows': [{'aem_service': s, 'program_name': f'P-{s}', 'error_count': e, 'skysi_key': '', 'skysi_url': ''}
+                     for s, (e, _t) in counts.items()],
+        'report_items': [{'aem_service': s, 'error_count': e, 'total_form_submissions': t, 'program_name': f'P-{s}',
+                          'paths': [{'path': '/p', 'time': '', 'messages': [{'msg': f'{msg} {s}'}]}]}
+                         for s, (e, t) in counts.items()],
+    }
+
+
+class CountingStore(ReportStore):
+    loads = 0
+
+    def load_report(self, report_date):
+        CountingStore.loads += 1
+        return super().load_report(report_date)
+
+
+def save(store, day, report):
+    store.save_report(day, report)
+    update_rollups(store, day, report)
+
+
+def test_resaved_day_replaces_its_share_without_reading_snapshots():
+    store = CountingStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    # Week of Sat 2026-10-10 .. Fri 2026-10-16
+    save(store, '2026-10-10', day_report({'a': (2, 100), 'b': (1, 50)}))
+    save(store, '2026-10-11', day_report({'a': (3, 100)}))
+    CountingStore.loads = 0
+    # Today's refresh lands again and again with growing counts; b drops out
+    save(store, '2026-10-11', day_report({'a': (5, 200), 'c': (4, 40)}, msg='later'))
+    save(store, '2026-10-11', day_report({'a': (6, 300), 'c': (4, 60)}, msg='later'))
+    assert CountingStore.loads == 0
+
+    for kind in ('week', 'month'):
+        key, start, end = period_for(kind, '2026-10-11')
+        stored = render_rollup(store.load_rollup(kind, key))
+        fresh = render_rollup(rebuild_rollup(store, kind, key, start, end))
+        assert stored == fresh
+        totals = {it['aem_service']: (it['error_count'], it['total_form_submissions']) for it in stored['report_items']}
+        assert totals == {'a': (8, 400), 'b': (1, 50), 'c': (4, 60)}
+        assert stored['dates'] == ['2026-10-10', '2026-10-11']
+
+
+def test_out_of_order_day_matches_rebuild():
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    save(store, '2026-10-12', day_report({'a': (1, 10)}))
+    save(store, '2026-10-10', day_report({'b': (2, 20), 'a': (1, 5)}))
+    key, start, end = period_for('week', '2026-10-12')
+    stored = store.load_rollup('week', key)
+    fresh = rebuild_rollup(store, 'week', key, start, end)
+    assert render_rollup(stored)['report_items'] == render_rollup(fresh)['report_items']
+    assert stored['dates'] == ['2026-10-10', '2026-10-12']
+
+
+
+def test_reading_a_missing_rollup_does_not_write():
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    # Snapshots stored without rollups, e.g. by an older version
+    store.save_report('2026-10-10', day_report({'a': (2, 100)}))
+    store.save_report('2026-10-12', day_report({'a': (1, 50), 'b': (3, 30)}))
+    stamp = store.stamp()
+    state = get_rollup(store, 'week', '2026-10-12')
+    assert render_rollup(state)['dates'] == ['2026-10-10', '2026-10-12']
+    assert store.load_rollup('week', period_for('week', '2026-10-12')[0]) is None
+    assert store.stamp() == stamp
+    assert get_rollup(store, 'week', '2026-10-03') is None
+
+
+def test_imported_snapshots_are_folded_into_rollups():
+    d = tempfile.mkdtemp()
+    for day, counts in (('2026-10-10', {'a': (2, 100)}), ('2026-10-11', {'a': (1, 50)})):
+        with open(os.path.join(d, f'report_cache_{day}.json'), 'w', encoding='utf-8') as f:
+            json.dump(day_report(counts), f)
+    store = ReportStore(os.path.join(d, 'reports.db'))
+    store.import_json_dir(d, on_saved=lambda day, data: update_rollups(store, day, data))
+    key, start, end = period_for('week', '2026-10-11')
+    stored = store.load_rollup('week', key)
+    assert stored['dates'] == ['2026-10-10', '2026-10-11']
+    assert render_rollup(stored) == render_rollup(rebuild_rollup(store, 'week', key, start, end))
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import deadline
+from resilience import Backend, BackendUnavailable, Bulkhead, CircuitBreaker
+
+
+def fail(backend: Backend, error: str = 'boom') -> None:
+    with pytest.raises(RuntimeError):
+        with backend.call():
+            raise RuntimeError(error)
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    backend = Backend('t', 4, 4, 1, failure_threshold=2, slow_call_seconds=10, reset_timeout=30)
+    fail(backend)
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+    with backend.call():
+        pass  # a success resets the count
+    fail(backend)
+    fail(backend)
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(BackendUnavailable) as e:
+        with backend.call():
+            pytest.fail('must not reach the backend')
+    assert e.value.reason == 'circuit open' and 29 < e.value.retry_after <= 30
+    assert not backend.available()
+
+
+def test_half_open_allows_one_trial_that_decides():
+    breaker = CircuitBreaker('t', failure_threshold=1, slow_call_seconds=10, reset_timeout=0.05)
+    breaker.record(0.1, 'boom')
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(BackendUnavailable, match='trial call in flight'):
+        breaker.before_call()
+    breaker.record(0.1, 'still down')
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(0.1)
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+
+def test_slow_calls_and_flagged_failures_count():
+    backend = Backend('t', 4, 4, 1, failure_threshold=2, slow_call_seconds=0.01, reset_timeout=30)
+    with backend.call():
+        time.sleep(0.02)
+    with deadline.deadline_scope(5) as d:
+        with backend.call() as call:
+            call.fail('HTTP 503')
+        assert d.partial
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    assert backend.breaker.last_error == 'HTTP 503'
+
+
+def test_bulkhead_rejects_when_the_queue_is_full_or_the_wait_times_out():
+    bulkhead = Bulkhead('t', max_concurrent=1, max_queue=1, queue_timeout=0.1)
+    bulkhead.acquire()
+    t0 = time.monotonic()
+    with pytest.raises(BackendUnavailable, match='queue wait timed out'):
+        bulkhead.acquire()
+    assert time.monotonic() - t0 < 1
+    assert bulkhead.queued() == 0
+
+    waiting = threading.Thread(target=lambda: pytest.raises(BackendUnavailable, bulkhead.acquire))
+    waiting.start()
+    time.sleep(0.02)
+    with pytest.raises(BackendUnavailable, match='queue full'):
+        bulkhead.acquire()
+    waiting.join()
+    assert bulkhead.rejected == 3
+
+
+def test_queue_wait_is_bounded_by_the_request_deadline():
+    bulkhead = Bulkhead('t', max_concurrent=1, max_queue=4, queue_timeout=30)
+    bulkhead.acquire()
+    t0 = time.monotonic()
+    with deadline.deadline_scope(0.1):
+        with pytest.raises(BackendUnavailable):
+            bulkhead.acquire()
+    assert time.monotonic() - t0 < 1
+
+
+def test_released_slot_is_handed_to_the_oldest_waiter():
+    bulkhead = Bulkhead('t', max_concurrent=1, max_queue=4, queue_timeout=5)
+    bulkhead.acquire()
+    order = []
+
+    def waiter(i):
+        bulkhead.acquire()
+        order.append(i)
+        bulkhead.release()
+
+    threads = [threading.Thread(target=waiter, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    assert bulkhead.queued() == 3
+    bulkhead.release()
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2]
+    assert (bulkhead.active, bulkhead.queued()) == (0, 0)
+
+
+def test_async_waiter_gets_a_slot_released_by_a_thread_and_cancel_hands_it_on():
+    bulkhead = Bulkhead('t', max_concurrent=1, max_queue=4, queue_timeout=5)
+
+    async def scenario():
+        bulkhead.acquire()  # held by a worker thread
+        got = asyncio.ensure_future(bulkhead.aacquire())
+        await asyncio.sleep(0.01)
+        assert bulkhead.queued() == 1
+        threading.Thread(target=bulkhead.release).start()
+        await asyncio.wait_for(got, 1)
+        assert (bulkhead.active, bulkhead.queued()) == (1, 0)
+
+        # Cancelled while queued: leaves the queue, the slot stays with its holder
+        cancelled = asyncio.ensure_future(bulkhead.aacquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert (bulkhead.active, bulkhead.queued()) == (1, 0)
+
+        # Cancelled just as the slot was granted: the slot is passed on, not leaked
+        granted = asyncio.ensure_future(bulkhead.aacquire())
+        await asyncio.sleep(0.01)
+        bulkhead.release()
+        granted.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await granted
+        assert (bulkhead.active, bulkhead.queued()) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_rejected_call_does_not_use_up_the_half_open_trial():
+    backend = Backend('t', 1, 0, 0.05, failure_threshold=1, slow_call_seconds=10, reset_timeout=0.05)
+    fail(backend)
+    time.sleep(0.06)
+    backend.bulkhead.acquire()  # bulkhead full, no queue
+    with pytest.raises(BackendUnavailable, match='queue full'):
+        with backend.call():
+            pass
+    backend.bulkhead.release()
+    with backend.call():
+        pass
+    assert backend.breaker.state == CircuitBreaker.CLOSED
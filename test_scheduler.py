@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from report_store import ReportStore
+from scheduler import RefreshScheduler
+
+
+def test_one_process_runs_each_window():
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    runs, warmed = [], []
+    # Two nodes sharing the store
+    nodes = [RefreshScheduler(store, jitter=0, after_run=warmed.append) for _ in range(2)]
+    for i, node in enumerate(nodes):
+        node._owner = f'node-{i}'
+        node.add_task('report-refresh', 3600, lambda i=i: runs.append(i))
+    now = 7200.0
+    assert [node._run_once(node._tasks[0], now) for node in nodes] == [True, False]
+    assert runs == [0] and warmed == ['report-refresh']
+    # The next window is free again
+    assert nodes[1]._run_once(nodes[1]._tasks[0], now + 3600)
+    assert runs == [0, 1]
+
+
+def test_failing_task_still_prewarms():
+    store = ReportStore(os.path.join(tempfile.mkdtemp(), 'reports.db'))
+    warmed = []
+    sched = RefreshScheduler(store, jitter=0, after_run=warmed.append)
+
+    def boom():
+        raise RuntimeError('splunk down')
+
+    sched.add_task('daily-stats-refresh', 86400, boom)
+    assert sched._run_once(sched._tasks[0], 86400.0)
+    assert warmed == ['daily-stats-refresh']
+
+
+def test_store_is_not_created_until_used():
+    path = os.path.join(tempfile.mkdtemp(), 'nested', 'reports.db')
+    store = ReportStore(path)
+    assert not os.path.exists(os.path.dirname(path))
+    assert store.list_dates() == []
+    assert os.path.exists(path)
@@ -0,0 +1,79 @@
+import asyncio
+
+import search_perf
+from search_perf import QueryLog, job_stats, search_origin, spl_template, template_id
+
+
+def test_template_strips_literals_and_collapses_repeated_stages():
+    a = spl_template('search index=aem sourcetype=aemerror aem_service="cm-p1-e1" earliest=-24h error_count>5'
+                     ' | eval w1=if(x>3,1,0) | eval w2=if(x>4,1,0) | stats count by aem_service')
+    b = spl_template('search  index=aem sourcetype=aemerror aem_service="cm-p9-e9" earliest=-7d error_count>50'
+                     ' | eval w1=if(x>3,1,0) | eval w2=if(x>9,1,0) | eval w3=if(x>9,1,0) | stats count by aem_service')
+    assert a == b == ('search index=aem sourcetype=aemerror aem_service="?" earliest=? error_count>?'
+                      ' | eval wN=if(x>?,N,N) ... | stats count by aem_service')
+    assert template_id(a) == template_id(b) and len(template_id(a)) == 12
+    assert spl_template(None) == ''
+
+
+def test_job_stats_keeps_the_costliest_phases():
+    content = {
+        'runDuration': '2.5', 'scanCount': '1200', 'eventCount': 40, 'resultCount': None, 'dispatchState': 'DONE',
+        'performance': {
+            'command.search': {'duration_secs': 2.0},
+            'command.stats': {'duration_secs': '0.4'},
+            'dispatch.fetch': {'duration_secs': 'n/a'},
+            'startup.handoff': 7,
+        },
+    }
+    assert job_stats(content) == {
+        'run_duration': 2.5, 'scan_count': 1200, 'event_count': 40, 'result_count': 0, 'dispatch_state': 'DONE',
+        'phases': {'command.search': 2.0, 'command.stats': 0.4},
+    }
+    assert job_stats({'runDuration': 'bogus'})['run_duration'] == 0
+
+
+def test_query_log_ranks_templates_and_rotates(tmp_path):
+    log = QueryLog(str(tmp_path / 'queries.jsonl'))
+    for origin, tid, run, outcome in (('report', 'a', 1.0, 'ok'), ('report', 'a', 3.0, 'partial'),
+                                      ('skysi', 'b', 2.5, 'error')):
+        log.append({'template_id': tid, 'template': tid, 'origin': origin, 'run_duration': run,
+                    'scan_count': 10, 'outcome': outcome, 'phases': {'command.search': run}})
+    with open(log.path, 'ab') as f:
+        f.write(b'{"torn\n')
+
+    ranked = log.rank()
+    assert [r['template_id'] for r in ranked] == ['a', 'b']
+    assert ranked[0]['count'] == 2 and ranked[0]['avg_run_duration'] == 2.0 and ranked[0]['max_run_duration'] == 3.0
+    assert (ranked[0]['partial'], ranked[1]['errors']) == (1, 1)
+    assert ranked[0]['top_phases'] == {'command.search': 4.0}
+    assert [r['template_id'] for r in log.rank(sort='max_run_duration', limit=1)] == ['a']
+    assert [r['template_id'] for r in log.rank(origin='skysi')] == ['b']
+
+    small = QueryLog(str(tmp_path / 'small.jsonl'), max_bytes=200)
+    for i in range(4):
+        small.append({'template_id': 'c', 'query': 'x' * 80, 'run_duration': i})
+    assert (tmp_path / 'small.jsonl.1').exists()
+    assert 0 < len(list(small.entries())) < 4
+
+
+def test_record_tags_the_innermost_origin(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_perf, 'QUERY_LOG', QueryLog(str(tmp_path / 'queries.jsonl')))
+    monkeypatch.setattr(search_perf, 'SLOW_QUERY_SECONDS', 1.0)
+
+    @search_origin
+    def outer():
+        return inner()
+
+    @search_origin
+    def inner():
+        return search_perf.record('search index=aem x=1', 'sid1', {'runDuration': 1.5}, 3, 'ok', 0.2)
+
+    @search_origin
+    async def fast():
+        return search_perf.record('search index=aem x=2', 'sid2', {}, 0, 'ok', 0.1)
+
+    assert outer()['origin'] == 'inner'
+    assert asyncio.run(fast())['origin'] == 'fast'
+    assert search_perf.current_origin() == 'unknown'
+    # Only searches at or above the slow threshold are logged
+    assert [e['sid'] for e in search_perf.QUERY_LOG.entries()] == ['sid1']
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import deadline
+from singleflight import SingleFlight, AsyncSingleFlight
+
+
+def run_leader(flight, key, fn):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault('result', flight.do(key, fn)))
+    t.start()
+    return t, out
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight(grace_seconds=30)
+    release, calls = threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'payload'
+
+    t, out = run_leader(flight, 'k', fn)
+    time.sleep(0.05)
+    followers = [run_leader(flight, 'k', fn) for _ in range(3)]
+    release.set()
+    for ft, _ in [(t, out)] + followers:
+        ft.join()
+    assert calls == [1]
+    assert out['result'] == ('payload', False)
+    assert all(fo['result'] == ('payload', True) for _, fo in followers)
+    # Within the grace window a later caller gets the same result
+    assert flight.do('k', fn) == ('payload', True)
+
+
+def test_follower_stops_waiting_at_its_own_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+    t, _ = run_leader(flight, 'k', lambda: release.wait(5))
+    time.sleep(0.05)
+    t0 = time.monotonic()
+    with deadline.deadline_scope(0.2) as d:
+        with pytest.raises(deadline.DeadlineExceeded):
+            flight.do('k', lambda: 'never runs')
+        assert d.partial
+    assert time.monotonic() - t0 < 1
+    release.set()
+    t.join()
+
+
+def test_partial_result_is_not_kept_for_later_callers():
+    flight = SingleFlight(grace_seconds=30)
+
+    def cut_short():
+        deadline.current().mark_partial('request deadline exceeded')
+        return 'partial'
+
+    with deadline.deadline_scope(5):
+        assert flight.do('k', cut_short) == ('partial', False)
+    assert flight.do('k', lambda: 'complete') == ('complete', False)
+
+
+def test_failure_is_not_kept_for_later_callers():
+    flight = SingleFlight(grace_seconds=30)
+
+    def boom():
+        raise RuntimeError('splunk down')
+
+    with pytest.raises(RuntimeError):
+        flight.do('k', boom)
+    assert flight.do('k', lambda: 'ok') == ('ok', False)
+
+
+def test_async_follower_deadline_and_partial_results():
+    async def scenario():
+        flight = AsyncSingleFlight(grace_seconds=30)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return 'slow'
+
+        leader = asyncio.ensure_future(flight.do('k', slow))
+        await asyncio.sleep(0.01)
+        with deadline.deadline_scope(0.1):
+            with pytest.raises(deadline.DeadlineExceeded):
+                await flight.do('k', slow)
+        release.set()
+        assert await leader == ('slow', False)
+        # Successful result kept for the grace window
+        assert await flight.do('k', slow) == ('slow', True)
+
+        async def cut_short():
+            deadline.current().mark_partial('request deadline exceeded')
+            return 'partial'
+
+        async def complete():
+            return 'complete'
+
+        with deadline.deadline_scope(5):
+            assert await flight.do('p', cut_short) == ('partial', False)
+        assert await flight.do('p', complete) == ('complete', False)
+
+    asyncio.run(scenario())
@@ -16,7 +16,6 @@ load_dotenv()
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from api.app import create_app
 from config.settings import get_api_config
 
 def main():
@@ -27,17 +26,22 @@ def main():
     print(f"📍 Host: {config['host']}")
     print(f"🔌 Port: {config['port']}")
     print(f"🐛 Debug: {config['debug']}")
+    # reload runs a single process
+    workers = 1 if config["debug"] else max(1, config["workers"])
+    print(f"👷 Workers: {workers}")
     print(f"📚 API Documentation: https://{config['host']}:{config['port']}/docs")
     print(f"🏥 Health Check: https://{config['host']}:{config['port']}/health")
     print("=" * 60)
     
-    app = create_app()
-    
+    # Import string + factory so each worker process builds its own app and clients
     uvicorn.run(
-        app,
+        "api.app:create_app",
+        factory=True,
         host=config["host"],
         port=config["port"],
         reload=config["debug"],
+        workers=workers,
+        timeout_keep_alive=config["keep_alive"],
         log_level="info"
     )
 
@@ -1,3 +1,8 @@
+import pytest
+
+import deadline
+import splunk_tool
+from resilience import BackendUnavailable
 from splunk_tool import splunk_search_tool
 
 def test_query():
@@ -7,6 +12,18 @@ def test_query():
     result = splunk_search_tool(query)
     print("Splunk Response:\n", result)
 
+def test_unavailable_backend_and_spent_deadline_propagate(monkeypatch):
+    for error in (BackendUnavailable('splunk', 'circuit open', retry_after=5), deadline.DeadlineExceeded('request deadline exceeded')):
+        def run(query, error=error):
+            raise error
+        monkeypatch.setattr(splunk_tool, 'run_search_job', run)
+        with pytest.raises(type(error)):
+            splunk_search_tool('index=x')
+
+    # Other failures still come back as an error string for the agent
+    monkeypatch.setattr(splunk_tool, 'run_search_job', lambda query: 1 / 0)
+    assert splunk_search_tool('index=x').startswith('Error querying Splunk')
+
 # Call the function
 if __name__ == "__main__":
     test_query()
@@ -0,0 +1,43 @@
+import pytest
+
+import splunk_tool
+from synthetic import DAY, SyntheticAemLogs, SyntheticConfig, splunk_time
+
+NOW = 1_790_000_000.0
+
+
+def logs(**overrides) -> SyntheticAemLogs:
+    return SyntheticAemLogs(SyntheticConfig(**{'tenants': 40, 'days': 3, 'failing_fraction': 0.3, 'seed': 7, 'now': NOW, **overrides}))
+
+
+def test_same_seed_same_data():
+    a, b = logs(), logs()
+    assert list(a.access_events()) == list(b.access_events())
+    assert list(a.error_events()) == list(b.error_events())
+    assert logs(seed=8).services_with_errors(a.start, a.now) != a.services_with_errors(a.start, a.now)
+    with pytest.raises(ValueError):
+        logs(burst_shape='sawtooth')
+
+
+def test_splunk_time_modifiers():
+    assert splunk_time('now', NOW) == NOW
+    assert splunk_time('-1d', NOW) == NOW - DAY
+    assert splunk_time('-1d@d', NOW) == (NOW - DAY) // DAY * DAY
+    assert splunk_time('01/02/2026:03:04:05', NOW) == 1767323045.0
+    assert splunk_time(str(NOW), NOW) == NOW
+
+
+def test_search_rows_agree_with_the_event_streams():
+    data = logs()
+    failed = [e for e in data.access_events() if e['code'] >= 500]
+    errors = data.search(splunk_tool.services_with_errors_query('-3d', 'now'))
+    assert errors and sum(int(r['ErrorCount']) for r in errors) == len(failed)
+
+    svc = errors[0]['aem_service']
+    latest = data.search(splunk_tool.latest_failures_by_path_query(svc, 'prod', 'publish', '-3d', 'now'))
+    assert latest and all(r['path'] in data.by_service[svc].paths for r in latest)
+    assert data.search(splunk_tool.latest_failures_by_path_query('cm-p0-e0', 'prod', 'publish', '-3d', 'now')) == []
+
+    submissions = {r['aem_service']: int(r['TotalFormSubmission'])
+                   for r in data.search(splunk_tool.services_total_submissions_query('-3d', 'now'))}
+    assert sum(submissions.values()) == sum(1 for _ in data.access_events())
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def export_path(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(tracing, 'TRACE_EXPORT_PATH', str(path))
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 1.0)
+    return path
+
+
+def test_nested_spans_share_the_trace_and_export_on_root_close(export_path):
+    with tracing.span('request', route='/report') as root:
+        with tracing.span('splunk.search') as child:
+            tracing.annotate(rows=3)
+        assert not export_path.exists()
+    assert tracing.current_span() is None
+    lines = [json.loads(line) for line in export_path.read_text().splitlines()]
+    assert [s['name'] for s in lines] == ['splunk.search', 'request']
+    assert {s['trace_id'] for s in lines} == {root.trace.trace_id}
+    assert (child.parent_id, root.parent_id) == (root.span_id, '')
+    assert lines[0]['attributes'] == {'rows': 3}
+    tracing.annotate(ignored=True)  # no open span: a no-op
+
+
+def test_errors_and_async_spans(export_path):
+    @tracing.traced('job')
+    async def job():
+        await asyncio.sleep(0)
+        with tracing.span('inner'):
+            raise ValueError('bad window')
+
+    with pytest.raises(ValueError):
+        asyncio.run(job())
+    spans = {s['name']: s for s in map(json.loads, export_path.read_text().splitlines())}
+    assert spans['inner']['parent_id'] == spans['job']['span_id']
+    assert spans['inner']['error'] == spans['job']['error'] == 'bad window'
+
+
+def test_otlp_export(export_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_EXPORT_FORMAT', 'otlp')
+    with tracing.span('request', cached=True, rows=2):
+        pass
+    spans = json.loads(export_path.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert spans[0]['kind'] == 2 and spans[0]['status'] == {'code': 1}
+    assert spans[0]['attributes'] == [{'key': 'cached', 'value': {'boolValue': True}},
+                                      {'key': 'rows', 'value': {'intValue': '2'}}]
+
+
+def test_debug_headers_describe_the_open_request(export_path):
+    root, token = tracing.start_span('request')
+    for _ in range(2):
+        with tracing.span('splunk search'):
+            pass
+    headers = tracing.debug_headers(root)
+    tracing.end_span(root, token)
+    timing = json.loads(headers[tracing.DEBUG_HEADER])
+    assert headers['X-Trace-Id'] == root.trace.trace_id == timing['trace_id']
+    assert [(s['name'], s['depth']) for s in timing['spans']] == [('request', 0), ('splunk search', 1), ('splunk search', 1)]
+    assert timing['by_name']['splunk search']['count'] == 2
+    assert headers['Server-Timing'].startswith('total;dur=')
+    assert 'splunk_search;dur=' in headers['Server-Timing']
+    assert tracing.debug_requested(' True') and not tracing.debug_requested(None)
+
+
+def test_unsampled_traces_are_not_exported(export_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 0.0)
+    with tracing.span('request'):
+        pass
+    assert not export_path.exists()
@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import time
+import random
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import json_codec
+
+# Finished traces are appended here; set TRACE_EXPORT_PATH= (empty) to keep spans in memory only
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', os.path.join(os.path.dirname(__file__), 'traces.jsonl'))
+# jsonl: one span per line; otlp: one OTLP/JSON ExportTraceServiceRequest per trace (the OTLP file exporter format)
+TRACE_EXPORT_FORMAT = os.getenv('TRACE_EXPORT_FORMAT', 'jsonl').strip().lower()
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+TRACE_EXPORT_MAX_BYTES = int(os.getenv('TRACE_EXPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'splunk-agent-api')
+# Spans kept per trace; a runaway loop of searches shouldn't grow one trace without bound
+MAX_SPANS_PER_TRACE = 500
+DEBUG_HEADER = 'X-Debug-Timing'
+_NON_TOKEN = re.compile(r'[^\w.-]')
+
+
+class Trace:
+    """The finished spans of one request (or one background job)."""
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'dropped', '_lock')
+
+    def __init__(self, sampled: bool):
+        self.trace_id = '%032x' % random.getrandbits(128)
+        self.sampled = sampled
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: 'Span') -> None:
+        with self._lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+
+class Span:
+    __slots__ = ('name', 'trace', 'span_id', 'parent_id', 'start', 'duration', 'attributes', 'error', '_t0')
+
+    def __init__(self, name: str, trace: Trace, parent_id: str, attributes: dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration: float | None = None
+        self.attributes = attributes
+        self.error = ''
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self._t0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar('trace_span', default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def start_span(name: str, **attributes) -> tuple[Span, contextvars.Token]:
+    """Open a span under the current one (or as the root of a new trace). Pair with end_span."""
+    parent = _current.get()
+    if parent is None:
+        trace, parent_id = Trace(sampled=random.random() < TRACE_SAMPLE_RATE), ''
+    else:
+        trace, parent_id = parent.trace, parent.span_id
+    span = Span(name, trace, parent_id, attributes)
+    return span, _current.set(span)
+
+
+def end_span(span: Span, token: contextvars.Token, error: str = '') -> None:
+    span.duration = time.perf_counter() - span._t0
+    if error:
+        span.error = error
+    span.trace.add(span)
+    try:
+        _current.reset(token)
+    except ValueError:
+        pass  # ended from another context (e.g. a Flask teardown after a copied context)
+    if not span.parent_id:
+        export(span.trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """with span('splunk.search', template=...) as s: ... s.set(rows=n)"""
+    s, token = start_span(name, **attributes)
+    error = ''
+    try:
+        yield s
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        end_span(s, token, error)
+
+
+def traced(name: str | None = None):
+    """Decorator: run the function (sync or async) inside a span named name (default: its qualname)."""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attributes) -> None:
+    """Set attributes on the current span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.attributes.update(attributes)
+
+
+def debug_requested(header_value: str | None) -> bool:
+    return (header_value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def timing_breakdown(root: Span) -> dict:
+    """Per-request timing for X-Debug-Timing: the span tree (depth-first, start order) plus
+    totals per span name. The root may still be open; its elapsed time so far is used."""
+    spans = sorted(root.trace.spans, key=lambda s: s._t0)
+    children: dict[str, list[Span]] = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+    tree = []
+
+    def walk(s: Span, depth: int) -> None:
+        tree.append({
+            "name": s.name,
+            "depth": depth,
+            "offset_ms": round((s._t0 - root._t0) * 1000, 1),
+            "duration_ms": round(s.elapsed() * 1000, 1),
+            **({"attributes": s.attributes} if s.attributes else {}),
+            **({"error": s.error} if s.error else {}),
+        })
+        for child in children.get(s.span_id, []):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    totals: dict[str, dict] = {}
+    for s in spans:
+        t = totals.setdefault(s.name, {"count": 0, "total_ms": 0.0})
+        t["count"] += 1
+        t["total_ms"] = round(t["total_ms"] + s.elapsed() * 1000, 1)
+    return {"trace_id": root.trace.trace_id, "total_ms": round(root.elapsed() * 1000, 1),
+            "spans": tree, "by_name": totals, "dropped_spans": root.trace.dropped}
+
+
+def server_timing(breakdown: dict, limit: int = 20) -> str:
+    """Server-Timing header value (shown by browser dev tools) from the per-name totals."""
+    items = sorted(breakdown["by_name"].items(), key=lambda kv: -kv[1]["total_ms"])[:limit]
+    parts = [f'total;dur={breakdown["total_ms"]}']
+    parts.extend(f'{_NON_TOKEN.sub("_", name)};dur={t["total_ms"]};desc="x{t["count"]}"' for name, t in items)
+    return ', '.join(parts)
+
+
+def debug_headers(root: Span) -> dict:
+    """X-Debug-Timing (JSON breakdown), Server-Timing and X-Trace-Id for one request."""
+    breakdown = timing_breakdown(root)
+    # ASCII-escaped: header values must be latin-1
+    dump = functools.partial(json.dumps, separators=(',', ':'), default=str)
+    body = dump(breakdown)
+    if len(body) > 16384:
+        # Keep the header within common proxy limits; the exported trace has everything
+        breakdown["spans"] = breakdown["spans"][:50]
+        breakdown["truncated"] = True
+        body = dump(breakdown)
+    return {DEBUG_HEADER: body, 'Server-Timing': server_timing(breakdown), 'X-Trace-Id': root.trace.trace_id}
+
+
+def _otlp_value(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": v if isinstance(v, str) else json_codec.dumps(v, default=str)}
+
+
+def _otlp_span(s: Span) -> dict:
+    start_ns = int(s.start * 1e9)
+    out = {
+        "traceId": s.trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 2 if not s.parent_id else 1,  # SERVER for request roots, INTERNAL otherwise
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int(s.elapsed() * 1e9)),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    return out
+
+
+def otlp_request(trace: Trace) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [_otlp_span(s) for s in trace.spans]}],
+    }]}
+
+
+_export_lock = threading.Lock()
+
+
+def export(trace: Trace) -> None:
+    if not TRACE_EXPORT_PATH or not trace.sampled:
+        return
+    if TRACE_EXPORT_FORMAT == 'otlp':
+        data = json_codec.dumps_bytes(otlp_request(trace), default=str) + b'\n'
+    else:
+        data = b''.join(json_codec.dumps_bytes(s.to_dict(), default=str) + b'\n' for s in trace.spans)
+    with _export_lock:
+        try:
+            if os.path.exists(TRACE_EXPORT_PATH) and os.path.getsize(TRACE_EXPORT_PATH) + len(data) > TRACE_EXPORT_MAX_BYTES:
+                os.replace(TRACE_EXPORT_PATH, TRACE_EXPORT_PATH + '.1')
+            with open(TRACE_EXPORT_PATH, 'ab') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"Failed to export trace {trace.trace_id}: {e}")